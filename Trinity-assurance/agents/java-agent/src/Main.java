@@ -0,0 +1,47 @@
+import java.io.BufferedReader;
+import java.io.FileOutputStream;
+import java.io.FileDescriptor;
+import java.io.InputStreamReader;
+import java.io.PrintStream;
+import java.nio.charset.StandardCharsets;
+import java.util.ArrayList;
+import java.util.Arrays;
+import java.util.List;
+
+/**
+ * Long-lived test JVM for Trinity's JavaTestExecutor.
+ *
+ * Reads batches from stdin, one line per batch of whitespace-separated class names,
+ * runs each batch with {@link Runner} and writes JSON result lines to stdout,
+ * followed by {"event":"batch_done","failures":N}. Test output printed to System.out
+ * is redirected to stderr so it can't corrupt the result stream.
+ *
+ * -Dtrinity.timeout=SECONDS sets the per-test timeout (0 or unset: none).
+ */
+public class Main {
+
+    public static void main(String[] args) throws Exception {
+        PrintStream results = new PrintStream(new FileOutputStream(FileDescriptor.out), true, "UTF-8");
+        System.setOut(System.err);
+
+        Runner runner = new Runner(Double.parseDouble(System.getProperty("trinity.timeout", "0")));
+        if (args.length > 0) {
+            int failures = runner.run(Arrays.asList(args), results);
+            results.println("{\"event\":\"batch_done\",\"failures\":" + failures + "}");
+            System.exit(failures > 0 ? 1 : 0);
+        }
+
+        BufferedReader in = new BufferedReader(new InputStreamReader(System.in, StandardCharsets.UTF_8));
+        String line;
+        while ((line = in.readLine()) != null) {
+            List<String> classNames = new ArrayList<>();
+            for (String name : line.trim().split("\\s+")) {
+                if (!name.isEmpty()) {
+                    classNames.add(name);
+                }
+            }
+            int failures = classNames.isEmpty() ? 0 : runner.run(classNames, results);
+            results.println("{\"event\":\"batch_done\",\"failures\":" + failures + "}");
+        }
+    }
+}
@@ -1,3 +1,154 @@
-public class Reporter {
-    
+import java.io.PrintStream;
+import java.util.HashMap;
+import java.util.HashSet;
+import java.util.Map;
+import java.util.Set;
+
+import org.junit.platform.engine.TestExecutionResult;
+import org.junit.platform.engine.TestSource;
+import org.junit.platform.engine.support.descriptor.ClassSource;
+import org.junit.platform.engine.support.descriptor.MethodSource;
+import org.junit.platform.launcher.TestExecutionListener;
+import org.junit.platform.launcher.TestIdentifier;
+
+/**
+ * Emits one JSON line per test (and per failed container) to the given stream:
+ * {"event":"result","class":"...","name":"...","status":"passed|failed|error|skipped",
+ *  "duration":0.012,"message":"...","traceback":"..."}
+ */
+public class Reporter implements TestExecutionListener {
+
+    private final PrintStream out;
+    private final Map<String, Long> startTimes = new HashMap<>();
+    private final Set<String> classesWithTests = new HashSet<>();
+    private int failures = 0;
+
+    public Reporter(PrintStream out) {
+        this.out = out;
+    }
+
+    public int failures() {
+        return failures;
+    }
+
+    public boolean hasTests(String className) {
+        return classesWithTests.contains(className);
+    }
+
+    @Override
+    public void executionStarted(TestIdentifier id) {
+        startTimes.put(id.getUniqueId(), System.nanoTime());
+        if (id.isTest()) {
+            classesWithTests.add(className(id));
+            out.println("{\"event\":\"start\",\"class\":" + json(className(id)) + ",\"name\":" + json(testName(id)) + "}");
+            out.flush();
+        }
+    }
+
+    @Override
+    public void executionSkipped(TestIdentifier id, String reason) {
+        if (id.isTest()) {
+            classesWithTests.add(className(id));
+            emit(className(id), testName(id), "skipped", 0.0, reason == null ? "" : reason, "");
+        }
+    }
+
+    @Override
+    public void executionFinished(TestIdentifier id, TestExecutionResult result) {
+        Long started = startTimes.remove(id.getUniqueId());
+        double duration = started == null ? 0.0 : (System.nanoTime() - started) / 1e9;
+        Throwable error = result.getThrowable().orElse(null);
+
+        String status;
+        switch (result.getStatus()) {
+            case SUCCESSFUL:
+                status = "passed";
+                break;
+            case ABORTED:
+                status = "skipped";
+                break;
+            default:
+                status = error instanceof AssertionError ? "failed" : "error";
+        }
+
+        if (id.isTest()) {
+            if (!"passed".equals(status) && !"skipped".equals(status)) {
+                failures++;
+            }
+            emit(className(id), testName(id), status, duration, message(error), traceback(error));
+        } else if (result.getStatus() == TestExecutionResult.Status.FAILED && className(id) != null) {
+            // Class-level failure (e.g. @BeforeAll or static init threw)
+            failures++;
+            emit(className(id), "<class>", "error", duration, message(error), traceback(error));
+        }
+    }
+
+    public void emit(String className, String name, String status, double duration, String message, String traceback) {
+        out.println("{\"event\":\"result\",\"class\":" + json(className)
+                + ",\"name\":" + json(name)
+                + ",\"status\":" + json(status)
+                + ",\"duration\":" + String.format(java.util.Locale.ROOT, "%.6f", duration)
+                + ",\"message\":" + json(message)
+                + ",\"traceback\":" + json(traceback) + "}");
+        out.flush();
+    }
+
+    private static String className(TestIdentifier id) {
+        TestSource source = id.getSource().orElse(null);
+        if (source instanceof MethodSource) {
+            return ((MethodSource) source).getClassName();
+        }
+        if (source instanceof ClassSource) {
+            return ((ClassSource) source).getClassName();
+        }
+        return null;
+    }
+
+    private static String testName(TestIdentifier id) {
+        TestSource source = id.getSource().orElse(null);
+        if (source instanceof MethodSource) {
+            return ((MethodSource) source).getMethodName();
+        }
+        return id.getDisplayName();
+    }
+
+    private static String message(Throwable error) {
+        if (error == null) {
+            return "";
+        }
+        return error.getClass().getName() + (error.getMessage() == null ? "" : ": " + error.getMessage());
+    }
+
+    static String traceback(Throwable error) {
+        if (error == null) {
+            return "";
+        }
+        java.io.StringWriter writer = new java.io.StringWriter();
+        error.printStackTrace(new java.io.PrintWriter(writer));
+        return writer.toString();
+    }
+
+    static String json(String value) {
+        if (value == null) {
+            return "null";
+        }
+        StringBuilder sb = new StringBuilder("\"");
+        for (int i = 0; i < value.length(); i++) {
+            char c = value.charAt(i);
+            switch (c) {
+                case '"': sb.append("\\\""); break;
+                case '\\': sb.append("\\\\"); break;
+                case '\n': sb.append("\\n"); break;
+                case '\r': sb.append("\\r"); break;
+                case '\t': sb.append("\\t"); break;
+                default:
+                    if (c < 0x20) {
+                        sb.append(String.format("\\u%04x", (int) c));
+                    } else {
+                        sb.append(c);
+                    }
+            }
+        }
+        return sb.append('"').toString();
+    }
 }
@@ -1,3 +1,108 @@
+import static org.junit.platform.engine.discovery.DiscoverySelectors.selectClass;
+
+import java.io.PrintStream;
+import java.lang.reflect.Method;
+import java.lang.reflect.Modifier;
+import java.util.List;
+import java.util.concurrent.ExecutionException;
+import java.util.concurrent.ExecutorService;
+import java.util.concurrent.Executors;
+import java.util.concurrent.Future;
+import java.util.concurrent.TimeUnit;
+import java.util.concurrent.TimeoutException;
+
+import org.junit.platform.launcher.Launcher;
+import org.junit.platform.launcher.LauncherDiscoveryRequest;
+import org.junit.platform.launcher.core.LauncherDiscoveryRequestBuilder;
+import org.junit.platform.launcher.core.LauncherFactory;
+
+/**
+ * Runs a batch of test classes inside the current JVM through the JUnit Platform launcher.
+ * Classes without any JUnit tests but with a main(String[]) are run as a single "main" test,
+ * matching how plain generated classes were executed before.
+ *
+ * With a timeout, Jupiter fails any test running longer (preemptively, in a separate
+ * thread) and main() runs are abandoned after the same time.
+ */
 public class Runner {
-    
+
+    private final Launcher launcher = LauncherFactory.create();
+    private final long timeoutMillis;
+    private final ExecutorService mains = Executors.newCachedThreadPool(task -> {
+        Thread thread = new Thread(task, "trinity-main");
+        thread.setDaemon(true);
+        return thread;
+    });
+
+    public Runner(double timeoutSeconds) {
+        this.timeoutMillis = Math.max(0L, Math.round(timeoutSeconds * 1000));
+    }
+
+    public int run(List<String> classNames, PrintStream out) {
+        Reporter reporter = new Reporter(out);
+        LauncherDiscoveryRequestBuilder builder = LauncherDiscoveryRequestBuilder.request();
+        for (String name : classNames) {
+            builder.selectors(selectClass(name));
+        }
+        if (timeoutMillis > 0) {
+            builder.configurationParameter("junit.jupiter.execution.timeout.default", timeoutMillis + " ms");
+            builder.configurationParameter("junit.jupiter.execution.timeout.thread.mode.default", "SEPARATE_THREAD");
+        }
+        LauncherDiscoveryRequest request = builder.build();
+        launcher.execute(request, reporter);
+
+        int failures = reporter.failures();
+        for (String name : classNames) {
+            if (!reporter.hasTests(name) && !runMain(name, reporter)) {
+                failures++;
+            }
+        }
+        return failures;
+    }
+
+    private boolean runMain(String className, Reporter reporter) {
+        long started = System.nanoTime();
+        try {
+            Class<?> cls = Class.forName(className);
+            Method main = cls.getMethod("main", String[].class);
+            if (!Modifier.isStatic(main.getModifiers())) {
+                return true;
+            }
+            invokeMain(main);
+            reporter.emit(className, "main", "passed", (System.nanoTime() - started) / 1e9, "", "");
+            return true;
+        } catch (NoSuchMethodException e) {
+            return true;  // nothing runnable in this class
+        } catch (TimeoutException e) {
+            reporter.emit(className, "main", "error", (System.nanoTime() - started) / 1e9,
+                    "main() timed out after " + timeoutMillis + " ms", "");
+            return false;
+        } catch (Throwable e) {
+            Throwable cause = e instanceof java.lang.reflect.InvocationTargetException ? e.getCause() : e;
+            String status = cause instanceof AssertionError ? "failed" : "error";
+            reporter.emit(className, "main", status, (System.nanoTime() - started) / 1e9,
+                    cause.getClass().getName() + (cause.getMessage() == null ? "" : ": " + cause.getMessage()),
+                    Reporter.traceback(cause));
+            return false;
+        }
+    }
+
+    private void invokeMain(Method main) throws Throwable {
+        if (timeoutMillis <= 0) {
+            main.invoke(null, (Object) new String[0]);
+            return;
+        }
+        Future<?> run = mains.submit(() -> {
+            main.invoke(null, (Object) new String[0]);
+            return null;
+        });
+        try {
+            run.get(timeoutMillis, TimeUnit.MILLISECONDS);
+        } catch (ExecutionException e) {
+            throw e.getCause();
+        } catch (TimeoutException e) {
+            run.cancel(true);
+            throw e;
+        }
+    }
 }
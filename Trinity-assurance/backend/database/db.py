@@ -0,0 +1,185 @@
+# backend/database/db.py
+
+import os
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+DB_PATH = os.getenv("TRINITY_DB_PATH", os.path.join("tests", ".history", "trinity.db"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    repo        TEXT    NOT NULL,
+    file        TEXT    NOT NULL,
+    language    TEXT    NOT NULL DEFAULT '',
+    test_type   TEXT    NOT NULL DEFAULT 'auto',
+    output_path TEXT    NOT NULL DEFAULT '',
+    created_at  REAL    NOT NULL,
+    output_sha  TEXT,
+    output_size INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_history_repo_time ON history (repo, created_at);
+CREATE INDEX IF NOT EXISTS idx_history_repo_file ON history (repo, file);
+CREATE INDEX IF NOT EXISTS idx_history_repo_lang ON history (repo, language, created_at);
+
+-- Test bodies are stored out of line (zlib, deduplicated by sha256) so listing
+-- history never has to read them.
+CREATE TABLE IF NOT EXISTS history_blobs (
+    sha  TEXT PRIMARY KEY,
+    body BLOB NOT NULL
+);
+"""
+
+# Applied in order on top of SCHEMA; PRAGMA user_version records how many have run.
+MIGRATIONS = [
+    # 1: run results saved through the old test_history_manager API
+    "ALTER TABLE history ADD COLUMN result TEXT",
+    # 2: legacy JSON files already imported by migrate_legacy_history
+    """
+    CREATE TABLE IF NOT EXISTS legacy_imports (
+        path        TEXT PRIMARY KEY,
+        records     INTEGER NOT NULL,
+        imported_at REAL    NOT NULL
+    )
+    """,
+    # 3-6: structured test runs and compact per-test results
+    """
+    CREATE TABLE IF NOT EXISTS test_runs (
+        id          INTEGER PRIMARY KEY AUTOINCREMENT,
+        repo        TEXT    NOT NULL,
+        language    TEXT    NOT NULL,
+        test_type   TEXT    NOT NULL,
+        started_at  REAL    NOT NULL,
+        finished_at REAL,
+        passed      INTEGER NOT NULL DEFAULT 0,
+        failed      INTEGER NOT NULL DEFAULT 0,
+        errors      INTEGER NOT NULL DEFAULT 0,
+        skipped     INTEGER NOT NULL DEFAULT 0,
+        duration    REAL    NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS test_results (
+        run_id    INTEGER NOT NULL REFERENCES test_runs (id),
+        nodeid    TEXT    NOT NULL,
+        file      TEXT    NOT NULL,
+        status    TEXT    NOT NULL,
+        duration  REAL    NOT NULL DEFAULT 0,
+        message   TEXT    NOT NULL DEFAULT '',
+        traceback BLOB
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_test_runs_repo ON test_runs (repo, id)",
+    "CREATE INDEX IF NOT EXISTS idx_test_results_run ON test_results (run_id, status)",
+    # 7-8: commit each generation run was based on (drives incremental generation)
+    """
+    CREATE TABLE IF NOT EXISTS generation_runs (
+        id          INTEGER PRIMARY KEY AUTOINCREMENT,
+        repo        TEXT    NOT NULL,
+        language    TEXT    NOT NULL,
+        test_type   TEXT    NOT NULL,
+        commit_sha  TEXT    NOT NULL,
+        base_sha    TEXT,
+        files       INTEGER NOT NULL DEFAULT 0,
+        created_at  REAL    NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_generation_runs_repo ON generation_runs (repo, language, test_type, id)",
+    # 9: per-test-file timing and failure history (drives sharding and fail-fast ordering)
+    """
+    CREATE TABLE IF NOT EXISTS test_file_stats (
+        repo           TEXT    NOT NULL,
+        language       TEXT    NOT NULL,
+        file           TEXT    NOT NULL,
+        runs           INTEGER NOT NULL DEFAULT 0,
+        avg_duration   REAL    NOT NULL DEFAULT 0,
+        failure_rate   REAL    NOT NULL DEFAULT 0,
+        last_duration  REAL    NOT NULL DEFAULT 0,
+        last_failed_at REAL    NOT NULL DEFAULT 0,
+        last_run_at    REAL    NOT NULL,
+        PRIMARY KEY (repo, language, file)
+    )
+    """,
+]
+
+
+class Database:
+    """
+    SQLite store in WAL mode: readers never block the writer and appends are O(1).
+    Connections are per thread; use `transaction()` to group writes into one commit.
+    """
+
+    def __init__(self, path: str = DB_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+            self._ensure_schema(conn)
+        return conn
+
+    def _ensure_schema(self, conn: sqlite3.Connection) -> None:
+        with self._schema_lock:
+            if self._schema_ready:
+                return
+            conn.executescript(SCHEMA)
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for index, statement in enumerate(MIGRATIONS[version:], start=version + 1):
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    conn.execute(statement)
+                    conn.execute(f"PRAGMA user_version = {index}")
+                    conn.execute("COMMIT")
+                except sqlite3.OperationalError:
+                    conn.execute("ROLLBACK")
+                    # Another process may have applied it first
+                    if conn.execute("PRAGMA user_version").fetchone()[0] < index:
+                        raise
+                logger.info(f"[DB] Applied migration {index}")
+            self._schema_ready = True
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """BEGIN IMMEDIATE … COMMIT; nested calls join the outer transaction."""
+        conn = self.connection()
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+
+_databases: Dict[str, Database] = {}
+_databases_lock = threading.Lock()
+
+
+def get_db(path: str = DB_PATH) -> Database:
+    """Process-wide Database per file path."""
+    key = os.path.abspath(path)
+    with _databases_lock:
+        if key not in _databases:
+            _databases[key] = Database(path)
+        return _databases[key]
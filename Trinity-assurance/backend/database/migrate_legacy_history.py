@@ -0,0 +1,135 @@
+# backend/database/migrate_legacy_history.py
+"""
+One-shot import of the three legacy history layouts into the SQLite store:
+
+  1. tests/.history/<repo>.json        list of records   (old TestHistory.save)
+  2. tests/_history/<repo>/<ts>.json   one run per file  (old test_history_manager)
+  3. tests/.history/<repo>/*.json      one record per file (read by old routers/history.py)
+
+Each imported file is recorded in `legacy_imports`, so re-running is a no-op.
+
+Usage: python -m backend.database.migrate_legacy_history [--base-dir tests] [--archive]
+"""
+import os
+import json
+import time
+import argparse
+import logging
+from datetime import datetime
+from typing import Dict, Iterator, List, Tuple
+
+from backend.services.history_manager import TestHistory
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def _load_json(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _legacy_files(base_dir: str) -> Iterator[Tuple[str, str, str]]:
+    """Yield (layout, repo, path) for every legacy JSON file under base_dir."""
+    flat_dir = os.path.join(base_dir, ".history")
+    if os.path.isdir(flat_dir):
+        for entry in sorted(os.scandir(flat_dir), key=lambda e: e.name):
+            if entry.is_file() and entry.name.endswith(".json"):
+                yield "flat", entry.name[:-len(".json")], entry.path
+            elif entry.is_dir():
+                for name in sorted(os.listdir(entry.path)):
+                    if name.endswith(".json"):
+                        yield "per_record", entry.name, os.path.join(entry.path, name)
+
+    runs_dir = os.path.join(base_dir, "_history")
+    if os.path.isdir(runs_dir):
+        for repo in sorted(os.listdir(runs_dir)):
+            repo_dir = os.path.join(runs_dir, repo)
+            if os.path.isdir(repo_dir):
+                for name in sorted(os.listdir(repo_dir)):
+                    if name.endswith(".json"):
+                        yield "run", repo, os.path.join(repo_dir, name)
+
+
+def _records(layout: str, repo: str, path: str) -> List[Dict]:
+    data = _load_json(path)
+    mtime = os.path.getmtime(path)
+
+    if layout == "flat":
+        return [
+            {**r, "created_at": mtime} for r in (data if isinstance(data, list) else [])
+            if isinstance(r, dict)
+        ]
+    if layout == "per_record":
+        return [{**data, "created_at": mtime}] if isinstance(data, dict) else []
+
+    # layout == "run"
+    try:
+        created_at = datetime.strptime(data.get("timestamp", ""), "%Y%m%d_%H%M%S").timestamp()
+    except ValueError:
+        created_at = mtime
+    result = data.get("result") or {}
+    return [{
+        "file": result.get("file", "*"),
+        "language": result.get("language", ""),
+        "test_type": result.get("test_type", "auto"),
+        "output_path": result.get("output_path", ""),
+        "ai_output": data.get("test_code", ""),
+        "result": result,
+        "created_at": created_at,
+    }]
+
+
+def migrate(base_dir: str = "tests", archive: bool = False) -> Dict[str, int]:
+    history = TestHistory(base_dir=base_dir)
+    conn = history.db.connection()
+    stats = {"files": 0, "records": 0, "skipped": 0, "failed": 0}
+
+    for layout, repo, path in _legacy_files(base_dir):
+        key = os.path.abspath(path)
+        if conn.execute("SELECT 1 FROM legacy_imports WHERE path = ?", (key,)).fetchone():
+            stats["skipped"] += 1
+            continue
+
+        try:
+            records = _records(layout, repo, path)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"[Migrate] ❌ Could not read {path}: {e}")
+            stats["failed"] += 1
+            continue
+
+        with history.db.transaction() as tx, history.batch():
+            for r in records:
+                history.save(
+                    repo=repo,
+                    file=r.get("file", ""),
+                    language=r.get("language", ""),
+                    test_type=r.get("test_type", "auto"),
+                    output_path=r.get("output_path", ""),
+                    ai_output=r.get("ai_output", ""),
+                    result=r.get("result"),
+                    created_at=r["created_at"],
+                )
+            tx.execute(
+                "INSERT INTO legacy_imports (path, records, imported_at) VALUES (?, ?, ?)",
+                (key, len(records), time.time()),
+            )
+
+        if archive:
+            os.replace(path, f"{path}.migrated")
+
+        stats["files"] += 1
+        stats["records"] += len(records)
+        logger.info(f"[Migrate] ✅ {layout}: {path} → {len(records)} records")
+
+    return stats
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="📦 Import legacy Trinity history files into SQLite")
+    parser.add_argument("--base-dir", type=str, default="tests", help="Folder holding .history/ and _history/")
+    parser.add_argument("--archive", action="store_true", help="Rename imported files to *.migrated")
+
+    args = parser.parse_args()
+    print(migrate(args.base_dir, args.archive))
@@ -1,9 +1,45 @@
-from fastapi import FastAPI
+import os
+import time
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from backend.routers import tests, history, download, license
+from fastapi.responses import PlainTextResponse
+from backend.routers import tests, history, download, license, dashboard, ci
+from backend.utils.metrics import (
+    HTTP_REQUESTS,
+    HTTP_SECONDS,
+    REGISTRY,
+    TRACE_HEADER,
+    install_trace_logging,
+    new_trace_id,
+    trace_id_var,
+)
+
+# Every log record carries the request's trace id; TRINITY_LOG_FORMAT=trace also prints it
+install_trace_logging(
+    "%(asctime)s %(levelname)s [%(trace_id)s] %(name)s: %(message)s"
+    if os.getenv("TRINITY_LOG_FORMAT") == "trace" else None
+)
 
 app = FastAPI(title="Trinity Assurance")
 
+
+@app.middleware("http")
+async def trace_and_measure(request: Request, call_next):
+    token = trace_id_var.set(new_trace_id(request.headers.get(TRACE_HEADER)))
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        response.headers[TRACE_HEADER] = trace_id_var.get()
+        return response
+    finally:
+        # Label by route template, not raw path, to keep label cardinality bounded
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        HTTP_SECONDS.observe(time.perf_counter() - started, method=request.method, route=route)
+        HTTP_REQUESTS.inc(method=request.method, route=route, status=str(status))
+        trace_id_var.reset(token)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -18,6 +54,13 @@ app.include_router(tests.router, prefix="/tests", tags=["Test Generation"])
 app.include_router(history.router, prefix="/history", tags=["Test History"])
 app.include_router(download.router, prefix="/download", tags=["Download"])
 app.include_router(license.router, prefix="/license", tags=["License"])
+app.include_router(dashboard.router, prefix="/dashboard", tags=["Dashboard"])
+app.include_router(ci.router, prefix="/ci", tags=["CI"])
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 
 @app.get("/")
 def root():
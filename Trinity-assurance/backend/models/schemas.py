@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, HttpUrl, constr
-from typing import Optional, Literal
+from typing import Optional, Literal, Dict, List
 from enum import Enum
 
 class Language(str, Enum):
@@ -25,6 +25,12 @@ class TestGenerationRequest(BaseModel):
     )
     dry_run: Optional[bool] = Field(default=False, description="If True, test code will not be saved")
     test_type: TestType = Field(default=TestType.auto)
+    incremental: bool = Field(
+        default=False, description="Only regenerate tests for files changed since base_ref / the last generation"
+    )
+    base_ref: Optional[constr(pattern=r'^([a-zA-Z0-9_][a-zA-Z0-9_\-\/\.~^]*)?$')] = Field(
+        None, description="Commit, tag or branch to diff against in incremental mode"
+    )
     license_token: str = Field(..., description="License key/token to authenticate access")
 
 # 📤 Response model: AI Test Generator Output
@@ -32,13 +38,71 @@ class TestGenerationResponse(BaseModel):
     status: Literal["success", "error"]
     generated_test_code: str
 
+# 📤 Response model: Background generation job
+class JobSubmitResponse(BaseModel):
+    job_id: str
+    status: Literal["queued", "running", "succeeded", "failed"]
+    deduplicated: bool = Field(default=False, description="True if an identical in-flight or recent job was reused")
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    kind: str
+    status: Literal["queued", "running", "succeeded", "failed"]
+    progress: Dict[str, int]
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    attached: int = 0
+    generated_test_code: Optional[str] = None
+
 # 📥 Request model: Test Runner Trigger
 class TestRunRequest(BaseModel):
     language: Language
     test_type: TestType = Field(default=TestType.auto)
+    repo: Optional[constr(pattern=r'^([a-zA-Z0-9_\-\.]*[a-zA-Z0-9_\-][a-zA-Z0-9_\-\.]*)?$')] = Field(
+        None, description="Run only tests/<repo>/ (defaults to all of tests/; '.' and '..' are refused)"
+    )
+    workers: Optional[int] = Field(
+        None, ge=1, le=256, description="Parallel worker processes (default and maximum: CPU count)"
+    )
+    timeout: Optional[float] = Field(None, gt=0, description="Per-test timeout in seconds")
+    mode: Literal["all", "affected"] = Field(
+        default="all", description="'affected' runs only tests that import files changed since base_ref"
+    )
+    base_ref: Optional[constr(pattern=r'^([a-zA-Z0-9_][a-zA-Z0-9_\-\/\.~^]*)?$')] = Field(
+        None, description="Commit to diff against in affected mode (default: HEAD~1)"
+    )
+    shard_index: int = Field(default=1, ge=1, description="1-based shard to run (CI node index)")
+    shard_count: int = Field(default=1, ge=1, le=1024, description="Total shards, balanced by recorded timings")
+
+# 📥 Request model: Self-healing of a failing generated suite
+class HealRequest(BaseModel):
+    language: Language
+    repo: constr(pattern=r'^([a-zA-Z0-9_\-\.]*[a-zA-Z0-9_\-][a-zA-Z0-9_\-\.]*)$') = Field(
+        ..., description="Heal tests/<repo>/ against repos/<repo>/ (a single folder name, not '.' or '..')"
+    )
+    test_type: TestType = Field(default=TestType.auto)
+    run_id: Optional[int] = Field(None, description="Heal the failures of this recorded run (default: run the suite first)")
+    max_clusters: int = Field(default=20, ge=1, le=500, description="Repair at most this many failure clusters")
+    workers: Optional[int] = Field(None, ge=1, le=256, description="Parallel worker processes for (re-)runs")
+    dry_run: bool = Field(default=False, description="Report the patches without writing them or re-running")
+
+# 📤 Per-test result record
+class TestCaseResult(BaseModel):
+    nodeid: str
+    file: str
+    name: str
+    status: Literal["passed", "failed", "error", "skipped"]
+    duration: float = 0.0
+    message: str = ""
+    traceback: str = ""
 
 # 📤 Response model: Test Runner Output
 class TestRunResponse(BaseModel):
     status: Literal["success", "error"]
     output: str
-    error: Optional[str] = None
\ No newline at end of file
+    error: Optional[str] = None
+    results: List[TestCaseResult] = Field(default_factory=list)
+    summary: Dict[str, float] = Field(default_factory=dict)
+    run_id: Optional[int] = None
\ No newline at end of file
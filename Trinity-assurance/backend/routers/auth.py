@@ -0,0 +1,150 @@
+# backend/routers/auth.py
+
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException, Request
+
+from backend.utils.license_checker import License, verify_license
+from backend.utils.metrics import LICENSE_CHECKS
+from backend.utils.rate_limiter import TokenBucket
+
+LICENSE_HEADER = "X-License-Token"
+
+# Per-license limits by scope: requests/minute (burst = one minute's worth) and
+# requests/day. 0 disables a limit. Counters are per process.
+SCOPE_LIMITS: Dict[str, Tuple[int, int]] = {
+    "verify": (
+        int(os.getenv("TRINITY_LICENSE_VERIFY_RPM", "600")),
+        int(os.getenv("TRINITY_LICENSE_VERIFY_DAILY", "0")),
+    ),
+    "generate": (
+        int(os.getenv("TRINITY_LICENSE_GENERATE_RPM", "10")),
+        int(os.getenv("TRINITY_LICENSE_GENERATE_DAILY", "0")),
+    ),
+    "ingest": (
+        int(os.getenv("TRINITY_LICENSE_INGEST_RPM", "60")),
+        int(os.getenv("TRINITY_LICENSE_INGEST_DAILY", "0")),
+    ),
+}
+MAX_TRACKED_LICENSES = int(os.getenv("TRINITY_LICENSE_TRACKED", "10000"))
+
+INVALID_DETAIL = "❌ Invalid or expired license token"
+
+
+class LicenseUsage:
+    """
+    Request counters per (license, scope): a token bucket for the per-minute rate and
+    a calendar-day (UTC) counter for the quota. Least recently seen licenses are
+    dropped beyond `max_licenses`.
+    """
+
+    def __init__(self, limits: Dict[str, Tuple[int, int]] = SCOPE_LIMITS, max_licenses: int = MAX_TRACKED_LICENSES):
+        self.limits = limits
+        self.max_licenses = max_licenses
+        self._usage: "OrderedDict[Tuple[str, str], Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _entry(self, user_id: str, scope: str) -> Dict:
+        key = (user_id, scope)
+        entry = self._usage.get(key)
+        if entry is None:
+            rpm = self.limits.get(scope, (0, 0))[0]
+            entry = {"bucket": TokenBucket(rpm) if rpm else None, "day": "", "today": 0, "total": 0}
+            self._usage[key] = entry
+            while len(self._usage) > self.max_licenses:
+                self._usage.popitem(last=False)
+        self._usage.move_to_end(key)
+        return entry
+
+    def check(self, user_id: str, scope: str) -> Optional[Tuple[str, float]]:
+        """Count one request; returns (reason, retry_after seconds) if it must be refused."""
+        daily = self.limits.get(scope, (0, 0))[1]
+        day = time.strftime("%Y-%m-%d", time.gmtime())
+        with self._lock:
+            entry = self._entry(user_id, scope)
+            if entry["day"] != day:
+                entry["day"], entry["today"] = day, 0
+            if daily and entry["today"] >= daily:
+                return "quota_exceeded", 86400 - time.time() % 86400
+            wait = entry["bucket"].try_acquire() if entry["bucket"] else 0.0
+            if wait:
+                return "rate_limited", wait
+            entry["today"] += 1
+            entry["total"] += 1
+        return None
+
+    def snapshot(self, user_id: str) -> Dict[str, Dict]:
+        with self._lock:
+            return {
+                scope: {"today": entry["today"], "total": entry["total"], "daily_quota": self.limits.get(scope, (0, 0))[1]}
+                for (user, scope), entry in self._usage.items() if user == user_id
+            }
+
+
+license_usage = LicenseUsage()
+
+
+async def license_token_from(request: Request, body: bool = True) -> Optional[str]:
+    """Token from X-License-Token, `Authorization: Bearer`, or (if `body`) a JSON body's license_token."""
+    token = request.headers.get(LICENSE_HEADER)
+    if token:
+        return token
+    scheme, _, credentials = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and credentials:
+        return credentials.strip()
+    if body and request.headers.get("content-type", "").startswith("application/json"):
+        try:
+            # Starlette caches the body on the request, so the route can still parse it
+            body = json.loads(await request.body() or b"{}")
+        except ValueError:
+            return None
+        if isinstance(body, dict) and isinstance(body.get("license_token"), str):
+            return body["license_token"]
+    return None
+
+
+class LicenseGuard:
+    """
+    FastAPI dependency: verifies the caller's license through the shared verification
+    cache and enforces that license's limits for `scope`. Returns the License.
+
+        @router.post("/generate")
+        def generate(..., license: License = Depends(LicenseGuard("generate"))):
+
+    Streaming endpoints pass `body=False` so the guard never buffers the request body.
+    """
+
+    def __init__(self, scope: str, usage: LicenseUsage = license_usage, body: bool = True):
+        self.scope = scope
+        self.usage = usage
+        self.body = body
+
+    async def __call__(self, request: Request) -> License:
+        token = await license_token_from(request, self.body)
+        verified = verify_license(token) if token else None
+        if verified is None:
+            LICENSE_CHECKS.inc(scope=self.scope, outcome="invalid")
+            raise HTTPException(status_code=401, detail=INVALID_DETAIL)
+
+        refused = self.usage.check(verified.user_id, self.scope)
+        if refused:
+            reason, retry_after = refused
+            LICENSE_CHECKS.inc(scope=self.scope, outcome=reason)
+            detail = (
+                f"🚦 Daily {self.scope} quota exhausted for this license" if reason == "quota_exceeded"
+                else f"🚦 Too many {self.scope} requests for this license; retry later"
+            )
+            raise HTTPException(status_code=429, detail=detail, headers={"Retry-After": str(max(1, int(retry_after + 0.999)))})
+
+        LICENSE_CHECKS.inc(scope=self.scope, outcome="ok")
+        return verified
+
+
+require_verify = LicenseGuard("verify")
+require_generate = LicenseGuard("generate")
+require_ingest = LicenseGuard("ingest", body=False)
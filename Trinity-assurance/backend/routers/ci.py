@@ -0,0 +1,96 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from backend.models.schemas import Language
+from backend.routers.auth import require_ingest
+from backend.services.ci_parser import FORMATS, ingest_log
+from backend.utils.license_checker import License
+from typing import Dict, Iterator, Optional
+import os
+import queue
+import asyncio
+import logging
+import threading
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+MAX_UPLOAD_BYTES = int(os.getenv("TRINITY_CI_MAX_BYTES", str(2 * 1024 ** 3)))
+# Chunks buffered between the upload and the parser thread (backpressure beyond that)
+QUEUE_CHUNKS = 16
+
+
+def _queued_chunks(chunks: "queue.Queue[Optional[bytes]]") -> Iterator[bytes]:
+    while True:
+        chunk = chunks.get()
+        if chunk is None:
+            return
+        yield chunk
+
+
+def _ingest(chunks: "queue.Queue[Optional[bytes]]", stopped: threading.Event, *args) -> Dict:
+    try:
+        return ingest_log(_queued_chunks(chunks), *args)
+    finally:
+        stopped.set()
+
+
+def _put(chunks: "queue.Queue[Optional[bytes]]", chunk: Optional[bytes], stopped: threading.Event) -> bool:
+    """Blocking put that gives up once the parser has stopped consuming."""
+    while not stopped.is_set():
+        try:
+            chunks.put(chunk, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+@router.post("/ingest")
+async def ingest_ci_log(
+    request: Request,
+    repo: str = Query(..., pattern=r"^[a-zA-Z0-9_\-\.]+$", description="Record the results under this repo"),
+    language: Language = Query(..., description="Language of the suite that produced the log"),
+    test_type: str = Query("ci", pattern=r"^[a-zA-Z0-9_\-]+$"),
+    format: str = Query("auto", description=f"One of {', '.join(FORMATS)}"),
+    license: License = Depends(require_ingest),
+):
+    """
+    Ingest a CI log or JUnit XML report sent as the raw request body (chunked
+    transfer and gzip welcome). The body is parsed while it streams in, in a worker
+    thread fed through a small bounded queue, so memory stays flat for any log size.
+    """
+    if format not in FORMATS:
+        raise HTTPException(status_code=422, detail=f"format must be one of {', '.join(FORMATS)}")
+
+    chunks: "queue.Queue[Optional[bytes]]" = queue.Queue(maxsize=QUEUE_CHUNKS)
+    stopped = threading.Event()
+    parser = asyncio.ensure_future(asyncio.to_thread(_ingest, chunks, stopped, repo, language, test_type, format))
+    received = 0
+    too_large = False
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > MAX_UPLOAD_BYTES:
+                too_large = True
+                break
+            if not chunk:
+                continue
+            try:
+                chunks.put_nowait(chunk)
+            except queue.Full:  # parser is behind: wait off the event loop
+                if not await asyncio.to_thread(_put, chunks, chunk, stopped):
+                    break
+    finally:
+        await asyncio.to_thread(_put, chunks, None, stopped)
+
+    try:
+        result = await parser
+    except Exception as e:
+        logger.error(f"[CI] ❌ Ingestion failed for {repo}: {e}")
+        raise HTTPException(status_code=500, detail=f"CI ingestion failed: {str(e)}")
+    if too_large:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Upload exceeds {MAX_UPLOAD_BYTES} bytes; results up to the limit were kept in run {result['run_id']}",
+        )
+    return {"repo": repo, **result}
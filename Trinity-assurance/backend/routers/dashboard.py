@@ -0,0 +1,31 @@
+from fastapi import APIRouter, HTTPException
+import logging
+
+from backend.services.history_manager import TestHistory, history_cache
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+@router.get("/")
+def get_dashboard():
+    """
+    Per-repo history summaries for every repo with recorded history.
+    """
+    history = TestHistory()
+    return {
+        "repos": [history.summary(repo) for repo in history.repos()],
+        "cache": {"hits": history_cache.hits, "misses": history_cache.misses},
+    }
+
+
+@router.get("/{repo_name}")
+def get_repo_dashboard(repo_name: str):
+    """
+    History summary for one repo (counts by language / test type, last update).
+    """
+    summary = TestHistory().summary(repo_name)
+    if not summary["total"]:
+        raise HTTPException(status_code=404, detail=f"No history found for repo '{repo_name}'.")
+    return summary
@@ -1,26 +1,68 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse
-import os
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from backend.services.packager import packager
+from backend.utils.git_ops import suite_folder
+import re
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-@router.get("/download/{repo_name}", response_class=FileResponse)
-def download_zip(repo_name: str):
+RANGE_HEADER = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def archive_response(request: Request, folder: str, filename: str) -> Response:
+    """
+    Stream a ZIP of `folder` from the packager cache.
+    Supports If-None-Match (304), single byte ranges (206/416) and If-Range.
+    """
+    try:
+        layout = packager.layout(folder)
+    except ValueError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    etag = f'"{layout.etag}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, no-cache",
+        "Content-Disposition": f'attachment; filename="{filename}"',
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    start, end, status = 0, layout.size - 1, 200
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    match = RANGE_HEADER.match(range_header.strip()) if range_header else None
+    if match and (not if_range or if_range == etag) and (match.group(1) or match.group(2)):
+        first, last = match.group(1), match.group(2)
+        if first:
+            start, end = int(first), min(int(last), layout.size - 1) if last else layout.size - 1
+        else:
+            start = max(0, layout.size - int(last))
+        if start > end or start >= layout.size:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{layout.size}"})
+        status = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{layout.size}"
+
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        layout.iter_bytes(start, end), status_code=status, media_type="application/zip", headers=headers
+    )
+
+
+@router.get("/download/{repo_name}")
+def download_zip(request: Request, repo_name: str):
     """
     📦 Download the generated test suite as a ZIP file for a specific repo.
     """
-    zip_path = os.path.join("tests", repo_name, f"{repo_name}.zip")
-
-    if not os.path.exists(zip_path):
-        logger.error(f"[Download] ❌ ZIP file not found at: {zip_path}")
-        raise HTTPException(status_code=404, detail="ZIP file not found.")
-
-    logger.info(f"[Download] ✅ Sending ZIP: {zip_path}")
-    return FileResponse(
-        path=zip_path,
-        filename=f"{repo_name}_tests.zip",
-        media_type="application/zip"
-    )
\ No newline at end of file
+    folder = suite_folder(repo_name)
+
+    if folder is None:
+        logger.error(f"[Download] ❌ Test folder not found for: {repo_name}")
+        raise HTTPException(status_code=404, detail="Test folder not found.")
+
+    logger.info(f"[Download] ✅ Streaming ZIP for: {folder}")
+    return archive_response(request, folder, f"{repo_name}_tests.zip")
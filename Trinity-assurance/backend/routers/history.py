@@ -1,45 +1,109 @@
-from fastapi import APIRouter, HTTPException, Path
+from fastapi import APIRouter, HTTPException, Path, Query, Request, Response
 from fastapi.responses import JSONResponse
-import os
-import json
+from datetime import datetime
+from typing import Optional
+import hashlib
 import logging
 
+from backend.services.history_manager import TestHistory, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from backend.utils.metrics import stage_timer
+
 router = APIRouter()
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-HISTORY_BASE_DIR = "tests/.history"
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    If-None-Match check: "*" or any listed entity tag equal to `etag`
+    (weak comparison, so W/"x" and "x" are the same tag).
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if (candidate[2:] if candidate.startswith("W/") else candidate) == opaque:
+            return True
+    return False
+
+
+def history_page(
+    request: Request,
+    repo_name: str,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    language: Optional[str] = None,
+    test_type: Optional[str] = None,
+    file_prefix: Optional[str] = None,
+    file: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    fields: Optional[str] = None,
+    include_output: bool = False,
+) -> Response:
+    """
+    Shared handler for paginated history reads with ETag / If-None-Match support.
+    The ETag covers the repo's history version plus the query, so unchanged polls get a 304.
+    """
+    history = TestHistory()
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+
+    etag_source = "|".join(str(v) for v in (
+        history.version(repo_name), limit, cursor, language, test_type,
+        file_prefix, file, since, until, fields, include_output,
+    ))
+    etag = f'W/"{hashlib.sha1(etag_source.encode()).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    try:
+        with stage_timer("history", "query"):
+            page = history.query(
+                repo_name,
+                limit=limit,
+                cursor=cursor,
+                fields=field_list,
+                include_output=include_output,
+                language=language,
+                test_type=test_type,
+                file_prefix=file_prefix,
+                file=file,
+                since=since.timestamp() if since else None,
+                until=until.timestamp() if until else None,
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return JSONResponse(
+        {"repo": repo_name, "history": page["items"], "next_cursor": page["next_cursor"]},
+        headers=headers,
+    )
+
 
 @router.get("/{repo_name}", response_class=JSONResponse)
 def get_test_history(
-    repo_name: str = Path(..., description="Sanitized repo name (used internally)")
+    request: Request,
+    repo_name: str = Path(..., description="Sanitized repo name (used internally)"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
+    language: Optional[str] = None,
+    test_type: Optional[str] = None,
+    file_prefix: Optional[str] = None,
+    file: Optional[str] = Query(None, description="Only entries for exactly this file"),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    include_output: bool = Query(False, description="Include the generated test body (ai_output)"),
 ):
     """
-    Returns AI-generated test history for a given repo.
+    Returns AI-generated test history for a given repo, newest first and paginated.
     """
-    repo_dir = os.path.join(HISTORY_BASE_DIR, repo_name)
-
-    if not os.path.isdir(repo_dir):
-        logger.warning(f"[History] No history found at: {repo_dir}")
-        raise HTTPException(status_code=404, detail=f"No history found for repo '{repo_name}'.")
-
-    history = []
-
-    for filename in os.listdir(repo_dir):
-        if filename.endswith(".json"):
-            file_path = os.path.join(repo_dir, filename)
-            try:
-                with open(file_path, "r") as f:
-                    data = json.load(f)
-                    history.append({
-                        "file": data.get("file", filename),
-                        "language": data.get("language", ""),
-                        "test_type": data.get("test_type", "auto"),
-                        "output_path": data.get("output_path", ""),
-                        "ai_output": data.get("ai_output", "")
-                    })
-            except Exception as e:
-                logger.error(f"[History] Error loading {file_path}: {e}")
-                continue
-
-    return {"repo": repo_name, "history": history}
\ No newline at end of file
+    return history_page(
+        request, repo_name, limit, cursor, language, test_type,
+        file_prefix, file, since, until, fields, include_output,
+    )
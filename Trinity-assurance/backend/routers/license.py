@@ -1,16 +1,21 @@
 # backend/routers/license.py
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends
 from pydantic import BaseModel
-from backend.utils.license_checker import is_license_valid as verify_license_token
+from backend.routers.auth import license_usage, require_verify
+from backend.utils.license_checker import License
 
 router = APIRouter()
 
 class LicenseRequest(BaseModel):
     license_token: str
 
-@router.post("/verify")  # ✅ Fix here
-def verify_token(request: LicenseRequest):
-    if not verify_license_token(request.license_token):
-        raise HTTPException(status_code=401, detail="❌ Invalid or expired license token")
-    return {"status": "✅ License valid"}
\ No newline at end of file
+@router.post("/verify")
+def verify_token(request: LicenseRequest, license: License = Depends(require_verify)):
+    # Verified (and cached until the license expires) by require_verify
+    return {"status": "✅ License valid"}
+
+@router.get("/usage")
+def license_usage_summary(license: License = Depends(require_verify)):
+    """Request counters and quotas for the caller's license (this process)."""
+    return {"user_id": license.user_id, "expires_at": license.expires_at, "usage": license_usage.snapshot(license.user_id)}
@@ -1,106 +1,298 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from backend.models.schemas import (
     TestGenerationRequest,
     TestGenerationResponse,
     TestRunRequest,
     TestRunResponse,
+    JobSubmitResponse,
+    JobStatusResponse,
+    HealRequest,
 )
 from backend.services.test_generator import TestGenerator
 from backend.services.test_runner import TestRunner
-from backend.services.history_manager import TestHistory
-from backend.utils.license_checker import is_license_valid
-import os
-import zipfile
+from backend.services.healer import Healer
+from backend.services.history_manager import TestHistory, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from backend.routers.history import history_page
+from backend.routers.download import archive_response
+from backend.services.job_queue import Job, job_queue
+from backend.routers.auth import require_generate
+from backend.utils.license_checker import License
+from backend.utils.git_ops import resolve_remote_commit, suite_folder
+from datetime import datetime
+from typing import Optional, Tuple
+import hashlib
+import json
+import asyncio
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
-generator = TestGenerator()  # API key auto-loaded from env
+generator = TestGenerator()  # provider from TRINITY_LLM_PROVIDER; LLM client built on first call
 
 
-@router.post("/generate", response_model=TestGenerationResponse)
-async def generate_tests(request: TestGenerationRequest):
+def _generation_key(request: TestGenerationRequest) -> Tuple[str, bool]:
     """
-    Generate tests using AI for a given repository.
-    Requires a valid license token.
+    Single-flight key for a generation request and whether its result may be reused.
+    The remote commit comes from `git ls-remote`; if it can't be resolved, identical
+    requests still share an in-flight job but a finished result is not reused.
     """
-    # ✅ License verification
-    if not is_license_valid(request.license_token):
-        raise HTTPException(status_code=401, detail="Invalid or expired license token.")
+    repo_url = str(request.repo_url).rstrip("/")
+    repo_url = repo_url[:-len(".git")] if repo_url.endswith(".git") else repo_url
+    commit = resolve_remote_commit(repo_url)  # the generator works on the default branch HEAD
+    parts = [
+        repo_url.lower(), commit or "unresolved", str(getattr(request.language, "value", request.language)),
+        request.folder_filter or "", str(getattr(request.test_type, "value", request.test_type)),
+        request.file_path or "", str(bool(request.dry_run)), str(request.incremental), request.base_ref or "",
+    ]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest(), commit is not None
 
-    try:
-        test_code = generator.generate_tests_from_repo(
-            repo_url=request.repo_url,
+
+def _submit_generation(request: TestGenerationRequest, license: License) -> Tuple[Job, bool]:
+    """
+    Queue a generation job, or attach to an identical one (same repo commit and options)
+    that is running or finished recently. The owner (license user) drives fair scheduling.
+    """
+    dedupe_key, reuse_result = _generation_key(request)
+    return job_queue.submit_or_attach(
+        lambda progress: generator.generate_tests_from_repo(
+            repo_url=str(request.repo_url),
             language=request.language,
             file_path=request.file_path,
             test_type=request.test_type,
             folder_filter=request.folder_filter,
-            dry_run=request.dry_run
-        )
+            dry_run=request.dry_run,
+            progress=progress,
+            incremental=request.incremental,
+            base_ref=request.base_ref,
+        ),
+        owner=license.user_id,
+        kind="generate",
+        dedupe_key=dedupe_key,
+        reuse_result=reuse_result,
+        repo_url=str(request.repo_url),
+    )
+
+
+@router.post("/generate", response_model=TestGenerationResponse)
+async def generate_tests(request: TestGenerationRequest, license: License = Depends(require_generate)):
+    """
+    Generate tests using AI for a given repository.
+    Requires a valid license token (checked and rate limited by require_generate).
+    Runs on the background job queue and awaits the result without blocking the event loop.
+    """
+    job, _ = await asyncio.to_thread(_submit_generation, request, license)
+
+    try:
+        test_code = await asyncio.wrap_future(job.future)
         return TestGenerationResponse(status="success", generated_test_code=test_code)
     except Exception as e:
         logger.error(f"[TestOps] Test generation failed: {e}")
         raise HTTPException(status_code=500, detail=f"Test generation failed: {str(e)}")
 
 
+@router.post("/jobs", response_model=JobSubmitResponse, status_code=202)
+def submit_generation_job(request: TestGenerationRequest, license: License = Depends(require_generate)):
+    """
+    Queue test generation and return a job id immediately.
+    """
+    job, deduplicated = _submit_generation(request, license)
+    return JobSubmitResponse(job_id=job.id, status=job.status, deduplicated=deduplicated)
+
+
+def _get_job(job_id: str) -> Job:
+    job = job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse)
+def get_generation_job(job_id: str):
+    """
+    Current status and progress of a generation job (result included once finished).
+    """
+    job = _get_job(job_id)
+    payload = job.to_dict()
+    if job.status == "succeeded":
+        payload["generated_test_code"] = job.future.result()
+    return JobStatusResponse(**payload)
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_generation_job(job_id: str):
+    """
+    Server-Sent Events stream of per-file progress; closes once the job finishes.
+    """
+    job = _get_job(job_id)
+
+    async def event_stream():
+        cursor = 0
+        while True:
+            events = await job.wait_events_async(cursor, 15.0)
+            if not events:
+                if job.done:
+                    break
+                yield ": keep-alive\n\n"
+                continue
+            for event in events:
+                yield f"id: {event['seq']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+            cursor += len(events)
+            if job.done and cursor >= len(job.events):
+                break
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _make_runner(request: TestRunRequest) -> TestRunner:
+    if request.shard_index > request.shard_count:
+        raise HTTPException(status_code=422, detail="shard_index must be between 1 and shard_count")
+    try:
+        return TestRunner(
+            language=request.language,
+            test_type=request.test_type,
+            repo=request.repo,
+            workers=request.workers,
+            timeout=request.timeout,
+            mode=request.mode,
+            base_ref=request.base_ref,
+            shard_index=request.shard_index,
+            shard_count=request.shard_count,
+        )
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
 @router.post("/run", response_model=TestRunResponse)
 def run_tests(request: TestRunRequest):
     """
     Run tests for the specified language and type.
     """
+    runner = _make_runner(request)
     try:
-        runner = TestRunner(language=request.language, test_type=request.test_type)
         stdout, stderr = runner.run()
 
         return TestRunResponse(
             status="success" if not stderr else "error",
             output=stdout,
-            error=stderr or None
+            error=stderr or None,
+            results=runner.results,
+            summary=runner.summary,
+            run_id=runner.run_id,
         )
     except Exception as e:
         logger.error(f"[TestOps] Test run failed: {e}")
         raise HTTPException(status_code=500, detail=f"Test run failed: {str(e)}")
 
 
-@router.get("/history/{repo}", response_model=dict)
-def get_test_history(repo: str):
+@router.post("/run/stream")
+def run_tests_stream(request: TestRunRequest):
+    """
+    Run tests and stream one JSON result per line (NDJSON) as tests finish,
+    ending with a {"event": "summary", ...} line.
+    """
+    runner = _make_runner(request)
+
+    def ndjson():
+        try:
+            for record in runner.iter_results():
+                yield json.dumps({"event": "result", **record}) + "\n"
+        except Exception as e:
+            logger.error(f"[TestOps] Streaming test run failed: {e}")
+            yield json.dumps({"event": "error", "message": str(e)}) + "\n"
+            return
+        yield json.dumps({"event": "summary", "run_id": runner.run_id, **runner.summary}) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+@router.post("/heal")
+def heal_tests(request: HealRequest, license: License = Depends(require_generate)):
+    """
+    Repair failing generated tests: failures are clustered by root cause and each
+    cluster costs at most one LLM request; only the patched files are re-run.
+    """
+    results = None
+    if request.run_id is not None:
+        history = TestHistory()
+        run = history.get_test_run(request.run_id)
+        if run is None or run["repo"] != history.sanitize_repo(request.repo):
+            raise HTTPException(status_code=404, detail=f"Run {request.run_id} not found for {request.repo}")
+        results = history.get_test_run_results(request.run_id)
+        if not results:
+            raise HTTPException(status_code=404, detail=f"Run {request.run_id} has no recorded results")
+    try:
+        healer = Healer(request.repo, request.language, request.test_type, generator=generator)
+        return healer.heal(results, max_clusters=request.max_clusters, dry_run=request.dry_run, workers=request.workers)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"[TestOps] Healing failed for {request.repo}: {e}")
+        raise HTTPException(status_code=500, detail=f"Healing failed: {str(e)}")
+
+
+@router.get("/runs/{repo}")
+def list_test_runs(repo: str, limit: int = Query(20, ge=1, le=200)):
+    """
+    Recent test runs for a repo with pass/fail counts.
+    """
+    return {"repo": repo, "runs": TestHistory().list_test_runs(repo, limit)}
+
+
+@router.get("/runs/{repo}/{run_id}")
+def get_test_run(repo: str, run_id: int, status: Optional[str] = None):
     """
-    Fetch AI-generated test history for a given repo.
+    Per-test results of one run, optionally filtered by status.
+    """
+    history = TestHistory()
+    run = history.get_test_run(run_id)
+    if run is None or run["repo"] != history.sanitize_repo(repo):
+        raise HTTPException(status_code=404, detail=f"Run {run_id} not found for {repo}")
+    return {"repo": repo, "run_id": run_id, "results": history.get_test_run_results(run_id, status)}
+
+
+@router.get("/history/{repo}")
+def get_test_history(
+    request: Request,
+    repo: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    language: Optional[str] = None,
+    test_type: Optional[str] = None,
+    file_prefix: Optional[str] = None,
+    file: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    fields: Optional[str] = None,
+    include_output: bool = False,
+):
+    """
+    Fetch AI-generated test history for a given repo (paginated, see /history/{repo_name}).
     """
     try:
-        history = TestHistory().fetch(repo)
-        return {"repo": repo, "history": history}
+        return history_page(
+            request, repo, limit, cursor, language, test_type,
+            file_prefix, file, since, until, fields, include_output,
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"[TestOps] Failed to fetch history for {repo}: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch history: {str(e)}")
 
 
 @router.get("/download/{repo}")
-def download_tests_zip(repo: str):
+def download_tests_zip(request: Request, repo: str):
     """
-    Download all tests for a given repo as a ZIP file.
+    Download all tests for a given repo as a ZIP file, streamed from the packager cache.
     """
-    folder_path = os.path.join("tests", repo)
-    zip_path = f"{folder_path}.zip"
+    folder_path = suite_folder(repo)
 
-    if not os.path.exists(folder_path):
+    if folder_path is None:
         raise HTTPException(status_code=404, detail="Test folder not found")
 
-    try:
-        with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zipf:
-            for root, _, files in os.walk(folder_path):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    arcname = os.path.relpath(file_path, folder_path)
-                    zipf.write(file_path, arcname)
-        logger.info(f"[TestOps] ✅ Zipped tests for {repo} at {zip_path}")
-    except Exception as e:
-        logger.error(f"[TestOps] ❌ Failed to zip tests: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to zip tests: {str(e)}")
-
-    return FileResponse(
-        path=zip_path,
-        filename=f"{repo}_tests.zip",
-        media_type="application/zip"
-    )
\ No newline at end of file
+    return archive_response(request, folder_path, f"{repo}_tests.zip")
@@ -0,0 +1,728 @@
+# backend/services/ci_parser.py
+"""
+Streaming extraction of per-test results from CI output.
+
+Everything is a generator over byte chunks, so a log of any size is parsed with
+constant memory: chunks → (gunzip) → lines → format parsers → records.
+
+  * JUnit XML (Surefire/Gradle/pytest --junitxml/jest-junit reports): incremental
+    ElementTree XMLParser with a target that keeps only the current testcase
+  * pytest console output (-v / -rA / xdist), with FAILURES tracebacks
+  * Jest console output (--verbose or not), with ● failure details
+  * Maven Surefire console output (per-class summaries, per-test failures)
+
+Console formats are parsed side by side, so a monorepo log with several tools in it
+yields all of their results. Records have the TestRunner shape
+(nodeid, file, name, status, duration, message, traceback) plus "format"; a record
+with a "count" stands for that many tests that the log doesn't list one by one.
+
+    python -m backend.services.ci_parser build.log --repo myrepo --language java
+"""
+
+import os
+import re
+import sys
+import time
+import zlib
+import codecs
+import logging
+from collections import OrderedDict, deque
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, Optional
+from xml.etree.ElementTree import ParseError, XMLParser
+
+from backend.services.history_manager import MAX_TRACEBACK_CHARS, RESULT_STATUSES, TestHistory
+from backend.services.test_runner import RESULT_BATCH_SIZE, accumulate_file_stats
+from backend.utils.metrics import CI_BYTES, CI_RECORDS, STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+FORMATS = ("auto", "junit", "pytest", "jest", "surefire")
+READ_CHUNK_BYTES = 1024 * 1024
+# Longer lines (minified bundles, base64 blobs) are cut; no test result line is this long
+MAX_LINE_CHARS = 16 * 1024
+MAX_MESSAGE_CHARS = 1000
+# Failed tests held back until their traceback section shows up; beyond this the
+# oldest are emitted without one
+MAX_PENDING = 5000
+# Recently emitted nodeids, to drop the repeats of -rA summaries
+MAX_SEEN = 50000
+
+ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;?]*[ -/]*[@-~]")
+# GitHub Actions / Jenkins timestamper prefixes
+TIMESTAMP = re.compile(r"^\[?\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d(?:[.,]\d+)?Z?\]?[ \t]", re.MULTILINE)
+
+
+def safe_path(file: str) -> Optional[str]:
+    """
+    A log-supplied test path as a clean relative path, or None when it is absolute or
+    climbs out with "..": the file names come from untrusted logs and later feed the
+    sharder and the healer.
+    """
+    path = file.replace("\\", "/")
+    if path.startswith("/") or re.match(r"^[A-Za-z]:", path):
+        return None
+    parts = [part for part in path.split("/") if part not in ("", ".")]
+    if ".." in parts:
+        return None
+    return "/".join(parts)
+
+
+def _record(fmt: str, file: str, name: str, status: str, duration: float = 0.0,
+            message: str = "", traceback: str = "") -> Dict:
+    return {
+        "nodeid": f"{file}::{name}" if name else file, "file": file, "name": name, "status": status,
+        "duration": duration, "message": message[:MAX_MESSAGE_CHARS],
+        "traceback": traceback[-MAX_TRACEBACK_CHARS:], "format": fmt,
+    }
+
+
+class _Tail:
+    """The last MAX_TRACEBACK_CHARS of a block of lines (tracebacks matter at the end)."""
+
+    def __init__(self):
+        self.lines: deque = deque()
+        self.chars = 0
+
+    def append(self, line: str) -> None:
+        self.lines.append(line)
+        self.chars += len(line) + 1
+        while self.chars > MAX_TRACEBACK_CHARS and len(self.lines) > 1:
+            self.chars -= len(self.lines.popleft()) + 1
+
+    def text(self) -> str:
+        return "\n".join(self.lines).strip("\n")
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Byte / line stages
+# ──────────────────────────────────────────────────────────────────────────────
+def gunzip(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Pass chunks through, inflating them if the stream is gzip (multi-member too)."""
+    chunks = iter(chunks)
+    first = b""
+    for first in chunks:
+        if first:
+            break
+    if first[:2] != b"\x1f\x8b":
+        if first:
+            yield first
+        yield from chunks
+        return
+    inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    for chunk in chain([first], chunks):
+        while chunk:
+            # Bounded output per step: a small, highly compressed chunk can't blow up memory
+            yield inflater.decompress(chunk, READ_CHUNK_BYTES)
+            chunk = inflater.unconsumed_tail or inflater.unused_data
+            if inflater.eof:
+                inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    yield inflater.flush()
+
+
+def iter_line_batches(chunks: Iterable[bytes], max_line: int = MAX_LINE_CHARS) -> Iterator[List[str]]:
+    """
+    Decoded lines, one list per chunk, without ANSI colours, CI timestamps or
+    carriage-return overwrites. Batches keep per-line generator overhead off the hot path.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    tail = ""
+    for chunk in chain(chunks, [None]):
+        text = tail + (decoder.decode(chunk) if chunk is not None else decoder.decode(b"", final=True))
+        # Whole-chunk substitutions: the per-line work stays in C
+        if "\x1b" in text:
+            text = ANSI_ESCAPE.sub("", text)
+        text = TIMESTAMP.sub("", text)
+        if "\r" in text:
+            text = text.replace("\r\n", "\n")
+        lines = text.split("\n")
+        tail = lines.pop() if chunk is not None else ""
+        if len(tail) > max_line:
+            tail = tail[:max_line]
+        if "\r" in text or (lines and max(map(len, lines)) > max_line):
+            lines = [line[:max_line].rstrip("\r").rpartition("\r")[2] for line in lines]
+        yield lines
+
+
+def iter_lines(chunks: Iterable[bytes], max_line: int = MAX_LINE_CHARS) -> Iterator[str]:
+    for lines in iter_line_batches(chunks, max_line):
+        yield from lines
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# JUnit XML
+# ──────────────────────────────────────────────────────────────────────────────
+class _JUnitTarget:
+    """
+    ElementTree parser target that turns <testcase> elements into records as they
+    close. No tree is built; failure text is capped and <system-out>/<system-err>
+    content is dropped, so memory doesn't depend on report size.
+    """
+
+    OUTCOMES = {"failure": "failed", "error": "error", "skipped": "skipped"}
+
+    def __init__(self):
+        self.records: List[Dict] = []
+        self.suite_files: List[str] = []
+        self.case: Optional[Dict] = None
+        self.capture: Optional[str] = None  # outcome tag whose text is being collected
+        self.text: List[str] = []
+        self.chars = 0
+
+    @staticmethod
+    def _local(tag: str) -> str:
+        return tag.rpartition("}")[2]
+
+    def start(self, tag: str, attrib: Dict[str, str]) -> None:
+        tag = self._local(tag)
+        if tag == "testsuite":
+            self.suite_files.append(attrib.get("file") or attrib.get("filepath") or "")
+        elif tag == "testcase":
+            self.case = {"attrib": dict(attrib), "status": "passed", "message": "", "type": ""}
+        elif self.case is not None and tag in self.OUTCOMES:
+            # A testcase may carry both <skipped> and a later <failure>; failures win
+            if self.case["status"] in ("passed", "skipped"):
+                self.case.update(status=self.OUTCOMES[tag], message=attrib.get("message", ""), type=attrib.get("type", ""))
+            self.text, self.chars = [], 0
+            self.capture = tag
+
+    def data(self, text: str) -> None:
+        if self.capture and self.chars < MAX_TRACEBACK_CHARS:
+            self.text.append(text)
+            self.chars += len(text)
+
+    def end(self, tag: str) -> None:
+        tag = self._local(tag)
+        if tag == "testsuite" and self.suite_files:
+            self.suite_files.pop()
+        elif tag == "testcase" and self.case is not None:
+            self.records.append(self._finish(self.case))
+            self.case = None
+        elif tag == self.capture and self.case is not None:
+            if tag != "skipped" or not self.case.get("traceback"):
+                self.case["traceback"] = "".join(self.text).strip()
+            self.capture = None
+
+    def close(self) -> None:
+        return None
+
+    def _finish(self, case: Dict) -> Dict:
+        attrib = case["attrib"]
+        classname = attrib.get("classname", "")
+        file = attrib.get("file") or (self.suite_files[-1] if self.suite_files else "") or classname
+        try:
+            duration = float(attrib.get("time", "0").replace(",", ""))
+        except ValueError:
+            duration = 0.0
+        traceback = case.get("traceback", "")
+        message = (case["message"] or traceback).strip()
+        message = message.splitlines()[0] if message else ""
+        # Keep the exception type in front of the message, like the runners report it
+        if case["type"] and not message.startswith(case["type"]):
+            message = f"{case['type']}: {message}" if message else case["type"]
+        name = attrib.get("name", "")
+        if file != classname and classname and not file.endswith(".java"):
+            # pytest: classname is the dotted module[.Class]; keep the class in the name
+            module = os.path.splitext(file)[0].replace("/", ".").replace("\\", ".")
+            prefix = classname[len(module):].lstrip(".") if classname.startswith(module) else ""
+            name = f"{prefix.replace('.', '::')}::{name}" if prefix else name
+        return _record("junit", file, name, case["status"], duration, message, traceback)
+
+
+def parse_junit(chunks: Iterable[bytes]) -> Iterator[Dict]:
+    """Records from a JUnit XML report (a <testsuites> or <testsuite> document)."""
+    target = _JUnitTarget()
+    parser = XMLParser(target=target)
+    try:
+        for chunk in chunks:
+            parser.feed(chunk)
+            if target.records:
+                yield from target.records
+                target.records = []
+        parser.close()
+    except ParseError as e:
+        logger.warning(f"[CI] ⚠️ Malformed JUnit XML, keeping the results parsed so far: {e}")
+    yield from target.records
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Console formats: one small state machine per tool, fed line by line
+# ──────────────────────────────────────────────────────────────────────────────
+NONE: tuple = ()
+
+
+class _PendingFailures:
+    """Failed tests waiting for their details, keyed by a tool-specific title."""
+
+    def __init__(self):
+        self.records: "OrderedDict[str, Dict]" = OrderedDict()
+        self.titles: Dict[str, str] = {}  # title → nodeid
+        self.nodeids: Dict[str, str] = {}  # nodeid → title
+
+    def get(self, nodeid: str) -> Optional[Dict]:
+        return self.records.get(nodeid)
+
+    def add(self, record: Dict, title: str) -> List[Dict]:
+        self.records[record["nodeid"]] = record
+        self.titles[title] = record["nodeid"]
+        self.nodeids[record["nodeid"]] = title
+        overflow = []
+        while len(self.records) > MAX_PENDING:
+            nodeid, oldest = self.records.popitem(last=False)
+            self.titles.pop(self.nodeids.pop(nodeid, ""), None)
+            overflow.append(oldest)
+        return overflow
+
+    def find(self, title: str) -> Optional[Dict]:
+        nodeid = self.titles.get(title)
+        return self.records.get(nodeid) if nodeid else None
+
+    def flush(self) -> List[Dict]:
+        records = list(self.records.values())
+        self.records.clear()
+        self.titles.clear()
+        self.nodeids.clear()
+        return records
+
+
+class PytestParser:
+    format = "pytest"
+    STATUSES = {"PASSED": "passed", "FAILED": "failed", "ERROR": "error", "SKIPPED": "skipped",
+                "XFAIL": "skipped", "XPASS": "passed"}
+    # `tests/a.py::test_x PASSED [ 50%]`
+    SUFFIX = re.compile(r"^(?P<nodeid>\S+?\.py::.+?) (?P<status>PASSED|FAILED|ERROR|SKIPPED|XFAIL|XPASS)\b")
+    # `FAILED tests/a.py::test_x - AssertionError: ...` (-r summary) / `[gw0] [ 50%] PASSED tests/a.py::test_x`
+    PREFIX = re.compile(
+        r"^(?:\[gw\d+\] \[\s*\d+%\] )?(?P<status>PASSED|FAILED|ERROR|XFAIL|XPASS) "
+        r"(?P<nodeid>\S+?\.py(?:::.+?)?)(?: - (?P<message>.*))?$"
+    )
+    SECTION = re.compile(r"^={3,} (?P<title>.+?) ={3,}$")
+    SESSION_END = re.compile(r"\bin \d+(?:\.\d+)?s\b")
+    BLOCK = re.compile(r"^_{3,} (?P<title>.+?) _{3,}$")
+    LOCATION = re.compile(r"^(?P<file>\S+?\.py):\d+: ")
+
+    def __init__(self):
+        self.pending = _PendingFailures()
+        self.seen: "OrderedDict[str, None]" = OrderedDict()
+        self.section = ""
+        self.block_title: Optional[str] = None
+        self.block: Optional[_Tail] = None
+
+    @staticmethod
+    def headline(nodeid: str) -> str:
+        """pytest's FAILURES section title for a nodeid (`Class.test_name[param]`)."""
+        return nodeid.partition("::")[2].replace("::", ".")
+
+    def _result(self, nodeid: str, status: str, message: str = "") -> List[Dict]:
+        if nodeid in self.seen:
+            return NONE
+        pending = self.pending.get(nodeid)
+        if pending is not None:
+            # The -r summary line carries the exception type; prefer it to the bare E line
+            if message:
+                pending["message"] = message[:MAX_MESSAGE_CHARS]
+            return NONE
+        file, _, name = nodeid.partition("::")
+        record = _record(self.format, file, name, status, message=message)
+        if status in ("failed", "error"):
+            return self.pending.add(record, self.headline(nodeid) or f"collecting {file}")
+        self._seen(nodeid)
+        return [record]
+
+    def _seen(self, nodeid: str) -> None:
+        self.seen[nodeid] = None
+        if len(self.seen) > MAX_SEEN:
+            self.seen.popitem(last=False)
+
+    def _close_block(self) -> List[Dict]:
+        title, block = self.block_title, self.block
+        self.block_title = self.block = None
+        if title is None:
+            return NONE
+        # Errors section titles: "ERROR collecting tests/a.py", "ERROR at setup of test_x"
+        key = re.sub(r"^ERROR (?:at \w+ of )?", "", title)
+        record = self.pending.find(key)
+        text = block.text()
+        overflow: List[Dict] = []
+        if record is None:
+            # Quiet runs (-q, no -v): the section is the only trace of the failure
+            if key.startswith("collecting "):
+                file, name = key[len("collecting "):], ""
+            else:
+                location = next((self.LOCATION.match(l) for l in block.lines if self.LOCATION.match(l)), None)
+                if location is None:
+                    return NONE
+                base, bracket, params = key.partition("[")
+                file, name = location.group("file"), base.replace(".", "::") + bracket + params
+            status = "error" if self.section == "errors" else "failed"
+            record = _record(self.format, file, name, status)
+            overflow = self.pending.add(record, key)
+        record["traceback"] = text
+        if not record["message"]:
+            errors = [l[1:].strip() for l in block.lines if l.startswith("E ")]
+            record["message"] = (errors[0] if errors else "")[:MAX_MESSAGE_CHARS]
+        return overflow
+
+    def feed(self, line: str) -> Iterable[Dict]:
+        first = line[:1]
+        if first == "=":
+            section = self.SECTION.match(line)
+            if section:
+                out = list(self._close_block())
+                title = section.group("title")
+                self.section = {"FAILURES": "failures", "ERRORS": "errors"}.get(title, "other")
+                if title == "test session starts":
+                    self.seen.clear()
+                elif self.SESSION_END.search(title):
+                    out += self._flush()
+                return out
+        if self.section in ("failures", "errors"):
+            if first == "_":
+                block = self.BLOCK.match(line)
+                if block:
+                    out = self._close_block()
+                    self.block_title, self.block = block.group("title"), _Tail()
+                    return out
+            if self.block is not None:
+                self.block.append(line)
+                return NONE
+        if ".py" not in line:
+            return NONE
+        match = self.SUFFIX.match(line) or self.PREFIX.match(line)
+        if not match:
+            return NONE
+        return self._result(match.group("nodeid"), self.STATUSES[match.group("status")], match.groupdict().get("message") or "")
+
+    def _flush(self) -> List[Dict]:
+        records = self.pending.flush()
+        for record in records:
+            self._seen(record["nodeid"])
+        return records
+
+    def close(self) -> Iterable[Dict]:
+        return list(self._close_block()) + self._flush()
+
+
+class JestParser:
+    format = "jest"
+    FILE = re.compile(r"^(?P<status>PASS|FAIL) (?P<file>\S+)")
+    TEST = re.compile(
+        r"^(?P<indent>\s+)(?P<mark>[✓✔√✕✖×○✎]) (?P<name>.+?)(?: \((?P<value>\d+(?:\.\d+)?) ?(?P<unit>ms|s)\))?$"
+    )
+    DETAIL = re.compile(r"^\s*● (?P<title>.+)$")
+    MARKS = {"✓": "passed", "✔": "passed", "√": "passed", "✕": "failed", "✖": "failed", "×": "failed",
+             "○": "skipped", "✎": "skipped"}
+    NOT_DESCRIBE = ("at ", "console.", "●", "›", "Expected", "Received", "expect(")
+
+    def __init__(self):
+        self.pending = _PendingFailures()
+        self.file: Optional[str] = None
+        self.describe: List[tuple] = []  # (indent, name) of the enclosing describe blocks
+        self.detail: Optional[Dict] = None
+        self.detail_text: Optional[_Tail] = None
+
+    def _close_detail(self) -> List[Dict]:
+        record, text = self.detail, self.detail_text
+        self.detail = self.detail_text = None
+        if record is None:
+            return NONE
+        record["traceback"] = text.text()
+        if not record["message"]:
+            record["message"] = next((l.strip() for l in text.lines if l.strip()), "")[:MAX_MESSAGE_CHARS]
+        return NONE
+
+    def feed(self, line: str) -> Iterable[Dict]:
+        first = line[:1]
+        if first in "PFT" and line[:4] in ("PASS", "FAIL", "Test"):
+            match = self.FILE.match(line)
+            if match:
+                self._close_detail()
+                out = self.pending.flush()
+                self.file, self.describe = match.group("file"), []
+                return out
+            if line.startswith(("Tests:", "Test Suites:")):
+                self._close_detail()
+                self.file = None
+                return self.pending.flush()
+        if self.file is None:
+            return NONE
+        if "●" in line:
+            match = self.DETAIL.match(line)
+            if match:
+                self._close_detail()
+                title = match.group("title").strip()
+                if title == "Test suite failed to run":
+                    record = _record(self.format, self.file, "", "error")
+                    out = self.pending.add(record, f"{self.file}::")
+                else:
+                    name = title.replace(" › ", " > ")
+                    record = self.pending.find(name)
+                    out = NONE
+                    if record is None:  # not --verbose: details are all there is
+                        record = _record(self.format, self.file, name, "failed")
+                        out = self.pending.add(record, name)
+                self.detail, self.detail_text = record, _Tail()
+                return out
+        if self.detail is not None:
+            self.detail_text.append(line)
+            return NONE
+        if first not in " \t":
+            return NONE
+        match = self.TEST.match(line)
+        indent = len(line) - len(line.lstrip())
+        while self.describe and self.describe[-1][0] >= indent:
+            self.describe.pop()
+        if not match:
+            text = line.strip()
+            if text and not text.startswith(self.NOT_DESCRIBE):
+                self.describe.append((indent, text))
+            return NONE
+        status = self.MARKS[match.group("mark")]
+        name = match.group("name")
+        if status == "skipped":
+            name = re.sub(r"^(?:skipped|todo) ", "", name)
+        name = " > ".join([d for _, d in self.describe] + [name])
+        duration = float(match.group("value") or 0) / (1000 if match.group("unit") == "ms" else 1)
+        record = _record(self.format, self.file, name, status, duration)
+        if status == "failed":
+            return self.pending.add(record, name)
+        return [record]
+
+    def close(self) -> Iterable[Dict]:
+        self._close_detail()
+        return self.pending.flush()
+
+
+class SurefireParser:
+    format = "surefire"
+    LEVEL = re.compile(r"^\[(?:INFO|ERROR|WARNING|WARN)\] ")
+    RUNNING = re.compile(r"^Running (?P<cls>[\w.$]+)\s*$")
+    CLASS_SUMMARY = re.compile(
+        r"^Tests run: (?P<run>\d+), Failures: (?P<failures>\d+), Errors: (?P<errors>\d+), Skipped: (?P<skipped>\d+)"
+        r"(?:, Time elapsed: (?P<time>[\d.,]+) ?s)?(?:.*?\s--? in (?P<cls>[\w.$]+))?"
+    )
+    # JUnit 4: `testBar(com.acme.FooTest)`; JUnit 5 / surefire 3: `com.acme.FooTest.testBar --`
+    TEST_FAILURE = re.compile(
+        r"^(?P<test>.+?)(?: --)?\s+Time elapsed: (?P<time>[\d.,]+) ?s(?:ec)?\s+<<< (?P<kind>FAILURE|ERROR)!\s*$"
+    )
+    JUNIT4_NAME = re.compile(r"^(?P<method>[^(]+)\((?P<cls>[\w.$]+)\)$")
+
+    def __init__(self):
+        self.current: Optional[str] = None
+        self.failure: Optional[Dict] = None
+        self.trace: Optional[_Tail] = None
+
+    def _close_failure(self) -> List[Dict]:
+        record, trace = self.failure, self.trace
+        self.failure = self.trace = None
+        if record is None:
+            return NONE
+        record["traceback"] = trace.text()
+        record["message"] = next((l.strip() for l in trace.lines if l.strip()), "")[:MAX_MESSAGE_CHARS]
+        return [record]
+
+    def _failure(self, match: "re.Match") -> None:
+        test = match.group("test").strip()
+        junit4 = self.JUNIT4_NAME.match(test)
+        if junit4:
+            cls, method = junit4.group("cls"), junit4.group("method")
+        elif self.current and test.startswith(self.current + "."):
+            cls, method = self.current, test[len(self.current) + 1:]
+        else:
+            cls, _, method = test.rpartition(".")
+            cls = cls or self.current or ""
+        duration = float(match.group("time").replace(",", ""))
+        status = "failed" if match.group("kind") == "FAILURE" else "error"
+        self.failure, self.trace = _record(self.format, cls, method, status, duration), _Tail()
+
+    def feed(self, line: str) -> Iterable[Dict]:
+        if self.trace is not None:
+            # Stack traces are printed raw, without a log level, until a blank line
+            if line.strip() and not line.startswith("["):
+                self.trace.append(line)
+                return NONE
+            out = self._close_failure()
+            if not line.strip():
+                return out
+            return list(out) + list(self.feed(line))
+        if "Running " not in line and "Tests run:" not in line and "<<<" not in line and "Results" not in line:
+            return NONE
+        if line[:1] == "[":
+            line = self.LEVEL.sub("", line, count=1)
+        first = line[:1]
+        if first == "R":
+            running = self.RUNNING.match(line)
+            if running:
+                self.current = running.group("cls")
+            elif line.startswith("Results"):
+                self.current = None
+            return NONE
+        if first == "T":
+            summary = self.CLASS_SUMMARY.match(line)
+            cls = summary and (summary.group("cls") or self.current)
+            if not cls:
+                return NONE
+            self.current = None
+            run, failures, errors, skipped = (int(summary.group(k)) for k in ("run", "failures", "errors", "skipped"))
+            duration = float((summary.group("time") or "0").replace(",", ""))
+            out = []
+            passed = run - failures - errors - skipped
+            # Passing / skipped tests aren't listed one by one: one aggregate per class
+            for status, count in (("passed", passed), ("skipped", skipped)):
+                if count > 0:
+                    record = _record(self.format, cls, "", status, duration if status == "passed" else 0.0)
+                    record["count"] = count
+                    out.append(record)
+            return out
+        failure = self.TEST_FAILURE.match(line)
+        if failure:
+            self._failure(failure)
+        return NONE
+
+    def close(self) -> Iterable[Dict]:
+        return self._close_failure()
+
+
+TEXT_PARSERS = {"pytest": PytestParser, "jest": JestParser, "surefire": SurefireParser}
+
+
+def parse_text(chunks: Iterable[bytes], fmt: str = "auto") -> Iterator[Dict]:
+    parsers = [cls() for name, cls in TEXT_PARSERS.items() if fmt in ("auto", name)]
+    feeds = [parser.feed for parser in parsers]
+    for lines in iter_line_batches(chunks):
+        for line in lines:
+            for feed in feeds:
+                records = feed(line)
+                if records:
+                    yield from records
+    for parser in parsers:
+        yield from parser.close()
+
+
+def parse_stream(chunks: Iterable[bytes], fmt: str = "auto") -> Iterator[Dict]:
+    """
+    Records from a CI log or report given as byte chunks (optionally gzipped).
+    fmt "auto" treats XML documents as JUnit reports and anything else as console output.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"❌ Unsupported CI format: {fmt}")
+    chunks = gunzip(chunks)
+    head = b""
+    for head in chunks:
+        if head.strip():
+            break
+    stream = chain([head], chunks)
+    if fmt == "junit" or (fmt == "auto" and head.lstrip(b"\xef\xbb\xbf \t\r\n").startswith(b"<")):
+        return parse_junit(stream)
+    return parse_text(stream, fmt)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# History ingestion
+# ──────────────────────────────────────────────────────────────────────────────
+def ingest_log(
+    chunks: Iterable[bytes],
+    repo: str,
+    language: str,
+    test_type: str = "ci",
+    fmt: str = "auto",
+    history: Optional[TestHistory] = None,
+) -> Dict:
+    """
+    Parse a CI log as it streams in and record it as one test run: per-test records
+    in batches, per-file durations for the sharder. Returns the run summary.
+    """
+    history = history or TestHistory()
+    language = str(getattr(language, "value", language))
+    run_id = history.start_run(repo, language, test_type)
+    summary: Dict = {status: 0 for status in RESULT_STATUSES}
+    summary.update(total=0, duration=0.0)
+    formats: Dict[str, int] = {}
+    rejected = 0
+    file_stats: Dict[str, Dict] = {}
+    sizes = {"received": 0, "log": 0}
+    started = time.perf_counter()
+
+    def counted(source: Iterable[bytes], key: str) -> Iterator[bytes]:
+        for chunk in source:
+            sizes[key] += len(chunk)
+            yield chunk
+
+    buffer: List[Dict] = []
+    try:
+        # Throughput is measured on the log itself, i.e. after gunzip
+        for record in parse_stream(counted(gunzip(counted(chunks, "received")), "log"), fmt):
+            count = record.pop("count", 1)
+            source = record.pop("format")
+            file = safe_path(record["file"])
+            if file is None:
+                rejected += count
+                continue
+            if file != record["file"]:
+                record["nodeid"] = file + record["nodeid"][len(record["file"]):]
+                record["file"] = file
+            summary[record["status"]] += count
+            summary["total"] += count
+            summary["duration"] += record["duration"]
+            formats[source] = formats.get(source, 0) + count
+            CI_RECORDS.inc(count, format=source, status=record["status"])
+            accumulate_file_stats(file_stats, record)
+            if count != 1:
+                continue  # aggregates count towards the run, they aren't per-test rows
+            buffer.append(record)
+            if len(buffer) >= RESULT_BATCH_SIZE:
+                history.record_results(run_id, buffer)
+                buffer = []
+    finally:
+        if buffer:
+            history.record_results(run_id, buffer)
+        summary["duration"] = round(summary["duration"], 3)
+        history.finish_run(run_id, summary)
+        if file_stats:
+            history.record_file_stats(repo, language, file_stats)
+        seconds = time.perf_counter() - started
+        CI_BYTES.inc(sizes["received"])
+        STAGE_SECONDS.observe(seconds, component="ci", stage="ingest")
+        if rejected:
+            logger.warning(f"[CI] ⚠️ Run {run_id}: dropped {rejected} results with absolute or '..' paths")
+
+    mb_per_s = round(sizes["log"] / (1024 * 1024) / seconds, 2) if seconds else 0.0
+    logger.info(
+        f"[CI] 📥 Run {run_id} for {repo}: {summary['total']} results from {sizes['log'] / (1024 * 1024):.1f} MB "
+        f"in {seconds:.2f}s ({mb_per_s} MB/s) {formats}"
+    )
+    return {
+        "run_id": run_id, "summary": summary, "formats": formats, "received_bytes": sizes["received"],
+        "log_bytes": sizes["log"], "rejected": rejected, "seconds": round(seconds, 3), "mb_per_s": mb_per_s,
+    }
+
+
+def read_chunks(path: str, size: int = READ_CHUNK_BYTES) -> Iterator[bytes]:
+    """A file (or "-" for stdin) as byte chunks."""
+    stream = sys.stdin.buffer if path == "-" else open(path, "rb")
+    try:
+        yield from iter(lambda: stream.read(size), b"")
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+
+
+if __name__ == "__main__":
+    import json
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Extract test results from CI logs and JUnit XML reports")
+    parser.add_argument("paths", nargs="+", help="Log / report files (gzip ok), or - for stdin")
+    parser.add_argument("--format", default="auto", choices=FORMATS)
+    parser.add_argument("--repo", help="Record the results as a test run of this repo")
+    parser.add_argument("--language", default="python")
+    parser.add_argument("--test-type", default="ci")
+    args = parser.parse_args()
+
+    for path in args.paths:
+        if args.repo:
+            print(json.dumps(ingest_log(read_chunks(path), args.repo, args.language, args.test_type, args.format)))
+        else:
+            for record in parse_stream(read_chunks(path), args.format):
+                print(json.dumps(record))
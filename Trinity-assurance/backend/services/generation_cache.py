@@ -0,0 +1,176 @@
+# backend/services/generation_cache.py
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Dict, Optional
+
+from backend.utils.metrics import cache_event
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+CACHE_DIR = os.getenv("TRINITY_GEN_CACHE_DIR", os.path.join("tests", ".cache", "generation"))
+CACHE_MAX_ENTRIES = int(os.getenv("TRINITY_GEN_CACHE_MAX_ENTRIES", "50000"))
+CACHE_MAX_BYTES = int(os.getenv("TRINITY_GEN_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+CACHE_MAX_AGE_DAYS = float(os.getenv("TRINITY_GEN_CACHE_MAX_AGE_DAYS", "30"))
+# evict() walks the whole cache, so it runs at most this often (across processes)
+EVICT_INTERVAL_SECONDS = float(os.getenv("TRINITY_GEN_CACHE_EVICT_INTERVAL", "600"))
+# A .tmp file older than this was left by a writer that died before its rename
+ORPHAN_TMP_SECONDS = 3600
+
+
+def hash_source(source_code: str) -> str:
+    return hashlib.sha256(source_code.encode("utf-8", errors="ignore")).hexdigest()
+
+
+class GenerationCache:
+    """
+    Content-addressed, on-disk cache of generated test code.
+
+    Key = sha256(source hash, prompt version, model, language, test_type, temperature).
+    Entries live at <cache_dir>/<key[:2]>/<key>.json. The file mtime is the entry's
+    age: set on write, refreshed on every hit, so an entry expires after max_age_days
+    unused and eviction (oldest mtime first) approximates LRU.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = CACHE_DIR,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        max_bytes: int = CACHE_MAX_BYTES,
+        max_age_days: float = CACHE_MAX_AGE_DAYS,
+        evict_interval: float = EVICT_INTERVAL_SECONDS,
+    ):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_days * 86400
+        self.evict_interval = evict_interval
+        self._evict_stamp = os.path.join(cache_dir, ".last_evict")
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(
+        source_hash: str,
+        prompt_version: str,
+        model: str,
+        language: str,
+        test_type: str,
+        temperature: float,
+    ) -> str:
+        raw = "\x1f".join([source_hash, prompt_version, model, language, test_type, f"{temperature:.3f}"])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            if self.max_age_seconds and time.time() - os.stat(path).st_mtime > self.max_age_seconds:
+                raise FileNotFoundError(path)
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path, None)
+        except (FileNotFoundError, json.JSONDecodeError, OSError):
+            with self._lock:
+                self.misses += 1
+            cache_event("generation", hit=False)
+            return None
+
+        with self._lock:
+            self.hits += 1
+        cache_event("generation", hit=True)
+        return entry.get("test_code")
+
+    def put(self, key: str, test_code: str, source_file: str = "") -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        entry = {"key": key, "source_file": source_file, "created_at": time.time(), "test_code": test_code}
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"[Cache] ⚠️ Failed to write cache entry {key}: {e}")
+
+    def _evict_due(self, now: float) -> bool:
+        """Claim this eviction pass unless one ran within evict_interval (the stamp's mtime)."""
+        try:
+            if now - os.stat(self._evict_stamp).st_mtime < self.evict_interval:
+                return False
+        except OSError:
+            pass
+        try:
+            with open(self._evict_stamp, "a"):
+                pass
+            os.utime(self._evict_stamp, (now, now))
+        except OSError:
+            pass
+        return True
+
+    def evict(self, force: bool = False) -> int:
+        """
+        Drop expired entries, then oldest-used entries until under the count/size limits.
+        Skipped (returns 0) if a pass ran within evict_interval, unless forced.
+        """
+        now = time.time()
+        if not force and not self._evict_due(now):
+            return 0
+
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                if not name.endswith(".json"):
+                    # In-flight writes belong to their writer; only orphans are removed
+                    if name.endswith(".tmp"):
+                        try:
+                            if now - os.stat(path).st_mtime > ORPHAN_TMP_SECONDS:
+                                os.remove(path)
+                        except OSError:
+                            pass
+                    continue
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+
+        entries.sort()
+        total_bytes = sum(size for _, size, _ in entries)
+        count = len(entries)
+        removed = 0
+
+        for mtime, size, path in entries:
+            expired = self.max_age_seconds and now - mtime > self.max_age_seconds
+            over_limit = count > self.max_entries or total_bytes > self.max_bytes
+            if not (expired or over_limit):
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            count -= 1
+            total_bytes -= size
+            removed += 1
+
+        with self._lock:
+            self.evictions += removed
+        if removed:
+            logger.info(f"[Cache] 🧹 Evicted {removed} generation cache entries")
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
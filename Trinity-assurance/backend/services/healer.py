@@ -0,0 +1,465 @@
+# backend/services/healer.py
+
+import os
+import re
+import json
+import hashlib
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from backend.services.language_detector import get_language
+from backend.services.prompt_planner import CONTEXT_TOKENS, SAFETY_MARGIN, count_tokens, output_budget
+from backend.services.test_runner import TestRunner
+from backend.services.test_validator import TestValidator
+from backend.utils.git_ops import checkout_path, suite_folder
+from backend.utils.metrics import stage_timer
+from backend.utils.prompts import HEAL_FILE_PROMPT_TEMPLATE, HEAL_RULES_PROMPT_TEMPLATE
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+MAX_CLUSTERS = int(os.getenv("TRINITY_HEAL_MAX_CLUSTERS", "20"))
+# How much of a failure / file goes into a repair prompt
+MAX_FAILURE_CHARS = 3000
+MAX_LISTED_FILES = 30
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Failure records and signatures
+# ──────────────────────────────────────────────────────────────────────────────
+EXC_TYPE = re.compile(
+    r"^(?:E\s+)?(?P<type>[A-Za-z_][\w.$]*(?:Error|Exception|Exit|Interrupt|Failure|Failed|Warning))\b:?\s*(?P<rest>.*)$"
+)
+# pytest's crash line when the message itself has no type (plain `assert` failures)
+CRASH_LINE = re.compile(r"^\S+:\d+: (?P<type>[A-Za-z_][\w.]*)$", re.MULTILINE)
+# Frames, innermost last: Python, pytest's short form, Node, JVM
+FRAME_PATTERNS = (
+    re.compile(r'File "(?P<path>[^"]+)", line \d+, in (?P<func>\S+)'),
+    re.compile(r"^(?P<path>[^\s:][^:\n]*\.py):\d+: in (?P<func>\S+)", re.MULTILINE),
+    re.compile(r"\bat (?:(?P<func>[^\s(]+) \()?(?P<path>[^\s()]+?\.[cm]?[jt]sx?):\d+:\d+\)?"),
+    re.compile(r"\bat (?P<func>[\w$.<>]+)\((?P<path>[\w$]+\.java):\d+\)"),
+)
+# Frames from the runtime, test frameworks and installed packages never identify a root cause
+FOREIGN_FRAMES = (
+    "site-packages", "dist-packages", "/lib/python", "<frozen", "importlib", "_pytest", "pluggy",
+    "node_modules", "node:", "js_worker.js", "pytest_worker.py", "org.junit", "java.", "jdk.", "sun.",
+)
+MESSAGE_NORMALIZERS = (
+    (re.compile(r"'[^']*'|\"[^\"]*\"|`[^`]*`"), "<str>"),
+    (re.compile(r"0x[0-9a-fA-F]+"), "<hex>"),
+    (re.compile(r"(?:[A-Za-z]:)?(?:[\\/][\w.\-]+){2,}"), "<path>"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "<num>"),
+    (re.compile(r"\s+"), " "),
+)
+MISSING_MODULE = re.compile(r"No module named (?P<q>['\"])(?P<module>[\w.]+)(?P=q)")
+
+
+@dataclass
+class Failure:
+    nodeid: str
+    file: str  # CWD-relative test file path, as reported by the runner
+    name: str
+    status: str
+    message: str
+    traceback: str
+    exc_type: str = ""
+    frame: str = ""
+    template: str = ""
+
+    @property
+    def signature(self) -> str:
+        raw = "\x1f".join((self.exc_type, self.frame, self.template))
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:12]
+
+
+@dataclass
+class FailureCluster:
+    signature: str
+    exc_type: str
+    frame: str
+    template: str
+    failures: List[Failure] = field(default_factory=list)
+
+    @property
+    def files(self) -> List[str]:
+        return list(OrderedDict.fromkeys(f.file for f in self.failures))
+
+    def to_dict(self) -> Dict:
+        return {
+            "signature": self.signature, "exc_type": self.exc_type, "frame": self.frame,
+            "message": self.template, "tests": len(self.failures), "files": self.files,
+        }
+
+
+def normalize_message(message: str) -> str:
+    """Message template: literals, numbers, addresses and paths replaced by placeholders."""
+    text = message.strip().splitlines()[0] if message.strip() else ""
+    for pattern, placeholder in MESSAGE_NORMALIZERS:
+        text = pattern.sub(placeholder, text)
+    return text.strip()[:200]
+
+
+def _exception(message: str, traceback: str, status: str) -> Tuple[str, str]:
+    """(exception type, rest of the message) from the runner's message, else the traceback's last E line."""
+    lines = [message.strip().splitlines()[0]] if message.strip() else []
+    lines += [line for line in reversed(traceback.splitlines()) if line.startswith("E ")]
+    for line in lines:
+        match = EXC_TYPE.match(line.strip())
+        if match:
+            return match.group("type").rsplit(".", 1)[-1], match.group("rest")
+    crash = list(CRASH_LINE.finditer(traceback))
+    if crash:
+        return crash[-1].group("type").rsplit(".", 1)[-1], message
+    return status, message
+
+
+def _frame(traceback: str, test_file: str) -> str:
+    """
+    Innermost frame that explains the failure: a repo source frame when there is one
+    (file:function, no line numbers). Frames in the test files themselves collapse to
+    `<test>` (or `<test>:<module>` at import time), so the same mistake repeated across
+    many generated files lands in one cluster.
+    """
+    test_base = os.path.basename(test_file)
+    frames: List[Tuple[int, str, str]] = []
+    for pattern in FRAME_PATTERNS:
+        frames += [(m.start(), m.group("path"), m.group("func") or "<anonymous>") for m in pattern.finditer(traceback)]
+    frames.sort()
+    fallback = ""
+    for _, path, func in reversed(frames):
+        if any(marker in path or marker in func for marker in FOREIGN_FRAMES):
+            continue
+        if os.path.basename(path) == test_base or "/tests/" in f"/{path}" or path.startswith("tests"):
+            fallback = fallback or ("<test>:<module>" if func == "<module>" else "<test>")
+            continue
+        return f"{os.path.basename(path)}:{func}"
+    return fallback or "<test>"
+
+
+def parse_failures(records: Iterable[Dict]) -> List[Failure]:
+    """Structured failures from TestRunner / history records (passed and skipped are ignored)."""
+    failures = []
+    for record in records:
+        if record.get("status") not in ("failed", "error"):
+            continue
+        nodeid = record.get("nodeid") or record.get("file", "")
+        file = record.get("file") or nodeid.split("::", 1)[0]
+        name = record.get("name") or (nodeid.split("::", 1)[1] if "::" in nodeid else "<collection>")
+        message, traceback = record.get("message") or "", record.get("traceback") or ""
+        exc_type, rest = _exception(message, traceback, record["status"])
+        failures.append(Failure(
+            nodeid=nodeid, file=file, name=name, status=record["status"], message=message, traceback=traceback,
+            exc_type=exc_type, frame=_frame(traceback, file), template=normalize_message(rest),
+        ))
+    return failures
+
+
+def cluster_failures(failures: List[Failure]) -> List[FailureCluster]:
+    """
+    Group failures by signature, largest first. Clusters confined to one file are then
+    merged per file, so a file with many unrelated failures still costs one repair.
+    """
+    clusters: "OrderedDict[str, FailureCluster]" = OrderedDict()
+    for failure in failures:
+        cluster = clusters.get(failure.signature)
+        if cluster is None:
+            cluster = clusters[failure.signature] = FailureCluster(
+                failure.signature, failure.exc_type, failure.frame, failure.template
+            )
+        cluster.failures.append(failure)
+
+    merged: List[FailureCluster] = []
+    per_file: "OrderedDict[str, FailureCluster]" = OrderedDict()
+    for cluster in clusters.values():
+        files = cluster.files
+        if len(files) > 1:
+            merged.append(cluster)
+            continue
+        existing = per_file.get(files[0])
+        if existing is None:
+            per_file[files[0]] = cluster
+        else:
+            existing.failures.extend(cluster.failures)
+            existing.signature = hashlib.sha1(f"file:{files[0]}".encode()).hexdigest()[:12]
+            existing.exc_type, existing.frame, existing.template = "mixed", "<test>", f"{len(existing.failures)} failures"
+    merged.extend(per_file.values())
+    return sorted(merged, key=lambda c: (-len(c.failures), c.signature))
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Healer
+# ──────────────────────────────────────────────────────────────────────────────
+class Healer:
+    """
+    Self-healing for generated suites: cluster the failures of a run by root-cause
+    signature, repair each cluster with at most one LLM request (or none, for known
+    mechanical causes such as a wrong `from module import *` path), write the patched
+    test files after a syntax check, and re-run only those files.
+    """
+
+    def __init__(self, repo: str, language: str, test_type: str = "unit", generator=None, validator=None):
+        self.repo = repo
+        self.spec = get_language(language)
+        self.language = self.spec.name
+        self.test_type = test_type
+        self.test_dir = suite_folder(repo)
+        if self.test_dir is None:
+            raise FileNotFoundError(f"No generated tests found for '{repo}'")
+        self.repo_path = checkout_path(repo)
+        if generator is None:
+            from backend.services.test_generator import TestGenerator
+            generator = TestGenerator()
+        self.generator = generator
+        self.validator = validator or generator.validator or TestValidator()
+        self.llm_calls = 0
+        self._modules: Optional[Dict[str, List[str]]] = None
+
+    # ──────────────────────────────────────────────────────────────────────
+    # Mechanical fixes (no LLM)
+    # ──────────────────────────────────────────────────────────────────────
+    def _module_index(self) -> Dict[str, List[str]]:
+        """Last component → dotted module names importable from the repo root (the runner's sys.path)."""
+        if self._modules is None:
+            self._modules = {}
+            for dirpath, dirs, files in os.walk(self.repo_path):
+                dirs[:] = [d for d in dirs if d.isidentifier() and d not in ("node_modules", "venv", "__pycache__")]
+                rel = os.path.relpath(dirpath, self.repo_path)
+                prefix = [] if rel == "." else rel.split(os.sep)
+                for file in files:
+                    stem, ext = os.path.splitext(file)
+                    if ext == ".py" and stem.isidentifier():
+                        parts = prefix + ([] if stem == "__init__" else [stem])
+                        if parts:
+                            self._modules.setdefault(parts[-1], []).append(".".join(parts))
+        return self._modules
+
+    def _resolve_module(self, module: str) -> Optional[str]:
+        """Best importable stand-in for a module path that doesn't import (longest matching suffix)."""
+        parts = module.split(".")
+        best, best_score, tie = None, 0, False
+        for candidate in set(self._module_index().get(parts[-1], [])):
+            if candidate == module:
+                continue
+            cparts = candidate.split(".")
+            score = 0
+            while score < min(len(parts), len(cparts)) and parts[-1 - score] == cparts[-1 - score]:
+                score += 1
+            if score > best_score:
+                best, best_score, tie = candidate, score, False
+            elif score == best_score:
+                tie = True
+        return None if tie else best
+
+    def _fix_imports(self, cluster: FailureCluster, contents: Dict[str, str]) -> Dict[str, str]:
+        """Rewrite imports of a module that doesn't exist to the repo module it most likely means."""
+        if self.spec.runner != "pytest" or cluster.exc_type not in ("ModuleNotFoundError", "ImportError", "mixed"):
+            return {}
+        patched = {}
+        for failure in cluster.failures:
+            match = MISSING_MODULE.search(failure.message) or MISSING_MODULE.search(failure.traceback)
+            if not match or failure.file in patched or failure.file not in contents:
+                continue
+            missing = re.escape(match.group("module"))
+            content = contents[failure.file]
+            # The failing import is the missing module or a submodule of it
+            imports = re.compile(rf"^(?P<head>\s*(?:from|import)\s+)(?P<module>{missing}(?:\.\w+)*)\b", re.MULTILINE)
+            new_content = content
+            for module in {m.group("module") for m in imports.finditer(content)}:
+                resolved = self._resolve_module(module)
+                if resolved:
+                    new_content = re.sub(
+                        rf"^(\s*(?:from|import)\s+){re.escape(module)}\b", rf"\g<1>{resolved}", new_content, flags=re.MULTILINE
+                    )
+            if new_content != content:
+                patched[failure.file] = new_content
+        return patched
+
+    # ──────────────────────────────────────────────────────────────────────
+    # LLM repairs: one request per cluster
+    # ──────────────────────────────────────────────────────────────────────
+    def _source_for(self, test_file: str) -> Tuple[str, str]:
+        """(repo-relative source path, code) the generated test file was made from, if it can be found."""
+        stem = os.path.splitext(os.path.basename(test_file))[0]
+        wanted = stem[len("test_"):] if stem.startswith("test_") else stem
+        for root, dirs, files in os.walk(self.repo_path):
+            dirs[:] = [d for d in dirs if not d.startswith(".") and d not in ("node_modules", "__pycache__")]
+            for file in files:
+                rel = os.path.relpath(os.path.join(root, file), self.repo_path)
+                if self.spec.is_source(file) and self.generator.sanitize_filename(os.path.splitext(rel)[0]) == wanted:
+                    with open(os.path.join(root, file), "r", encoding="utf-8", errors="ignore") as f:
+                        return rel, f.read()
+        return "(not found)", ""
+
+    @staticmethod
+    def _describe(failures: List[Failure]) -> str:
+        text = "\n\n".join(f"{f.name}: {f.message}\n{f.traceback[-1200:]}" for f in failures)
+        return text[:MAX_FAILURE_CHARS]
+
+    def _complete(self, prompt: str, content_tokens: int) -> Optional[str]:
+        prompt_tokens = count_tokens(prompt)
+        if prompt_tokens + SAFETY_MARGIN >= CONTEXT_TOKENS:
+            logger.info("[Healer] ℹ️ Repair prompt too large for the context window; skipping cluster")
+            return None
+        self.llm_calls += 1
+        try:
+            return self.generator.complete(prompt, output_budget(content_tokens, prompt_tokens))
+        except Exception as e:
+            logger.error(f"[Healer] ❌ Repair request failed: {e}")
+            return None
+
+    def _repair_file(self, cluster: FailureCluster, contents: Dict[str, str]) -> Dict[str, str]:
+        test_file = cluster.files[0]
+        source_file, source = self._source_for(test_file)
+        prompt = HEAL_FILE_PROMPT_TEMPLATE.format(
+            language=self.language, test_file=os.path.basename(test_file), source_file=source_file,
+            source=source, test_code=contents[test_file], failures=self._describe(cluster.failures),
+        )
+        response = self._complete(prompt, count_tokens(contents[test_file]))
+        fixed = self.generator.clean_test_code(response) if response else ""
+        return {test_file: fixed} if fixed and fixed != contents[test_file] else {}
+
+    def _repair_rules(self, cluster: FailureCluster, contents: Dict[str, str]) -> Dict[str, str]:
+        files = [f for f in cluster.files if f in contents]
+        example = files[0]
+        prompt = HEAL_RULES_PROMPT_TEMPLATE.format(
+            count=len(files), language=self.language, exc_type=cluster.exc_type,
+            failure=self._describe(cluster.failures[:1]), test_file=os.path.basename(example),
+            test_code=contents[example],
+            other_files="\n".join(os.path.basename(f) for f in files[1:MAX_LISTED_FILES + 1]) or "(none)",
+        )
+        response = self._complete(prompt, 256)
+        rules = self._parse_rules(response or "")
+        patched = {}
+        for file in files:
+            content = contents[file]
+            for pattern, replacement in rules:
+                content = pattern.sub(replacement, content)
+            if content != contents[file]:
+                patched[file] = content
+        return patched
+
+    @staticmethod
+    def _parse_rules(response: str) -> List[Tuple["re.Pattern", str]]:
+        text = response.strip()
+        start, end = text.find("{"), text.rfind("}")
+        try:
+            payload = json.loads(text[start:end + 1]) if start != -1 else {}
+        except json.JSONDecodeError:
+            logger.warning("[Healer] ⚠️ Repair response was not valid JSON")
+            return []
+        rules = []
+        for rule in payload.get("rules", []) if isinstance(payload, dict) else []:
+            try:
+                pattern, replacement = re.compile(rule["pattern"], re.MULTILINE), str(rule.get("replacement", ""))
+                # The replacement template (group references) is only parsed by sub()
+                pattern.sub(replacement, "")
+                rules.append((pattern, replacement))
+            except (KeyError, TypeError, IndexError, re.error) as e:
+                logger.warning(f"[Healer] ⚠️ Skipping unusable rule {rule!r}: {e}")
+        return rules
+
+    # ──────────────────────────────────────────────────────────────────────
+    # Entry point
+    # ──────────────────────────────────────────────────────────────────────
+    def _in_test_dir(self, path: str) -> bool:
+        """True if `path` resolves (symlinks included) to a file under tests/<repo>."""
+        root = os.path.realpath(self.test_dir)
+        return os.path.realpath(path).startswith(root + os.sep) and os.path.isfile(path)
+
+    def _apply(self, patches: Dict[str, str], dry_run: bool) -> Tuple[List[str], Dict[str, str]]:
+        """Syntax-check patched files and write the valid ones. Returns (written, rejected → error)."""
+        patches = {file: code for file, code in patches.items() if self._in_test_dir(file)}
+        names = {file: os.path.basename(file) for file in patches}
+        errors = self.validator.validate(self.language, {names[f]: code for f, code in patches.items()}, self.repo_path)
+        written, rejected = [], {}
+        for file, code in patches.items():
+            if errors.get(names[file]):
+                rejected[file] = errors[names[file]]
+                continue
+            if not dry_run:
+                with open(file, "w", encoding="utf-8") as f:
+                    f.write(code)
+            written.append(file)
+        return written, rejected
+
+    def heal(
+        self,
+        results: Optional[List[Dict]] = None,
+        max_clusters: int = MAX_CLUSTERS,
+        dry_run: bool = False,
+        workers: Optional[int] = None,
+    ) -> Dict:
+        """
+        Heal the failures in `results` (a run's per-test records); runs the suite first
+        when none are given. Returns a report of clusters, fixes and the re-run.
+        """
+        if results is None:
+            runner = TestRunner(language=self.language, test_type=self.test_type, repo=self.repo, workers=workers)
+            results = list(runner.iter_results())
+
+        with stage_timer("heal", "cluster"):
+            failures, outside = [], set()
+            for failure in parse_failures(results):
+                if self._in_test_dir(failure.file):
+                    failures.append(failure)
+                else:
+                    outside.add(failure.file)
+            clusters = cluster_failures(failures)
+        if outside:
+            logger.warning(f"[Healer] ⚠️ Ignoring {len(outside)} failing files outside {self.test_dir}")
+        logger.info(f"[Healer] 🩺 {len(failures)} failures in {len(clusters)} clusters for {self.repo}")
+
+        contents: Dict[str, str] = {}
+        for failure in failures:
+            if failure.file not in contents:
+                with open(failure.file, "r", encoding="utf-8", errors="ignore") as f:
+                    contents[failure.file] = f.read()
+
+        report_clusters, patched_files = [], []
+        for index, cluster in enumerate(clusters):
+            entry = {**cluster.to_dict(), "fix": None, "patched": [], "rejected": {}}
+            report_clusters.append(entry)
+            if index >= max_clusters:
+                continue
+
+            with stage_timer("heal", "repair"):
+                patches = self._fix_imports(cluster, contents)
+                entry["fix"] = "import_path" if patches else None
+                remaining = [f for f in cluster.files if f not in patches]
+                if remaining:
+                    rest = FailureCluster(
+                        cluster.signature, cluster.exc_type, cluster.frame, cluster.template,
+                        [f for f in cluster.failures if f.file in remaining],
+                    )
+                    llm_patches = (self._repair_file if len(remaining) == 1 else self._repair_rules)(rest, contents)
+                    if llm_patches:
+                        entry["fix"] = "llm_file" if len(remaining) == 1 else "llm_rules"
+                        patches.update(llm_patches)
+
+            if not patches:
+                continue
+            written, rejected = self._apply(patches, dry_run)
+            for file in written:
+                contents[file] = patches[file]
+            entry["patched"], entry["rejected"] = written, rejected
+            patched_files.extend(f for f in written if f not in patched_files)
+
+        report = {
+            "repo": self.repo, "language": self.language, "failures": len(failures),
+            "clusters": report_clusters, "llm_calls": self.llm_calls,
+            "patched_files": patched_files, "dry_run": dry_run, "rerun": None,
+        }
+        if patched_files and not dry_run:
+            runner = TestRunner(
+                language=self.language, test_type=self.test_type, repo=self.repo, workers=workers, files=patched_files
+            )
+            rerun = list(runner.iter_results())
+            still_failing = {r["file"] for r in rerun if r["status"] in ("failed", "error")}
+            report["rerun"] = {"run_id": runner.run_id, "summary": runner.summary}
+            report["healed_files"] = [f for f in patched_files if f not in still_failing]
+            logger.info(
+                f"[Healer] ✅ Healed {len(report['healed_files'])}/{len(patched_files)} patched files "
+                f"with {self.llm_calls} LLM calls"
+            )
+        return report
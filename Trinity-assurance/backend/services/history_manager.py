@@ -1,57 +1,511 @@
 import os
 import json
+import time
+import zlib
+import base64
+import hashlib
 import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.database.db import get_db
+from backend.utils.metrics import cache_event, timed
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+HISTORY_FIELDS = ("id", "file", "language", "test_type", "output_path", "created_at", "output_size", "ai_output")
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Per-test results keep only a bounded, compressed traceback for failures
+MAX_TRACEBACK_CHARS = 8000
+RESULT_STATUSES = ("passed", "failed", "error", "skipped")
+# Weight of the latest run in per-file duration / failure-rate moving averages
+FILE_STATS_ALPHA = 0.3
+
+CACHE_REPOS = int(os.getenv("TRINITY_HISTORY_CACHE_REPOS", "256"))
+CACHE_PAGES_PER_REPO = 16
+# Writes from this process invalidate immediately; the TTL bounds staleness when
+# several worker processes share one database.
+CACHE_TTL_SECONDS = float(os.getenv("TRINITY_HISTORY_CACHE_TTL", "30"))
+
+
+class HistoryCache:
+    """
+    Process-wide LRU of per-repo read state: the summary (which also carries the
+    version token used for ETags) and a few recently served pages.
+    Any write to a repo drops its entry.
+    """
+
+    def __init__(self, max_repos: int = CACHE_REPOS, ttl_seconds: float = CACHE_TTL_SECONDS):
+        self.max_repos = max_repos
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _entry(self, repo: str) -> Dict[str, Any]:
+        entry = self._entries.get(repo)
+        if entry is None or time.monotonic() - entry["loaded_at"] > self.ttl_seconds:
+            entry = {"loaded_at": time.monotonic(), "summary": None, "pages": OrderedDict()}
+            self._entries[repo] = entry
+        self._entries.move_to_end(repo)
+        while len(self._entries) > self.max_repos:
+            self._entries.popitem(last=False)
+        return entry
+
+    def get_summary(self, repo: str) -> Optional[Dict]:
+        with self._lock:
+            summary = self._entry(repo)["summary"]
+            self._count(summary is not None)
+            return summary
+
+    def set_summary(self, repo: str, summary: Dict) -> None:
+        with self._lock:
+            self._entry(repo)["summary"] = summary
+
+    def get_page(self, repo: str, key: Tuple) -> Optional[Dict]:
+        with self._lock:
+            page = self._entry(repo)["pages"].get(key)
+            self._count(page is not None)
+            return page
+
+    def set_page(self, repo: str, key: Tuple, page: Dict) -> None:
+        with self._lock:
+            pages = self._entry(repo)["pages"]
+            pages[key] = page
+            while len(pages) > CACHE_PAGES_PER_REPO:
+                pages.popitem(last=False)
+
+    def invalidate(self, repo: str) -> None:
+        with self._lock:
+            self._entries.pop(repo, None)
+
+    def _count(self, hit: bool) -> None:
+        cache_event("history", hit)
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+
+history_cache = HistoryCache()
+
+
 class TestHistory:
-    def __init__(self, base_dir: str = "tests"):
+    """
+    Generated-test history backed by the SQLite store in backend/database/db.py.
+    `save` is a single indexed insert; wrap a generation run in `batch()` to commit once.
+    This is the only history interface: the legacy test_history_manager functions
+    delegate here, and reads are served from `history_cache` when possible.
+    """
+
+    def __init__(self, base_dir: str = "tests", db_path: Optional[str] = None):
         self.base_dir = base_dir
         self.history_dir = os.path.join(self.base_dir, ".history")
         os.makedirs(self.history_dir, exist_ok=True)
+        self.db = get_db(db_path or os.path.join(self.history_dir, "trinity.db"))
+        self._pending = threading.local()
 
     def sanitize_repo(self, repo: str) -> str:
         return repo.replace("/", "_").replace("-", "_")
 
-    def save(self, repo: str, file: str, language: str, test_type: str, output_path: str, ai_output: str):
-        repo_sanitized = self.sanitize_repo(repo)
-        history_path = os.path.join(self.history_dir, f"{repo_sanitized}.json")
+    @contextmanager
+    def batch(self):
+        """Buffer `save` calls on this thread and write them in one transaction on exit."""
+        if getattr(self._pending, "records", None) is not None:
+            yield
+            return
+        self._pending.records = []
+        try:
+            yield
+        finally:
+            records, self._pending.records = self._pending.records, None
+            if records:
+                self._write(records)
+                logger.info(f"[Trinity] ✅ History batch saved: {len(records)} records")
 
+    def save(
+        self,
+        repo: str,
+        file: str,
+        language: str,
+        test_type: str,
+        output_path: str,
+        ai_output: str,
+        result: Optional[Dict] = None,
+        created_at: Optional[float] = None,
+    ):
         record = {
+            "repo": self.sanitize_repo(repo),
             "file": file,
-            "language": language,
-            "test_type": test_type,
+            "language": str(getattr(language, "value", language)),
+            "test_type": str(getattr(test_type, "value", test_type)),
             "output_path": output_path,
-            "ai_output": ai_output
+            "created_at": created_at if created_at is not None else time.time(),
+            "ai_output": ai_output or "",
+            "result": json.dumps(result) if result is not None else None,
         }
 
-        history = []
-        if os.path.exists(history_path):
-            try:
-                with open(history_path, "r") as f:
-                    history = json.load(f)
-            except json.JSONDecodeError:
-                logger.warning(f"[Trinity] Corrupt history file. Starting fresh: {history_path}")
-                history = []
-
-        history.append(record)
-
-        with open(history_path, "w") as f:
-            json.dump(history, f, indent=2)
+        pending = getattr(self._pending, "records", None)
+        if pending is not None:
+            pending.append(record)
+            return
+
+        self._write([record])
         logger.info(f"[Trinity] ✅ History saved for: {file}")
 
-    def fetch(self, repo: str):
+    @timed("history", "write")
+    def _write(self, records: List[Dict]):
+        blobs = {}
+        rows = []
+        for r in records:
+            body = r["ai_output"].encode("utf-8")
+            sha = hashlib.sha256(body).hexdigest()
+            blobs[sha] = zlib.compress(body)
+            rows.append((
+                r["repo"], r["file"], r["language"], r["test_type"],
+                r["output_path"], r["created_at"], sha, len(body), r["result"],
+            ))
+
+        with self.db.transaction() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO history_blobs (sha, body) VALUES (?, ?)",
+                blobs.items(),
+            )
+            conn.executemany(
+                "INSERT INTO history"
+                " (repo, file, language, test_type, output_path, created_at, output_sha, output_size, result)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+        for repo in {r["repo"] for r in records}:
+            history_cache.invalidate(repo)
+
+    def load_output(self, output_sha: Optional[str]) -> str:
+        if not output_sha:
+            return ""
+        row = self.db.connection().execute(
+            "SELECT body FROM history_blobs WHERE sha = ?", (output_sha,)
+        ).fetchone()
+        return zlib.decompress(row["body"]).decode("utf-8") if row else ""
+
+    def fetch(self, repo: str, include_output: bool = True) -> List[Dict]:
         repo_sanitized = self.sanitize_repo(repo)
-        history_path = os.path.join(self.history_dir, f"{repo_sanitized}.json")
-
-        if os.path.exists(history_path):
-            try:
-                with open(history_path, "r") as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
-                logger.error(f"[Trinity] ❌ Failed to decode history file: {history_path}")
-                return []
-
-        logger.warning(f"[Trinity] ⚠️ No history file found for repo: {repo}")
-        return []
\ No newline at end of file
+        rows = self.db.connection().execute(
+            "SELECT id, file, language, test_type, output_path, created_at, output_sha, output_size"
+            " FROM history WHERE repo = ? ORDER BY id",
+            (repo_sanitized,),
+        ).fetchall()
+
+        if not rows:
+            logger.warning(f"[Trinity] ⚠️ No history found for repo: {repo}")
+
+        history = []
+        for row in rows:
+            record = dict(row)
+            output_sha = record.pop("output_sha")
+            if include_output:
+                record["ai_output"] = self.load_output(output_sha)
+            history.append(record)
+        return history
+
+    # ──────────────────────────────────────────────────────────────────────
+    # Paginated queries (newest first, keyset cursor on id)
+    # ──────────────────────────────────────────────────────────────────────
+    @staticmethod
+    def encode_cursor(record_id: int) -> str:
+        return base64.urlsafe_b64encode(str(record_id).encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> int:
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            return int(base64.urlsafe_b64decode(padded.encode()).decode())
+        except Exception:
+            raise ValueError(f"Invalid cursor: {cursor}")
+
+    def _filters(
+        self,
+        repo: str,
+        language: Optional[str] = None,
+        test_type: Optional[str] = None,
+        file_prefix: Optional[str] = None,
+        file: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+    ):
+        clauses = ["repo = ?"]
+        params: List = [self.sanitize_repo(repo)]
+        if language:
+            clauses.append("language = ?")
+            params.append(language)
+        if test_type:
+            clauses.append("test_type = ?")
+            params.append(test_type)
+        if file_prefix:
+            # Range scan instead of LIKE so the (repo, file) index is usable
+            clauses.append("file >= ? AND file < ?")
+            params.extend([file_prefix, file_prefix + "\U0010ffff"])
+        if file:
+            clauses.append("file = ?")
+            params.append(file)
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("created_at < ?")
+            params.append(until)
+        return " AND ".join(clauses), params
+
+    def query(
+        self,
+        repo: str,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        include_output: bool = False,
+        **filters,
+    ) -> Dict:
+        """
+        One page of history records, newest first.
+        `ai_output` is only loaded when requested via `include_output` or `fields`.
+        Returns {"items": [...], "next_cursor": str | None}.
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        selected = [f for f in (fields or HISTORY_FIELDS) if f in HISTORY_FIELDS]
+        want_output = include_output or (fields is not None and "ai_output" in fields)
+        if want_output and "ai_output" not in selected:
+            selected.append("ai_output")
+        if not want_output and "ai_output" in selected:
+            selected.remove("ai_output")
+
+        cache_key = (limit, cursor, tuple(selected), tuple(sorted(filters.items())))
+        if not want_output:
+            cached = history_cache.get_page(self.sanitize_repo(repo), cache_key)
+            if cached is not None:
+                return cached
+
+        where, params = self._filters(repo, **filters)
+        if cursor:
+            where += " AND id < ?"
+            params.append(self.decode_cursor(cursor))
+
+        rows = self.db.connection().execute(
+            "SELECT id, file, language, test_type, output_path, created_at, output_sha, output_size"
+            f" FROM history WHERE {where} ORDER BY id DESC LIMIT ?",
+            (*params, limit + 1),
+        ).fetchall()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        items = []
+        for row in rows:
+            record = dict(row)
+            if want_output:
+                record["ai_output"] = self.load_output(record["output_sha"])
+            items.append({k: record[k] for k in selected})
+
+        next_cursor = self.encode_cursor(rows[-1]["id"]) if has_more else None
+        page = {"items": items, "next_cursor": next_cursor}
+        if not want_output:
+            history_cache.set_page(self.sanitize_repo(repo), cache_key, page)
+        return page
+
+    # ──────────────────────────────────────────────────────────────────────
+    # Summaries (dashboard + ETag version), served from history_cache
+    # ──────────────────────────────────────────────────────────────────────
+    def summary(self, repo: str) -> Dict:
+        repo_sanitized = self.sanitize_repo(repo)
+        cached = history_cache.get_summary(repo_sanitized)
+        if cached is not None:
+            return cached
+
+        conn = self.db.connection()
+        totals = conn.execute(
+            "SELECT COUNT(*) AS n, COALESCE(MAX(id), 0) AS last_id, MAX(created_at) AS last_updated,"
+            " COUNT(DISTINCT file) AS files"
+            " FROM history WHERE repo = ?",
+            (repo_sanitized,),
+        ).fetchone()
+        by_language = conn.execute(
+            "SELECT language, COUNT(*) AS n FROM history WHERE repo = ? GROUP BY language",
+            (repo_sanitized,),
+        ).fetchall()
+        by_type = conn.execute(
+            "SELECT test_type, COUNT(*) AS n FROM history WHERE repo = ? GROUP BY test_type",
+            (repo_sanitized,),
+        ).fetchall()
+
+        summary = {
+            "repo": repo_sanitized,
+            "total": totals["n"],
+            "files": totals["files"],
+            "last_updated": totals["last_updated"],
+            "languages": {row["language"]: row["n"] for row in by_language},
+            "test_types": {row["test_type"]: row["n"] for row in by_type},
+            "version": f"{totals['n']}-{totals['last_id']}",
+        }
+        history_cache.set_summary(repo_sanitized, summary)
+        return summary
+
+    def version(self, repo: str) -> str:
+        """Cheap change token for a repo's history (record count + newest id)."""
+        return self.summary(repo)["version"]
+
+    def repos(self) -> List[str]:
+        rows = self.db.connection().execute("SELECT DISTINCT repo FROM history ORDER BY repo").fetchall()
+        return [row["repo"] for row in rows]
+
+    def fetch_runs(self, repo: str) -> List[Dict]:
+        """Records saved with a `result` (legacy test_history_manager shape), newest first."""
+        rows = self.db.connection().execute(
+            "SELECT created_at, output_sha, result FROM history"
+            " WHERE repo = ? AND result IS NOT NULL ORDER BY id DESC",
+            (self.sanitize_repo(repo),),
+        ).fetchall()
+        return [
+            {
+                "timestamp": time.strftime("%Y%m%d_%H%M%S", time.localtime(row["created_at"])),
+                "repo": repo,
+                "test_code": self.load_output(row["output_sha"]),
+                "result": json.loads(row["result"]),
+            }
+            for row in rows
+        ]
+
+    # ──────────────────────────────────────────────────────────────────────
+    # Generation runs (incremental generation baseline)
+    # ──────────────────────────────────────────────────────────────────────
+    def record_generation(
+        self, repo: str, language: str, test_type: str, commit_sha: str,
+        base_sha: Optional[str] = None, files: int = 0,
+    ) -> None:
+        with self.db.transaction() as conn:
+            conn.execute(
+                "INSERT INTO generation_runs (repo, language, test_type, commit_sha, base_sha, files, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self.sanitize_repo(repo), str(getattr(language, "value", language)),
+                    str(getattr(test_type, "value", test_type)), commit_sha, base_sha, files, time.time(),
+                ),
+            )
+
+    def last_generated_commit(self, repo: str, language: str, test_type: str) -> Optional[str]:
+        row = self.db.connection().execute(
+            "SELECT commit_sha FROM generation_runs WHERE repo = ? AND language = ? AND test_type = ?"
+            " ORDER BY id DESC LIMIT 1",
+            (
+                self.sanitize_repo(repo), str(getattr(language, "value", language)),
+                str(getattr(test_type, "value", test_type)),
+            ),
+        ).fetchone()
+        return row["commit_sha"] if row else None
+
+    # ──────────────────────────────────────────────────────────────────────
+    # Structured test runs
+    # ──────────────────────────────────────────────────────────────────────
+    def start_run(self, repo: str, language: str, test_type: str) -> int:
+        with self.db.transaction() as conn:
+            cursor = conn.execute(
+                "INSERT INTO test_runs (repo, language, test_type, started_at) VALUES (?, ?, ?, ?)",
+                (self.sanitize_repo(repo), str(language), str(test_type), time.time()),
+            )
+            return cursor.lastrowid
+
+    def record_results(self, run_id: int, results: List[Dict]) -> None:
+        """Append a batch of per-test records to a run in one transaction."""
+        rows = []
+        for r in results:
+            traceback = None
+            if r.get("status") in ("failed", "error") and r.get("traceback"):
+                traceback = zlib.compress(r["traceback"][-MAX_TRACEBACK_CHARS:].encode("utf-8"))
+            rows.append((
+                run_id, r.get("nodeid", ""), r.get("file", ""), r.get("status", "error"),
+                float(r.get("duration") or 0.0), (r.get("message") or "")[:1000], traceback,
+            ))
+        with self.db.transaction() as conn:
+            conn.executemany(
+                "INSERT INTO test_results (run_id, nodeid, file, status, duration, message, traceback)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def finish_run(self, run_id: int, summary: Dict) -> None:
+        with self.db.transaction() as conn:
+            conn.execute(
+                "UPDATE test_runs SET finished_at = ?, passed = ?, failed = ?, errors = ?, skipped = ?, duration = ?"
+                " WHERE id = ?",
+                (
+                    time.time(), summary.get("passed", 0), summary.get("failed", 0),
+                    summary.get("error", 0), summary.get("skipped", 0), summary.get("duration", 0.0), run_id,
+                ),
+            )
+
+    def list_test_runs(self, repo: str, limit: int = 20) -> List[Dict]:
+        rows = self.db.connection().execute(
+            "SELECT * FROM test_runs WHERE repo = ? ORDER BY id DESC LIMIT ?",
+            (self.sanitize_repo(repo), limit),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_test_run(self, run_id: int) -> Optional[Dict]:
+        row = self.db.connection().execute("SELECT * FROM test_runs WHERE id = ?", (run_id,)).fetchone()
+        return dict(row) if row else None
+
+    def get_test_run_results(self, run_id: int, status: Optional[str] = None) -> List[Dict]:
+        query = "SELECT nodeid, file, status, duration, message, traceback FROM test_results WHERE run_id = ?"
+        params: List[Any] = [run_id]
+        if status:
+            query += " AND status = ?"
+            params.append(status)
+        results = []
+        for row in self.db.connection().execute(query, params):
+            record = dict(row)
+            record["traceback"] = zlib.decompress(record["traceback"]).decode("utf-8") if record["traceback"] else ""
+            results.append(record)
+        return results
+
+    # ──────────────────────────────────────────────────────────────────────
+    # Per-file timing / failure stats
+    # ──────────────────────────────────────────────────────────────────────
+    def record_file_stats(self, repo: str, language: str, files: Dict[str, Dict]) -> None:
+        """
+        Fold one run into per-file moving averages.
+        `files` maps test file → {"duration": seconds, "failed": bool}.
+        """
+        now = time.time()
+        rows = [
+            (
+                self.sanitize_repo(repo), str(getattr(language, "value", language)), file,
+                float(f["duration"]), 1.0 if f["failed"] else 0.0, now if f["failed"] else 0.0, now,
+            )
+            for file, f in files.items()
+        ]
+        with self.db.transaction() as conn:
+            conn.executemany(
+                "INSERT INTO test_file_stats"
+                " (repo, language, file, runs, avg_duration, failure_rate, last_duration, last_failed_at, last_run_at)"
+                " VALUES (?1, ?2, ?3, 1, ?4, ?5, ?4, ?6, ?7)"
+                " ON CONFLICT (repo, language, file) DO UPDATE SET"
+                "   runs = runs + 1,"
+                f"  avg_duration = {1 - FILE_STATS_ALPHA} * avg_duration + {FILE_STATS_ALPHA} * excluded.avg_duration,"
+                f"  failure_rate = {1 - FILE_STATS_ALPHA} * failure_rate + {FILE_STATS_ALPHA} * excluded.failure_rate,"
+                "   last_duration = excluded.last_duration,"
+                "   last_failed_at = MAX(last_failed_at, excluded.last_failed_at),"
+                "   last_run_at = excluded.last_run_at",
+                rows,
+            )
+
+    def get_file_stats(self, repo: str, language: str) -> List[Dict]:
+        rows = self.db.connection().execute(
+            "SELECT file, runs, avg_duration, failure_rate, last_duration, last_failed_at, last_run_at"
+            " FROM test_file_stats WHERE repo = ? AND language = ?",
+            (self.sanitize_repo(repo), str(getattr(language, "value", language))),
+        ).fetchall()
+        return [dict(row) for row in rows]
@@ -0,0 +1,285 @@
+# backend/services/impact_analyzer.py
+
+import os
+import re
+import ast
+import json
+import hashlib
+import logging
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set
+
+from backend.services.language_detector import LANGUAGES, family_extensions
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+IMPACT_CACHE_DIR = os.getenv("TRINITY_IMPACT_CACHE_DIR", os.path.join("tests", ".cache", "impact"))
+# Bump when the parsed-import format changes so stale caches are ignored
+GRAPH_CACHE_VERSION = 1
+
+# JS and TS import each other, so both see the whole family
+LANGUAGE_EXTENSIONS = {name: family_extensions(name) for name in LANGUAGES}
+JS_EXTENSIONS = LANGUAGE_EXTENSIONS["javascript"]
+
+IGNORED_DIRS = {"node_modules", "__pycache__", "venv", "build", "dist", "target", "_history"}
+
+JS_IMPORT = re.compile(
+    r"""(?:\bimport\s+(?:[\w*${}\s,]+\s+from\s+)?|\bexport\s+[\w*${}\s,]+\s+from\s+|\brequire\s*\(\s*|\bimport\s*\(\s*)"""
+    r"""['"]([^'"]+)['"]"""
+)
+JAVA_PACKAGE = re.compile(r"^\s*package\s+([\w.]+)\s*;", re.MULTILINE)
+JAVA_IMPORT = re.compile(r"^\s*import\s+(static\s+)?([\w.]+)(\.\*)?\s*;", re.MULTILINE)
+JAVA_IDENTIFIER = re.compile(r"\b[A-Z]\w*\b")
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Import extraction (raw specifiers; resolution happens against the file index)
+# ──────────────────────────────────────────────────────────────────────────────
+def _python_imports(source: str) -> Dict:
+    """[module, names, level] triples for every import statement."""
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return {"imports": []}
+
+    imports = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.extend([alias.name, [], 0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            imports.append([node.module or "", [alias.name for alias in node.names], node.level])
+    return {"imports": imports}
+
+
+def _js_imports(source: str) -> Dict:
+    return {"imports": sorted(set(JS_IMPORT.findall(source)))}
+
+
+def _java_imports(source: str) -> Dict:
+    package = JAVA_PACKAGE.search(source)
+    imports = []
+    for is_static, name, wildcard in JAVA_IMPORT.findall(source):
+        if is_static and not wildcard:
+            name = name.rsplit(".", 1)[0]  # static member → its class
+        imports.append([name, bool(wildcard) and not is_static])
+    return {
+        "package": package.group(1) if package else "",
+        "imports": imports,
+        # Same-package classes need no import; keep candidate identifiers to match against
+        "identifiers": sorted(set(JAVA_IDENTIFIER.findall(source))),
+    }
+
+
+def parse_imports(path: str) -> Dict:
+    try:
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            source = f.read()
+    except OSError:
+        return {"imports": []}
+    if path.endswith(".py"):
+        return _python_imports(source)
+    if path.endswith(".java"):
+        return _java_imports(source)
+    return _js_imports(source)
+
+
+class ImpactAnalyzer:
+    """
+    File-level dependency graph over one or more roots (e.g. repos/<repo> and tests/<repo>),
+    built from import statements and used to map changed files to the tests they affect.
+
+    Parsed imports are cached on disk per file, keyed by (mtime, size), so `update()` after
+    a new commit only re-parses files that changed; edges are re-resolved each update
+    because added or removed files can change where an import points.
+    """
+
+    def __init__(self, roots: List[str], language: str, cache_dir: str = IMPACT_CACHE_DIR):
+        self.roots = [os.path.abspath(r) for r in roots if r and os.path.isdir(r)]
+        self.language = language.lower()
+        self.extensions = LANGUAGE_EXTENSIONS.get(self.language, ())
+        key = hashlib.sha1("|".join([self.language, *self.roots]).encode()).hexdigest()[:16]
+        self.cache_path = os.path.join(cache_dir, f"{key}.json")
+        self.entries: Dict[str, Dict] = {}
+        self.graph: Dict[str, Set[str]] = {}
+        self.reverse: Dict[str, Set[str]] = {}
+
+    # ──────────────────────────────────────────────────────────────────────
+    # Cache
+    # ──────────────────────────────────────────────────────────────────────
+    def _load_cache(self) -> Dict[str, Dict]:
+        try:
+            with open(self.cache_path, "r") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+        return data.get("files", {}) if data.get("version") == GRAPH_CACHE_VERSION else {}
+
+    def _save_cache(self) -> None:
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp = f"{self.cache_path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"version": GRAPH_CACHE_VERSION, "roots": self.roots, "files": self.entries}, f)
+        os.replace(tmp, self.cache_path)
+
+    # ──────────────────────────────────────────────────────────────────────
+    # Graph construction
+    # ──────────────────────────────────────────────────────────────────────
+    def _walk(self) -> Iterable[str]:
+        for root in self.roots:
+            for dirpath, dirs, files in os.walk(root):
+                dirs[:] = [d for d in dirs if d not in IGNORED_DIRS and not d.startswith(".")]
+                for f in files:
+                    if f.endswith(self.extensions):
+                        yield os.path.join(dirpath, f)
+
+    def update(self) -> Dict[str, Set[str]]:
+        """Refresh the graph, re-parsing only files whose mtime/size changed since the cached run."""
+        cached = self._load_cache()
+        entries: Dict[str, Dict] = {}
+        parsed = 0
+        for path in self._walk():
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            stamp = [st.st_mtime_ns, st.st_size]
+            entry = cached.get(path)
+            if entry is None or entry.get("stamp") != stamp:
+                entry = {"stamp": stamp, **parse_imports(path)}
+                parsed += 1
+            entries[path] = entry
+
+        self.entries = entries
+        if parsed or len(entries) != len(cached):
+            self._save_cache()
+        self._resolve()
+        logger.info(f"[Impact] 🕸️ Dependency graph: {len(entries)} files ({parsed} re-parsed)")
+        return self.graph
+
+    def _resolve(self) -> None:
+        if self.language == "python":
+            resolver = self._python_resolver()
+        elif self.language == "java":
+            resolver = self._java_resolver()
+        else:
+            resolver = self._js_resolve
+
+        self.graph = {}
+        self.reverse = {path: set() for path in self.entries}
+        for path, entry in self.entries.items():
+            deps = {d for d in resolver(path, entry) if d != path and d in self.entries}
+            self.graph[path] = deps
+            for dep in deps:
+                self.reverse[dep].add(path)
+
+    def _python_resolver(self):
+        # Every root is a sys.path entry: dotted module name → file
+        modules: Dict[str, str] = {}
+        for path in self.entries:
+            for root in self.roots:
+                if path.startswith(root + os.sep):
+                    rel = os.path.splitext(os.path.relpath(path, root))[0].split(os.sep)
+                    if rel[-1] == "__init__":
+                        rel = rel[:-1]
+                    if rel:
+                        modules.setdefault(".".join(rel), path)
+
+        def package_of(path: str) -> Optional[str]:
+            for root in self.roots:
+                if path.startswith(root + os.sep):
+                    rel = os.path.relpath(os.path.dirname(path), root)
+                    return "" if rel == "." else rel.replace(os.sep, ".")
+            return None
+
+        def resolve(path: str, entry: Dict) -> Set[str]:
+            deps: Set[str] = set()
+            for module, names, level in entry.get("imports", []):
+                if level:
+                    package = package_of(path)
+                    if package is None:
+                        continue
+                    parts = package.split(".") if package else []
+                    if level > 1:
+                        parts = parts[:-(level - 1)]
+                    module = ".".join(p for p in (*parts, module) if p)
+
+                # Importing a.b.c also imports packages a and a.b
+                pieces = module.split(".") if module else []
+                for i in range(1, len(pieces) + 1):
+                    target = modules.get(".".join(pieces[:i]))
+                    if target:
+                        deps.add(target)
+                for name in names:
+                    target = modules.get(f"{module}.{name}" if module else name)
+                    if target:
+                        deps.add(target)
+            return deps
+
+        return resolve
+
+    def _java_resolver(self):
+        classes: Dict[str, str] = {}
+        packages: Dict[str, Dict[str, str]] = {}
+        for path, entry in self.entries.items():
+            simple = os.path.splitext(os.path.basename(path))[0]
+            package = entry.get("package", "")
+            classes[f"{package}.{simple}" if package else simple] = path
+            packages.setdefault(package, {})[simple] = path
+
+        def resolve(path: str, entry: Dict) -> Set[str]:
+            deps: Set[str] = set()
+            for name, wildcard in entry.get("imports", []):
+                if wildcard:
+                    deps.update(packages.get(name, {}).values())
+                    continue
+                # Nested classes: walk up a.b.Outer.Inner until a file matches
+                while name and name not in classes:
+                    name = name.rpartition(".")[0]
+                if name:
+                    deps.add(classes[name])
+            same_package = packages.get(entry.get("package", ""), {})
+            deps.update(same_package[i] for i in entry.get("identifiers", []) if i in same_package)
+            return deps
+
+        return resolve
+
+    def _js_resolve(self, path: str, entry: Dict) -> Set[str]:
+        deps: Set[str] = set()
+        for spec in entry.get("imports", []):
+            if not spec.startswith("."):
+                continue  # bare specifiers are packages, not repo files
+            base = os.path.normpath(os.path.join(os.path.dirname(path), spec))
+            candidates = [base, *(base + ext for ext in JS_EXTENSIONS)]
+            candidates += [os.path.join(base, "index" + ext) for ext in JS_EXTENSIONS]
+            # "./x.js" written in TS sources often refers to x.ts
+            stem, ext = os.path.splitext(base)
+            if ext in JS_EXTENSIONS:
+                candidates += [stem + e for e in JS_EXTENSIONS]
+            for candidate in candidates:
+                if candidate in self.entries:
+                    deps.add(candidate)
+                    break
+        return deps
+
+    # ──────────────────────────────────────────────────────────────────────
+    # Queries
+    # ──────────────────────────────────────────────────────────────────────
+    def dependents(self, files: Iterable[str]) -> Set[str]:
+        """Changed files plus everything that imports them, transitively."""
+        seen: Set[str] = set()
+        queue = deque(os.path.abspath(f) for f in files)
+        while queue:
+            path = queue.popleft()
+            if path in seen:
+                continue
+            seen.add(path)
+            queue.extend(self.reverse.get(path, ()))
+        return seen
+
+    def affected_tests(self, changed_files: Iterable[str], test_files: Iterable[str]) -> List[str]:
+        """Subset of test_files (order kept) that depend on any changed file, or changed themselves."""
+        if not self.entries:
+            self.update()
+        impacted = self.dependents(changed_files)
+        return [t for t in test_files if os.path.abspath(t) in impacted]
@@ -0,0 +1,401 @@
+# backend/services/java_executor.py
+
+import os
+import re
+import json
+import queue
+import shutil
+import hashlib
+import logging
+import time
+import tempfile
+import threading
+import subprocess
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from backend.services.python_executor import HARD_TIMEOUT_GRACE, TEST_TIMEOUT, WorkerGroup
+from backend.services.test_sharder import lpt_shards
+from backend.utils.git_ops import repo_lock
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+AGENT_SRC_DIR = os.path.join(PROJECT_ROOT, "agents", "java-agent", "src")
+JUNIT_PLATFORM_JAR = os.getenv(
+    "JUNIT_PLATFORM_JAR",
+    os.path.join(PROJECT_ROOT, "agents", "java-agent", "lib", "junit-platform-console-standalone.jar"),
+)
+JAVA_CACHE_DIR = os.getenv("TRINITY_JAVA_CACHE_DIR", os.path.join("tests", ".cache", "java"))
+DEFAULT_WORKERS = int(os.getenv("TRINITY_JAVA_WORKERS", "0")) or max(1, (os.cpu_count() or 2) // 2)
+JVM_OPTS = os.getenv("TRINITY_JVM_OPTS", "-Xss4m -XX:+UseSerialGC -XX:TieredStopAtLevel=1").split()
+
+JAVAC_ERROR = re.compile(r"^(?P<file>.+?\.java):(?P<line>\d+): error: (?P<message>.*)$")
+PACKAGE_DECL = re.compile(r"^\s*package\s+([\w.]+)\s*;", re.MULTILINE)
+IDENTIFIER = re.compile(r"\b[A-Za-z_$][\w$]*\b")
+
+IGNORED_DIRS = {".history", "_history", ".cache"}
+
+
+def _sha256(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _read_stamp(path: str) -> str:
+    try:
+        with open(path) as f:
+            return f.read()
+    except OSError:
+        return ""
+
+
+def _write_atomic(path: str, text: str) -> None:
+    """Write via a uniquely named temp file, so concurrent writers never share one."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def discover_java_tests(test_dir: str) -> List[str]:
+    found: List[str] = []
+    for root, dirs, files in os.walk(test_dir):
+        dirs[:] = sorted(d for d in dirs if d not in IGNORED_DIRS and not d.startswith("."))
+        found.extend(os.path.join(root, f) for f in sorted(files) if f.endswith(".java"))
+    return found
+
+
+def _package(source: str) -> str:
+    match = PACKAGE_DECL.search(source)
+    return match.group(1) if match else ""
+
+
+def class_name_for(java_file: str) -> str:
+    """Fully-qualified class name from the package declaration + file name."""
+    with open(java_file, "r", encoding="utf-8", errors="ignore") as f:
+        package = _package(f.read())
+    simple = os.path.splitext(os.path.basename(java_file))[0]
+    return f"{package}.{simple}" if package else simple
+
+
+def dependents(changed: List[str], files: List[str]) -> Set[str]:
+    """
+    Files that have to be recompiled along with `changed`: every file in a changed file's
+    package (package-private members, imports not needed) and, transitively, every file
+    that mentions a recompiled class by name. Text-based, so it errs on the side of more.
+    """
+    info: Dict[str, Tuple[str, str, Set[str]]] = {}
+    for f in files:
+        with open(f, "r", encoding="utf-8", errors="ignore") as handle:
+            source = handle.read()
+        simple = os.path.splitext(os.path.basename(f))[0]
+        info[f] = (_package(source), simple, set(IDENTIFIER.findall(source)))
+
+    packages = {info[f][0] for f in changed if f in info}
+    result = set(changed) | {f for f, (package, _, _) in info.items() if package in packages}
+    frontier = set(result)
+    while frontier:
+        names = {info[f][1] for f in frontier if f in info}
+        frontier = {f for f, (_, _, used) in info.items() if f not in result and used & names}
+        result |= frontier
+    return result
+
+
+def _error_record(file: str, name: str, message: str, traceback: str = "") -> Dict:
+    return {
+        "nodeid": f"{file}::{name}", "file": file, "name": name, "status": "error",
+        "duration": 0.0, "message": message, "traceback": traceback,
+    }
+
+
+class JavaTestExecutor:
+    """
+    Incremental javac + single-JVM JUnit Platform execution.
+
+    - Sources are hashed; only new/changed files and their dependents (same package,
+      or referencing a changed class) are recompiled into a per-suite class
+      directory (manifest.json maps file → source sha256).
+    - The agent in agents/java-agent/src (Main/Runner/Reporter) is compiled once
+      against JUNIT_PLATFORM_JAR and runs whole shards of classes in one JVM,
+      streaming one JSON line per test. JUnit enforces the per-test timeout inside
+      the JVM; a watchdog kills a JVM that stays silent past timeout + grace.
+    - Shards run in parallel JVMs, balanced by recorded per-file durations.
+    """
+
+    def __init__(
+        self,
+        test_dir: str = "tests",
+        workers: Optional[int] = None,
+        cache_dir: str = JAVA_CACHE_DIR,
+        durations: Optional[Dict[str, float]] = None,
+        timeout: float = TEST_TIMEOUT,
+    ):
+        self.test_dir = test_dir
+        self.workers = max(1, workers or DEFAULT_WORKERS)
+        self.timeout = timeout
+        self.durations = durations or {}
+        self.suite_key = hashlib.sha1(os.path.abspath(test_dir).encode()).hexdigest()[:12]
+        self.suite_dir = os.path.join(cache_dir, self.suite_key)
+        self.classes_dir = os.path.join(self.suite_dir, "classes")
+        self.manifest_path = os.path.join(self.suite_dir, "manifest.json")
+        self.agent_dir = os.path.join(cache_dir, "agent")
+        # Exclusive to rebuild the agent or a suite's classes, shared while JVMs load them
+        self.lock_dir = os.path.join(cache_dir, ".locks")
+        self.junit_jar = JUNIT_PLATFORM_JAR
+
+    # ──────────────────────────────────────────────────────────────────────
+    # Compilation
+    # ──────────────────────────────────────────────────────────────────────
+    def _load_manifest(self) -> Dict[str, str]:
+        try:
+            with open(self.manifest_path, "r") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def _save_manifest(self, manifest: Dict[str, str]) -> None:
+        _write_atomic(self.manifest_path, json.dumps(manifest, indent=2, sort_keys=True))
+
+    def _javac(self, files: List[str], out_dir: str, classpath: List[str]) -> Dict[str, List[str]]:
+        """Compile files in one javac call; returns {file: [error lines]} (empty on success)."""
+        if not files:
+            return {}
+        cmd = [
+            "javac", "-proc:none", "-nowarn", "-encoding", "UTF-8",
+            "-d", out_dir,
+            "-cp", os.pathsep.join(classpath),
+            *files,
+        ]
+        try:
+            result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        except OSError as e:
+            return {os.path.abspath(f): [f"javac unavailable: {e}"] for f in files}
+        if result.returncode == 0:
+            return {}
+
+        errors: Dict[str, List[str]] = {}
+        for line in result.stdout.splitlines():
+            match = JAVAC_ERROR.match(line)
+            if match:
+                errors.setdefault(os.path.abspath(match.group("file")), []).append(line)
+        if not errors:
+            # Failure we couldn't attribute (bad flags, missing JDK…): blame the whole batch
+            errors = {os.path.abspath(f): [result.stdout.strip()] for f in files}
+        return errors
+
+    def ensure_agent(self) -> Optional[str]:
+        """
+        Compile the Java agent if its sources changed. Returns an error message or None.
+        The rebuild takes the agent lock exclusively, so it waits for running JVMs.
+        """
+        if not os.path.exists(self.junit_jar):
+            return f"JUnit Platform jar not found at {self.junit_jar} (set JUNIT_PLATFORM_JAR)"
+
+        sources = sorted(
+            os.path.join(AGENT_SRC_DIR, f) for f in os.listdir(AGENT_SRC_DIR) if f.endswith(".java")
+        )
+        digest = hashlib.sha256("".join(_sha256(s) for s in sources).encode() + self.junit_jar.encode()).hexdigest()
+        stamp = os.path.join(self.agent_dir, ".stamp")
+        with repo_lock("agent", shared=True, lock_dir=self.lock_dir):
+            if _read_stamp(stamp) == digest:
+                return None
+
+        with repo_lock("agent", lock_dir=self.lock_dir):
+            if _read_stamp(stamp) == digest:  # rebuilt by a concurrent run meanwhile
+                return None
+            shutil.rmtree(self.agent_dir, ignore_errors=True)
+            os.makedirs(self.agent_dir, exist_ok=True)
+            errors = self._javac(sources, self.agent_dir, [self.junit_jar])
+            if errors:
+                return "Failed to compile Java agent:\n" + "\n".join(sum(errors.values(), []))
+            _write_atomic(stamp, digest)
+        return None
+
+    def _up_to_date(self, current: Dict[str, str]) -> bool:
+        manifest = self._load_manifest()
+        return (
+            os.path.isdir(self.classes_dir)
+            and all(os.path.exists(f) for f in manifest)
+            and all(manifest.get(f) == digest for f, digest in current.items())
+        )
+
+    def compile(self, files: List[str]) -> Tuple[List[str], List[Dict]]:
+        """
+        Incrementally compile test sources, under the suite's exclusive lock when
+        anything changed. Returns (files that compiled, error records for files that didn't).
+        """
+        current = {os.path.abspath(f): _sha256(f) for f in files}
+        with repo_lock(self.suite_key, shared=True, lock_dir=self.lock_dir):
+            if self._up_to_date(current):
+                return list(files), []
+        with repo_lock(self.suite_key, lock_dir=self.lock_dir):
+            return self._compile(files, current)
+
+    def _compile(self, files: List[str], current: Dict[str, str]) -> Tuple[List[str], List[Dict]]:
+        os.makedirs(self.classes_dir, exist_ok=True)
+        manifest = self._load_manifest()
+
+        # A deleted source leaves stale .class files behind (including nested classes); rebuild clean
+        if any(not os.path.exists(f) for f in manifest):
+            shutil.rmtree(self.classes_dir, ignore_errors=True)
+            os.makedirs(self.classes_dir, exist_ok=True)
+            manifest = {}
+
+        changed = [f for f, digest in current.items() if manifest.get(f) != digest]
+        if changed:
+            # Classes compiled against the old version of a changed class must be rebuilt too
+            recompile = dependents(changed, list(current))
+            logger.info(
+                f"[Runner] ☕ {len(changed)}/{len(files)} Java sources changed; "
+                f"compiling {len(recompile)} with dependents"
+            )
+            changed = [f for f in current if f in recompile]
+
+        classpath = [self.classes_dir, self.junit_jar]
+        failed: Dict[str, List[str]] = {}
+        pending = list(changed)
+        # javac emits nothing when any file fails, so drop failing files and retry the rest
+        for _ in range(3):
+            errors = self._javac(pending, self.classes_dir, classpath)
+            if not errors:
+                break
+            failed.update(errors)
+            pending = [f for f in pending if f not in errors]
+        else:
+            failed.update({f: ["Not compiled: too many dependent compile failures"] for f in pending})
+            pending = []
+
+        for f in pending:
+            manifest[f] = current[f]
+        for f in failed:
+            manifest.pop(f, None)
+        self._save_manifest(manifest)
+
+        records = [
+            _error_record(os.path.relpath(f), "<compile>", lines[0], "\n".join(lines))
+            for f, lines in failed.items()
+        ]
+        compiled = [f for f in files if os.path.abspath(f) not in failed]
+        return compiled, records
+
+    # ──────────────────────────────────────────────────────────────────────
+    # Execution
+    # ──────────────────────────────────────────────────────────────────────
+    def shard(self, files: List[str]) -> List[List[str]]:
+        count = min(self.workers, len(files))
+        return lpt_shards(files, self.durations, count) if count else []
+
+    def _run_shard(self, files: List[str], out: "queue.Queue", group: WorkerGroup) -> None:
+        class_to_file = {class_name_for(f): os.path.relpath(f) for f in files}
+        classpath = os.pathsep.join([self.classes_dir, self.agent_dir, self.junit_jar])
+        cmd = ["java", *JVM_OPTS, f"-Dtrinity.timeout={self.timeout}", "-cp", classpath, "Main"]
+        reported = set()
+        running: Optional[Tuple[str, str]] = None
+
+        with tempfile.TemporaryFile() as log:
+            try:
+                proc = group.popen(
+                    cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=log, text=True, encoding="utf-8",
+                )
+            except OSError as e:
+                for file in class_to_file.values():
+                    out.put(_error_record(file, "<jvm>", f"Failed to start JVM: {e}"))
+                return
+            if proc is None:  # consumer already gone
+                return
+
+            # Watchdog: JUnit times tests out itself, but a test that ignores interrupts
+            # (or a wedged JVM) only shows up as silence on the result stream
+            last_activity = [time.monotonic()]
+            finished = threading.Event()
+            killed = threading.Event()
+
+            def watchdog():
+                while not finished.wait(1.0):
+                    if time.monotonic() - last_activity[0] > self.timeout + HARD_TIMEOUT_GRACE:
+                        logger.error(f"[Runner] ⏱️ JVM {proc.pid} unresponsive; killing (test: {running})")
+                        killed.set()
+                        proc.kill()
+                        return
+
+            threading.Thread(target=watchdog, daemon=True).start()
+
+            proc.stdin.write(" ".join(class_to_file) + "\n")
+            proc.stdin.close()
+
+            for line in proc.stdout:
+                last_activity[0] = time.monotonic()
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                event = record.pop("event", None)
+                if event == "start":
+                    running = (record["class"], record["name"])
+                    continue
+                if event != "result":
+                    continue
+                running = None
+                file = class_to_file.get(record.pop("class"), self.test_dir)
+                reported.add(file)
+                out.put({"nodeid": f"{file}::{record['name']}", "file": file, **record})
+
+            returncode = proc.wait()
+            finished.set()
+
+            if running is not None:
+                file = class_to_file.get(running[0], self.test_dir)
+                reported.add(file)
+                out.put(_error_record(file, running[1], "Test hung or crashed the JVM (killed)"))
+            if killed.is_set() or returncode not in (0, 1):
+                log.seek(0)
+                tail = log.read()[-4000:].decode("utf-8", errors="replace")
+                message = "JVM killed after going silent" if killed.is_set() else f"JVM exited with code {returncode}"
+                for file in class_to_file.values():
+                    if file not in reported:
+                        out.put(_error_record(file, "<jvm>", message, tail))
+
+    def iter_results(self, files: Optional[List[str]] = None) -> Iterator[Dict]:
+        files = discover_java_tests(self.test_dir) if files is None else files
+        if not files:
+            return
+
+        agent_error = self.ensure_agent()
+        if agent_error:
+            for f in files:
+                yield _error_record(os.path.relpath(f), "<setup>", agent_error)
+            return
+
+        compiled, compile_errors = self.compile(files)
+        yield from compile_errors
+
+        shards = self.shard(compiled)
+        if not shards:
+            return
+
+        logger.info(f"[Runner] ☕ Running {len(compiled)} Java test classes across {len(shards)} JVMs")
+        # Held shared until the JVMs exit, so no rebuild replaces classes they are loading
+        with repo_lock("agent", shared=True, lock_dir=self.lock_dir), \
+                repo_lock(self.suite_key, shared=True, lock_dir=self.lock_dir):
+            out: "queue.Queue" = queue.Queue()
+            group = WorkerGroup()
+            threads = [threading.Thread(target=self._run_shard, args=(s, out, group), daemon=True) for s in shards]
+            for t in threads:
+                t.start()
+
+            try:
+                while any(t.is_alive() for t in threads) or not out.empty():
+                    try:
+                        yield out.get(timeout=0.2)
+                    except queue.Empty:
+                        continue
+            finally:
+                group.close()
+
+    def run(self, files: Optional[List[str]] = None) -> List[Dict]:
+        return list(self.iter_results(files))
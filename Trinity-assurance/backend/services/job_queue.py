@@ -0,0 +1,239 @@
+# backend/services/job_queue.py
+
+import os
+import time
+import asyncio
+import uuid
+import logging
+import threading
+import contextvars
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+JOB_WORKERS = int(os.getenv("TRINITY_JOB_WORKERS", "2"))
+JOB_RETENTION_SECONDS = int(os.getenv("TRINITY_JOB_RETENTION_SECONDS", "3600"))
+MAX_EVENTS_PER_JOB = 10000
+# How long a succeeded job's result is handed to identical submissions (0 = in-flight only)
+DEDUPE_WINDOW_SECONDS = float(os.getenv("TRINITY_JOB_DEDUPE_WINDOW", "300"))
+
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+
+class Job:
+    """A unit of background work plus its progress event log."""
+
+    def __init__(
+        self,
+        fn: Callable[[ProgressCallback], Any],
+        owner: str,
+        kind: str,
+        params: Dict[str, Any],
+        dedupe_key: Optional[str] = None,
+    ):
+        self.id = uuid.uuid4().hex
+        self.fn = fn
+        self.owner = owner
+        self.kind = kind
+        self.params = params
+        self.dedupe_key = dedupe_key
+        self.attached = 0  # identical submissions served by this job
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.progress = {"done": 0, "total": 0}
+        self.error: Optional[str] = None
+        self.future: Future = Future()
+        # Runs in the submitter's context so the request's trace id reaches the worker's logs
+        self.context = contextvars.copy_context()
+        self.events: List[Dict[str, Any]] = []
+        self._cond = threading.Condition()
+        # Event-loop waiters (SSE streams), woken without parking a thread each
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+
+    def emit(self, event: Dict[str, Any]) -> None:
+        with self._cond:
+            if "done" in event and "total" in event:
+                self.progress = {"done": event["done"], "total": event["total"]}
+            waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+            if len(self.events) < MAX_EVENTS_PER_JOB:
+                self.events.append({"seq": len(self.events), "ts": time.time(), **event})
+                waiters, self._waiters = self._waiters, []
+            elif self.done:
+                waiters, self._waiters = self._waiters, []
+            self._cond.notify_all()
+        for loop, waiter in waiters:
+            try:
+                loop.call_soon_threadsafe(waiter.set)
+            except RuntimeError:  # loop already closed
+                pass
+
+    def wait_events(self, cursor: int, timeout: float) -> List[Dict[str, Any]]:
+        """Block until events past `cursor` exist, the job finishes, or `timeout` elapses."""
+        with self._cond:
+            self._cond.wait_for(lambda: len(self.events) > cursor or self.done, timeout=timeout)
+            return self.events[cursor:]
+
+    async def wait_events_async(self, cursor: int, timeout: float) -> List[Dict[str, Any]]:
+        """wait_events for the event loop: waits on an asyncio.Event instead of a worker thread."""
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._cond:
+            if len(self.events) > cursor or self.done:
+                return self.events[cursor:]
+            self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._cond:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        with self._cond:
+            return self.events[cursor:]
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": dict(self.progress),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "attached": self.attached,
+        }
+
+
+class JobQueue:
+    """
+    In-process job queue with a fixed worker pool.
+    Jobs are queued per owner (license) and workers serve owners round-robin,
+    so one license submitting many repos can't starve the others.
+
+    Submissions carrying a dedupe_key are single-flight: while a job with that key is
+    queued or running, identical submissions attach to it, and once it succeeds its
+    result is reused for `dedupe_window` seconds.
+    """
+
+    def __init__(
+        self,
+        workers: int = JOB_WORKERS,
+        retention_seconds: int = JOB_RETENTION_SECONDS,
+        dedupe_window: float = DEDUPE_WINDOW_SECONDS,
+    ):
+        self.workers = max(1, workers)
+        self.retention_seconds = retention_seconds
+        self.dedupe_window = dedupe_window
+        self.jobs: Dict[str, Job] = {}
+        self._by_key: Dict[str, Job] = {}
+        self._queues: "OrderedDict[str, Deque[Job]]" = OrderedDict()
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+
+    def _ensure_workers(self) -> None:
+        if self._threads:
+            return
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker, name=f"trinity-job-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def submit(self, fn: Callable[[ProgressCallback], Any], owner: str, kind: str = "generate", **params) -> Job:
+        return self.submit_or_attach(fn, owner, kind, **params)[0]
+
+    def submit_or_attach(
+        self,
+        fn: Callable[[ProgressCallback], Any],
+        owner: str,
+        kind: str = "generate",
+        dedupe_key: Optional[str] = None,
+        reuse_result: bool = True,
+        **params,
+    ) -> Tuple[Job, bool]:
+        """
+        Queue a job, or return the live (or recently succeeded, if `reuse_result`) job
+        with the same dedupe_key. The flag says whether an existing job was returned.
+        """
+        with self._cond:
+            self._prune()
+            existing = self._by_key.get(dedupe_key) if dedupe_key else None
+            if existing is not None and self._reusable(existing, reuse_result):
+                existing.attached += 1
+                existing.emit({"type": "attached", "owner": owner, "attached": existing.attached})
+                logger.info(f"[Jobs] 🔗 {owner} attached to {existing.status} {kind} job {existing.id}")
+                return existing, True
+
+            job = Job(fn, owner, kind, params, dedupe_key)
+            self._ensure_workers()
+            self.jobs[job.id] = job
+            if dedupe_key:
+                self._by_key[dedupe_key] = job
+            self._queues.setdefault(owner, deque()).append(job)
+            self._cond.notify()
+        logger.info(f"[Jobs] 📥 Queued {kind} job {job.id} for {owner}")
+        return job, False
+
+    def _reusable(self, job: Job, reuse_result: bool) -> bool:
+        if not job.done:
+            return True
+        # Failures are never reused: the next identical request retries
+        return (
+            reuse_result and job.status == "succeeded"
+            and job.finished_at is not None and time.time() - job.finished_at <= self.dedupe_window
+        )
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def _next_job(self) -> Job:
+        with self._cond:
+            while not self._queues:
+                self._cond.wait()
+            # Rotate owners: take the head owner's oldest job, then move that owner to the back
+            owner, queue = self._queues.popitem(last=False)
+            job = queue.popleft()
+            if queue:
+                self._queues[owner] = queue
+            return job
+
+    def _worker(self) -> None:
+        while True:
+            job = self._next_job()
+            job.status = "running"
+            job.started_at = time.time()
+            job.emit({"type": "status", "status": "running"})
+            try:
+                result = job.context.run(job.fn, job.emit)
+                # finished_at before status: a job that reads as done always has one (see _prune)
+                job.finished_at = time.time()
+                job.status = "succeeded"
+                job.future.set_result(result)
+            except Exception as e:
+                logger.error(f"[Jobs] ❌ Job {job.id} failed: {e}")
+                job.error = str(e)
+                job.finished_at = time.time()
+                job.status = "failed"
+                job.future.set_exception(e)
+            finally:
+                job.emit({"type": "status", "status": job.status, "error": job.error})
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.retention_seconds
+        expired = [j.id for j in self.jobs.values() if j.done and j.finished_at is not None and j.finished_at < cutoff]
+        for job_id in expired:
+            job = self.jobs.pop(job_id)
+            if job.dedupe_key and self._by_key.get(job.dedupe_key) is job:
+                del self._by_key[job.dedupe_key]
+
+
+job_queue = JobQueue()
@@ -0,0 +1,83 @@
+# backend/services/js_executor.py
+
+import os
+import shutil
+from typing import Dict, List, Optional
+
+from backend.services.language_detector import LANGUAGES, get_language
+from backend.services.python_executor import (
+    IGNORED_DIRS, MEMORY_LIMIT_MB, TEST_TIMEOUT, PythonTestExecutor,
+)
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "js_worker.js")
+NODE_BIN = os.getenv("TRINITY_NODE_BIN", "node")
+
+
+def discover_js_tests(test_dir: str, language: str = "javascript") -> List[str]:
+    """Test files of `language` and its family (JS ↔ TS) under test_dir, in a stable order."""
+    family = get_language(language).family
+    specs = [spec for spec in LANGUAGES.values() if spec.family == family]
+    found: List[str] = []
+    for root, dirs, files in os.walk(test_dir):
+        dirs[:] = sorted(
+            d for d in dirs if d not in IGNORED_DIRS and d != "node_modules" and not d.startswith(".")
+        )
+        for file in sorted(files):
+            if not file.endswith(".d.ts") and any(spec.is_test(file) for spec in specs):
+                found.append(os.path.join(root, file))
+    return found
+
+
+class JsTestExecutor(PythonTestExecutor):
+    """
+    Runs JavaScript / TypeScript test files in pooled Node workers (js_worker.js).
+    Each worker loads its whole shard in one process with Jest-style globals, so there
+    is no per-file Node startup and no npm install; results stream back over the same
+    pipe protocol as the Python workers.
+    """
+
+    # js_worker.js exits 0 (all files loaded) or 1 (a file failed to load)
+    NORMAL_EXIT_CODES = (0, 1)
+
+    def __init__(
+        self,
+        test_dir: str = "tests",
+        workers: Optional[int] = None,
+        timeout: float = TEST_TIMEOUT,
+        memory_limit_mb: int = MEMORY_LIMIT_MB,
+        extra_paths: Optional[List[str]] = None,
+        durations: Optional[Dict[str, float]] = None,
+        language: str = "javascript",
+    ):
+        super().__init__(test_dir, workers, timeout, memory_limit_mb, extra_paths, durations)
+        self.language = language
+
+    @staticmethod
+    def available() -> bool:
+        return shutil.which(NODE_BIN) is not None
+
+    def _command(self, files: List[str], write_fd: int) -> List[str]:
+        cmd = [
+            NODE_BIN, f"--max-old-space-size={self.memory_limit_mb}", WORKER_SCRIPT,
+            "--results-fd", str(write_fd),
+            "--timeout", str(self.timeout),
+        ]
+        if self.extra_paths:
+            # Relative imports that miss next to the test are retried from the source repo
+            cmd += ["--source-root", self.extra_paths[0]]
+        return cmd + files
+
+    def _worker_env(self) -> Dict[str, str]:
+        env = dict(os.environ)
+        paths = [os.path.join(p, "node_modules") for p in self.extra_paths] + self.extra_paths
+        if env.get("NODE_PATH"):
+            paths.append(env["NODE_PATH"])
+        env["NODE_PATH"] = os.pathsep.join(paths)
+        return env
+
+    def _normalize(self, path: str) -> str:
+        """The worker echoes the CWD-relative paths it was given."""
+        return os.path.relpath(path)
+
+    def discover(self) -> List[str]:
+        return discover_js_tests(self.test_dir, self.language)
@@ -0,0 +1,111 @@
+// backend/services/js_syntax_worker.js
+//
+// Long-lived syntax checker for generated JavaScript / TypeScript tests, used by
+// TestValidator. Reads one JSON request per line on stdin:
+//   {"id": 1, "filename": "test_x.ts", "code": "..."}
+// and answers one line per request on stdout:
+//   {"id": 1, "ok": false, "error": "test_x.ts:3:7 ';' expected"}
+// Nothing is executed; code is only parsed. TypeScript uses the `typescript`
+// package when it can be resolved, else Node's own type stripping (>= 23.2);
+// without either, .ts files are reported as {"ok": true, "skipped": true}.
+'use strict';
+
+const path = require('path');
+const vm = require('vm');
+const Module = require('module');
+const readline = require('readline');
+
+let typescript;
+
+function loadTypescript() {
+  if (typescript !== undefined) return typescript;
+  typescript = null;
+  for (const base of [process.cwd(), __dirname]) {
+    try {
+      typescript = require(require.resolve('typescript', { paths: [base] }));
+      break;
+    } catch (e) { /* try the next location */ }
+  }
+  return typescript;
+}
+
+const TS_EXTENSIONS = new Set(['.ts', '.tsx', '.mts', '.cts']);
+
+function tsDiagnostics(ts, code, filename) {
+  const output = ts.transpileModule(code, {
+    fileName: filename,
+    reportDiagnostics: true,
+    compilerOptions: { module: ts.ModuleKind.CommonJS, jsx: ts.JsxEmit.React, allowJs: true },
+  });
+  const diagnostic = (output.diagnostics || []).find((d) => d.category === ts.DiagnosticCategory.Error);
+  if (!diagnostic) return null;
+  const message = ts.flattenDiagnosticMessageText(diagnostic.messageText, '\n');
+  if (diagnostic.file && diagnostic.start !== undefined) {
+    const { line, character } = diagnostic.file.getLineAndCharacterOfPosition(diagnostic.start);
+    return `${filename}:${line + 1}:${character + 1} ${message}`;
+  }
+  return `${filename}: ${message}`;
+}
+
+function parseScript(code, filename) {
+  try {
+    // Module.wrap gives CommonJS semantics (top-level return, require, exports)
+    new vm.Script(Module.wrap(code), { filename });
+    return null;
+  } catch (error) {
+    if (!(error instanceof SyntaxError)) throw error;
+    if (/\b(import|export)\b/.test(error.message) && typeof vm.SourceTextModule === 'function') {
+      try {
+        new vm.SourceTextModule(code, { identifier: filename });
+        return null;
+      } catch (esmError) {
+        return describe(esmError, filename);
+      }
+    }
+    return describe(error, filename);
+  }
+}
+
+function describe(error, filename) {
+  const where = String(error.stack || '').split('\n')[0];
+  return where.startsWith(filename) ? `${where} ${error.message}` : `${filename}: ${error.message}`;
+}
+
+function check(filename, code) {
+  const ext = path.extname(filename);
+  const isTs = TS_EXTENSIONS.has(ext);
+  const ts = loadTypescript();
+  if (ts && (isTs || ext === '.jsx')) {
+    const error = tsDiagnostics(ts, code, filename);
+    return error ? { ok: false, error } : { ok: true };
+  }
+  if (isTs) {
+    if (typeof Module.stripTypeScriptTypes !== 'function' || ext === '.tsx') return { ok: true, skipped: true };
+    try {
+      code = Module.stripTypeScriptTypes(code, { mode: 'strip' });
+    } catch (error) {
+      return { ok: false, error: `${filename}: ${error.message}` };
+    }
+  }
+  if (ext === '.jsx') return { ok: true, skipped: true };
+  const error = parseScript(code, filename);
+  return error ? { ok: false, error } : { ok: true };
+}
+
+const input = readline.createInterface({ input: process.stdin, crlfDelay: Infinity });
+input.on('line', (line) => {
+  if (!line.trim()) return;
+  let request;
+  try {
+    request = JSON.parse(line);
+  } catch (error) {
+    return;
+  }
+  let response;
+  try {
+    response = { id: request.id, ...check(String(request.filename), String(request.code)) };
+  } catch (error) {
+    response = { id: request.id, ok: true, skipped: true, note: String(error && error.message || error) };
+  }
+  process.stdout.write(JSON.stringify(response) + '\n');
+});
@@ -0,0 +1,698 @@
+// backend/services/js_worker.js
+//
+// Worker process for JsTestExecutor. Loads and runs one shard of JavaScript /
+// TypeScript test files in a single long-lived Node process (no per-file
+// startup) and writes one JSON line per test to the file descriptor given by
+// --results-fd, mirroring pytest_worker.py.
+//
+// Tests use the Jest-style globals most generated suites rely on (describe,
+// it/test, hooks, expect, jest.fn/spyOn/mock); no npm packages are needed.
+// TypeScript and JSX are transpiled with the `typescript` package when it can be
+// resolved, or stripped by Node itself (>= 23.2) for plain .ts files.
+'use strict';
+
+const fs = require('fs');
+const path = require('path');
+const util = require('util');
+const Module = require('module');
+const { pathToFileURL } = require('url');
+
+// ──────────────────────────────────────────────────────────────────────────────
+// Arguments and output
+// ──────────────────────────────────────────────────────────────────────────────
+function parseArgs(argv) {
+  const args = { resultsFd: 1, timeout: 60, sourceRoot: null, files: [] };
+  for (let i = 0; i < argv.length; i++) {
+    if (argv[i] === '--results-fd') args.resultsFd = Number(argv[++i]);
+    else if (argv[i] === '--timeout') args.timeout = Number(argv[++i]);
+    else if (argv[i] === '--source-root') args.sourceRoot = path.resolve(argv[++i]);
+    else args.files.push(argv[i]);
+  }
+  return args;
+}
+
+const args = parseArgs(process.argv.slice(2));
+
+function emit(record) {
+  fs.writeSync(args.resultsFd, JSON.stringify(record) + '\n');
+}
+
+function describeError(err) {
+  if (err instanceof Error) {
+    const message = `${err.name}: ${err.message}`.split('\n')[0];
+    return { message, traceback: String(err.stack || message).slice(0, 8000) };
+  }
+  const message = `Thrown: ${util.inspect(err)}`;
+  return { message, traceback: message };
+}
+
+// ──────────────────────────────────────────────────────────────────────────────
+// Module loading: TypeScript / JSX transpilation and repo-root import fallback
+// ──────────────────────────────────────────────────────────────────────────────
+const TRANSPILED = ['.ts', '.tsx', '.mts', '.cts', '.jsx'];
+let typescript;
+
+function loadTypescript() {
+  if (typescript !== undefined) return typescript;
+  typescript = null;
+  const bases = [args.sourceRoot, process.cwd(), __dirname].filter(Boolean);
+  for (const base of bases) {
+    try {
+      typescript = require(require.resolve('typescript', { paths: [base] }));
+      break;
+    } catch (e) { /* try the next location */ }
+  }
+  return typescript;
+}
+
+function transpile(code, filename) {
+  const ts = loadTypescript();
+  if (ts) {
+    return ts.transpileModule(code, {
+      fileName: filename,
+      compilerOptions: {
+        module: ts.ModuleKind.CommonJS,
+        target: ts.ScriptTarget.ES2020,
+        jsx: ts.JsxEmit.React,
+        esModuleInterop: true,
+        allowJs: true,
+      },
+    }).outputText;
+  }
+  if (typeof Module.stripTypeScriptTypes === 'function' && !filename.endsWith('x')) {
+    return Module.stripTypeScriptTypes(code, { mode: 'transform' });
+  }
+  throw new Error(
+    `Cannot run ${path.basename(filename)}: install the "typescript" package (npm i -D typescript) or use Node >= 23.2`
+  );
+}
+
+for (const ext of TRANSPILED) {
+  Module._extensions[ext] = function (module, filename) {
+    module._compile(transpile(fs.readFileSync(filename, 'utf8'), filename), filename);
+  };
+}
+
+// Generated tests live under tests/<repo>/ but import sources as if they sat next to
+// them ("../src/x"); when a relative import misses, retry it from the repo root.
+const resolveFilename = Module._resolveFilename;
+Module._resolveFilename = function (request, parent, ...rest) {
+  try {
+    return resolveFilename.call(this, request, parent, ...rest);
+  } catch (err) {
+    if (err.code !== 'MODULE_NOT_FOUND' || !args.sourceRoot || !request.startsWith('.')) throw err;
+    const stripped = request.replace(/^(\.\.?\/)+/, '');
+    try {
+      return resolveFilename.call(this, path.join(args.sourceRoot, stripped), parent, ...rest);
+    } catch (e) {
+      throw err;
+    }
+  }
+};
+
+// jest.mock: modules registered here are returned by require() instead of the real ones
+const mockedModules = new Map();
+const load = Module._load;
+Module._load = function (request, parent, isMain) {
+  if (mockedModules.size) {
+    let resolved = request;
+    try { resolved = Module._resolveFilename(request, parent, isMain); } catch (e) { /* bare / missing */ }
+    if (mockedModules.has(resolved)) return mockedModules.get(resolved)();
+  }
+  return load.apply(this, arguments);
+};
+
+// ──────────────────────────────────────────────────────────────────────────────
+// expect()
+// ──────────────────────────────────────────────────────────────────────────────
+class AssertionError extends Error {
+  constructor(message) {
+    super(message);
+    this.name = 'AssertionError';
+  }
+}
+
+class Asymmetric {
+  constructor(description, test) {
+    this.description = description;
+    this.test = test;
+  }
+  [util.inspect.custom]() {
+    return this.description;
+  }
+}
+
+function fmt(value) {
+  return util.inspect(value, { depth: 4, breakLength: Infinity });
+}
+
+function equals(a, b, strict) {
+  if (b instanceof Asymmetric) return b.test(a);
+  if (a instanceof Asymmetric) return a.test(b);
+  if (Object.is(a, b)) return true;
+  if (typeof a !== 'object' || typeof b !== 'object' || a === null || b === null) return false;
+  if (Array.isArray(a) !== Array.isArray(b)) return false;
+  if (strict && Object.getPrototypeOf(a) !== Object.getPrototypeOf(b)) return false;
+  if (a instanceof Date || b instanceof Date) return a instanceof Date && b instanceof Date && +a === +b;
+  if (a instanceof RegExp || b instanceof RegExp) return String(a) === String(b);
+  if (a instanceof Map || a instanceof Set) return util.isDeepStrictEqual(a, b);
+  if (Array.isArray(a) && a.length !== b.length) return false;
+  const keys = new Set([...Object.keys(a), ...Object.keys(b)]);
+  for (const key of keys) {
+    // toEqual treats missing and undefined properties alike; toStrictEqual does not
+    if (!strict && a[key] === undefined && b[key] === undefined) continue;
+    if (strict && (key in a) !== (key in b)) return false;
+    if (!equals(a[key], b[key], strict)) return false;
+  }
+  return true;
+}
+
+function matchesObject(received, expected) {
+  if (expected instanceof Asymmetric) return expected.test(received);
+  if (typeof expected !== 'object' || expected === null) return equals(received, expected, false);
+  if (typeof received !== 'object' || received === null) return false;
+  if (Array.isArray(expected)) {
+    return Array.isArray(received) && received.length === expected.length &&
+      expected.every((item, i) => matchesObject(received[i], item));
+  }
+  return Object.keys(expected).every((key) => matchesObject(received[key], expected[key]));
+}
+
+function getPath(object, keyPath) {
+  const parts = Array.isArray(keyPath) ? keyPath : String(keyPath).replace(/\[(\w+)\]/g, '.$1').split('.');
+  let current = object;
+  for (const part of parts) {
+    if (current === null || current === undefined || !(Object(current) instanceof Object) || !(part in Object(current))) {
+      return { found: false };
+    }
+    current = current[part];
+  }
+  return { found: true, value: current };
+}
+
+function isMock(fn) {
+  return typeof fn === 'function' && fn._isMockFunction === true;
+}
+
+function requireMock(received) {
+  if (!isMock(received)) throw new AssertionError(`${fmt(received)} is not a mock function`);
+  return received.mock;
+}
+
+function thrownBy(received) {
+  if (typeof received !== 'function') return { threw: true, error: received };
+  try {
+    received();
+  } catch (error) {
+    return { threw: true, error };
+  }
+  return { threw: false };
+}
+
+function errorMatches(error, expected) {
+  if (expected === undefined) return true;
+  const message = error && error.message !== undefined ? error.message : String(error);
+  if (typeof expected === 'string') return message.includes(expected);
+  if (expected instanceof RegExp) return expected.test(message);
+  if (typeof expected === 'function') return error instanceof expected;
+  if (expected instanceof Error) return message === expected.message;
+  return false;
+}
+
+// Each matcher returns [pass, message shown when the assertion fails]
+const MATCHERS = {
+  toBe: (r, e) => [Object.is(r, e), `expected ${fmt(r)} to be ${fmt(e)}`],
+  toEqual: (r, e) => [equals(r, e, false), `expected ${fmt(r)} to equal ${fmt(e)}`],
+  toStrictEqual: (r, e) => [equals(r, e, true), `expected ${fmt(r)} to strictly equal ${fmt(e)}`],
+  toMatchObject: (r, e) => [matchesObject(r, e), `expected ${fmt(r)} to match object ${fmt(e)}`],
+  toBeTruthy: (r) => [!!r, `expected ${fmt(r)} to be truthy`],
+  toBeFalsy: (r) => [!r, `expected ${fmt(r)} to be falsy`],
+  toBeNull: (r) => [r === null, `expected ${fmt(r)} to be null`],
+  toBeUndefined: (r) => [r === undefined, `expected ${fmt(r)} to be undefined`],
+  toBeDefined: (r) => [r !== undefined, `expected value to be defined`],
+  toBeNaN: (r) => [Number.isNaN(r), `expected ${fmt(r)} to be NaN`],
+  toBeGreaterThan: (r, e) => [r > e, `expected ${fmt(r)} to be > ${fmt(e)}`],
+  toBeGreaterThanOrEqual: (r, e) => [r >= e, `expected ${fmt(r)} to be >= ${fmt(e)}`],
+  toBeLessThan: (r, e) => [r < e, `expected ${fmt(r)} to be < ${fmt(e)}`],
+  toBeLessThanOrEqual: (r, e) => [r <= e, `expected ${fmt(r)} to be <= ${fmt(e)}`],
+  toBeCloseTo: (r, e, digits = 2) => [
+    Math.abs(r - e) < Math.pow(10, -digits) / 2, `expected ${fmt(r)} to be close to ${fmt(e)} (${digits} digits)`,
+  ],
+  toBeInstanceOf: (r, e) => [r instanceof e, `expected ${fmt(r)} to be an instance of ${e && e.name}`],
+  toContain: (r, e) => [
+    r != null && typeof r.includes === 'function' ? r.includes(e) : Array.from(r || []).includes(e),
+    `expected ${fmt(r)} to contain ${fmt(e)}`,
+  ],
+  toContainEqual: (r, e) => [Array.from(r || []).some((item) => equals(item, e, false)), `expected ${fmt(r)} to contain equal ${fmt(e)}`],
+  toHaveLength: (r, e) => [r != null && r.length === e, `expected length ${r == null ? r : r.length} to be ${e}`],
+  toHaveProperty: (r, keyPath, ...value) => {
+    const { found, value: actual } = getPath(r, keyPath);
+    const pass = found && (value.length === 0 || equals(actual, value[0], false));
+    return [pass, `expected ${fmt(r)} to have property ${fmt(keyPath)}${value.length ? ` = ${fmt(value[0])}` : ''}`];
+  },
+  toMatch: (r, e) => [
+    typeof r === 'string' && (e instanceof RegExp ? e.test(r) : r.includes(e)), `expected ${fmt(r)} to match ${fmt(e)}`,
+  ],
+  toThrow: (r, e) => {
+    const { threw, error } = thrownBy(r);
+    return [threw && errorMatches(error, e), threw ? `expected error ${fmt(error)} to match ${fmt(e)}` : 'expected function to throw'];
+  },
+  toHaveBeenCalled: (r) => [requireMock(r).calls.length > 0, 'expected mock to have been called'],
+  toHaveBeenCalledTimes: (r, n) => [requireMock(r).calls.length === n, `expected ${n} calls, got ${r.mock.calls.length}`],
+  toHaveBeenCalledWith: (r, ...expected) => [
+    requireMock(r).calls.some((call) => equals(call, expected, false)),
+    `expected mock to have been called with ${fmt(expected)}; calls: ${fmt(r.mock.calls)}`,
+  ],
+  toHaveBeenLastCalledWith: (r, ...expected) => {
+    const calls = requireMock(r).calls;
+    return [calls.length > 0 && equals(calls[calls.length - 1], expected, false), `expected last call with ${fmt(expected)}`];
+  },
+  toHaveReturnedWith: (r, e) => [
+    requireMock(r).results.some((res) => res.type === 'return' && equals(res.value, e, false)),
+    `expected mock to have returned ${fmt(e)}`,
+  ],
+};
+MATCHERS.toThrowError = MATCHERS.toThrow;
+MATCHERS.toBeCalled = MATCHERS.toHaveBeenCalled;
+MATCHERS.toBeCalledWith = MATCHERS.toHaveBeenCalledWith;
+MATCHERS.toBeCalledTimes = MATCHERS.toHaveBeenCalledTimes;
+
+function buildMatchers(received, negate, wrap) {
+  const matchers = {};
+  for (const [name, matcher] of Object.entries(MATCHERS)) {
+    matchers[name] = (...expected) => wrap(received, (value) => {
+      const [pass, message] = matcher(value, ...expected);
+      if (pass === negate) throw new AssertionError(negate ? `not: ${message}` : message);
+    });
+  }
+  return matchers;
+}
+
+function expect(received) {
+  const sync = (value, check) => check(value);
+  const settle = (mode) => (promise, check) => Promise.resolve(promise).then(
+    (value) => {
+      if (mode === 'rejects') throw new AssertionError(`expected promise to reject, it resolved to ${fmt(value)}`);
+      return check(value);
+    },
+    (error) => {
+      if (mode === 'resolves') throw new AssertionError(`expected promise to resolve, it rejected with ${fmt(error)}`);
+      // toThrow on a rejection checks the rejection reason itself
+      return check(mode === 'rejects' ? () => { throw error; } : error);
+    },
+  );
+  const matchers = buildMatchers(received, false, sync);
+  matchers.not = buildMatchers(received, true, sync);
+  matchers.resolves = buildMatchers(received, false, settle('resolves'));
+  matchers.resolves.not = buildMatchers(received, true, settle('resolves'));
+  matchers.rejects = buildMatchers(received, false, settle('rejects'));
+  matchers.rejects.not = buildMatchers(received, true, settle('rejects'));
+  return matchers;
+}
+
+expect.anything = () => new Asymmetric('Anything', (v) => v !== null && v !== undefined);
+expect.any = (ctor) => new Asymmetric(`Any<${ctor.name}>`, (v) =>
+  (ctor === Number && typeof v === 'number') || (ctor === String && typeof v === 'string') ||
+  (ctor === Boolean && typeof v === 'boolean') || (ctor === Function && typeof v === 'function') ||
+  (v !== null && v !== undefined && v instanceof ctor));
+expect.objectContaining = (obj) => new Asymmetric(`ObjectContaining ${fmt(obj)}`, (v) => matchesObject(v, obj));
+expect.arrayContaining = (arr) => new Asymmetric(`ArrayContaining ${fmt(arr)}`, (v) =>
+  Array.isArray(v) && arr.every((item) => v.some((x) => equals(x, item, false))));
+expect.stringContaining = (s) => new Asymmetric(`StringContaining ${fmt(s)}`, (v) => typeof v === 'string' && v.includes(s));
+expect.stringMatching = (re) => new Asymmetric(`StringMatching ${fmt(re)}`, (v) => typeof v === 'string' && new RegExp(re).test(v));
+expect.assertions = () => {};
+expect.hasAssertions = () => {};
+
+// ──────────────────────────────────────────────────────────────────────────────
+// jest.fn / spyOn / mock
+// ──────────────────────────────────────────────────────────────────────────────
+const allMocks = new Set();
+
+function fn(implementation) {
+  let impl = implementation;
+  const once = [];
+  const mock = function (...callArgs) {
+    mock.mock.calls.push(callArgs);
+    mock.mock.instances.push(this);
+    const current = once.length ? once.shift() : impl;
+    try {
+      const value = current ? current.apply(this, callArgs) : undefined;
+      mock.mock.results.push({ type: 'return', value });
+      return value;
+    } catch (error) {
+      mock.mock.results.push({ type: 'throw', value: error });
+      throw error;
+    }
+  };
+  mock._isMockFunction = true;
+  mock.mock = { calls: [], instances: [], results: [] };
+  mock.mockImplementation = (f) => { impl = f; return mock; };
+  mock.mockImplementationOnce = (f) => { once.push(f); return mock; };
+  mock.mockReturnValue = (v) => mock.mockImplementation(() => v);
+  mock.mockReturnValueOnce = (v) => mock.mockImplementationOnce(() => v);
+  mock.mockResolvedValue = (v) => mock.mockImplementation(() => Promise.resolve(v));
+  mock.mockResolvedValueOnce = (v) => mock.mockImplementationOnce(() => Promise.resolve(v));
+  mock.mockRejectedValue = (e) => mock.mockImplementation(() => Promise.reject(e));
+  mock.mockRejectedValueOnce = (e) => mock.mockImplementationOnce(() => Promise.reject(e));
+  mock.mockReturnThis = () => mock.mockImplementation(function () { return this; });
+  mock.mockClear = () => { mock.mock = { calls: [], instances: [], results: [] }; return mock; };
+  mock.mockReset = () => { mock.mockClear(); impl = undefined; once.length = 0; return mock; };
+  mock.mockRestore = () => mock.mockReset();
+  mock.getMockName = () => 'jest.fn()';
+  allMocks.add(mock);
+  return mock;
+}
+
+function spyOn(object, method) {
+  const original = object[method];
+  if (typeof original !== 'function') throw new Error(`Cannot spy on ${String(method)}: not a function`);
+  const spy = fn(function (...callArgs) { return original.apply(this, callArgs); });
+  spy.mockRestore = () => { object[method] = original; return spy; };
+  object[method] = spy;
+  return spy;
+}
+
+function automock(exports) {
+  if (typeof exports === 'function') return fn();
+  if (!exports || typeof exports !== 'object') return exports;
+  const mocked = {};
+  for (const key of Object.keys(exports)) {
+    mocked[key] = typeof exports[key] === 'function' ? fn() : exports[key];
+  }
+  return mocked;
+}
+
+function makeJest(testFile) {
+  const fromTest = (request) => {
+    try {
+      return Module._resolveFilename(request, { id: testFile, filename: testFile, paths: Module._nodeModulePaths(path.dirname(testFile)) });
+    } catch (e) {
+      return request;
+    }
+  };
+  const jestApi = {
+    fn,
+    spyOn,
+    // Applies to modules required after the call (no hoisting without a transform)
+    mock(request, factory) {
+      const resolved = fromTest(request);
+      let value;
+      mockedModules.set(resolved, () => {
+        if (value === undefined) {
+          value = factory ? factory() : automock(load(resolved, null, false));
+        }
+        return value;
+      });
+      return jestApi;
+    },
+    unmock(request) { mockedModules.delete(fromTest(request)); return jestApi; },
+    requireActual: (request) => load(fromTest(request), null, false),
+    clearAllMocks() { allMocks.forEach((m) => m.mockClear()); return jestApi; },
+    resetAllMocks() { allMocks.forEach((m) => m.mockReset()); return jestApi; },
+    restoreAllMocks() { allMocks.forEach((m) => m.mockRestore()); return jestApi; },
+    setTimeout(ms) { currentTimeout = ms; return jestApi; },
+    useFakeTimers() { return jestApi; },
+    useRealTimers() { return jestApi; },
+  };
+  return jestApi;
+}
+
+// ──────────────────────────────────────────────────────────────────────────────
+// Collection
+// ──────────────────────────────────────────────────────────────────────────────
+let currentTimeout = args.timeout * 1000;
+
+function newSuite(name, parent, skip) {
+  return { name, parent, skip: !!skip, children: [], beforeAll: [], afterAll: [], beforeEach: [], afterEach: [] };
+}
+
+let rootSuite;
+let currentSuite;
+
+function formatTitle(title, row, index) {
+  let name = String(title);
+  if (row && typeof row === 'object' && !Array.isArray(row)) {
+    name = name.replace(/\$(\w+)/g, (m, key) => (key in row ? fmt(row[key]) : m));
+  }
+  const values = Array.isArray(row) ? row.slice() : [row];
+  name = name.replace(/%[sdifjopj#%]/g, (token) => {
+    if (token === '%%') return '%';
+    if (token === '%#') return String(index);
+    const value = values.shift();
+    if (token === '%s') return String(value);
+    if (token === '%d' || token === '%i') return String(token === '%i' ? Math.trunc(value) : Number(value));
+    if (token === '%f') return String(Number(value));
+    return fmt(value);
+  });
+  return name;
+}
+
+function withEach(register) {
+  return (table) => (title, body, timeout) => table.forEach((row, index) => {
+    const callArgs = Array.isArray(row) ? row : [row];
+    register(formatTitle(title, row, index), (...rest) => body(...callArgs, ...rest), timeout);
+  });
+}
+
+function describe(name, body, skip) {
+  const suite = newSuite(String(name), currentSuite, skip || currentSuite.skip);
+  currentSuite.children.push(suite);
+  const previous = currentSuite;
+  currentSuite = suite;
+  try {
+    const result = body && body();
+    if (result && typeof result.then === 'function') {
+      throw new Error('describe() callbacks must be synchronous');
+    }
+  } finally {
+    currentSuite = previous;
+  }
+}
+
+function it(name, body, timeout, skip) {
+  currentSuite.children.push({
+    test: true, name: String(name), body, timeout, skip: !!skip || !body || currentSuite.skip,
+  });
+}
+
+describe.skip = (name, body) => describe(name, body, true);
+describe.only = (name, body) => describe(name, body);
+describe.each = withEach((name, body) => describe(name, body));
+it.skip = (name, body) => it(name, body, undefined, true);
+it.only = (name, body, timeout) => it(name, body, timeout);
+it.todo = (name) => it(name, null, undefined, true);
+it.each = withEach((name, body, timeout) => it(name, body, timeout));
+it.skip.each = withEach((name, body) => it(name, body, undefined, true));
+
+function installGlobals(testFile) {
+  Object.assign(global, {
+    describe,
+    it,
+    test: it,
+    xit: it.skip,
+    xtest: it.skip,
+    xdescribe: describe.skip,
+    fit: it.only,
+    fdescribe: describe.only,
+    expect,
+    jest: makeJest(testFile),
+    beforeAll: (hook) => currentSuite.beforeAll.push(hook),
+    afterAll: (hook) => currentSuite.afterAll.push(hook),
+    beforeEach: (hook) => currentSuite.beforeEach.push(hook),
+    afterEach: (hook) => currentSuite.afterEach.push(hook),
+  });
+}
+
+// ──────────────────────────────────────────────────────────────────────────────
+// Execution
+// ──────────────────────────────────────────────────────────────────────────────
+let pendingRejection = null;
+process.on('unhandledRejection', (reason) => { pendingRejection = reason; });
+process.on('uncaughtException', (error) => { pendingRejection = error; });
+
+function callWithTimeout(body, timeoutMs) {
+  return new Promise((resolve, reject) => {
+    let timer = setTimeout(() => reject(new Error(`Test exceeded the per-test timeout (${timeoutMs} ms)`)), timeoutMs);
+    const done = (error) => {
+      clearTimeout(timer);
+      if (error) reject(error instanceof Error ? error : new Error(String(error)));
+      else resolve();
+    };
+    try {
+      if (body.length > 0) {
+        // done-callback style
+        body((error) => done(error));
+      } else {
+        Promise.resolve(body()).then(() => done(), done);
+      }
+    } catch (error) {
+      done(error);
+    }
+  });
+}
+
+function hasTests(suite) {
+  return suite.children.some((child) => (child.test ? !child.skip : hasTests(child)));
+}
+
+function eachHooks(suite, kind) {
+  const chain = [];
+  for (let s = suite; s; s = s.parent) chain.unshift(s);
+  const hooks = chain.flatMap((s) => s[kind]);
+  return kind === 'afterEach' ? hooks.reverse() : hooks;
+}
+
+function titleOf(suite, name) {
+  const parts = [name];
+  for (let s = suite; s && s.parent; s = s.parent) parts.unshift(s.name);
+  return parts.join(' > ');
+}
+
+function report(file, name, status, started, error) {
+  const record = {
+    file, name, status,
+    duration: Math.round((performance.now() - started) * 1000) / 1e6,
+    message: '', traceback: '',
+  };
+  if (error !== undefined) Object.assign(record, describeError(error));
+  emit(record);
+}
+
+function countTests(suite) {
+  return suite.children.reduce((n, child) => n + (child.test ? 1 : countTests(child)), 0);
+}
+
+async function runSuite(suite, file) {
+  if (!hasTests(suite)) {
+    for (const child of suite.children) {
+      if (child.test) report(file, titleOf(suite, child.name), 'skipped', performance.now());
+      else await runSuite(child, file);
+    }
+    return;
+  }
+
+  for (const hook of suite.beforeAll) {
+    const started = performance.now();
+    try {
+      await callWithTimeout(hook, currentTimeout);
+    } catch (error) {
+      // Every test under a failed beforeAll is reported as an error
+      const mark = (s) => s.children.forEach((child) => (child.test
+        ? report(file, titleOf(s, child.name), 'error', started, error)
+        : mark(child)));
+      mark(suite);
+      return;
+    }
+  }
+
+  for (const child of suite.children) {
+    if (!child.test) {
+      await runSuite(child, file);
+      continue;
+    }
+    const name = titleOf(suite, child.name);
+    const started = performance.now();
+    if (child.skip) {
+      report(file, name, 'skipped', started);
+      continue;
+    }
+    emit({ event: 'start', nodeid: `${file}::${name}` });
+    let status = 'passed';
+    let failure;
+    pendingRejection = null;
+    try {
+      for (const hook of eachHooks(suite, 'beforeEach')) await callWithTimeout(hook, currentTimeout);
+    } catch (error) {
+      status = 'error';
+      failure = error;
+    }
+    if (status === 'passed') {
+      try {
+        await callWithTimeout(child.body, child.timeout || currentTimeout);
+        if (pendingRejection) throw pendingRejection;
+      } catch (error) {
+        status = 'failed';
+        failure = error;
+      }
+    }
+    try {
+      for (const hook of eachHooks(suite, 'afterEach')) await callWithTimeout(hook, currentTimeout);
+    } catch (error) {
+      if (status === 'passed') {
+        status = 'error';
+        failure = error;
+      }
+    }
+    report(file, name, status, started, failure);
+  }
+
+  for (const hook of suite.afterAll) {
+    try {
+      await callWithTimeout(hook, currentTimeout);
+    } catch (error) { /* teardown failures don't change finished results */ }
+  }
+}
+
+async function loadTestFile(absolute) {
+  const ext = path.extname(absolute);
+  if (ext === '.mjs') return import(pathToFileURL(absolute).href);
+  try {
+    return require(absolute);
+  } catch (error) {
+    const esm = error.code === 'ERR_REQUIRE_ESM' ||
+      (error instanceof SyntaxError && /import|export/.test(error.message));
+    if (!esm) throw error;
+    // ES module syntax: transpile when TypeScript is around, else let Node's ESM loader take it
+    if (loadTypescript() && ext === '.js') {
+      delete require.cache[absolute];
+      const module = new Module(absolute, null);
+      module.filename = absolute;
+      module.paths = Module._nodeModulePaths(path.dirname(absolute));
+      module._compile(transpile(fs.readFileSync(absolute, 'utf8'), absolute), absolute);
+      return module.exports;
+    }
+    return import(pathToFileURL(absolute).href);
+  }
+}
+
+async function runFile(file) {
+  const absolute = path.resolve(file);
+  rootSuite = newSuite('', null, false);
+  currentSuite = rootSuite;
+  currentTimeout = args.timeout * 1000;
+  mockedModules.clear();
+  installGlobals(absolute);
+
+  const started = performance.now();
+  try {
+    await loadTestFile(absolute);
+  } catch (error) {
+    report(file, '<collection>', 'error', started, error);
+    return false;
+  } finally {
+    delete require.cache[absolute];
+  }
+  if (!countTests(rootSuite)) {
+    report(file, '<collection>', 'error', started, new Error('No tests found in file'));
+    return false;
+  }
+  await runSuite(rootSuite, file);
+  return true;
+}
+
+async function main() {
+  let failed = false;
+  for (const file of args.files) {
+    const ok = await runFile(file);
+    failed = failed || !ok;
+  }
+  return failed ? 1 : 0;
+}
+
+main().then(
+  (code) => { process.exitCode = code; },
+  (error) => {
+    process.stderr.write(String(error && error.stack || error) + '\n');
+    process.exitCode = 3;
+  },
+);
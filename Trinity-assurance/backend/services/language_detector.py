@@ -0,0 +1,82 @@
+# backend/services/language_detector.py
+
+import os
+import fnmatch
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class LanguageSpec:
+    """
+    Everything language-specific the pipeline needs, in one place:
+    which files are sources, how generated tests are named and found, and which
+    runner adapter executes them ("pytest", "junit" or "node").
+    """
+
+    name: str
+    extensions: Tuple[str, ...]      # source extensions; the first is the default
+    test_patterns: Tuple[str, ...]   # fnmatch patterns for test file names
+    runner: str
+    family: str                      # languages that import each other's modules (JS ↔ TS)
+
+    def is_source(self, path: str) -> bool:
+        return path.endswith(self.extensions)
+
+    def is_test(self, path: str) -> bool:
+        name = os.path.basename(path)
+        return self.is_source(name) and any(fnmatch.fnmatchcase(name, p) for p in self.test_patterns)
+
+    def test_file_name(self, rel_source: str, sanitize) -> str:
+        """Name of the generated test for a repo-relative source path; keeps the source's extension."""
+        stem, ext = os.path.splitext(rel_source)
+        if ext not in self.extensions:
+            stem, ext = rel_source, self.extensions[0]
+        return f"test_{sanitize(stem)}{ext}"
+
+
+LANGUAGES: Dict[str, LanguageSpec] = {
+    spec.name: spec
+    for spec in (
+        LanguageSpec("python", (".py",), ("test_*.py", "*_test.py"), "pytest", "python"),
+        LanguageSpec("java", (".java",), ("test_*.java", "*Test.java", "*Tests.java"), "junit", "java"),
+        LanguageSpec(
+            "javascript", (".js", ".jsx", ".mjs", ".cjs"),
+            ("test_*", "*_test.*", "*.test.*", "*.spec.*"), "node", "js",
+        ),
+        LanguageSpec(
+            "typescript", (".ts", ".tsx", ".mts", ".cts"),
+            ("test_*", "*_test.*", "*.test.*", "*.spec.*"), "node", "js",
+        ),
+    )
+}
+
+
+def get_language(language) -> LanguageSpec:
+    """Spec for a language name or Language enum; ValueError for unsupported ones."""
+    name = str(getattr(language, "value", language)).lower()
+    spec = LANGUAGES.get(name)
+    if spec is None:
+        raise ValueError(f"❌ Unsupported language: {name}")
+    return spec
+
+
+def family_extensions(language) -> Tuple[str, ...]:
+    """Extensions of every language that shares a module system with `language`, its own first."""
+    own = get_language(language)
+    others = (spec for spec in LANGUAGES.values() if spec.family == own.family and spec is not own)
+    return own.extensions + tuple(ext for spec in others for ext in spec.extensions)
+
+
+def language_for_file(path: str) -> Optional[str]:
+    for spec in LANGUAGES.values():
+        if spec.is_source(path) and not path.endswith(".d.ts"):
+            return spec.name
+    return None
+
+
+def detect_language(files: Iterable[str]) -> Optional[str]:
+    """Most common supported language among `files` (None if there are none)."""
+    counts = Counter(filter(None, (language_for_file(f) for f in files)))
+    return counts.most_common(1)[0][0] if counts else None
@@ -0,0 +1,271 @@
+# backend/services/llm_providers.py
+
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Dict, NamedTuple, Optional
+
+from backend.utils.metrics import cache_event
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# groq | stub | replay | record (record = groq, saving every response for later replay)
+LLM_PROVIDER = os.getenv("TRINITY_LLM_PROVIDER", "groq")
+REPLAY_DIR = os.getenv("TRINITY_LLM_REPLAY_DIR", os.path.join("tests", ".cache", "llm_replay"))
+# What replay does for a prompt it has no recording for: "error" or "stub"
+REPLAY_ON_MISS = os.getenv("TRINITY_LLM_REPLAY_ON_MISS", "error")
+
+
+def _setting(provider: str, key: str, default: str) -> str:
+    """Per-provider knob, e.g. TRINITY_LLM_GROQ_TIMEOUT or TRINITY_LLM_STUB_LATENCY_MS."""
+    return os.getenv(f"TRINITY_LLM_{provider.upper()}_{key}", default)
+
+
+class LLMResponse(NamedTuple):
+    text: str
+    total_tokens: Optional[int] = None
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+
+
+class LLMProvider:
+    """
+    One chat-completion backend. Subclasses implement `_complete`; the base class caps
+    in-flight calls per provider. Clients are created lazily on first call, so importing
+    or constructing a provider never needs credentials or network.
+    """
+
+    name = "base"
+    default_model = ""
+    # Quotas applied by TestGenerator's RateLimiter (0 = unlimited)
+    requests_per_minute = 0
+    tokens_per_minute = 0
+
+    def __init__(self, max_in_flight: Optional[int] = None, timeout: Optional[float] = None):
+        self.max_in_flight = max_in_flight or int(_setting(self.name, "MAX_IN_FLIGHT", "8"))
+        self.timeout = timeout or float(_setting(self.name, "TIMEOUT", "60"))
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+
+    def complete(self, model: str, prompt: str, max_tokens: int, temperature: float) -> LLMResponse:
+        with self._slots:
+            return self._complete(model or self.default_model, prompt, max_tokens, temperature)
+
+    def _complete(self, model: str, prompt: str, max_tokens: int, temperature: float) -> LLMResponse:
+        raise NotImplementedError
+
+    def is_retryable(self, exc: Exception) -> bool:
+        return False
+
+    def retry_after(self, exc: Exception) -> Optional[float]:
+        return None
+
+    def close(self) -> None:
+        pass
+
+
+class GroqProvider(LLMProvider):
+    name = "groq"
+    default_model = "llama3-8b-8192"
+    # Defaults match Groq's free tier for llama3-8b
+    requests_per_minute = int(os.getenv("GROQ_REQUESTS_PER_MINUTE", "30"))
+    tokens_per_minute = int(os.getenv("GROQ_TOKENS_PER_MINUTE", "30000"))
+
+    def __init__(self, api_key: Optional[str] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.api_key = api_key
+        self._client = None
+        self._http_client = None
+        self._lock = threading.Lock()
+
+    def client(self):
+        """Groq SDK client over one pooled httpx.Client, built on first use."""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    api_key = self.api_key or os.getenv("GROQ_API_KEY")
+                    if not api_key:
+                        raise ValueError("GROQ_API_KEY is required (set it in your root .env)")
+                    import httpx
+                    from groq import Groq
+
+                    self._http_client = httpx.Client(
+                        timeout=httpx.Timeout(self.timeout, connect=10.0),
+                        limits=httpx.Limits(
+                            max_connections=self.max_in_flight, max_keepalive_connections=self.max_in_flight
+                        ),
+                    )
+                    # Retries are handled by retry_with_backoff in TestGenerator
+                    self._client = Groq(api_key=api_key, max_retries=0, http_client=self._http_client)
+        return self._client
+
+    def _complete(self, model: str, prompt: str, max_tokens: int, temperature: float) -> LLMResponse:
+        response = self.client().chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            max_tokens=max_tokens,
+        )
+        usage = getattr(response, "usage", None)
+        return LLMResponse(
+            response.choices[0].message.content,
+            getattr(usage, "total_tokens", None),
+            getattr(usage, "prompt_tokens", None),
+            getattr(usage, "completion_tokens", None),
+        )
+
+    def is_retryable(self, exc: Exception) -> bool:
+        from groq import APIConnectionError, APITimeoutError
+
+        if isinstance(exc, (APIConnectionError, APITimeoutError)):
+            return True
+        status = getattr(exc, "status_code", None)
+        return status == 429 or (status is not None and status >= 500)
+
+    def retry_after(self, exc: Exception) -> Optional[float]:
+        response = getattr(exc, "response", None)
+        value = response.headers.get("retry-after") if response is not None else None
+        try:
+            return float(value) if value is not None else None
+        except ValueError:
+            return None
+
+    def close(self) -> None:
+        if self._http_client is not None:
+            self._http_client.close()
+        self._client = self._http_client = None
+
+
+class StubProvider(LLMProvider):
+    """
+    Offline, deterministic backend: the same prompt always yields the same minimal test
+    file after a fixed latency (TRINITY_LLM_STUB_LATENCY_MS). Understands the batch
+    prompt's per-file delimiters so every pipeline path can run without network.
+    """
+
+    name = "stub"
+    default_model = "stub"
+
+    SOURCE_MARKER = re.compile(r"^### SOURCE FILE:\s*(.+?)\s*$", re.MULTILINE)
+
+    def __init__(self, latency_ms: Optional[float] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.latency = (latency_ms if latency_ms is not None else float(_setting(self.name, "LATENCY_MS", "0"))) / 1000
+
+    @staticmethod
+    def _test_body(seed: str) -> str:
+        digest = hashlib.sha256(seed.encode("utf-8")).hexdigest()[:12]
+        return f"def test_stub_{digest}():\n    assert True\n"
+
+    def _complete(self, model: str, prompt: str, max_tokens: int, temperature: float) -> LLMResponse:
+        if self.latency:
+            time.sleep(self.latency)
+        paths = self.SOURCE_MARKER.findall(prompt)
+        if paths:
+            text = "\n".join(f"### TEST FILE: {p}\n{self._test_body(prompt + p)}" for p in paths)
+        else:
+            text = self._test_body(prompt)
+        return LLMResponse(text, len(prompt) // 4 + len(text) // 4, len(prompt) // 4, len(text) // 4)
+
+
+class ReplayProvider(LLMProvider):
+    """
+    Serves recorded responses from disk, keyed by sha256(model, prompt, max_tokens, temperature).
+    With `upstream`, misses are forwarded and recorded (TRINITY_LLM_PROVIDER=record);
+    otherwise a miss raises, or falls back to the stub when TRINITY_LLM_REPLAY_ON_MISS=stub.
+    """
+
+    name = "replay"
+
+    def __init__(self, replay_dir: str = REPLAY_DIR, upstream: Optional[LLMProvider] = None,
+                 on_miss: str = REPLAY_ON_MISS, **kwargs):
+        super().__init__(**kwargs)
+        self.replay_dir = replay_dir
+        self.upstream = upstream
+        self.fallback = StubProvider() if on_miss == "stub" else None
+        self.default_model = upstream.default_model if upstream else "stub"
+        if upstream:
+            self.requests_per_minute = upstream.requests_per_minute
+            self.tokens_per_minute = upstream.tokens_per_minute
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(model: str, prompt: str, max_tokens: int, temperature: float) -> str:
+        raw = "\x1f".join([model, str(max_tokens), f"{temperature:.3f}", prompt])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.replay_dir, key[:2], f"{key}.json")
+
+    def _complete(self, model: str, prompt: str, max_tokens: int, temperature: float) -> LLMResponse:
+        key = self.key(model, prompt, max_tokens, temperature)
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            self.hits += 1
+            cache_event("llm_replay", hit=True)
+            return LLMResponse(
+                entry["response"], entry.get("total_tokens"), entry.get("prompt_tokens"), entry.get("completion_tokens")
+            )
+        except (OSError, json.JSONDecodeError, KeyError):
+            self.misses += 1
+            cache_event("llm_replay", hit=False)
+
+        if self.upstream is not None:
+            response = self.upstream.complete(model, prompt, max_tokens, temperature)
+            self._record(key, model, response)
+            return response
+        if self.fallback is not None:
+            return self.fallback.complete(model, prompt, max_tokens, temperature)
+        raise LookupError(f"No recorded LLM response for prompt {key[:12]} in {self.replay_dir}")
+
+    def _record(self, key: str, model: str, response: LLMResponse) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"model": model, "response": response.text, "total_tokens": response.total_tokens,
+                       "prompt_tokens": response.prompt_tokens, "completion_tokens": response.completion_tokens,
+                       "recorded_at": time.time()}, f)
+        os.replace(tmp, path)
+
+    def is_retryable(self, exc: Exception) -> bool:
+        return self.upstream.is_retryable(exc) if self.upstream else False
+
+    def retry_after(self, exc: Exception) -> Optional[float]:
+        return self.upstream.retry_after(exc) if self.upstream else None
+
+    def close(self) -> None:
+        if self.upstream:
+            self.upstream.close()
+
+
+def create_provider(name: str, **kwargs) -> LLMProvider:
+    if name == "groq":
+        return GroqProvider(**kwargs)
+    if name == "stub":
+        return StubProvider(**kwargs)
+    if name == "replay":
+        return ReplayProvider(**kwargs)
+    if name == "record":
+        return ReplayProvider(upstream=GroqProvider(**kwargs))
+    raise ValueError(f"Unknown LLM provider: {name} (expected groq, stub, replay or record)")
+
+
+_providers: Dict[str, LLMProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def get_provider(name: Optional[str] = None) -> LLMProvider:
+    """Process-wide provider instance (one connection pool per provider)."""
+    name = name or LLM_PROVIDER
+    with _providers_lock:
+        if name not in _providers:
+            _providers[name] = create_provider(name)
+            logger.info(f"[LLM] 🔌 Using provider: {name}")
+        return _providers[name]
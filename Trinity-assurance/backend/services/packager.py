@@ -0,0 +1,297 @@
+# backend/services/packager.py
+
+import os
+import time
+import zlib
+import struct
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from backend.utils.metrics import cache_event, timed
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+ZIP_CACHE_DIR = os.getenv("TRINITY_ZIP_CACHE_DIR", os.path.join("tests", ".cache", "zip"))
+ZIP_CACHE_MAX_BYTES = int(os.getenv("TRINITY_ZIP_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+COMPRESS_LEVEL = int(os.getenv("TRINITY_ZIP_LEVEL", "6"))
+MAX_LAYOUTS = 64
+STAT_CACHE_MAX = 200_000
+CHUNK_SIZE = 64 * 1024
+
+# Plain ZIP (no ZIP64): per-archive limits
+ZIP_MAX_ENTRIES = 0xFFFF
+ZIP_MAX_OFFSET = 0xFFFFFFFF
+
+IGNORED_DIRS = {".history", "_history", ".cache", "__pycache__", "node_modules"}
+
+_LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+_CENTRAL_HEADER = struct.Struct("<IHHHHHHIIIHHHHHII")
+_END_RECORD = struct.Struct("<IHHHHIIH")
+_UTF8_FLAG = 0x0800
+_DEFLATED = 8
+_VERSION = 20
+_UNIX_FILE_ATTRS = (0o100644 & 0xFFFF) << 16
+
+
+class Entry(NamedTuple):
+    arcname: str
+    path: str
+    sha: str
+    crc: int
+    size: int
+    compressed_size: int
+    dos_time: int
+    dos_date: int
+
+
+Segment = Tuple[int, int, Union[bytes, str]]  # (offset, length, literal bytes or cached blob path)
+
+
+def _dos_datetime(mtime: float) -> Tuple[int, int]:
+    t = time.localtime(max(mtime, 315532800))  # ZIP dates start at 1980
+    return (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2), ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+
+
+class ArchiveLayout:
+    """
+    Byte layout of one archive version: local headers, cached deflate blobs and the
+    central directory, with known offsets. Serving any byte range just slices segments,
+    so the archive is never materialized as a file.
+    """
+
+    def __init__(self, etag: str, segments: List[Segment], size: int, entries: List[Entry]):
+        self.etag = etag
+        self.segments = segments
+        self.size = size
+        self.entries = entries
+
+    def iter_bytes(self, start: int = 0, end: Optional[int] = None, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        """Yield bytes [start, end] (inclusive), reading cached blobs in chunks."""
+        end = self.size - 1 if end is None else min(end, self.size - 1)
+        for offset, length, data in self.segments:
+            if offset + length <= start:
+                continue
+            if offset > end:
+                break
+            lo = max(start, offset) - offset
+            hi = min(end + 1, offset + length) - offset
+            if isinstance(data, bytes):
+                yield data[lo:hi]
+                continue
+            with open(data, "rb") as f:
+                f.seek(lo)
+                remaining = hi - lo
+                while remaining > 0:
+                    chunk = f.read(min(chunk_size, remaining))
+                    if not chunk:
+                        raise IOError(f"Cached ZIP entry truncated: {data}")
+                    remaining -= len(chunk)
+                    yield chunk
+
+
+class ZipPackager:
+    """
+    Builds ZIP archives of a tests folder from a content-addressed cache of deflated entries.
+
+    - Each file is deflated once per content hash (<cache_dir>/<sha[:2]>/<sha>.deflate), so
+      regenerating a few tests only compresses those files.
+    - The archive is described by an ArchiveLayout keyed on a manifest hash
+      (arcname, content hash, mtime of every entry); the hash doubles as the ETag.
+    - Layouts are cached in memory; unchanged folders are re-validated with a stat() per file.
+    """
+
+    def __init__(self, cache_dir: str = ZIP_CACHE_DIR, max_bytes: int = ZIP_CACHE_MAX_BYTES,
+                 level: int = COMPRESS_LEVEL):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.level = level
+        self._lock = threading.Lock()
+        self._folder_locks: Dict[str, threading.Lock] = {}
+        # (path, size, mtime_ns) → (sha, crc, size); avoids re-hashing unchanged files
+        self._stat_cache: Dict[Tuple[str, int, int], Tuple[str, int, int]] = {}
+        self._layouts: "OrderedDict[str, ArchiveLayout]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    # ──────────────────────────────────────────────────────────────────────
+    # Entries
+    # ──────────────────────────────────────────────────────────────────────
+    def list_files(self, folder: str) -> List[Tuple[str, str]]:
+        """(arcname, path) for every file under folder, sorted; skips Trinity state and old ZIPs."""
+        found = []
+        for root, dirs, files in os.walk(folder):
+            dirs[:] = [d for d in dirs if d not in IGNORED_DIRS and not d.startswith(".")]
+            for f in files:
+                if f.startswith(".") or f.endswith((".zip", ".pyc")):
+                    continue
+                path = os.path.join(root, f)
+                found.append((os.path.relpath(path, folder).replace(os.sep, "/"), path))
+        return sorted(found)
+
+    def _blob_path(self, sha: str) -> str:
+        return os.path.join(self.cache_dir, sha[:2], f"{sha}.deflate")
+
+    def _entry(self, arcname: str, path: str) -> Entry:
+        st = os.stat(path)
+        stat_key = (path, st.st_size, st.st_mtime_ns)
+        known = self._stat_cache.get(stat_key)
+
+        data = None
+        if known is None:
+            with open(path, "rb") as f:
+                data = f.read()
+            known = (hashlib.sha256(data).hexdigest(), zlib.crc32(data), len(data))
+            if len(self._stat_cache) >= STAT_CACHE_MAX:
+                self._stat_cache.clear()
+            self._stat_cache[stat_key] = known
+        sha, crc, size = known
+
+        blob = self._blob_path(sha)
+        try:
+            compressed_size = os.path.getsize(blob)
+        except OSError:
+            if data is None:
+                with open(path, "rb") as f:
+                    data = f.read()
+            compressor = zlib.compressobj(self.level, zlib.DEFLATED, -15)  # raw deflate, as ZIP stores it
+            compressed = compressor.compress(data) + compressor.flush()
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            tmp = f"{blob}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(compressed)
+            os.replace(tmp, blob)
+            compressed_size = len(compressed)
+            with self._lock:
+                self.misses += 1
+            cache_event("zip", hit=False)
+        else:
+            with self._lock:
+                self.hits += 1
+            cache_event("zip", hit=True)
+
+        dos_time, dos_date = _dos_datetime(st.st_mtime)
+        return Entry(arcname, path, sha, crc, size, compressed_size, dos_time, dos_date)
+
+    # ──────────────────────────────────────────────────────────────────────
+    # Layout
+    # ──────────────────────────────────────────────────────────────────────
+    @timed("package", "layout")
+    def layout(self, folder: str) -> ArchiveLayout:
+        """Current archive layout for folder, compressing only entries not in the cache."""
+        folder = os.path.abspath(folder)
+        with self._lock:
+            folder_lock = self._folder_locks.setdefault(folder, threading.Lock())
+
+        with folder_lock:
+            entries = [self._entry(arcname, path) for arcname, path in self.list_files(folder)]
+            if len(entries) > ZIP_MAX_ENTRIES:
+                raise ValueError(f"Too many files for a ZIP archive: {len(entries)}")
+
+            manifest = hashlib.sha256()
+            for e in entries:
+                manifest.update(f"{e.arcname}\0{e.sha}\0{e.dos_date}:{e.dos_time}\n".encode("utf-8"))
+            etag = manifest.hexdigest()
+
+            with self._lock:
+                cached = self._layouts.get(etag)
+                if cached is not None:
+                    self._layouts.move_to_end(etag)
+                    return cached
+
+            built = self._build(etag, entries)
+            with self._lock:
+                self._layouts[etag] = built
+                while len(self._layouts) > MAX_LAYOUTS:
+                    self._layouts.popitem(last=False)
+            logger.info(f"[Packager] 📦 Layout {etag[:12]} for {folder}: {len(entries)} entries, {built.size} bytes")
+            return built
+
+    def _build(self, etag: str, entries: List[Entry]) -> ArchiveLayout:
+        segments: List[Segment] = []
+        central = []
+        offset = 0
+
+        def add(data: Union[bytes, str], length: int) -> None:
+            nonlocal offset
+            segments.append((offset, length, data))
+            offset += length
+
+        for e in entries:
+            name = e.arcname.encode("utf-8")
+            header_offset = offset
+            add(_LOCAL_HEADER.pack(
+                0x04034B50, _VERSION, _UTF8_FLAG, _DEFLATED, e.dos_time, e.dos_date,
+                e.crc, e.compressed_size, e.size, len(name), 0,
+            ) + name, _LOCAL_HEADER.size + len(name))
+            add(self._blob_path(e.sha), e.compressed_size)
+            central.append(_CENTRAL_HEADER.pack(
+                0x02014B50, (3 << 8) | _VERSION, _VERSION, _UTF8_FLAG, _DEFLATED, e.dos_time, e.dos_date,
+                e.crc, e.compressed_size, e.size, len(name), 0, 0, 0, 0, _UNIX_FILE_ATTRS, header_offset,
+            ) + name)
+
+        directory = b"".join(central)
+        directory_offset = offset
+        if directory_offset + len(directory) > ZIP_MAX_OFFSET:
+            raise ValueError("Archive exceeds 4 GiB (ZIP64 not supported)")
+        add(directory + _END_RECORD.pack(
+            0x06054B50, 0, 0, len(entries), len(entries), len(directory), directory_offset, 0,
+        ), len(directory) + _END_RECORD.size)
+
+        return ArchiveLayout(etag, segments, offset, entries)
+
+    def write(self, folder: str, dest: str) -> ArchiveLayout:
+        """Materialize the archive at dest (atomic replace), e.g. for CI artifacts."""
+        layout = self.layout(folder)
+        tmp = f"{dest}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            for chunk in layout.iter_bytes():
+                f.write(chunk)
+        os.replace(tmp, dest)
+        return layout
+
+    # ──────────────────────────────────────────────────────────────────────
+    # Maintenance
+    # ──────────────────────────────────────────────────────────────────────
+    def evict(self) -> int:
+        """Drop least-recently-written blobs above max_bytes, keeping those used by cached layouts."""
+        with self._lock:
+            live = {e.sha for layout in self._layouts.values() for e in layout.entries}
+
+        blobs = []
+        for root, _, files in os.walk(self.cache_dir):
+            for f in files:
+                if f.endswith(".deflate"):
+                    path = os.path.join(root, f)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    blobs.append((st.st_mtime, st.st_size, f[:-len(".deflate")], path))
+
+        total = sum(size for _, size, _, _ in blobs)
+        removed = 0
+        for _, size, sha, path in sorted(blobs):
+            if total <= self.max_bytes:
+                break
+            if sha in live:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        if removed:
+            logger.info(f"[Packager] 🧹 Evicted {removed} cached ZIP entries")
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "layouts": len(self._layouts)}
+
+
+packager = ZipPackager()
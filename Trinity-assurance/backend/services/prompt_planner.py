@@ -0,0 +1,335 @@
+# backend/services/prompt_planner.py
+
+import os
+import re
+import ast
+import math
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+from backend.utils.prompts import (
+    TEST_GEN_PROMPT_TEMPLATE,
+    TEST_GEN_CHUNK_PROMPT_TEMPLATE,
+    TEST_GEN_BATCH_PROMPT_TEMPLATE,
+)
+
+try:
+    import tiktoken
+except ImportError:  # fall back to a regex estimate
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Model limits (defaults fit llama3-8b-8192)
+CONTEXT_TOKENS = int(os.getenv("TRINITY_LLM_CONTEXT_TOKENS", "8192"))
+MAX_OUTPUT_TOKENS = int(os.getenv("TRINITY_LLM_MAX_OUTPUT_TOKENS", "4096"))
+MIN_OUTPUT_TOKENS = 512
+# Tests run longer than the code they cover
+OUTPUT_RATIO = float(os.getenv("TRINITY_LLM_OUTPUT_RATIO", "1.5"))
+# Slack for tokenizer mismatch between the local count and the provider's
+SAFETY_MARGIN = 256
+
+# Files at or below this many tokens are packed together into one request
+SMALL_FILE_TOKENS = int(os.getenv("TRINITY_SMALL_FILE_TOKENS", "300"))
+BATCH_MAX_FILES = int(os.getenv("TRINITY_BATCH_MAX_FILES", "8"))
+
+BATCH_DELIMITER = re.compile(r"^###\s*TEST FILE:\s*(.+?)\s*$", re.MULTILINE)
+
+# Declaration starts used to split non-Python sources (regex fallback for the AST splitter)
+BOUNDARIES = {
+    "java": re.compile(
+        r"^(?:\s{0,4}|\t?)(?:@\w+|(?:(?:public|protected|private|static|final|abstract|synchronized|default)\s+)*"
+        r"(?:class|interface|enum|record|[\w<>\[\],.? ]+\s+\w+\s*\())"
+    ),
+    "javascript": re.compile(
+        r"^(?:export\s+)?(?:default\s+)?(?:async\s+)?(?:function\b|class\b|const\b|let\b|var\b)"
+        r"|^\s{2,4}(?:static\s+)?(?:async\s+)?(?:get\s+|set\s+)?\w+\s*\([^)]*\)\s*\{"
+    ),
+}
+BOUNDARIES["typescript"] = BOUNDARIES["javascript"]
+
+IMPORT_LINES = {
+    "python": re.compile(r"^(?:import\s|from\s+\S+\s+import\s)"),
+    "java": re.compile(r"^(?:package|import)\s"),
+    "javascript": re.compile(r"^(?:import\s|(?:const|let|var)\s+[\w{}\s,]+=\s*require\()"),
+}
+IMPORT_LINES["typescript"] = IMPORT_LINES["javascript"]
+JAVA_TYPE_DECL = re.compile(r"\b(?:class|interface|enum|record)\s+(\w+)")
+
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """Local token count: tiktoken when installed, otherwise a word/punctuation estimate."""
+    global _encoding
+    if tiktoken is not None:
+        if _encoding is None:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        return len(_encoding.encode(text, disallowed_special=()))
+    # Identifiers split into ~1.3 tokens on average; each punctuation char is about one
+    words = re.findall(r"\w+|[^\w\s]", text)
+    return int(sum(1.3 if w[0].isalnum() or w[0] == "_" else 1 for w in words)) + text.count("\n") // 2
+
+
+def output_budget(content_tokens: int, prompt_tokens: int) -> int:
+    """max_tokens for a request: proportional to the code covered, within the context window."""
+    wanted = max(MIN_OUTPUT_TOKENS, math.ceil(content_tokens * OUTPUT_RATIO))
+    return max(1, min(MAX_OUTPUT_TOKENS, wanted, CONTEXT_TOKENS - prompt_tokens - SAFETY_MARGIN))
+
+
+@dataclass
+class SourceFile:
+    path: str  # absolute/CWD-relative path on disk
+    rel_path: str  # repo-relative, shown to the model
+    code: str
+    tokens: int = 0
+
+
+@dataclass
+class PromptTask:
+    """One or more LLM requests whose outputs become test code for `files`."""
+    kind: str  # "single" | "chunked" | "batch"
+    files: List[SourceFile]
+    prompts: List[Tuple[str, int]] = field(default_factory=list)  # (prompt, max_tokens)
+
+
+class PromptPlanner:
+    """
+    Turns source files into token-budgeted requests:
+
+    - files that fit get one request with an output budget sized to their content;
+    - large files are split along AST boundaries (Python) or declaration boundaries
+      (regex, JS/TS/Java) into chunks that each fit the context window;
+    - tiny files are packed several per request with per-file output delimiters.
+    """
+
+    def __init__(self, language: str):
+        self.language = str(getattr(language, "value", language)).lower()
+        overhead = count_tokens(TEST_GEN_PROMPT_TEMPLATE.format(language=self.language, diff=""))
+        # Largest body such that prompt + proportional output fit in the window and in MAX_OUTPUT_TOKENS
+        self.max_chunk_tokens = max(
+            200,
+            min(
+                int((CONTEXT_TOKENS - overhead - SAFETY_MARGIN) / (1 + OUTPUT_RATIO)),
+                int(MAX_OUTPUT_TOKENS / OUTPUT_RATIO),
+            ),
+        )
+
+    # ──────────────────────────────────────────────────────────────────────
+    # Planning
+    # ──────────────────────────────────────────────────────────────────────
+    def plan(self, files: List[SourceFile]) -> List[PromptTask]:
+        tasks: List[PromptTask] = []
+        small: List[SourceFile] = []
+        for f in files:
+            f.tokens = f.tokens or count_tokens(f.code)
+            if f.tokens > self.max_chunk_tokens:
+                tasks.append(self.chunked_task(f))
+            elif f.tokens <= SMALL_FILE_TOKENS:
+                small.append(f)
+            else:
+                tasks.append(self.single_task(f))
+        tasks.extend(self._batches(small))
+
+        requests = sum(len(t.prompts) for t in tasks)
+        logger.info(
+            f"[Planner] 🧮 {len(files)} files → {requests} requests "
+            f"({sum(t.kind == 'batch' for t in tasks)} batches, {sum(t.kind == 'chunked' for t in tasks)} chunked)"
+        )
+        return tasks
+
+    def single_task(self, f: SourceFile) -> PromptTask:
+        prompt = TEST_GEN_PROMPT_TEMPLATE.format(language=self.language, diff=f.code)
+        return PromptTask("single", [f], [(prompt, output_budget(f.tokens, count_tokens(prompt)))])
+
+    def _batches(self, small: List[SourceFile]) -> List[PromptTask]:
+        tasks: List[PromptTask] = []
+        group: List[SourceFile] = []
+        group_tokens = 0
+        for f in small:
+            if group and (len(group) >= BATCH_MAX_FILES or group_tokens + f.tokens > self.max_chunk_tokens):
+                tasks.append(self._batch_task(group))
+                group, group_tokens = [], 0
+            group.append(f)
+            group_tokens += f.tokens
+        if group:
+            tasks.append(self._batch_task(group))
+        return tasks
+
+    def _batch_task(self, group: List[SourceFile]) -> PromptTask:
+        if len(group) == 1:
+            return self.single_task(group[0])
+        files = "\n".join(
+            f"========================\n### SOURCE FILE: {f.rel_path}\n{f.code}" for f in group
+        ) + "\n========================"
+        prompt = TEST_GEN_BATCH_PROMPT_TEMPLATE.format(language=self.language, count=len(group), files=files)
+        content = sum(f.tokens for f in group)
+        return PromptTask("batch", list(group), [(prompt, output_budget(content, count_tokens(prompt)))])
+
+    def chunked_task(self, f: SourceFile) -> PromptTask:
+        context, chunks = self.split(f.code)
+        context_tokens = count_tokens(context)
+        task = PromptTask("chunked", [f])
+        base = os.path.splitext(os.path.basename(f.rel_path))[0]
+        for part, chunk in enumerate(chunks, start=1):
+            if self.language == "java":
+                naming = f"Name the test class {base}Part{part}Test and do NOT declare it public."
+            else:
+                naming = "Use test names that are unique to this part of the file."
+            prompt = TEST_GEN_CHUNK_PROMPT_TEMPLATE.format(
+                language=self.language, path=f.rel_path, part=part, parts=len(chunks),
+                context=context or "(none)", code=chunk, naming=naming,
+            )
+            body_tokens = count_tokens(chunk)
+            task.prompts.append((prompt, output_budget(body_tokens, count_tokens(prompt))))
+            if body_tokens + context_tokens > self.max_chunk_tokens * 1.2:
+                logger.warning(f"[Planner] ⚠️ {f.rel_path} part {part} exceeds the chunk budget ({body_tokens} tokens)")
+        return task
+
+    # ──────────────────────────────────────────────────────────────────────
+    # Splitting
+    # ──────────────────────────────────────────────────────────────────────
+    def split(self, code: str) -> Tuple[str, List[str]]:
+        """(shared context, chunks) for a source that exceeds the chunk budget."""
+        if self.language == "python":
+            try:
+                return self._split_python(code)
+            except (SyntaxError, ValueError):
+                pass
+        return self._split_regex(code)
+
+    def _budget_for_body(self, context: str) -> int:
+        return max(100, self.max_chunk_tokens - count_tokens(context))
+
+    def _split_python(self, code: str) -> Tuple[str, List[str]]:
+        tree = ast.parse(code)
+        lines = code.splitlines()
+
+        def span(node) -> Tuple[int, int]:
+            start = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+            return start - 1, node.end_lineno
+
+        imports = [n for n in tree.body if isinstance(n, (ast.Import, ast.ImportFrom))]
+        context = "\n".join("\n".join(lines[slice(*span(n))]) for n in imports)
+        budget = self._budget_for_body(context)
+
+        units: List[str] = []
+        for node in tree.body:
+            if node in imports:
+                continue
+            start, end = span(node)
+            text = "\n".join(lines[start:end])
+            if isinstance(node, ast.ClassDef) and count_tokens(text) > budget and node.body:
+                # Oversized class: one unit per member, each carrying the class header
+                header_end = span(node.body[0])[0]
+                header = "\n".join(lines[start:header_end]).rstrip() + "\n    # ... (other members omitted)"
+                for member in node.body:
+                    m_start, m_end = span(member)
+                    units.append(header + "\n" + "\n".join(lines[m_start:m_end]))
+            else:
+                units.append(text)
+
+        return context, self._pack(units, budget)
+
+    def _split_regex(self, code: str) -> Tuple[str, List[str]]:
+        lines = code.splitlines()
+        import_line = IMPORT_LINES.get(self.language)
+        boundary = BOUNDARIES.get(self.language)
+
+        context_lines = [l for l in lines if import_line and import_line.match(l)]
+        if self.language == "java":
+            decl = next((l.strip() for l in lines if JAVA_TYPE_DECL.search(l)), "")
+            if decl:
+                context_lines.append(decl.rstrip("{ ") + " { ... }")
+        context = "\n".join(context_lines)
+        budget = self._budget_for_body(context)
+
+        units: List[str] = []
+        current: List[str] = []
+        for line in lines:
+            if import_line and import_line.match(line):
+                continue
+            if boundary and boundary.match(line) and current:
+                units.append("\n".join(current))
+                current = []
+            current.append(line)
+        if current:
+            units.append("\n".join(current))
+
+        return context, self._pack(units, budget)
+
+    def _pack(self, units: List[str], budget: int) -> List[str]:
+        """Greedily merge consecutive units up to the budget; hard-split any unit that alone exceeds it."""
+        chunks: List[str] = []
+        current: List[str] = []
+        current_tokens = 0
+        for unit in units:
+            tokens = count_tokens(unit)
+            if tokens > budget:
+                if current:
+                    chunks.append("\n\n".join(current))
+                    current, current_tokens = [], 0
+                chunks.extend(self._split_lines(unit, budget))
+                continue
+            if current and current_tokens + tokens > budget:
+                chunks.append("\n\n".join(current))
+                current, current_tokens = [], 0
+            current.append(unit)
+            current_tokens += tokens
+        if current:
+            chunks.append("\n\n".join(current))
+        return chunks or [""]
+
+    @staticmethod
+    def _split_lines(text: str, budget: int) -> List[str]:
+        pieces: List[str] = []
+        current: List[str] = []
+        tokens = 0
+        for line in text.splitlines():
+            line_tokens = count_tokens(line) + 1
+            if current and tokens + line_tokens > budget:
+                pieces.append("\n".join(current))
+                current, tokens = [], 0
+            current.append(line)
+            tokens += line_tokens
+        if current:
+            pieces.append("\n".join(current))
+        return pieces
+
+    # ──────────────────────────────────────────────────────────────────────
+    # Output handling
+    # ──────────────────────────────────────────────────────────────────────
+    @staticmethod
+    def split_batch_output(output: str, files: List[SourceFile]) -> Dict[str, str]:
+        """rel_path → test code from a delimited batch response; files the model skipped are absent."""
+        wanted = {f.rel_path for f in files}
+        marks = list(BATCH_DELIMITER.finditer(output))
+        results: Dict[str, str] = {}
+        for i, mark in enumerate(marks):
+            path = mark.group(1).strip("`'\" ")
+            end = marks[i + 1].start() if i + 1 < len(marks) else len(output)
+            body = output[mark.end():end].strip()
+            if path in wanted and body:
+                results[path] = body
+        return results
+
+    def merge_chunks(self, parts: List[str]) -> str:
+        """Combine per-chunk test code into one file, hoisting and de-duplicating import lines."""
+        import_line = IMPORT_LINES.get(self.language)
+        imports: List[str] = []
+        bodies: List[str] = []
+        for part in parts:
+            body = []
+            for line in part.splitlines():
+                if import_line and import_line.match(line):
+                    if line.strip() not in imports:
+                        imports.append(line.strip())
+                else:
+                    body.append(line)
+            bodies.append("\n".join(body).strip())
+        if self.language == "java":
+            imports.sort(key=lambda l: not l.startswith("package"))
+        header = "\n".join(imports)
+        return (header + "\n\n" if header else "") + "\n\n".join(b for b in bodies if b)
@@ -0,0 +1,210 @@
+# backend/services/pytest_worker.py
+"""
+Worker process for PythonTestExecutor. Runs one shard of test files and writes one
+JSON line per test to the file descriptor given by --results-fd.
+
+Kept free of backend imports: it runs as a plain script in a fresh interpreter.
+"""
+import os
+import sys
+import json
+import time
+import signal
+import inspect
+import argparse
+import traceback
+import importlib.util
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class TestTimeout(Exception):
+    pass
+
+
+def _on_alarm(signum, frame):
+    raise TestTimeout("Test exceeded the per-test timeout")
+
+
+def _set_timer(seconds: float) -> None:
+    if hasattr(signal, "setitimer"):
+        signal.setitimer(signal.ITIMER_REAL, seconds)
+
+
+class ResultWriter:
+    def __init__(self, fd: int):
+        self.stream = os.fdopen(fd, "w", buffering=1, encoding="utf-8")
+
+    def emit(self, record: dict) -> None:
+        self.stream.write(json.dumps(record) + "\n")
+        self.stream.flush()
+
+
+def _last_line(text: str) -> str:
+    lines = text.strip().splitlines()
+    return lines[-1] if lines else ""
+
+
+def _file_and_name(nodeid: str):
+    path, _, name = nodeid.partition("::")
+    return path, name or path
+
+
+class ResultPlugin:
+    """pytest plugin: per-test timeout + one structured record per test."""
+
+    def __init__(self, writer: ResultWriter, timeout: float):
+        self.writer = writer
+        self.timeout = timeout
+        self.pending = {}
+
+    def pytest_runtest_logstart(self, nodeid, location):
+        self.writer.emit({"event": "start", "nodeid": nodeid})
+
+    def pytest_runtest_protocol(self, item, nextitem):
+        _set_timer(self.timeout)
+        return None
+
+    def pytest_runtest_logreport(self, report):
+        record = self.pending.setdefault(report.nodeid, {
+            "event": "result",
+            "nodeid": report.nodeid,
+            "status": "passed",
+            "duration": 0.0,
+            "message": "",
+            "traceback": "",
+        })
+        record["duration"] += report.duration
+
+        if report.failed:
+            phase_status = "failed" if report.when == "call" else "error"
+            if record["status"] == "passed":
+                record["status"] = phase_status
+                record["traceback"] = report.longreprtext
+                crash = getattr(report.longrepr, "reprcrash", None)
+                record["message"] = crash.message if crash else _last_line(report.longreprtext)
+        elif report.skipped and record["status"] == "passed":
+            record["status"] = "skipped"
+            longrepr = report.longrepr
+            record["message"] = longrepr[2] if isinstance(longrepr, tuple) and len(longrepr) == 3 else ""
+
+        if report.when == "teardown":
+            _set_timer(0)
+            self.pending.pop(report.nodeid)
+            record["file"], record["name"] = _file_and_name(report.nodeid)
+            record["duration"] = round(record["duration"], 6)
+            self.writer.emit(record)
+
+    def pytest_collectreport(self, report):
+        if report.failed:
+            file, _ = _file_and_name(report.nodeid)
+            self.writer.emit({
+                "event": "result",
+                "nodeid": report.nodeid,
+                "file": file,
+                "name": "<collection>",
+                "status": "error",
+                "duration": 0.0,
+                "message": _last_line(report.longreprtext) or "Collection failed",
+                "traceback": report.longreprtext,
+            })
+
+
+def _run_with_pytest(pytest, files, rootdir, writer, timeout) -> int:
+    args = [
+        *files,
+        "-q",
+        "-p", "no:cacheprovider",
+        "--import-mode=importlib",
+        "--continue-on-collection-errors",
+        f"--rootdir={rootdir}",
+    ]
+    return pytest.main(args, plugins=[ResultPlugin(writer, timeout)])
+
+
+def _run_minimal(files, rootdir, writer, timeout) -> int:
+    """
+    Fallback when pytest isn't installed: plain test_* functions and Test* classes, no fixtures.
+    Paths are reported relative to rootdir, like pytest nodeids.
+    """
+    failures = 0
+    for index, path in enumerate(files):
+        file_path = os.path.relpath(os.path.abspath(path), os.path.abspath(rootdir))
+        try:
+            spec = importlib.util.spec_from_file_location(f"trinity_test_{index}", path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+        except Exception as e:
+            failures += 1
+            writer.emit({
+                "event": "result", "nodeid": file_path, "file": file_path, "name": "<collection>",
+                "status": "error", "duration": 0.0, "message": f"{type(e).__name__}: {e}",
+                "traceback": traceback.format_exc(),
+            })
+            continue
+
+        cases = []
+        for name, obj in vars(module).items():
+            if name.startswith("test") and inspect.isfunction(obj):
+                cases.append((name, obj))
+            elif name.startswith("Test") and inspect.isclass(obj):
+                for method_name, method in vars(obj).items():
+                    if method_name.startswith("test") and inspect.isfunction(method):
+                        cases.append((f"{name}::{method_name}", (obj, method_name)))
+
+        for name, case in cases:
+            nodeid = f"{file_path}::{name}"
+            writer.emit({"event": "start", "nodeid": nodeid})
+            record = {"event": "result", "nodeid": nodeid, "file": file_path, "name": name,
+                      "status": "passed", "duration": 0.0, "message": "", "traceback": ""}
+            started = time.perf_counter()
+            _set_timer(timeout)
+            try:
+                if isinstance(case, tuple):
+                    cls, method_name = case
+                    getattr(cls(), method_name)()
+                else:
+                    case()
+            except Exception as e:
+                failures += 1
+                record["status"] = "failed" if isinstance(e, AssertionError) else "error"
+                record["message"] = f"{type(e).__name__}: {e}"
+                record["traceback"] = traceback.format_exc()
+            finally:
+                _set_timer(0)
+            record["duration"] = round(time.perf_counter() - started, 6)
+            writer.emit(record)
+    return 1 if failures else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--results-fd", type=int, required=True)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--memory-mb", type=int, default=0)
+    parser.add_argument("--rootdir", type=str, default=".")
+    parser.add_argument("files", nargs="*")
+    args = parser.parse_args()
+
+    if resource is not None and args.memory_mb > 0:
+        limit = args.memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    if hasattr(signal, "SIGALRM"):
+        signal.signal(signal.SIGALRM, _on_alarm)
+
+    writer = ResultWriter(args.results_fd)
+    try:
+        import pytest
+    except ImportError:
+        pytest = None
+
+    if pytest is not None:
+        return _run_with_pytest(pytest, args.files, args.rootdir, writer, args.timeout)
+    return _run_minimal(args.files, args.rootdir, writer, args.timeout)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
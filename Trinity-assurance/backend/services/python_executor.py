@@ -0,0 +1,247 @@
+# backend/services/python_executor.py
+
+import os
+import sys
+import json
+import time
+import queue
+import logging
+import tempfile
+import threading
+import subprocess
+from typing import Dict, Iterator, List, Optional
+
+from backend.services.test_sharder import lpt_shards
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pytest_worker.py")
+
+DEFAULT_WORKERS = int(os.getenv("TRINITY_TEST_WORKERS", "0")) or (os.cpu_count() or 1)
+TEST_TIMEOUT = float(os.getenv("TRINITY_TEST_TIMEOUT", "60"))
+MEMORY_LIMIT_MB = int(os.getenv("TRINITY_TEST_MEMORY_MB", "1024"))
+# Extra grace before a silent worker is killed (covers tests that ignore SIGALRM)
+HARD_TIMEOUT_GRACE = 30.0
+
+# Folders under tests/ that hold Trinity state, not tests
+IGNORED_DIRS = {".history", "_history", ".cache", "__pycache__"}
+
+
+def discover_python_tests(test_dir: str) -> List[str]:
+    """test_*.py / *_test.py files under test_dir, in a stable order."""
+    found: List[str] = []
+    for root, dirs, files in os.walk(test_dir):
+        dirs[:] = sorted(d for d in dirs if d not in IGNORED_DIRS and not d.startswith("."))
+        for file in sorted(files):
+            if file.endswith(".py") and (file.startswith("test_") or file.endswith("_test.py")):
+                found.append(os.path.join(root, file))
+    return found
+
+
+def _error_record(file: str, message: str, traceback: str = "") -> Dict:
+    return {
+        "nodeid": file, "file": file, "name": "<worker>", "status": "error",
+        "duration": 0.0, "message": message, "traceback": traceback,
+    }
+
+
+class WorkerGroup:
+    """
+    The worker processes of one iter_results call, so they can be terminated when the
+    consumer stops early (closed generator, client disconnect) instead of running on.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._procs: List[subprocess.Popen] = []
+        self.closed = False
+
+    def popen(self, cmd: List[str], **kwargs) -> Optional[subprocess.Popen]:
+        """Popen, or None once the group is closed."""
+        with self._lock:
+            if self.closed:
+                return None
+            proc = subprocess.Popen(cmd, **kwargs)
+            self._procs.append(proc)
+            return proc
+
+    def close(self, grace: float = 5.0) -> None:
+        with self._lock:
+            self.closed = True
+            live = [proc for proc in self._procs if proc.poll() is None]
+        for proc in live:
+            proc.terminate()
+        deadline = time.monotonic() + grace
+        for proc in live:
+            try:
+                proc.wait(timeout=max(0.0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        if live:
+            logger.info(f"[Runner] 🛑 Terminated {len(live)} test workers (results no longer consumed)")
+
+
+class PythonTestExecutor:
+    """
+    Runs Python test files with pytest semantics across N isolated worker processes.
+    Each worker gets a shard of files, a per-test timeout (SIGALRM) and an address-space
+    limit, and streams one JSON record per test back over a pipe.
+
+    Subclasses for other runtimes override _command, _worker_env, _normalize and
+    discover; the sharding, pipe protocol and watchdog are shared.
+    """
+
+    # Exit codes 0-5 are normal pytest outcomes; anything else means the worker died
+    NORMAL_EXIT_CODES = (0, 1, 2, 3, 4, 5)
+
+    def __init__(
+        self,
+        test_dir: str = "tests",
+        workers: Optional[int] = None,
+        timeout: float = TEST_TIMEOUT,
+        memory_limit_mb: int = MEMORY_LIMIT_MB,
+        extra_paths: Optional[List[str]] = None,
+        durations: Optional[Dict[str, float]] = None,
+    ):
+        self.test_dir = test_dir
+        self.workers = max(1, workers or DEFAULT_WORKERS)
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.extra_paths = [os.path.abspath(p) for p in (extra_paths or [])]
+        self.durations = durations or {}
+
+    def shard(self, files: List[str]) -> List[List[str]]:
+        """Split files into at most `self.workers` shards, balanced by expected duration."""
+        count = min(self.workers, len(files))
+        return lpt_shards(files, self.durations, count) if count else []
+
+    def _worker_env(self) -> Dict[str, str]:
+        env = dict(os.environ)
+        paths = self.extra_paths + [os.getcwd()]
+        if env.get("PYTHONPATH"):
+            paths.append(env["PYTHONPATH"])
+        env["PYTHONPATH"] = os.pathsep.join(paths)
+        env["PYTHONDONTWRITEBYTECODE"] = "1"
+        return env
+
+    def _command(self, files: List[str], write_fd: int) -> List[str]:
+        return [
+            sys.executable, WORKER_SCRIPT,
+            "--results-fd", str(write_fd),
+            "--timeout", str(self.timeout),
+            "--memory-mb", str(self.memory_limit_mb),
+            "--rootdir", os.path.abspath(self.test_dir),
+            *files,
+        ]
+
+    def discover(self) -> List[str]:
+        return discover_python_tests(self.test_dir)
+
+    def _normalize(self, path: str) -> str:
+        """Worker paths are relative to --rootdir (the test dir); report them relative to CWD."""
+        return os.path.relpath(os.path.join(os.path.abspath(self.test_dir), path))
+
+    def _run_shard(self, files: List[str], out: "queue.Queue", group: WorkerGroup) -> None:
+        files = [os.path.relpath(os.path.abspath(f)) for f in files]
+        read_fd, write_fd = os.pipe()
+        cmd = self._command(files, write_fd)
+        reported = set()
+        running: Optional[str] = None
+
+        with tempfile.TemporaryFile() as log:
+            try:
+                proc = group.popen(
+                    cmd, stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+                    pass_fds=(write_fd,), env=self._worker_env(),
+                )
+            except OSError as e:
+                os.close(read_fd)
+                os.close(write_fd)
+                for file in files:
+                    out.put(_error_record(file, f"Failed to start test worker: {e}"))
+                return
+            os.close(write_fd)
+            if proc is None:  # consumer already gone
+                os.close(read_fd)
+                return
+
+            # Watchdog: kill the worker if it goes silent for longer than one test may take
+            last_activity = [time.monotonic()]
+            finished = threading.Event()
+
+            def watchdog():
+                while not finished.wait(1.0):
+                    if time.monotonic() - last_activity[0] > self.timeout + HARD_TIMEOUT_GRACE:
+                        logger.error(f"[Runner] ⏱️ Worker {proc.pid} unresponsive; killing (test: {running})")
+                        proc.kill()
+                        return
+
+            threading.Thread(target=watchdog, daemon=True).start()
+
+            with os.fdopen(read_fd, "r", encoding="utf-8") as results:
+                for line in results:
+                    last_activity[0] = time.monotonic()
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if record.pop("event", "result") == "start":
+                        running = record["nodeid"]
+                        continue
+                    running = None
+                    record["file"] = self._normalize(record["file"])
+                    record["nodeid"] = (
+                        record["file"] if record["name"] == "<collection>"
+                        else f"{record['file']}::{record['name']}"
+                    )
+                    reported.add(record["file"])
+                    out.put(record)
+
+            returncode = proc.wait()
+            finished.set()
+
+            if running is not None:
+                file, _, name = running.partition("::")
+                file = self._normalize(file)
+                reported.add(file)
+                out.put({**_error_record(file, "Test hung or crashed the worker (killed)"),
+                         "nodeid": f"{file}::{name}", "name": name})
+            if returncode not in self.NORMAL_EXIT_CODES:
+                log.seek(0)
+                tail = log.read()[-4000:].decode("utf-8", errors="replace")
+                for file in files:
+                    if file not in reported:
+                        out.put(_error_record(file, f"Test worker exited with code {returncode}", tail))
+
+    def iter_results(self, files: Optional[List[str]] = None) -> Iterator[Dict]:
+        """
+        Yield per-test records as soon as any worker reports them. Closing the generator
+        early terminates the workers still running.
+        """
+        files = self.discover() if files is None else files
+        shards = self.shard(files)
+        if not shards:
+            return
+
+        logger.info(f"[Runner] 🧵 Running {len(files)} test files across {len(shards)} workers")
+        out: "queue.Queue" = queue.Queue()
+        group = WorkerGroup()
+        threads = [
+            threading.Thread(target=self._run_shard, args=(shard, out, group), daemon=True)
+            for shard in shards
+        ]
+        for t in threads:
+            t.start()
+
+        try:
+            while any(t.is_alive() for t in threads) or not out.empty():
+                try:
+                    yield out.get(timeout=0.2)
+                except queue.Empty:
+                    continue
+        finally:
+            group.close()
+
+    def run(self, files: Optional[List[str]] = None) -> List[Dict]:
+        return list(self.iter_results(files))
@@ -2,16 +2,61 @@
 
 import os
 import re
-import zipfile
+import time
 import logging
-from typing import List
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import ExitStack
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 from dotenv import load_dotenv
-from groq import Groq
 
-from backend.utils.git_ops import clone_or_pull_repo
-from backend.utils.prompts import TEST_GEN_PROMPT_TEMPLATE
+from backend.utils.git_ops import (
+    checkout_repo,
+    get_changed_files,
+    get_deleted_files,
+    get_head_commit,
+    get_repo_diff,
+    repo_name_from_url,
+)
+from backend.utils.prompts import (
+    TEST_FIX_PROMPT_TEMPLATE,
+    TEST_GEN_PROMPT_VERSION,
+    TEST_UPDATE_PROMPT_TEMPLATE,
+    TEST_UPDATE_PROMPT_VERSION,
+)
+from backend.utils.rate_limiter import RateLimiter, retry_with_backoff
+from backend.utils.metrics import (
+    LLM_REQUESTS,
+    LLM_RETRIES,
+    LLM_SECONDS,
+    LLM_TOKENS,
+    VALIDATION_RETRIES,
+    bind_context,
+    stage_timer,
+)
 from backend.services.history_manager import TestHistory
+from backend.services.generation_cache import GenerationCache, hash_source
+from backend.services.llm_providers import LLMProvider, create_provider, get_provider
+from backend.services.packager import packager
+from backend.services.source_scanner import SourceScanner
+from backend.services.language_detector import get_language
+from backend.services.test_validator import (
+    MAX_REPAIR_ATTEMPTS,
+    VALIDATE_ENABLED,
+    VALIDATION_BATCH,
+    TestValidator,
+)
+from backend.services.prompt_planner import (
+    CONTEXT_TOKENS,
+    MAX_OUTPUT_TOKENS,
+    MIN_OUTPUT_TOKENS,
+    SAFETY_MARGIN,
+    PromptPlanner,
+    PromptTask,
+    SourceFile,
+    count_tokens,
+    output_budget,
+)
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Env loading: read .env from project root (…/Trinity-assurance/.env)
@@ -23,16 +68,46 @@ load_dotenv(os.path.join(PROJECT_ROOT, ".env"))
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# Concurrency knobs; RPM/TPM quotas default to the provider's (see llm_providers)
+MAX_IN_FLIGHT = int(os.getenv("TRINITY_LLM_MAX_IN_FLIGHT", "4"))
+MAX_RETRIES = int(os.getenv("TRINITY_LLM_MAX_RETRIES", "5"))
+CACHE_ENABLED = os.getenv("TRINITY_GEN_CACHE", "1") != "0"
+
+TEMPERATURE = 0.2
 
-class TestGenerator:
-    def __init__(self, api_key: str | None = None, model: str = "llama3-8b-8192"):
-        self.api_key = api_key or os.getenv("GROQ_API_KEY")
-        if not self.api_key:
-            raise ValueError("GROQ_API_KEY is required (set it in your root .env)")
 
-        self.model = model
-        self.client = Groq(api_key=self.api_key)
+class TestGenerator:
+    def __init__(
+        self,
+        api_key: str | None = None,
+        model: str | None = None,
+        max_in_flight: int = MAX_IN_FLIGHT,
+        requests_per_minute: int | None = None,
+        tokens_per_minute: int | None = None,
+        max_retries: int = MAX_RETRIES,
+        cache: GenerationCache | None = None,
+        provider: LLMProvider | str | None = None,
+        validator: TestValidator | None = None,
+    ):
+        # Providers build their clients on first call, so a missing GROQ_API_KEY only
+        # surfaces when a generation actually needs Groq.
+        if isinstance(provider, LLMProvider):
+            self.provider = provider
+        elif api_key and provider in (None, "groq"):
+            self.provider = create_provider("groq", api_key=api_key)
+        else:
+            self.provider = get_provider(provider)
+
+        self.model = model or self.provider.default_model
         self.history = TestHistory()
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_retries = max_retries
+        self.rate_limiter = RateLimiter(
+            self.provider.requests_per_minute if requests_per_minute is None else requests_per_minute,
+            self.provider.tokens_per_minute if tokens_per_minute is None else tokens_per_minute,
+        )
+        self.cache = cache or (GenerationCache() if CACHE_ENABLED else None)
+        self.validator = validator or (TestValidator() if VALIDATE_ENABLED else None)
 
     # ──────────────────────────────────────────────────────────────────────
     # Helpers
@@ -41,29 +116,17 @@ class TestGenerator:
         return re.sub(r"[^a-zA-Z0-9_\-\.]", "_", name)
 
     def get_all_source_files(self, repo_path: str, language: str, folder_filter: str = "") -> List[str]:
-        ext = {
-            "python": ".py",
-            "java": ".java",
-            "javascript": ".js",
-            "typescript": ".ts",
-        }.get(language, ".txt")
-
-        valid_files: List[str] = []
-        for root, dirs, files in os.walk(repo_path):
-            # ignore hidden folders and __pycache__
-            dirs[:] = [d for d in dirs if not d.startswith(".") and d != "__pycache__"]
-
-            if folder_filter and folder_filter not in root:
-                continue
+        return SourceScanner(repo_path).scan(get_language(language).extensions, folder_filter)
 
-            for file in files:
-                if file.endswith(ext) and not file.startswith("."):
-                    full_path = os.path.join(root, file)
-                    logger.info(f"[Scanner] ✅ Found: {full_path}")
-                    valid_files.append(full_path)
+    def is_source_file(self, rel_path: str, repo_path: str, language: str, folder_filter: str = "") -> bool:
+        """Same rules as get_all_source_files, for a single repo-relative path (used for diffs)."""
+        return SourceScanner(repo_path).is_included(rel_path, get_language(language).extensions, folder_filter)
 
-        logger.info(f"[Scanner] Total valid source files: {len(valid_files)}")
-        return valid_files
+    def test_file_for(self, source_file: str, repo_path: str, test_folder: str, language: str) -> Tuple[str, str]:
+        """(test file name, test file path) for a source file."""
+        rel_path = os.path.relpath(source_file, repo_path)
+        test_file_name = get_language(language).test_file_name(rel_path, self.sanitize_filename)
+        return test_file_name, os.path.join(test_folder, test_file_name)
 
     def clean_test_code(self, code: str) -> str:
         code = code.strip()
@@ -80,105 +143,516 @@ class TestGenerator:
         rel_path = os.path.relpath(source_file, repo_path)
         module_path = os.path.splitext(rel_path)[0].replace(os.sep, ".").replace("-", "_")
 
-        # Only add import if the target isn't itself a test file
-        if "test_" not in os.path.basename(source_file).lower():
-            return f"from {module_path} import *\n\n{test_code}"
+        import_line = f"from {module_path} import *"
+
+        # Only add import if the target isn't itself a test file (or an updated test already has it)
+        if "test_" not in os.path.basename(source_file).lower() and import_line not in test_code:
+            return f"{import_line}\n\n{test_code}"
         return test_code
 
     # ──────────────────────────────────────────────────────────────────────
-    # Core entry
+    # LLM calls (rate limited, retried, run concurrently by the core entry)
     # ──────────────────────────────────────────────────────────────────────
-    def generate_tests_from_repo(
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """Local token count used for TPM budgeting (see prompt_planner.count_tokens)."""
+        return count_tokens(text)
+
+    def complete(self, prompt: str, max_tokens: int = MAX_OUTPUT_TOKENS) -> str:
+        """Send one prompt to the LLM, respecting RPM/TPM quotas and retrying 429/5xx."""
+        estimated = self.estimate_tokens(prompt) + max_tokens
+
+        provider = self.provider.name
+
+        def call():
+            self.rate_limiter.acquire(estimated)
+            return self.provider.complete(self.model, prompt, max_tokens, TEMPERATURE)
+
+        started = time.perf_counter()
+        try:
+            response = retry_with_backoff(
+                call,
+                is_retryable=self.provider.is_retryable,
+                max_retries=self.max_retries,
+                retry_after=self.provider.retry_after,
+                on_retry=lambda attempt, e: LLM_RETRIES.inc(provider=provider),
+            )
+        except Exception:
+            LLM_REQUESTS.inc(provider=provider, outcome="error")
+            raise
+        finally:
+            LLM_SECONDS.observe(time.perf_counter() - started, provider=provider)
+
+        LLM_REQUESTS.inc(provider=provider, outcome="ok")
+        LLM_TOKENS.inc(response.prompt_tokens or self.estimate_tokens(prompt), provider=provider, direction="in")
+        LLM_TOKENS.inc(
+            response.completion_tokens or self.estimate_tokens(response.text or ""), provider=provider, direction="out"
+        )
+        self.rate_limiter.settle(estimated, response.total_tokens)
+        return response.text
+
+    def _cache_key(self, content_hash: str, prompt_version: str, language: str, test_type: str) -> str:
+        return GenerationCache.make_key(content_hash, prompt_version, self.model, language, test_type, TEMPERATURE)
+
+    def _cached_tests(self, source: SourceFile, language: str, test_type: str) -> Optional[str]:
+        if not self.cache:
+            return None
+        return self.cache.get(self._cache_key(hash_source(source.code), TEST_GEN_PROMPT_VERSION, language, test_type))
+
+    def _run_task(
+        self, task: PromptTask, planner: PromptPlanner, language: str, test_type: str
+    ) -> Dict[str, Optional[str]]:
+        """Execute one planned task; returns source path → cleaned test code (None on failure)."""
+        results: Dict[str, Optional[str]] = {f.path: None for f in task.files}
+        try:
+            if task.kind == "batch":
+                (prompt, max_tokens), = task.prompts
+                outputs = planner.split_batch_output(self.complete(prompt, max_tokens), task.files)
+                for f in task.files:
+                    if f.rel_path in outputs:
+                        results[f.path] = self.clean_test_code(outputs[f.rel_path])
+                    else:
+                        # The model skipped this file; give it its own request
+                        logger.warning(f"[Trinity] ⚠️ Batch output missing {f.rel_path}; retrying alone")
+                        results.update(self._run_task(planner.single_task(f), planner, language, test_type))
+            elif task.kind == "chunked":
+                parts = [self.clean_test_code(self.complete(p, n)) for p, n in task.prompts]
+                results[task.files[0].path] = planner.merge_chunks(parts)
+            else:
+                (prompt, max_tokens), = task.prompts
+                results[task.files[0].path] = self.clean_test_code(self.complete(prompt, max_tokens))
+        except Exception as e:
+            logger.error(f"❌ Error generating tests for {', '.join(f.rel_path for f in task.files)}: {e}")
+
+        if self.cache:
+            for f in task.files:
+                if results.get(f.path):
+                    key = self._cache_key(hash_source(f.code), TEST_GEN_PROMPT_VERSION, language, test_type)
+                    self.cache.put(key, results[f.path], source_file=f.rel_path)
+        return results
+
+    def _update_tests(
+        self, source: SourceFile, diff: str, existing_tests: str, language: str, test_type: str
+    ) -> Optional[str]:
+        """Patch an existing test file from a diff. Returns None if the prompt can't fit or the call fails."""
+        prompt = TEST_UPDATE_PROMPT_TEMPLATE.format(
+            language=language, source=source.code, diff=diff, existing_tests=existing_tests
+        )
+        prompt_tokens = count_tokens(prompt)
+        if prompt_tokens + MIN_OUTPUT_TOKENS + SAFETY_MARGIN > CONTEXT_TOKENS:
+            logger.info(f"[Trinity] ℹ️ Update prompt for {source.rel_path} too large; regenerating instead")
+            return None
+
+        cache_key = None
+        if self.cache:
+            content_hash = hash_source("\0".join((source.code, diff, existing_tests)))
+            cache_key = self._cache_key(content_hash, TEST_UPDATE_PROMPT_VERSION, language, test_type)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        try:
+            raw_code = self.complete(prompt, output_budget(count_tokens(existing_tests), prompt_tokens))
+        except Exception as e:
+            logger.error(f"❌ Error updating tests for {source.rel_path}: {e}")
+            return None
+
+        test_code = self.clean_test_code(raw_code)
+        if self.cache:
+            self.cache.put(cache_key, test_code, source_file=source.rel_path)
+        return test_code
+
+    def _generate_for_file(
         self,
-        repo_url: str,
+        source_file: str,
+        repo_path: str,
         language: str,
-        file_path: str = "",
-        folder_filter: str = "",
-        dry_run: bool = False,
         test_type: str = "auto",
-    ) -> str:
-        logger.info(f"[Trinity] Cloning repo: {repo_url}")
-        repo_path = clone_or_pull_repo(repo_url)
-        repo_name = os.path.basename(repo_path).replace("-", "_")
-
-        # Per-repo test folder
-        test_folder = os.path.join("tests", repo_name)
-        os.makedirs(test_folder, exist_ok=True)
-
-        ext = {"python": "py", "java": "java", "javascript": "js", "typescript": "ts"}.get(language, "txt")
-
-        files_to_process = [file_path] if file_path else self.get_all_source_files(
-            repo_path, language, folder_filter
-        )
-
-        if not files_to_process:
-            logger.error(f"[Trinity] ❌ No source files found in: {repo_path}")
-            return "No source files found to generate tests."
-
-        combined_test_output = ""
-        test_file_paths: List[str] = []
-
-        for source_file in files_to_process:
+        diff: Optional[str] = None,
+        existing_tests: Optional[str] = None,
+    ) -> Optional[str]:
+        """
+        Generate test code for one source file. Returns None on failure (logged).
+        With a diff and the current test file, asks the LLM to patch the tests instead.
+        """
+        try:
+            with open(source_file, "r", encoding="utf-8", errors="ignore") as f:
+                source = SourceFile(source_file, os.path.relpath(source_file, repo_path), f.read())
+        except Exception as e:
+            logger.error(f"❌ Failed to read {source_file}: {e}")
+            return None
+
+        test_code = None
+        if diff and existing_tests:
+            test_code = self._update_tests(source, diff, existing_tests, language, test_type)
+        if test_code is None:
+            test_code = self._cached_tests(source, language, test_type)
+        if test_code is None:
+            planner = PromptPlanner(language)
+            results: Dict[str, Optional[str]] = {}
+            for task in planner.plan([source]):
+                results.update(self._run_task(task, planner, language, test_type))
+            test_code = results.get(source_file)
+
+        return self.prepend_import_if_needed(source_file, repo_path, language, test_code) if test_code else None
+
+    def _submit_all(
+        self,
+        pool: ThreadPoolExecutor,
+        files: List[str],
+        repo_path: str,
+        language: str,
+        test_type: str,
+        update_inputs: Callable[[str], Tuple[Optional[str], Optional[str]]],
+    ) -> Dict[str, "Future[Optional[str]]"]:
+        """
+        Schedule generation for all files: cache hits resolve immediately, diff updates run
+        per file, and everything else is planned into token-budgeted (batched/chunked) tasks.
+        Returns one future per source file.
+        """
+        futures: Dict[str, "Future[Optional[str]]"] = {}
+        fresh: List[SourceFile] = []
+
+        for source_file in files:
+            future: "Future[Optional[str]]" = Future()
+            futures[source_file] = future
             try:
                 with open(source_file, "r", encoding="utf-8", errors="ignore") as f:
-                    source_code = f.read()
+                    source = SourceFile(source_file, os.path.relpath(source_file, repo_path), f.read())
             except Exception as e:
                 logger.error(f"❌ Failed to read {source_file}: {e}")
+                future.set_result(None)
                 continue
 
-            prompt = TEST_GEN_PROMPT_TEMPLATE.format(language=language, diff=source_code)
-
-            try:
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[{"role": "user", "content": prompt}],
-                    temperature=0.2,
-                    max_tokens=1000,
+            diff, existing_tests = update_inputs(source_file)
+            if diff and existing_tests:
+                futures[source_file] = pool.submit(
+                    bind_context(self._generate_for_file), source_file, repo_path, language, test_type, diff, existing_tests
                 )
-                raw_code = response.choices[0].message.content
-                test_code = self.clean_test_code(raw_code)
-                test_code = self.prepend_import_if_needed(source_file, repo_path, language, test_code)
+                continue
+
+            cached = self._cached_tests(source, language, test_type)
+            if cached is not None:
+                future.set_result(self.prepend_import_if_needed(source_file, repo_path, language, cached))
+            else:
+                fresh.append(source)
+
+        planner = PromptPlanner(language)
+        for task in planner.plan(fresh) if fresh else []:
+            task_future = pool.submit(bind_context(self._run_task), task, planner, language, test_type)
+
+            def resolve(done: Future, task: PromptTask = task) -> None:
+                results = done.result() if not done.exception() else {}
+                for f in task.files:
+                    code = results.get(f.path)
+                    futures[f.path].set_result(
+                        self.prepend_import_if_needed(f.path, repo_path, language, code) if code else None
+                    )
 
-                safe_name = self.sanitize_filename(
-                    os.path.relpath(source_file, repo_path).replace(f".{ext}", "")
+            task_future.add_done_callback(resolve)
+        return futures
+
+    # ──────────────────────────────────────────────────────────────────────
+    # Pre-write validation (syntax / compile) with LLM repair
+    # ──────────────────────────────────────────────────────────────────────
+    def _repair(
+        self, source_file: str, repo_path: str, language: str, test_type: str, test_code: str, error: str
+    ) -> Optional[str]:
+        """Ask the LLM to fix a test that failed validation. Returns None if it can't be asked or fails."""
+        try:
+            with open(source_file, "r", encoding="utf-8", errors="ignore") as f:
+                source_code = f.read()
+        except OSError as e:
+            logger.error(f"❌ Failed to read {source_file}: {e}")
+            return None
+
+        prompt = TEST_FIX_PROMPT_TEMPLATE.format(
+            language=language, source=source_code, test_code=test_code, error=error[:2000]
+        )
+        prompt_tokens = count_tokens(prompt)
+        if prompt_tokens + MIN_OUTPUT_TOKENS + SAFETY_MARGIN > CONTEXT_TOKENS:
+            logger.info(f"[Trinity] ℹ️ Repair prompt for {source_file} too large; giving up on it")
+            return None
+        try:
+            fixed = self.clean_test_code(self.complete(prompt, output_budget(count_tokens(test_code), prompt_tokens)))
+        except Exception as e:
+            logger.error(f"❌ Error repairing tests for {source_file}: {e}")
+            return None
+        if not fixed:
+            return None
+
+        fixed = self.prepend_import_if_needed(source_file, repo_path, language, fixed)
+        if self.cache:
+            # Replace the invalid output so the next run's cache hit is the repaired file
+            key = self._cache_key(hash_source(source_code), TEST_GEN_PROMPT_VERSION, language, test_type)
+            self.cache.put(key, fixed, source_file=os.path.relpath(source_file, repo_path))
+        return fixed
+
+    def _validate_and_repair(
+        self,
+        pool: ThreadPoolExecutor,
+        codes: Dict[str, Optional[str]],
+        repo_path: str,
+        language: str,
+        test_type: str,
+    ) -> Dict[str, str]:
+        """
+        Validate one batch of generated tests (source file → code, updated in place with
+        repairs). Invalid files are regenerated with the error fed back, up to
+        MAX_REPAIR_ATTEMPTS times. Returns source file → error for files still invalid.
+        """
+        errors: Dict[str, str] = {}
+        pending = {f: code for f, code in codes.items() if code}
+        for attempt in range(MAX_REPAIR_ATTEMPTS + 1):
+            if not pending:
+                break
+            with stage_timer("generate", "validate"):
+                names = {f: self.test_file_for(f, repo_path, "", language)[0] for f in pending}
+                results = self.validator.validate(language, {names[f]: pending[f] for f in pending}, repo_path)
+            for f in pending:
+                if results.get(names[f]):
+                    errors[f] = results[names[f]]
+                else:
+                    errors.pop(f, None)
+
+            invalid = [f for f in pending if f in errors]
+            if not invalid or attempt == MAX_REPAIR_ATTEMPTS:
+                break
+            logger.warning(
+                f"[Trinity] 🔁 {len(invalid)} generated tests failed validation; "
+                f"regenerating (attempt {attempt + 1}/{MAX_REPAIR_ATTEMPTS})"
+            )
+            VALIDATION_RETRIES.inc(len(invalid), language=get_language(language).name)
+            repairs = {
+                f: pool.submit(
+                    bind_context(self._repair), f, repo_path, language, test_type, pending[f], errors[f]
                 )
-                test_file_name = f"test_{safe_name}.{ext}"
-                test_file_path = os.path.join(test_folder, test_file_name)
-
-                if not dry_run:
-                    with open(test_file_path, "w", encoding="utf-8") as f:
-                        f.write(test_code)
-                    test_file_paths.append(test_file_path)
-
-                    # Save to test history
-                    self.history.save(
-                        repo=repo_name,
-                        file=source_file,
-                        language=language,
-                        test_type=test_type,
-                        output_path=test_file_path,
-                        ai_output=test_code,
+                for f in invalid
+            }
+            pending = {}
+            for f, future in repairs.items():
+                fixed = future.result()
+                if fixed:
+                    codes[f] = pending[f] = fixed
+        return errors
+
+    def _iter_validated(
+        self,
+        pool: ThreadPoolExecutor,
+        futures: Dict[str, "Future[Optional[str]]"],
+        files: List[str],
+        repo_path: str,
+        language: str,
+        test_type: str,
+    ) -> Iterator[Tuple[str, Optional[str], Optional[str]]]:
+        """(source file, test code, validation error) in input order, validated a batch at a time."""
+        for start in range(0, len(files), VALIDATION_BATCH):
+            batch = files[start:start + VALIDATION_BATCH]
+            codes = {f: futures[f].result() for f in batch}
+            errors = self._validate_and_repair(pool, codes, repo_path, language, test_type) if self.validator else {}
+            for f in batch:
+                yield f, codes[f], errors.get(f)
+
+    def _incremental_plan(
+        self, repo_path: str, repo_name: str, test_folder: str, language: str, test_type: str,
+        folder_filter: str, base_ref: Optional[str],
+    ) -> Optional[Tuple[str, List[str], List[str]]]:
+        """
+        (base commit, changed source files, test files of deleted sources) relative to base_ref,
+        or the last generated commit. None means no usable baseline: generate everything.
+        """
+        base = base_ref or self.history.last_generated_commit(repo_name, language, test_type)
+        if not base:
+            logger.info("[Trinity] ℹ️ No previous generation recorded; running a full generation")
+            return None
+
+        changed = get_changed_files(repo_path, base)
+        if changed is None:
+            logger.warning(f"[Trinity] ⚠️ Cannot diff against {base}; running a full generation")
+            return None
+
+        sources = [
+            os.path.join(repo_path, rel) for rel in changed
+            if self.is_source_file(rel, repo_path, language, folder_filter)
+        ]
+        stale_tests = [
+            self.test_file_for(os.path.join(repo_path, rel), repo_path, test_folder, language)[1]
+            for rel in get_deleted_files(repo_path, base)
+            if self.is_source_file(rel, repo_path, language, folder_filter)
+        ]
+        logger.info(
+            f"[Trinity] 🔀 Incremental since {base[:12]}: {len(sources)} changed, {len(stale_tests)} removed"
+        )
+        return base, sources, stale_tests
+
+    # ──────────────────────────────────────────────────────────────────────
+    # Core entry
+    # ──────────────────────────────────────────────────────────────────────
+    def generate_tests_from_repo(
+        self,
+        repo_url: str,
+        language: str,
+        file_path: str = "",
+        folder_filter: str = "",
+        dry_run: bool = False,
+        test_type: str = "auto",
+        progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+        incremental: bool = False,
+        base_ref: Optional[str] = None,
+    ) -> str:
+        """
+        Generate tests for every matching source file in the repo.
+        With `incremental`, only files changed since `base_ref` (default: the commit of the last
+        generation run) are regenerated, and existing tests are patched from the diff.
+        `progress`, if given, receives stage and per-file events (used by the job queue).
+        """
+        emit = progress or (lambda event: None)
+
+        logger.info(f"[Trinity] Cloning repo: {repo_url}")
+        emit({"type": "stage", "stage": "clone"})
+        # The checkout stays locked (shared) until generation is done with it
+        with ExitStack() as checkout:
+            with stage_timer("generate", "clone"):
+                repo_path = checkout.enter_context(checkout_repo(repo_url, folder_filter=folder_filter or ""))
+            repo_name = repo_name_from_url(repo_url)
+            head_commit = get_head_commit(repo_path)
+
+            # Per-repo test folder
+            test_folder = os.path.join("tests", repo_name)
+            os.makedirs(test_folder, exist_ok=True)
+
+            emit({"type": "stage", "stage": "scan"})
+            with stage_timer("generate", "scan"):
+                plan = None
+                if incremental:
+                    plan = self._incremental_plan(
+                        repo_path, repo_name, test_folder, language, test_type, folder_filter or "", base_ref
                     )
-                    logger.info(f"[Trinity] ✅ Test saved: {test_file_path}")
+
+                base_commit = None
+                stale_tests: List[str] = []
+                if plan is not None:
+                    base_commit, files_to_process, stale_tests = plan
+                    if file_path:
+                        files_to_process = [f for f in files_to_process if os.path.relpath(f, repo_path) == file_path]
+                else:
+                    files_to_process = [file_path] if file_path else self.get_all_source_files(
+                        repo_path, language, folder_filter
+                    )
+            total = len(files_to_process)
+
+            if not files_to_process and not stale_tests:
+                if plan is not None:
+                    logger.info(f"[Trinity] ✅ No source changes since {base_commit[:12]}; tests are up to date")
+                    if not dry_run:
+                        self.history.record_generation(repo_name, language, test_type, head_commit, base_commit, 0)
+                    return f"No source changes since {base_commit}; tests are up to date."
+                logger.error(f"[Trinity] ❌ No source files found in: {repo_path}")
+                return "No source files found to generate tests."
+
+            def update_inputs(source_file: str) -> Tuple[Optional[str], Optional[str]]:
+                """(diff, existing tests) when an incremental run can patch this file's tests."""
+                if not base_commit:
+                    return None, None
+                _, test_file_path = self.test_file_for(source_file, repo_path, test_folder, language)
+                if not os.path.exists(test_file_path):
+                    return None, None
+                with open(test_file_path, "r", encoding="utf-8", errors="ignore") as f:
+                    existing_tests = f.read()
+                diff = get_repo_diff(repo_path, os.path.relpath(source_file, repo_path), base_ref=base_commit)
+                return diff, existing_tests
+
+            combined_test_output = ""
+            failures = 0
+
+            emit({"type": "stage", "stage": "generate", "done": 0, "total": total})
+
+            # Fan out planned LLM requests; results are consumed in input order so output stays deterministic.
+            # History records are buffered and committed once for the whole run.
+            with ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="trinity-llm") as pool, \
+                    self.history.batch(), stage_timer("generate", "generate"):
+                futures = self._submit_all(pool, files_to_process, repo_path, language, test_type, update_inputs)
+
+                validated = self._iter_validated(pool, futures, files_to_process, repo_path, language, test_type)
+                for done, (source_file, test_code, error) in enumerate(validated, start=1):
+                    rel_source = os.path.relpath(source_file, repo_path)
+                    if test_code is None:
+                        failures += 1
+                        emit({"type": "file", "file": rel_source, "status": "failed", "done": done, "total": total})
+                        continue
+                    if error:
+                        # Never write (or record) a test that doesn't even parse
+                        failures += 1
+                        logger.error(f"[Trinity] ❌ Generated tests for {rel_source} are still invalid: {error}")
+                        emit({
+                            "type": "file", "file": rel_source, "status": "invalid", "error": error,
+                            "done": done, "total": total,
+                        })
+                        continue
+
+                    try:
+                        test_file_name, test_file_path = self.test_file_for(
+                            source_file, repo_path, test_folder, language
+                        )
+
+                        if not dry_run:
+                            with stage_timer("generate", "write"), open(test_file_path, "w", encoding="utf-8") as f:
+                                f.write(test_code)
+
+                            # Save to test history
+                            self.history.save(
+                                repo=repo_name,
+                                file=source_file,
+                                language=language,
+                                test_type=test_type,
+                                output_path=test_file_path,
+                                ai_output=test_code,
+                            )
+                            logger.info(f"[Trinity] ✅ Test saved: {test_file_path}")
+                        else:
+                            logger.info(f"[Trinity] 🧪 Dry run: skipped writing {test_file_name}")
+
+                        combined_test_output += f"\n\n==== {test_file_name} ====\n{test_code}"
+                        emit({
+                            "type": "file", "file": rel_source, "status": "generated",
+                            "test_file": test_file_name, "done": done, "total": total,
+                        })
+
+                    except Exception as e:
+                        failures += 1
+                        logger.error(f"❌ Error saving test for {source_file}: {e}")
+                        emit({"type": "file", "file": rel_source, "status": "failed", "done": done, "total": total})
+                        continue
+
+            if not dry_run:
+                for stale in stale_tests:
+                    if os.path.exists(stale):
+                        os.remove(stale)
+                        logger.info(f"[Trinity] 🗑️ Removed test for deleted source: {stale}")
+
+                # Only advance the incremental baseline when every changed file got its tests
+                if failures:
+                    logger.warning(f"[Trinity] ⚠️ {failures} files failed; generation baseline not advanced")
                 else:
-                    logger.info(f"[Trinity] 🧪 Dry run: skipped writing {test_file_name}")
+                    self.history.record_generation(
+                        repo_name, language, test_type, head_commit, base_commit, total - failures
+                    )
 
-                combined_test_output += f"\n\n==== {test_file_name} ====\n{test_code}"
+            if self.cache:
+                self.cache.evict()
+                logger.info(f"[Trinity] 🗃️ Generation cache: {self.cache.stats()}")
 
-            except Exception as e:
-                logger.error(f"❌ Error generating test for {source_file}: {e}")
-                continue
+            emit({"type": "stage", "stage": "package"})
 
-        # ZIP packaging → per-repo path: tests/<repo>/<repo>.zip
-        if not dry_run and test_file_paths:
-            zip_path = os.path.join("tests", repo_name, f"{repo_name}.zip")
-            try:
-                with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zipf:
-                    for path in test_file_paths:
-                        arcname = os.path.relpath(path, test_folder)
-                        zipf.write(path, arcname)
-                logger.info(f"[Trinity] 📦 All tests zipped: {zip_path}")
-            except Exception as e:
-                logger.error(f"[Trinity] ❌ Failed to create ZIP: {e}")
+            # Pre-build the download archive: only new or changed tests get compressed, and
+            # /tests/download streams the cached entries (no ZIP file is written here)
+            if not dry_run and (total - failures or stale_tests):
+                try:
+                    with stage_timer("generate", "package"):
+                        layout = packager.layout(test_folder)
+                        packager.evict()
+                    logger.info(f"[Trinity] 📦 Tests packaged: {len(layout.entries)} files, {packager.stats()}")
+                except Exception as e:
+                    logger.error(f"[Trinity] ❌ Failed to package tests: {e}")
 
-        return combined_test_output.strip() or "Test generation completed, but no tests were generated."
\ No newline at end of file
+            return combined_test_output.strip() or "Test generation completed, but no tests were generated."
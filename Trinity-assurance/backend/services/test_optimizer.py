@@ -1,5 +1,7 @@
 import os
 import logging
+from backend.services.impact_analyzer import ImpactAnalyzer
+from backend.services.language_detector import LANGUAGES, language_for_file
 from backend.utils.git_ops import get_changed_files
 
 logger = logging.getLogger(__name__)
@@ -10,58 +12,38 @@ class TestOptimizer:
         self.repo_path = repo_path
         self.language = language.lower()
 
-    def get_relevant_tests(self, test_dir: str = "tests/", src_dir: str = "src/") -> list:
+    def get_relevant_tests(self, test_dir: str = "tests/", base_ref: str = "HEAD~1") -> list:
         """
-        Determine which test files are relevant based on the source code changes.
+        Determine which test files are relevant based on the source code changes:
+        every test that imports a changed file, directly or transitively.
         """
         logger.info(f"[Trinity] 🔍 Analyzing repo for changed files: {self.repo_path}")
-        changed_files = get_changed_files(self.repo_path)
+        changed_files = get_changed_files(self.repo_path, base_ref)
 
         if not changed_files:
             logger.warning("[Trinity] ⚠️ No changed files found. Running all available tests.")
             return self._collect_all_tests(test_dir)
 
-        relevant_tests = []
-
-        for file in changed_files:
-            if not self._is_valid_source_file(file):
-                continue
-
-            mapped = self._map_source_to_test(file, test_dir, src_dir)
-            if mapped:
-                relevant_tests.append(mapped)
+        all_tests = self._collect_all_tests(test_dir)
+        analyzer = ImpactAnalyzer([self.repo_path], self.language)
+        analyzer.update()
+        relevant_tests = [
+            os.path.relpath(path, self.repo_path)
+            for path in analyzer.affected_tests(
+                [os.path.join(self.repo_path, f) for f in changed_files if self._is_valid_source_file(f)],
+                [os.path.join(self.repo_path, t) for t in all_tests],
+            )
+        ]
 
         logger.info(f"[Trinity] 🧠 Optimized Test Selection: {relevant_tests}")
-        return relevant_tests or self._collect_all_tests(test_dir)
+        return relevant_tests
 
     def _is_valid_source_file(self, file: str) -> bool:
-        return file.endswith((".py", ".js", ".ts", ".java"))
+        return language_for_file(file) is not None
 
-    def _map_source_to_test(self, source_file: str, test_dir: str, src_dir: str) -> str:
-        """
-        Map a source file to its likely test file.
-        Example:
-          - src/utils/math.py => tests/test_math.py
-          - src/api/user.ts => tests/test_user.ts
-        """
-        file_name = os.path.basename(source_file)
-        test_name = ""
-
-        if self.language == "python":
-            test_name = f"test_{file_name}"
-        elif self.language == "javascript":
-            test_name = file_name.replace(".js", ".test.js")
-        elif self.language == "typescript":
-            test_name = file_name.replace(".ts", ".test.ts")
-        elif self.language == "java":
-            test_name = file_name.replace(".java", "Test.java")
-        else:
-            return None
-
-        candidate_path = os.path.join(test_dir, test_name)
-        full_candidate = os.path.join(self.repo_path, candidate_path)
-
-        return candidate_path if os.path.exists(full_candidate) else None
+    def _is_test_file(self, file: str) -> bool:
+        language = language_for_file(file)
+        return language is not None and LANGUAGES[language].is_test(file)
 
     def _collect_all_tests(self, test_dir: str) -> list:
         """
@@ -73,12 +55,8 @@ class TestOptimizer:
             return []
 
         return [
-            os.path.join(test_dir, f)
-            for f in os.listdir(test_path)
-            if (
-                f.startswith("test_")
-                or f.endswith(".test.js")
-                or f.endswith(".test.ts")
-                or f.endswith("Test.java")
-            )
-        ]
\ No newline at end of file
+            os.path.relpath(os.path.join(root, f), self.repo_path)
+            for root, _, files in os.walk(test_path)
+            for f in sorted(files)
+            if self._is_test_file(f) and self._is_valid_source_file(f)
+        ]
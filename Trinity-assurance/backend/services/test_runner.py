@@ -1,132 +1,292 @@
 import os
-import sys
+import json
+import time
 import logging
-import traceback
-import importlib.util
-import subprocess
-from typing import Tuple
-from backend.services.history_manager import TestHistory
+from contextlib import nullcontext
+from typing import Dict, Iterator, List, Optional, Tuple
+from backend.services.history_manager import TestHistory, RESULT_STATUSES
+from backend.services.python_executor import PythonTestExecutor, discover_python_tests
+from backend.services.java_executor import JavaTestExecutor, discover_java_tests
+from backend.services.js_executor import JsTestExecutor, discover_js_tests
+from backend.services.language_detector import LANGUAGES, get_language
+from backend.services.impact_analyzer import ImpactAnalyzer
+from backend.services.test_sharder import TestSharder, parse_shard
+from backend.utils.git_ops import CLONE_BASE_DIR, checkout_path, get_changed_files, repo_lock, suite_folder
+from backend.utils.metrics import STAGE_SECONDS, timed
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+STATUS_ICONS = {"passed": "✅", "failed": "❌", "error": "💥", "skipped": "⏭️"}
+RESULT_BATCH_SIZE = 200
+
+
+def accumulate_file_stats(file_stats: Dict[str, Dict], record: Dict) -> None:
+    """Fold one per-test record into per-file {duration, failed} totals for the sharder."""
+    stat = file_stats.setdefault(record["file"], {"duration": 0.0, "failed": False})
+    stat["duration"] += record.get("duration") or 0.0
+    stat["failed"] = stat["failed"] or record["status"] in ("failed", "error")
+
+
+def ingest_reports(paths: List[str], repo: Optional[str], language: str) -> int:
+    """Record per-file stats from NDJSON shard reports (written with --report on CI agents)."""
+    file_stats: Dict[str, Dict] = {}
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                if record.pop("event", None) == "result":
+                    accumulate_file_stats(file_stats, record)
+    if file_stats:
+        TestHistory().record_file_stats(repo or "all", language, file_stats)
+    return len(file_stats)
+
+
 class TestRunner:
-    def __init__(self, language: str = "python", test_type: str = "unit"):
+    def __init__(
+        self,
+        language: str = "python",
+        test_type: str = "unit",
+        repo: Optional[str] = None,
+        workers: Optional[int] = None,
+        timeout: Optional[float] = None,
+        mode: str = "all",
+        base_ref: Optional[str] = None,
+        shard_index: int = 1,
+        shard_count: int = 1,
+        files: Optional[List[str]] = None,
+    ):
         self.language = language.lower()
         self.test_type = test_type.lower()
+        self.repo = repo
+        # Fewer workers than cores on request, never more
+        self.workers = min(workers, os.cpu_count() or 1) if workers else None
+        self.timeout = timeout
+        self.mode = mode
+        self.base_ref = base_ref or "HEAD~1"
+        if shard_count < 1 or not 1 <= shard_index <= shard_count:
+            raise ValueError(f"Invalid shard {shard_index}/{shard_count}")
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+        # Explicit test files (e.g. the ones just patched by the healer) instead of discovery
+        self.files = files
+        self.durations: Dict[str, float] = {}
+        self.test_dir = suite_folder(repo) if repo else "tests"
+        if self.test_dir is None:
+            raise FileNotFoundError(f"No generated tests found for '{repo}'")
+        self.repo_path = checkout_path(repo) if repo else None
+        self.selection: Dict = {}
+        self.results: List[Dict] = []
+        self.summary: Dict = {}
+        self.run_id: Optional[int] = None
         self.history = TestHistory()
 
     def run(self) -> Tuple[str, str]:
         logger.info(f"[Trinity] 🚀 Running {self.test_type} tests for language: {self.language}")
 
         try:
-            if self.language == "python":
-                stdout, stderr = self._run_python_tests()
-            elif self.language == "java":
-                stdout, stderr = self._run_java_tests()
-            elif self.language == "javascript":
-                stdout, stderr = self._run_js_tests()
-            else:
-                return "", f"❌ Unsupported language: {self.language}"
-
-            self.history.save(
-                repo="latest_run",
-                file="*",
-                language=self.language,
-                test_type=self.test_type,
-                output_path="N/A",
-                ai_output=stdout + "\n\n" + stderr
-            )
-
-            return stdout, stderr
+            self.results = list(self.iter_results())
+            if not self.results and self.selection:
+                if self.mode == "affected":
+                    return f"✅ No tests affected by changes since {self.base_ref}", ""
+                return f"✅ Shard {self.shard_index}/{self.shard_count} has no tests", ""
+            if not self.results:
+                return "", f"❌ No {self.language} tests found in '{self.test_dir}/'"
+            return self._format_results(self.results)
 
         except Exception as e:
             error_msg = f"[Trinity] Test execution failed: {str(e)}"
             logger.error(error_msg)
             return "", error_msg
 
-    def _run_python_tests(self) -> Tuple[str, str]:
-        logger.info("[Trinity] 🧪 Executing Python tests using dynamic import...")
+    def iter_results(self) -> Iterator[Dict]:
+        """
+        Yield per-test records as executors produce them, persisting them in batches
+        as one test run under the real repo name. `self.summary` is final once exhausted.
+        """
+        # Shared repo lock: the checkout can't be reset or evicted while tests import from it
+        with repo_lock(self.repo, shared=True) if self.repo else nullcontext():
+            yield from self._iter_results()
 
-        test_dir = "tests"
-        output = ""
-        errors = ""
-
-        if not os.path.exists(test_dir):
-            return "", "❌ No 'tests/' directory found."
-
-        # Add both CWD and 'repos' folder to sys.path for import resolution
-        sys.path.insert(0, os.path.abspath("repos"))
-        sys.path.insert(0, os.getcwd())
+    def _iter_results(self) -> Iterator[Dict]:
+        source = self._result_source()
+        self.summary = {status: 0 for status in RESULT_STATUSES}
+        self.summary.update(total=0, duration=0.0)
+        self.run_id = self.history.start_run(self.repo or "all", self.language, self.test_type)
+        started = time.perf_counter()
+        buffer: List[Dict] = []
+        file_stats: Dict[str, Dict] = {}
 
         try:
-            for root, _, files in os.walk(test_dir):
-                for file in files:
-                    if file.endswith(".py") and not file.startswith("__"):
-                        file_path = os.path.join(root, file)
-                        try:
-                            spec = importlib.util.spec_from_file_location("test_module", file_path)
-                            test_module = importlib.util.module_from_spec(spec)
-                            spec.loader.exec_module(test_module)
-                            output += f"✅ Ran test: {file_path}\n"
-                        except Exception:
-                            error_trace = traceback.format_exc()
-                            errors += f"❌ Error in {file_path}:\n{error_trace}\n"
+            for record in source:
+                self.summary[record["status"]] = self.summary.get(record["status"], 0) + 1
+                self.summary["total"] += 1
+                accumulate_file_stats(file_stats, record)
+                buffer.append(record)
+                if len(buffer) >= RESULT_BATCH_SIZE:
+                    self.history.record_results(self.run_id, buffer)
+                    buffer = []
+                yield record
         finally:
-            # Clean up sys.path
-            if os.getcwd() in sys.path:
-                sys.path.remove(os.getcwd())
-            if os.path.abspath("repos") in sys.path:
-                sys.path.remove(os.path.abspath("repos"))
+            if buffer:
+                self.history.record_results(self.run_id, buffer)
+            self.summary["duration"] = round(time.perf_counter() - started, 3)
+            STAGE_SECONDS.observe(self.summary["duration"], component="runner", stage="run")
+            self.summary.update(self.selection)
+            self.history.finish_run(self.run_id, self.summary)
+            if file_stats:
+                self.history.record_file_stats(self.repo or "all", self.language, file_stats)
+            logger.info(f"[Trinity] 📊 Run {self.run_id} for {self.repo or 'all'}: {self.summary}")
 
-        return output.strip(), errors.strip()
+    def _result_source(self) -> Iterator[Dict]:
+        runner = get_language(self.language).runner
+        if not os.path.exists(self.test_dir):
+            raise FileNotFoundError(f"❌ No '{self.test_dir}/' directory found.")
 
-    def _run_java_tests(self) -> Tuple[str, str]:
-        logger.info("[Trinity] 🧪 Compiling and executing Java tests...")
-
-        try:
-            java_test_dir = "tests"
-            java_files = [os.path.join(java_test_dir, f) for f in os.listdir(java_test_dir) if f.endswith(".java")]
+        if self.files is not None:
+            files = self.files
+        else:
+            files = self.select_tests() if self.mode == "affected" else None
+        files = self.plan(files)
+        adapters = {"pytest": self._python_results, "junit": self._java_results, "node": self._node_results}
+        return adapters[runner](files)
 
-            if not java_files:
-                return "", "❌ No Java test files found in 'tests/'"
+    def discover_tests(self) -> List[str]:
+        runner = get_language(self.language).runner
+        if runner == "pytest":
+            return discover_python_tests(self.test_dir)
+        if runner == "junit":
+            return discover_java_tests(self.test_dir)
+        return discover_js_tests(self.test_dir, self.language)
 
-            compile = subprocess.run(
-                ["javac"] + java_files,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
+    @timed("runner", "plan")
+    def plan(self, files: Optional[List[str]]) -> Optional[List[str]]:
+        """
+        Order files fail-fast (recent failures, then fastest) and keep only this CI shard,
+        balanced by recorded per-file durations.
+        """
+        files = self.discover_tests() if files is None else files
+        sharder = TestSharder(self.repo or "all", self.language, self.history)
+        if self.shard_count > 1:
+            files = sharder.shard(files, self.shard_index, self.shard_count)
+            self.selection.update(
+                shard_index=self.shard_index, shard_count=self.shard_count, shard_files=len(files)
             )
-            if compile.returncode != 0:
-                return compile.stdout, compile.stderr
-
-            output = ""
-            for file in java_files:
-                classname = os.path.splitext(os.path.basename(file))[0]
-                run = subprocess.run(
-                    ["java", "-cp", java_test_dir, classname],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True
-                )
-                output += f"\n\n=== Running {classname}.java ===\n"
-                output += run.stdout + run.stderr
-
-            return output.strip(), ""
+        else:
+            files = sharder.order(files)
+        self.durations = sharder.durations(files)
+        return files
 
-        except Exception as e:
-            return "", f"Java test error: {str(e)}"
+    @timed("runner", "select")
+    def select_tests(self) -> Optional[List[str]]:
+        """
+        Tests affected by the changes between base_ref and HEAD of the repo's checkout, via the
+        import graph over the repo and its tests. None means "run everything".
+        """
+        if not self.repo_path or not os.path.isdir(self.repo_path):
+            logger.warning("[Trinity] ⚠️ Affected mode needs a cloned repo; running all tests")
+            return None
 
-    def _run_js_tests(self) -> Tuple[str, str]:
-        logger.info("[Trinity] 🧪 Running JavaScript tests via npm...")
+        changed = get_changed_files(self.repo_path, self.base_ref)
+        if changed is None:
+            logger.warning(f"[Trinity] ⚠️ Cannot diff against {self.base_ref}; running all tests")
+            return None
 
-        try:
-            result = subprocess.run(
-                ["npm", "test"],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            return result.stdout.strip(), result.stderr.strip()
-        except Exception as e:
-            return "", f"JavaScript test error: {str(e)}"
\ No newline at end of file
+        candidates = self.discover_tests()
+        analyzer = ImpactAnalyzer([self.repo_path, self.test_dir], self.language)
+        analyzer.update()
+        selected = analyzer.affected_tests([os.path.join(self.repo_path, f) for f in changed], candidates)
+
+        self.selection = {"changed_files": len(changed), "discovered": len(candidates), "selected": len(selected)}
+        logger.info(
+            f"[Trinity] 🎯 Affected since {self.base_ref}: {len(selected)}/{len(candidates)} test files "
+            f"for {len(changed)} changed files"
+        )
+        return selected
+
+    def _python_results(self, files: Optional[List[str]] = None) -> Iterator[Dict]:
+        logger.info("[Trinity] 🧪 Executing Python tests in isolated pytest workers...")
+
+        # Generated tests import modules relative to the cloned repo root
+        extra_paths = [os.path.abspath(CLONE_BASE_DIR)]
+        if self.repo_path:
+            extra_paths.insert(0, self.repo_path)
+
+        executor_args = {"workers": self.workers, "extra_paths": extra_paths, "durations": self.durations}
+        if self.timeout:
+            executor_args["timeout"] = self.timeout
+        return PythonTestExecutor(self.test_dir, **executor_args).iter_results(files)
+
+    def _java_results(self, files: Optional[List[str]] = None) -> Iterator[Dict]:
+        logger.info("[Trinity] 🧪 Compiling (incrementally) and executing Java tests...")
+        executor_args = {"workers": self.workers, "durations": self.durations}
+        if self.timeout:
+            executor_args["timeout"] = self.timeout
+        return JavaTestExecutor(self.test_dir, **executor_args).iter_results(files)
+
+    def _node_results(self, files: Optional[List[str]] = None) -> Iterator[Dict]:
+        logger.info(f"[Trinity] 🧪 Executing {self.language} tests in pooled Node workers...")
+        if not JsTestExecutor.available():
+            raise RuntimeError("❌ Node.js is required to run JavaScript/TypeScript tests (set TRINITY_NODE_BIN)")
+
+        # Relative imports in generated tests are resolved against the cloned repo root
+        extra_paths = [os.path.abspath(self.repo_path)] if self.repo_path else []
+        executor_args = {"workers": self.workers, "extra_paths": extra_paths, "durations": self.durations}
+        if self.timeout:
+            executor_args["timeout"] = self.timeout
+        return JsTestExecutor(self.test_dir, language=self.language, **executor_args).iter_results(files)
+
+    @staticmethod
+    def _format_results(results: List[Dict]) -> Tuple[str, str]:
+        """Render structured results as the legacy (stdout, stderr) pair."""
+        output = []
+        errors = []
+        counts: Dict[str, int] = {}
+        for r in sorted(results, key=lambda r: r["nodeid"]):
+            counts[r["status"]] = counts.get(r["status"], 0) + 1
+            output.append(f"{STATUS_ICONS.get(r['status'], '•')} {r['status'].upper()} {r['nodeid']} ({r['duration']:.2f}s)")
+            if r["status"] in ("failed", "error"):
+                errors.append(f"❌ {r['nodeid']}: {r['message']}\n{r['traceback']}")
+
+        summary = ", ".join(f"{n} {status}" for status, n in sorted(counts.items()))
+        output.append(f"\n{summary or 'no tests collected'}")
+        return "\n".join(output).strip(), "\n".join(errors).strip()
+
+
+if __name__ == "__main__":
+    import sys
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="🧪 Run generated Trinity tests (optionally one CI shard)")
+    parser.add_argument("--language", type=str, default="python", choices=sorted(LANGUAGES))
+    parser.add_argument("--test-type", type=str, default="unit")
+    parser.add_argument("--repo", type=str, default=None, help="Run only tests/<repo>/")
+    parser.add_argument("--shard", type=str, default="1/1", help="Run shard i of N, balanced by recorded timings")
+    parser.add_argument("--mode", type=str, default="all", choices=["all", "affected"])
+    parser.add_argument("--base-ref", type=str, default=None, help="Diff base for --mode affected")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--timeout", type=float, default=None)
+    parser.add_argument("--report", type=str, default=None, help="Write per-test results as NDJSON")
+    parser.add_argument("--ingest", nargs="+", default=None, help="Record timings from shard reports and exit")
+
+    args = parser.parse_args()
+    if args.ingest:
+        print(f"Recorded timings for {ingest_reports(args.ingest, args.repo, args.language)} test files")
+        sys.exit(0)
+
+    index, count = parse_shard(args.shard)
+    runner = TestRunner(
+        language=args.language, test_type=args.test_type, repo=args.repo, workers=args.workers,
+        timeout=args.timeout, mode=args.mode, base_ref=args.base_ref, shard_index=index, shard_count=count,
+    )
+    stdout, stderr = runner.run()
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as report:
+            for record in runner.results:
+                report.write(json.dumps({"event": "result", **record}) + "\n")
+            report.write(json.dumps({"event": "summary", "run_id": runner.run_id, **runner.summary}) + "\n")
+    print(stdout)
+    if stderr:
+        print(stderr, file=sys.stderr)
+    sys.exit(1 if stderr or runner.summary.get("failed") or runner.summary.get("error") else 0)
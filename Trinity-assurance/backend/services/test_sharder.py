@@ -0,0 +1,92 @@
+# backend/services/test_sharder.py
+
+import os
+import heapq
+import logging
+from statistics import median
+from typing import Dict, List, Optional, Tuple
+
+from backend.services.history_manager import TestHistory
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Estimate for files with no recorded runs when nothing else is known
+DEFAULT_FILE_DURATION = float(os.getenv("TRINITY_DEFAULT_TEST_DURATION", "1.0"))
+# A file counts as "recently failing" above this failure rate (EWMA over runs)
+FAILING_THRESHOLD = 0.1
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """'2/4' → (2, 4). Shards are 1-based, like most CI matrix indices."""
+    try:
+        index, count = (int(p) for p in spec.split("/", 1))
+    except ValueError:
+        raise ValueError(f"Invalid shard '{spec}': expected i/N, e.g. 1/4")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Invalid shard '{spec}': index must be between 1 and N")
+    return index, count
+
+
+def lpt_shards(files: List[str], durations: Dict[str, float], count: int) -> List[List[str]]:
+    """
+    Greedy longest-processing-time bin packing: place files longest-first onto the
+    least-loaded shard. Each shard keeps the files' input order.
+    """
+    count = max(1, min(count, len(files))) if files else max(1, count)
+    order = {f: i for i, f in enumerate(files)}
+    heap = [(0.0, i) for i in range(count)]
+    shards: List[List[str]] = [[] for _ in range(count)]
+
+    for f in sorted(files, key=lambda f: (-durations.get(f, DEFAULT_FILE_DURATION), order[f])):
+        load, index = heapq.heappop(heap)
+        shards[index].append(f)
+        heapq.heappush(heap, (load + durations.get(f, DEFAULT_FILE_DURATION), index))
+
+    return [sorted(s, key=order.__getitem__) for s in shards]
+
+
+class TestSharder:
+    """
+    Orders and splits test files using per-file timing and failure history
+    (recorded by TestRunner at the end of each run).
+    """
+
+    def __init__(self, repo: str, language: str, history: Optional[TestHistory] = None):
+        self.repo = repo
+        self.language = language
+        self.history = history or TestHistory()
+        self.stats = {
+            os.path.normpath(s["file"]): s for s in self.history.get_file_stats(repo, language)
+        }
+
+    def durations(self, files: List[str]) -> Dict[str, float]:
+        """Expected duration per file; unknown files get the median of known ones."""
+        known = [s["avg_duration"] for s in self.stats.values()]
+        fallback = median(known) if known else DEFAULT_FILE_DURATION
+        return {
+            f: self.stats[os.path.normpath(f)]["avg_duration"] if os.path.normpath(f) in self.stats else fallback
+            for f in files
+        }
+
+    def order(self, files: List[str]) -> List[str]:
+        """Fail-fast order: recently failing files first, then fastest first."""
+        durations = self.durations(files)
+
+        def key(f: str):
+            stat = self.stats.get(os.path.normpath(f), {})
+            failing = stat.get("failure_rate", 0.0) >= FAILING_THRESHOLD
+            return (not failing, -stat.get("last_failed_at", 0.0) if failing else 0.0, durations[f], f)
+
+        return sorted(files, key=key)
+
+    def shard(self, files: List[str], index: int, count: int) -> List[str]:
+        """Files of 1-based shard `index` out of `count`, in fail-fast order."""
+        ordered = self.order(files)
+        shards = lpt_shards(ordered, self.durations(ordered), count)
+        selected = shards[index - 1] if index <= len(shards) else []
+        logger.info(
+            f"[Sharder] 🧩 Shard {index}/{count}: {len(selected)}/{len(files)} files, "
+            f"~{sum(self.durations(selected).values()):.1f}s expected"
+        )
+        return selected
@@ -0,0 +1,279 @@
+# backend/services/test_validator.py
+
+import os
+import re
+import json
+import time
+import shutil
+import logging
+import tempfile
+import threading
+import subprocess
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from backend.services.java_executor import JAVAC_ERROR, JUNIT_PLATFORM_JAR
+from backend.services.js_executor import NODE_BIN
+from backend.services.language_detector import get_language
+from backend.utils.metrics import VALIDATION_RESULTS, VALIDATION_SECONDS
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+VALIDATE_ENABLED = os.getenv("TRINITY_VALIDATE", "1") != "0"
+# Regeneration attempts for a test that fails validation (error fed back to the LLM)
+MAX_REPAIR_ATTEMPTS = int(os.getenv("TRINITY_VALIDATE_ATTEMPTS", "2"))
+# Generated files validated together (one pool map / one javac / one node round trip)
+VALIDATION_BATCH = int(os.getenv("TRINITY_VALIDATE_BATCH", "32"))
+VALIDATE_WORKERS = int(os.getenv("TRINITY_VALIDATE_WORKERS", "0")) or min(4, os.cpu_count() or 1)
+# Smaller Python batches are compiled in-process: pool IPC would cost more than the parse
+POOL_MIN_BATCH = 8
+# Unresolved imports are expected at generation time (the repo's dependencies aren't on the
+# classpath); only syntax and other compile errors fail a Java test unless strict
+JAVA_STRICT = os.getenv("TRINITY_VALIDATE_JAVA_STRICT", "0") == "1"
+JAVA_RESOLUTION_ERRORS = ("cannot find symbol", "does not exist", "cannot access", "is not public in")
+JAVA_PUBLIC_CLASS = re.compile(r"^\s*public\s+(?:(?:final|abstract)\s+)*(?:class|interface|enum|record)\s+(\w+)", re.MULTILINE)
+SYNTAX_WORKER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "js_syntax_worker.js")
+SYNTAX_TIMEOUT = 30.0
+
+
+def check_python(item: Tuple[str, str]) -> Tuple[str, Optional[str], float]:
+    """(name, error or None, seconds) for one generated Python test; runs in pool workers."""
+    name, code = item
+    started = time.perf_counter()
+    try:
+        # compile() = ast.parse plus the checks the parser alone lets through
+        # (e.g. `return` outside a function, misplaced `await`, bad assignment targets)
+        compile(code, name, "exec", dont_inherit=True)
+        error = None
+    except SyntaxError as e:
+        error = f"{name}:{e.lineno}:{e.offset or 0} {e.msg}"
+        if e.text:
+            error += f"\n    {e.text.rstrip()}"
+    except ValueError as e:  # e.g. null bytes in the source
+        error = f"{name}: {e}"
+    return name, error, time.perf_counter() - started
+
+
+class JsSyntaxChecker:
+    """One persistent `node js_syntax_worker.js` process, restarted if it dies."""
+
+    def __init__(self):
+        self._proc: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+        self._next_id = 0
+
+    @staticmethod
+    def available() -> bool:
+        return shutil.which(NODE_BIN) is not None
+
+    def _ensure(self) -> subprocess.Popen:
+        if self._proc is None or self._proc.poll() is not None:
+            self._proc = subprocess.Popen(
+                [NODE_BIN, "--experimental-vm-modules", "--no-warnings", SYNTAX_WORKER],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                text=True, encoding="utf-8", bufsize=1,
+            )
+        return self._proc
+
+    def check(self, files: Dict[str, str]) -> Dict[str, Dict]:
+        """name → {"ok", "error", "skipped"} for every file, in one round trip."""
+        with self._lock:
+            proc = self._ensure()
+            ids = {}
+            requests = []
+            for name, code in files.items():
+                self._next_id += 1
+                ids[self._next_id] = name
+                requests.append(json.dumps({"id": self._next_id, "filename": name, "code": code}) + "\n")
+
+            # The deadline covers writing too; requests are written from a separate
+            # thread so a batch larger than the pipe buffers can't block on a full stdout
+            timer = threading.Timer(SYNTAX_TIMEOUT, proc.kill)
+            timer.start()
+            writer = threading.Thread(target=self._write, args=(proc, requests), daemon=True)
+            writer.start()
+            results: Dict[str, Dict] = {}
+            try:
+                while len(results) < len(ids):
+                    line = proc.stdout.readline()
+                    if not line:
+                        break  # worker died; unanswered files are treated as unchecked
+                    response = json.loads(line)
+                    if response.get("id") in ids:
+                        results[ids[response["id"]]] = response
+            finally:
+                timer.cancel()
+                if len(results) < len(ids) and proc.poll() is None:
+                    proc.kill()
+                writer.join()
+            if len(results) < len(ids):
+                logger.warning(f"[Validator] ⚠️ Node syntax worker answered {len(results)}/{len(ids)} files")
+            return results
+
+    @staticmethod
+    def _write(proc: subprocess.Popen, requests: List[str]) -> None:
+        try:
+            for request in requests:
+                proc.stdin.write(request)
+            proc.stdin.flush()
+        except (OSError, ValueError):
+            pass  # worker killed or died mid-batch; the reader sees EOF
+
+    def close(self) -> None:
+        with self._lock:
+            if self._proc is not None and self._proc.poll() is None:
+                self._proc.kill()
+            self._proc = None
+
+
+class TestValidator:
+    """
+    Checks generated tests before they are written: Python through compile() in a
+    process pool, Java with one `javac -proc:none` per batch, JavaScript/TypeScript
+    through a persistent Node syntax worker. Returns an error message per invalid file;
+    languages whose toolchain is missing are skipped (treated as valid).
+    """
+
+    def __init__(self, workers: int = VALIDATE_WORKERS, java_strict: bool = JAVA_STRICT):
+        self.workers = max(1, workers)
+        self.java_strict = java_strict
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._js = JsSyntaxChecker()
+        self._warned: set = set()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                # forkserver: never fork the threaded server process itself
+                method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context(method))
+            return self._pool
+
+    def _skip(self, language: str, reason: str, files: Dict[str, str]) -> Dict[str, Optional[str]]:
+        if language not in self._warned:
+            self._warned.add(language)
+            logger.warning(f"[Validator] ⚠️ Skipping {language} validation: {reason}")
+        VALIDATION_RESULTS.inc(len(files), language=language, outcome="skipped")
+        return {name: None for name in files}
+
+    def _record(self, language: str, errors: Dict[str, Optional[str]], seconds: Dict[str, float]) -> None:
+        for name, error in errors.items():
+            VALIDATION_SECONDS.observe(seconds.get(name, 0.0), language=language)
+            VALIDATION_RESULTS.inc(language=language, outcome="invalid" if error else "valid")
+
+    def validate(self, language: str, files: Dict[str, str], repo_path: Optional[str] = None) -> Dict[str, Optional[str]]:
+        """
+        files: test file name → code. Returns test file name → error (None when valid).
+        repo_path lets javac resolve the repo's own classes.
+        """
+        if not files:
+            return {}
+        spec = get_language(language)
+        if spec.runner == "pytest":
+            return self._validate_python(spec.name, files)
+        if spec.runner == "junit":
+            return self._validate_java(spec.name, files, repo_path)
+        return self._validate_js(spec.name, files)
+
+    def _validate_python(self, language: str, files: Dict[str, str]) -> Dict[str, Optional[str]]:
+        items = list(files.items())
+        if len(items) < POOL_MIN_BATCH or self.workers == 1:
+            results = [check_python(item) for item in items]
+        else:
+            try:
+                results = list(self._executor().map(check_python, items, chunksize=max(1, len(items) // (self.workers * 4))))
+            except Exception as e:  # broken pool (worker killed, no /dev/shm, …): check inline
+                logger.warning(f"[Validator] ⚠️ Process pool unavailable ({e}); validating in-process")
+                with self._pool_lock:
+                    self._pool = None
+                results = [check_python(item) for item in items]
+        errors = {name: error for name, error, _ in results}
+        self._record(language, errors, {name: seconds for name, _, seconds in results})
+        return errors
+
+    def _java_source_roots(self, repo_path: Optional[str]) -> List[str]:
+        if not repo_path:
+            return []
+        conventional = os.path.join(repo_path, "src", "main", "java")
+        return [conventional if os.path.isdir(conventional) else repo_path]
+
+    def _validate_java(self, language: str, files: Dict[str, str], repo_path: Optional[str]) -> Dict[str, Optional[str]]:
+        if shutil.which("javac") is None:
+            return self._skip(language, "javac not found", files)
+
+        started = time.perf_counter()
+        with tempfile.TemporaryDirectory(prefix="trinity-validate-") as tmp:
+            # One directory per file, named after its public class so javac accepts it
+            paths: Dict[str, str] = {}
+            for i, (name, code) in enumerate(files.items()):
+                match = JAVA_PUBLIC_CLASS.search(code)
+                file_name = f"{match.group(1)}.java" if match else os.path.basename(name)
+                os.makedirs(os.path.join(tmp, "src", str(i)))
+                path = os.path.join(tmp, "src", str(i), file_name)
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(code)
+                paths[os.path.abspath(path)] = name
+
+            cmd = [
+                "javac", "-proc:none", "-nowarn", "-encoding", "UTF-8", "-implicit:none", "-Xmaxerrs", "10000",
+                "-d", os.path.join(tmp, "classes"),
+            ]
+            if os.path.exists(JUNIT_PLATFORM_JAR):
+                cmd += ["-cp", JUNIT_PLATFORM_JAR]
+            roots = self._java_source_roots(repo_path)
+            if roots:
+                cmd += ["-sourcepath", os.pathsep.join(roots)]
+            try:
+                result = subprocess.run(cmd + list(paths), stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+            except OSError as e:
+                return self._skip(language, str(e), files)
+
+        errors: Dict[str, Optional[str]] = {name: None for name in files}
+        if result.returncode != 0:
+            for line in result.stdout.splitlines():
+                match = JAVAC_ERROR.match(line)
+                if not match or os.path.abspath(match.group("file")) not in paths:
+                    continue  # errors inside repo sources pulled in via -sourcepath aren't the test's fault
+                if not self.java_strict and any(s in match.group("message") for s in JAVA_RESOLUTION_ERRORS):
+                    continue
+                name = paths[os.path.abspath(match.group("file"))]
+                line_error = f"{name}:{match.group('line')} {match.group('message')}"
+                errors[name] = f"{errors[name]}\n{line_error}" if errors[name] else line_error
+
+        # One javac run for the batch: attribute its wall time evenly
+        per_file = (time.perf_counter() - started) / len(files)
+        self._record(language, errors, {name: per_file for name in files})
+        return errors
+
+    def _validate_js(self, language: str, files: Dict[str, str]) -> Dict[str, Optional[str]]:
+        if not self._js.available():
+            return self._skip(language, f"{NODE_BIN} not found", files)
+
+        started = time.perf_counter()
+        try:
+            responses = self._js.check(files)
+        except (OSError, ValueError) as e:
+            self._js.close()
+            return self._skip(language, f"syntax worker failed: {e}", files)
+
+        per_file = (time.perf_counter() - started) / len(files)
+        errors: Dict[str, Optional[str]] = {}
+        for name in files:
+            response = responses.get(name) or {"ok": True, "skipped": True}
+            if response.get("skipped"):
+                VALIDATION_RESULTS.inc(language=language, outcome="skipped")
+                errors[name] = None
+                continue
+            errors[name] = None if response.get("ok") else response.get("error") or "syntax error"
+            self._record(language, {name: errors[name]}, {name: per_file})
+        return errors
+
+    def close(self) -> None:
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+        self._js.close()
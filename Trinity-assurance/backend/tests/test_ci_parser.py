@@ -0,0 +1,122 @@
+import gzip
+
+import pytest
+
+from backend.services.ci_parser import ingest_log, parse_stream, safe_path
+
+PYTEST_LOG = b"""2024-05-01T10:00:00.000Z ============================= test session starts ==============================
+2024-05-01T10:00:00.100Z tests/test_a.py::test_one PASSED                                  [ 33%]
+tests/test_a.py::test_two FAILED                                  [ 66%]
+tests/test_b.py::test_three SKIPPED (no db)                       [100%]
+
+=================================== FAILURES ===================================
+___________________________________ test_two ___________________________________
+
+    def test_two():
+>       assert 1 == 2
+E       assert 1 == 2
+
+tests/test_a.py:5: AssertionError
+=========================== short test summary info ============================
+FAILED tests/test_a.py::test_two - assert 1 == 2
+==================== 1 failed, 1 passed, 1 skipped in 0.12s ====================
+"""
+
+JUNIT_XML = (
+    b'<?xml version="1.0"?><testsuites><testsuite name="s" tests="3">'
+    b'<testcase classname="com.x.FooTest" name="ok" time="0.5" file="src/FooTest.java"/>'
+    b'<testcase classname="com.x.FooTest" name="bad" time="0.1">'
+    b'<failure message="expected 1&#10;but 2" type="AssertionError">trace here</failure></testcase>'
+    b'<testcase classname="com.x.FooTest" name="sk"><skipped/></testcase>'
+    b'</testsuite></testsuites>'
+)
+
+
+def _chunks(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def _summary(records):
+    return {r["nodeid"]: r["status"] for r in records}
+
+
+@pytest.mark.parametrize("size", [len(PYTEST_LOG), 64, 7, 1])
+def test_pytest_log_is_chunking_independent(size):
+    records = list(parse_stream(_chunks(PYTEST_LOG, size)))
+    assert _summary(records) == {
+        "tests/test_a.py::test_one": "passed",
+        "tests/test_a.py::test_two": "failed",
+        "tests/test_b.py::test_three": "skipped",
+    }
+    failed = next(r for r in records if r["status"] == "failed")
+    assert failed["message"] == "assert 1 == 2"
+    assert "tests/test_a.py:5: AssertionError" in failed["traceback"]
+    assert failed["format"] == "pytest"
+
+
+def test_gzipped_log_matches_plain():
+    plain = list(parse_stream([PYTEST_LOG]))
+    assert list(parse_stream(_chunks(gzip.compress(PYTEST_LOG), 10))) == plain
+
+
+def test_junit_report_streamed_in_small_chunks():
+    records = list(parse_stream(_chunks(JUNIT_XML, 5)))
+    assert _summary(records) == {
+        "src/FooTest.java::ok": "passed", "com.x.FooTest::bad": "failed", "com.x.FooTest::sk": "skipped",
+    }
+    bad = records[1]
+    assert bad["message"] == "AssertionError: expected 1"  # first line only
+    assert bad["traceback"] == "trace here" and bad["duration"] == 0.1
+
+
+def test_jest_console_output():
+    log = "PASS src/a.test.js\n  \u2713 adds (3 ms)\nFAIL src/b.test.js\n  \u2715 subtracts (2 ms)\n".encode()
+    records = list(parse_stream([log], fmt="jest"))
+    assert _summary(records) == {"src/a.test.js::adds": "passed", "src/b.test.js::subtracts": "failed"}
+    assert records[0]["duration"] == 0.003
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        list(parse_stream([b""], fmt="tap"))
+
+
+@pytest.mark.parametrize("path, expected", [
+    ("tests/a.py", "tests/a.py"),
+    ("./tests//a.py", "tests/a.py"),
+    ("tests\\sub\\a.py", "tests/sub/a.py"),
+    ("com.x.FooTest", "com.x.FooTest"),
+    ("/etc/passwd", None),
+    ("C:/work/a.py", None),
+    ("tests/../../a.py", None),
+    ("..", None),
+])
+def test_safe_path(path, expected):
+    assert safe_path(path) == expected
+
+
+class _History:
+    def __init__(self):
+        self.rows, self.stats, self.summary = [], {}, None
+
+    def start_run(self, repo, language, test_type):
+        return 7
+
+    def record_results(self, run_id, rows):
+        self.rows.extend(rows)
+
+    def finish_run(self, run_id, summary):
+        self.summary = summary
+
+    def record_file_stats(self, repo, language, stats):
+        self.stats = stats
+
+
+def test_ingest_drops_results_with_unsafe_paths():
+    log = PYTEST_LOG.replace(b"tests/test_b.py::test_three", b"/abs/test_b.py::test_three")
+    history = _History()
+    result = ingest_log([log], "r", "python", history=history)
+    assert result["run_id"] == 7 and result["rejected"] == 1
+    assert {row["file"] for row in history.rows} == {"tests/test_a.py"}
+    assert set(history.stats) == {"tests/test_a.py"}
+    assert history.summary["total"] == 2
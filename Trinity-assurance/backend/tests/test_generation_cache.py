@@ -0,0 +1,82 @@
+import os
+import time
+
+import pytest
+
+from backend.services.generation_cache import GenerationCache, hash_source
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return GenerationCache(cache_dir=str(tmp_path / "cache"), max_entries=3, max_bytes=10 ** 6, max_age_days=1)
+
+
+def _key(i):
+    return GenerationCache.make_key(hash_source(f"def f{i}(): pass"), "v1", "model", "python", "unit", 0.2)
+
+
+def _age(cache, key, seconds):
+    path = cache._path(key)
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+def test_key_covers_every_input():
+    base = ("src", "v1", "model", "python", "unit", 0.2)
+    keys = {GenerationCache.make_key(*base)}
+    for i, changed in enumerate(["src2", "v2", "model2", "java", "ui", 0.3]):
+        variant = list(base)
+        variant[i] = changed
+        keys.add(GenerationCache.make_key(*variant))
+    assert len(keys) == 7
+
+
+def test_round_trip_and_hit_miss_counts(cache):
+    assert cache.get(_key(1)) is None
+    cache.put(_key(1), "def test_f1(): pass", "f1.py")
+    assert cache.get(_key(1)) == "def test_f1(): pass"
+    assert cache.stats() == {"hits": 1, "misses": 1, "evictions": 0}
+
+
+def test_age_is_time_since_last_use(cache):
+    cache.put(_key(1), "one")
+    cache.put(_key(2), "two")
+    _age(cache, _key(1), 2 * 86400)
+    _age(cache, _key(2), 86400 - 60)
+    assert cache.get(_key(1)) is None  # unused for longer than max_age
+    assert cache.get(_key(2)) == "two"  # the hit refreshes its age
+    assert time.time() - os.stat(cache._path(_key(2))).st_mtime < 60
+
+
+def test_evict_drops_expired_then_least_recently_used(cache):
+    for i in range(5):
+        cache.put(_key(i), f"code {i}")
+        _age(cache, _key(i), 1000 - i)
+    _age(cache, _key(4), 2 * 86400)
+    assert cache.evict(force=True) == 2  # key 4 expired, key 0 is the LRU one over the limit
+    assert [cache.get(_key(i)) is not None for i in range(5)] == [False, True, True, True, False]
+
+
+def test_evict_ignores_in_flight_tmp_files_and_removes_orphans(cache):
+    cache.put(_key(1), "one")
+    folder = os.path.dirname(cache._path(_key(1)))
+    fresh, orphan = os.path.join(folder, "a.json.1.2.tmp"), os.path.join(folder, "b.json.1.2.tmp")
+    for path in (fresh, orphan):
+        open(path, "w").close()
+    past = time.time() - 2 * 3600
+    os.utime(orphan, (past, past))
+
+    cache.evict(force=True)
+    assert os.path.exists(fresh) and not os.path.exists(orphan)
+    assert cache.get(_key(1)) == "one"
+
+
+def test_evict_is_throttled_across_instances(cache, tmp_path):
+    for i in range(5):
+        cache.put(_key(i), f"code {i}")
+    assert cache.evict() == 2
+    for i in range(5, 8):
+        cache.put(_key(i), f"code {i}")
+    other = GenerationCache(cache_dir=cache.cache_dir, max_entries=3, evict_interval=600)
+    assert other.evict() == 0  # a pass just ran
+    assert other.evict(force=True) == 3
@@ -0,0 +1,103 @@
+import os
+import subprocess
+import threading
+
+import pytest
+
+from backend.utils import git_ops
+from backend.utils.git_ops import checkout_path, checkout_repo, evict_repo_cache, repo_lock, repo_name_from_url
+
+
+def _git(*args, cwd):
+    subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@t", "-c", "init.defaultBranch=main", *args],
+        cwd=cwd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+@pytest.fixture
+def upstream(tmp_path, monkeypatch):
+    work = tmp_path / "work"
+    os.makedirs(work / "upstream" / "demo-repo")
+    monkeypatch.chdir(work)
+    origin = work / "upstream" / "demo-repo"
+    _git("init", "-q", cwd=origin)
+
+    def commit(text):
+        (origin / "app.py").write_text(text)
+        _git("add", "-A", cwd=origin)
+        _git("commit", "-q", "-m", text, cwd=origin)
+
+    commit("v1 = 1\n")
+    return f"file://{origin}", commit
+
+
+@pytest.fixture
+def measured(monkeypatch):
+    walked = []
+    real = git_ops._tree_bytes
+    monkeypatch.setattr(git_ops, "_tree_bytes", lambda top: walked.append(top) or real(top))
+    return walked
+
+
+def test_repo_name_from_url():
+    assert repo_name_from_url("https://github.com/acme/my-service.git/") == "my_service"
+
+
+def test_clone_is_only_measured_when_head_moves(upstream, measured):
+    url, commit = upstream
+    for _ in range(3):
+        with checkout_repo(url, mode="clone") as path:
+            assert open(os.path.join(path, "app.py")).read() == "v1 = 1\n"
+    assert len(measured) == 1
+
+    commit("v2 = 2\n")
+    with checkout_repo(url, mode="clone") as path:
+        assert open(os.path.join(path, "app.py")).read() == "v2 = 2\n"
+    assert len(measured) == 2
+    assert git_ops._read_meta("demo_repo")["bytes"] > 0
+
+
+def test_held_checkout_is_not_evicted(upstream):
+    url, _ = upstream
+    with checkout_repo(url, mode="clone") as path:
+        evicted = []
+        worker = threading.Thread(target=lambda: evicted.extend(evict_repo_cache(max_bytes=0)))
+        worker.start()
+        worker.join()
+        assert evicted == [] and os.path.isdir(path)
+    assert evict_repo_cache(max_bytes=0) == ["demo_repo"]
+    assert not os.path.exists(path)
+
+
+def test_worktrees_beyond_the_limit_are_pruned_unless_in_use(upstream, measured, monkeypatch):
+    monkeypatch.setattr(git_ops, "WORKTREES_PER_REPO", 2)
+    url, commit = upstream
+    with checkout_repo(url, mode="worktree") as first:
+        assert checkout_path("demo_repo") == first
+        for i in range(2, 5):
+            commit(f"v{i} = {i}\n")
+            with checkout_repo(url, mode="worktree") as latest:
+                assert checkout_path("demo_repo") == latest
+        # Older than the two most recent, but still held by this job
+        assert os.path.isdir(first)
+
+    commit("v5 = 5\n")
+    with checkout_repo(url, mode="worktree") as latest:
+        pass
+    worktrees = git_ops._read_meta("demo_repo")["worktrees"]
+    assert len(worktrees) == 2 and latest in worktrees
+    assert not os.path.exists(first)
+    assert sorted(os.listdir(os.path.dirname(latest))) == sorted(os.path.basename(p) for p in worktrees)
+    assert len(measured) == 5  # each worktree once, when it was created
+
+
+def test_repo_lock_is_exclusive_against_shared_holders(tmp_path):
+    lock_dir = str(tmp_path / "locks")
+    with repo_lock("r", shared=True, lock_dir=lock_dir):
+        with repo_lock("r", shared=True, lock_dir=lock_dir, blocking=False) as shared:
+            assert shared
+        with repo_lock("r", lock_dir=lock_dir, blocking=False) as exclusive:
+            assert not exclusive
+    with repo_lock("r", lock_dir=lock_dir, blocking=False) as exclusive:
+        assert exclusive
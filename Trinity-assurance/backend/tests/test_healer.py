@@ -0,0 +1,119 @@
+import os
+
+import pytest
+
+from backend.services.healer import Healer, cluster_failures, normalize_message, parse_failures
+
+
+def _failure(file, name, message, traceback="", status="failed"):
+    return {
+        "nodeid": f"{file}::{name}", "file": file, "name": name, "status": status,
+        "message": message, "traceback": traceback,
+    }
+
+
+IMPORT_TRACE = 'tests/r/{file}:1: in <module>\n    from app.mod import *\nE   ModuleNotFoundError: No module named \'{module}\''
+SOURCE_TRACE = (
+    'tests/r/{file}:5: in test_it\n    total(items)\n'
+    'repos/r/app/cart.py:12: in total\n    return sum(i.price for i in items)\n'
+    "E   AttributeError: 'dict' object has no attribute 'price'"
+)
+
+
+def test_normalize_message_replaces_literals():
+    assert normalize_message("KeyError: 'user_42' at 0x7f3a in /srv/app/x.py, got 17") == \
+        "KeyError: <str> at <hex> in <path>, got <num>"
+    assert normalize_message("") == ""
+
+
+def test_parse_failures_ignores_passed_and_extracts_signature_parts():
+    records = [
+        _failure("tests/r/test_a.py", "test_ok", "", status="passed"),
+        _failure("tests/r/test_a.py", "test_it", "AttributeError: 'dict' object has no attribute 'price'",
+                 SOURCE_TRACE.format(file="test_a.py")),
+    ]
+    [failure] = parse_failures(records)
+    assert failure.exc_type == "AttributeError"
+    assert failure.frame == "cart.py:total"
+    assert failure.template == "<str> object has no attribute <str>"
+
+
+def test_plain_assert_falls_back_to_crash_line_type():
+    trace = "    def test_x():\n>       assert add(1, 2) == 4\nE       assert 3 == 4\n\ntests/r/test_m.py:3: AssertionError"
+    [failure] = parse_failures([_failure("tests/r/test_m.py", "test_x", "assert 3 == 4", trace)])
+    assert failure.exc_type == "AssertionError"
+    assert failure.frame == "<test>"
+
+
+def test_same_root_cause_across_files_is_one_cluster():
+    records = [
+        _failure(f"tests/r/test_{i}.py", "test_it", "AttributeError: 'dict' object has no attribute 'price'",
+                 SOURCE_TRACE.format(file=f"test_{i}.py"))
+        for i in range(4)
+    ] + [
+        _failure(f"tests/r/test_imp{i}.py", "<collection>", f"ModuleNotFoundError: No module named 'mod{i}'",
+                 IMPORT_TRACE.format(file=f"test_imp{i}.py", module=f"mod{i}"), status="error")
+        for i in range(2)
+    ]
+    clusters = cluster_failures(parse_failures(records))
+    assert [len(c.failures) for c in clusters] == [4, 2]
+    assert clusters[0].frame == "cart.py:total"
+    assert clusters[1].exc_type == "ModuleNotFoundError" and clusters[1].frame == "<test>:<module>"
+    assert len(clusters[0].files) == 4
+
+
+def test_unrelated_failures_in_one_file_merge_into_one_cluster():
+    records = [
+        _failure("tests/r/test_a.py", "test_1", "KeyError: 'x'"),
+        _failure("tests/r/test_a.py", "test_2", "TypeError: bad operand"),
+        _failure("tests/r/test_b.py", "test_3", "ValueError: nope"),
+    ]
+    clusters = cluster_failures(parse_failures(records))
+    assert len(clusters) == 2
+    merged = next(c for c in clusters if c.files == ["tests/r/test_a.py"])
+    assert merged.exc_type == "mixed" and len(merged.failures) == 2
+
+
+def test_healer_only_touches_files_under_its_test_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("tests/r")
+    open("tests/r/test_a.py", "w").close()
+    open("outside.py", "w").close()
+    os.symlink(os.path.abspath("outside.py"), "tests/r/link.py")
+
+    class Generator:
+        validator = None
+
+    healer = Healer("r", "python", generator=Generator())
+    assert healer._in_test_dir("tests/r/test_a.py")
+    assert not healer._in_test_dir("tests/r/../../outside.py")
+    assert not healer._in_test_dir(os.path.abspath("outside.py"))
+    assert not healer._in_test_dir("tests/r/link.py")
+
+
+def test_healer_refuses_repo_names_outside_tests(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("tests/r")
+    os.makedirs("backend")
+    open("backend/main.py", "w").close()
+    os.symlink(os.path.abspath("backend"), "tests/escape")
+
+    class Generator:
+        validator = None
+
+    for repo in ("..", ".", "", "r/..", "escape", "missing"):
+        with pytest.raises(FileNotFoundError):
+            Healer(repo, "python", generator=Generator())
+
+
+def test_rules_with_bad_replacements_are_skipped():
+    response = (
+        '{"rules": ['
+        '{"pattern": "from app\\\\.mod import", "replacement": "from app.module import"},'
+        '{"pattern": "a", "replacement": "\\\\5"},'
+        '{"pattern": "b", "replacement": "\\\\g<missing>"},'
+        '{"pattern": "(", "replacement": ""}'
+        ']}'
+    )
+    rules = Healer._parse_rules(response)
+    assert [(p.pattern, r) for p, r in rules] == [("from app\\.mod import", "from app.module import")]
@@ -0,0 +1,208 @@
+import pytest
+
+from backend.services import history_manager
+from backend.services.history_manager import HistoryCache
+
+
+@pytest.fixture
+def history(tmp_path, monkeypatch):
+    monkeypatch.setattr(history_manager, "history_cache", HistoryCache())
+    return history_manager.TestHistory(base_dir=str(tmp_path / "tests"))
+
+
+def test_exact_file_filter_ignores_files_sharing_the_prefix(history):
+    history.save("r", "a.py", "python", "unit", "tests/r/test_a.py", "old a")
+    history.save("r", "a.py", "python", "unit", "tests/r/test_a.py", "new a")
+    history.save("r", "a.py.bak", "python", "unit", "tests/r/test_a_bak.py", "backup")
+
+    by_prefix = history.query("r", limit=1, file_prefix="a.py", include_output=True)["items"]
+    assert by_prefix[0]["file"] == "a.py.bak"
+
+    [entry] = history.query("r", limit=1, file="a.py", include_output=True)["items"]
+    assert entry["file"] == "a.py" and entry["ai_output"] == "new a"
+
+
+# ──────────────────────────────────────────────────────────────────────
+# Storage
+# ──────────────────────────────────────────────────────────────────────
+def test_save_appends_and_fetch_returns_records_in_order(history):
+    history.save("org/my-repo", "a.py", "python", "unit", "tests/r/test_a.py", "body a")
+    history.save("org/my-repo", "b.py", "python", "unit", "tests/r/test_b.py", "body b")
+
+    records = history.fetch("org/my-repo")
+    assert [r["file"] for r in records] == ["a.py", "b.py"]
+    assert records[0]["ai_output"] == "body a" and records[0]["output_size"] == len("body a")
+    assert "ai_output" not in history.fetch("org/my-repo", include_output=False)[0]
+    assert history.repos() == ["org_my_repo"]
+
+
+def test_identical_bodies_are_stored_once(history):
+    for name in ("a.py", "b.py", "c.py"):
+        history.save("r", name, "python", "unit", f"tests/r/test_{name}", "same body")
+    conn = history.db.connection()
+    assert conn.execute("SELECT COUNT(*) FROM history").fetchone()[0] == 3
+    assert conn.execute("SELECT COUNT(*) FROM history_blobs").fetchone()[0] == 1
+
+
+def test_batch_writes_on_exit_only(history):
+    with history.batch():
+        history.save("r", "a.py", "python", "unit", "tests/r/test_a.py", "a")
+        with history.batch():
+            history.save("r", "b.py", "python", "unit", "tests/r/test_b.py", "b")
+        assert history.fetch("r") == []
+    assert [r["file"] for r in history.fetch("r")] == ["a.py", "b.py"]
+
+
+def test_schema_migrations_are_recorded_and_not_reapplied(tmp_path):
+    from backend.database.db import MIGRATIONS, Database
+
+    path = str(tmp_path / "trinity.db")
+    Database(path).connection()
+    conn = Database(path).connection()
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == len(MIGRATIONS)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+# ──────────────────────────────────────────────────────────────────────
+# Pagination, filters, projection
+# ──────────────────────────────────────────────────────────────────────
+def test_cursor_pages_walk_newest_first_without_gaps(history):
+    for i in range(7):
+        history.save("r", f"f{i}.py", "python", "unit", f"tests/r/test_f{i}.py", str(i))
+
+    seen, cursor = [], None
+    while True:
+        page = history.query("r", limit=3, cursor=cursor)
+        seen += [item["file"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [f"f{i}.py" for i in reversed(range(7))]
+
+
+def test_invalid_cursor_is_a_value_error(history):
+    with pytest.raises(ValueError):
+        history.query("r", cursor="not-a-cursor!")
+
+
+def test_filters_combine(history):
+    history.save("r", "src/a.py", "python", "unit", "", "", created_at=100)
+    history.save("r", "src/b.js", "javascript", "unit", "", "", created_at=200)
+    history.save("r", "src/c.py", "python", "integration", "", "", created_at=300)
+    history.save("r", "lib/d.py", "python", "unit", "", "", created_at=400)
+
+    def files(**filters):
+        return [item["file"] for item in history.query("r", **filters)["items"]]
+
+    assert files(language="python", test_type="unit") == ["lib/d.py", "src/a.py"]
+    assert files(file_prefix="src/") == ["src/c.py", "src/b.js", "src/a.py"]
+    assert files(since=200, until=400) == ["src/c.py", "src/b.js"]
+
+
+def test_projection_skips_bodies_unless_asked(history):
+    history.save("r", "a.py", "python", "unit", "tests/r/test_a.py", "body")
+
+    [item] = history.query("r", fields=["file", "bogus"])["items"]
+    assert item == {"file": "a.py"}
+    [item] = history.query("r")["items"]
+    assert "ai_output" not in item
+    [item] = history.query("r", fields=["file", "ai_output"])["items"]
+    assert item == {"file": "a.py", "ai_output": "body"}
+
+
+def test_version_changes_on_write(history):
+    before = history.version("r")
+    history.save("r", "a.py", "python", "unit", "", "")
+    assert history.version("r") != before
+
+
+def test_etag_matching():
+    pytest.importorskip("fastapi")
+    from backend.routers.history import etag_matches
+
+    etag = 'W/"abc"'
+    assert etag_matches('W/"abc"', etag)
+    assert etag_matches('"abc"', etag)
+    assert etag_matches('"x", W/"abc"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"ab"', etag)
+    assert not etag_matches(None, etag)
+
+
+# ──────────────────────────────────────────────────────────────────────
+# LRU cache and legacy layouts
+# ──────────────────────────────────────────────────────────────────────
+def test_cache_evicts_least_recently_used_repo():
+    cache = HistoryCache(max_repos=2, ttl_seconds=60)
+    cache.set_summary("a", {"v": 1})
+    cache.set_summary("b", {"v": 2})
+    assert cache.get_summary("a") == {"v": 1}
+    cache.set_summary("c", {"v": 3})
+    assert cache.get_summary("a") == {"v": 1}
+    assert cache.get_summary("c") == {"v": 3}
+    assert cache.get_summary("b") is None
+
+
+def test_cache_entries_expire_after_ttl():
+    cache = HistoryCache(ttl_seconds=0)
+    cache.set_page("a", ("k",), {"items": []})
+    assert cache.get_page("a", ("k",)) is None
+
+
+def test_repeated_reads_hit_the_cache_until_a_write(history):
+    history.save("r", "a.py", "python", "unit", "", "")
+    cache = history_manager.history_cache
+
+    history.summary("r")
+    history.query("r")
+    hits = cache.hits
+    assert history.summary("r")["total"] == 1
+    history.query("r")
+    assert cache.hits == hits + 2
+
+    history.save("r", "b.py", "python", "unit", "", "")
+    assert history.summary("r")["total"] == 2
+    assert len(history.query("r")["items"]) == 2
+
+
+def test_legacy_result_api_reads_and_writes_the_unified_store(tmp_path, monkeypatch):
+    from backend.services import test_history_manager
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(history_manager, "history_cache", HistoryCache())
+    test_history_manager.save_test_result("r", "code 1", {"file": "a.py", "passed": 1})
+    test_history_manager.save_test_result("r", "code 2", {"file": "b.py", "passed": 2})
+
+    runs = test_history_manager.load_test_history("r")
+    assert [run["result"]["passed"] for run in runs] == [2, 1]
+    assert [r["file"] for r in history_manager.TestHistory().fetch("r")] == ["a.py", "b.py"]
+
+
+def test_legacy_files_are_imported_once(tmp_path, monkeypatch):
+    import json
+    from backend.database.migrate_legacy_history import migrate
+
+    monkeypatch.setattr(history_manager, "history_cache", HistoryCache())
+    base = tmp_path / "tests"
+    (base / ".history" / "per").mkdir(parents=True)
+    (base / "_history" / "runs").mkdir(parents=True)
+    (base / ".history" / "flat.json").write_text(json.dumps([
+        {"file": "a.py", "language": "python", "test_type": "unit", "output_path": "", "ai_output": "a"},
+        {"file": "b.py", "language": "python", "test_type": "unit", "output_path": "", "ai_output": "b"},
+    ]))
+    (base / ".history" / "per" / "1.json").write_text(json.dumps({"file": "c.py", "ai_output": "c"}))
+    (base / "_history" / "runs" / "20240102_030405.json").write_text(json.dumps({
+        "timestamp": "20240102_030405", "test_code": "d", "result": {"file": "d.py", "passed": 3},
+    }))
+    (base / ".history" / "broken.json").write_text("{")
+
+    stats = migrate(str(base), archive=True)
+    assert stats == {"files": 3, "records": 4, "skipped": 0, "failed": 1}
+    assert migrate(str(base))["records"] == 0
+
+    history = history_manager.TestHistory(base_dir=str(base))
+    assert [r["ai_output"] for r in history.fetch("flat")] == ["a", "b"]
+    assert history.fetch("per")[0]["file"] == "c.py"
+    [run] = history.fetch_runs("runs")
+    assert run["result"]["passed"] == 3
+    assert (base / ".history" / "flat.json.migrated").exists()
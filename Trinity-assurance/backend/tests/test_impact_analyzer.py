@@ -0,0 +1,80 @@
+import os
+
+from backend.services.impact_analyzer import ImpactAnalyzer
+
+
+def _write(root, rel, text=""):
+    path = os.path.join(root, rel)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+    return path
+
+
+def _analyzer(tmp_path, language, *roots):
+    return ImpactAnalyzer([str(tmp_path / r) for r in roots], language, cache_dir=str(tmp_path / "cache"))
+
+
+def test_python_dependents_are_transitive(tmp_path):
+    repo, tests = str(tmp_path / "repo"), str(tmp_path / "tests")
+    models = _write(repo, "app/models.py", "X = 1\n")
+    _write(repo, "app/__init__.py")
+    service = _write(repo, "app/service.py", "from .models import X\n")
+    api = _write(repo, "app/api.py", "from app import service\n")
+    other = _write(repo, "app/other.py", "import os\n")
+    t_api = _write(tests, "test_api.py", "from app.api import *\n")
+    t_other = _write(tests, "test_other.py", "import app.other\n")
+
+    analyzer = _analyzer(tmp_path, "python", "repo", "tests")
+    assert analyzer.affected_tests([models], [t_api, t_other]) == [t_api]
+    assert analyzer.dependents([models]) >= {models, service, api, t_api}
+    assert other not in analyzer.dependents([models])
+    assert analyzer.affected_tests([t_other], [t_api, t_other]) == [t_other]
+
+
+def test_js_relative_imports_resolve_across_extensions(tmp_path):
+    repo = str(tmp_path / "repo")
+    util = _write(repo, "src/util.ts", "export const x = 1\n")
+    index = _write(repo, "src/lib/index.js", "module.exports = require('../util.js')\n")
+    test = _write(repo, "test/app.test.js", "import lib from '../src/lib'\nimport React from 'react'\n")
+
+    analyzer = _analyzer(tmp_path, "javascript", "repo")
+    analyzer.update()
+    assert analyzer.graph[index] == {util}
+    assert analyzer.graph[test] == {index}
+    assert analyzer.affected_tests([util], [test]) == [test]
+
+
+def test_java_imports_wildcards_and_same_package(tmp_path):
+    repo = str(tmp_path / "repo")
+    model = _write(repo, "com/x/model/User.java", "package com.x.model;\npublic class User {}\n")
+    helper = _write(repo, "com/x/svc/Helper.java", "package com.x.svc;\nclass Helper {}\n")
+    svc = _write(repo, "com/x/svc/UserService.java",
+                 "package com.x.svc;\nimport com.x.model.*;\nclass UserService { Helper h; }\n")
+    test = _write(repo, "com/x/svc/UserServiceTest.java",
+                  "package com.x.svc;\nimport com.x.model.User.Inner;\nclass UserServiceTest {}\n")
+
+    analyzer = _analyzer(tmp_path, "java", "repo")
+    analyzer.update()
+    assert analyzer.graph[svc] == {model, helper}
+    assert model in analyzer.graph[test]
+
+
+def test_update_reparses_only_changed_files(tmp_path, monkeypatch):
+    from backend.services import impact_analyzer
+
+    repo = str(tmp_path / "repo")
+    a = _write(repo, "a.py", "import b\n")
+    _write(repo, "b.py")
+    _analyzer(tmp_path, "python", "repo").update()
+
+    parsed = []
+    real_parse = impact_analyzer.parse_imports
+    monkeypatch.setattr(impact_analyzer, "parse_imports", lambda p: parsed.append(p) or real_parse(p))
+    _write(repo, "a.py", "import b\nimport c\n")
+    c = _write(repo, "c.py")
+    analyzer = _analyzer(tmp_path, "python", "repo")
+    analyzer.update()
+
+    assert sorted(parsed) == sorted([a, c])
+    assert analyzer.affected_tests([c], [a]) == [a]
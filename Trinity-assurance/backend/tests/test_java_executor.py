@@ -0,0 +1,89 @@
+import os
+import threading
+import time
+
+import pytest
+
+from backend.services import java_executor
+from backend.services.java_executor import JavaTestExecutor
+from backend.utils.git_ops import repo_lock
+
+
+@pytest.fixture
+def suite(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("tests/r")
+    for name in ("ATest", "BTest"):
+        with open(f"tests/r/{name}.java", "w") as f:
+            f.write(f"package demo;\nclass {name} {{}}\n")
+    return sorted(os.path.abspath(os.path.join("tests/r", f)) for f in os.listdir("tests/r"))
+
+
+def _slow_javac(calls, active):
+    lock = threading.Lock()
+
+    def javac(self, files, out_dir, classpath):
+        if not files:  # like the real _javac: nothing to compile, no javac process
+            return {}
+        with lock:
+            active.append(1)
+            calls.append(list(files))
+            overlap = len(active)
+        time.sleep(0.1)
+        with lock:
+            active.pop()
+        assert overlap == 1, "two javac runs wrote the same class directory at once"
+        return {}
+
+    return javac
+
+
+def test_concurrent_compiles_of_one_suite_are_serialized(suite, monkeypatch):
+    calls, active = [], []
+    monkeypatch.setattr(JavaTestExecutor, "_javac", _slow_javac(calls, active))
+    results = []
+
+    def run():
+        results.append(JavaTestExecutor("tests/r", cache_dir="cache").compile(suite))
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert calls == [suite]  # the others found the manifest up to date
+    assert all(compiled == suite and not errors for compiled, errors in results)
+    suite_dir = JavaTestExecutor("tests/r", cache_dir="cache").suite_dir
+    assert not [f for f in os.listdir(suite_dir) if f.endswith(".tmp")]
+
+
+def test_changed_source_recompiles_its_package(suite, monkeypatch):
+    calls, active = [], []
+    monkeypatch.setattr(JavaTestExecutor, "_javac", _slow_javac(calls, active))
+    executor = JavaTestExecutor("tests/r", cache_dir="cache")
+    executor.compile(suite)
+    with open(suite[0], "a") as f:
+        f.write("// edited\n")
+    executor.compile(suite)
+    assert calls == [suite, suite]  # same package: the unchanged class is a dependent
+
+
+def test_agent_rebuild_waits_for_running_jvms(suite, tmp_path, monkeypatch):
+    jar = tmp_path / "junit.jar"
+    jar.write_text("")
+    builds = []
+    monkeypatch.setattr(java_executor, "JUNIT_PLATFORM_JAR", str(jar))
+    monkeypatch.setattr(JavaTestExecutor, "_javac", lambda self, files, out, cp: builds.append(time.time()) or {})
+    executor = JavaTestExecutor("tests/r", cache_dir="cache")
+
+    released = []
+    with repo_lock("agent", shared=True, lock_dir=executor.lock_dir):
+        worker = threading.Thread(target=executor.ensure_agent)
+        worker.start()
+        time.sleep(0.2)
+        assert not builds
+        released.append(time.time())
+    worker.join()
+    assert len(builds) == 1 and builds[0] >= released[0]
+    assert executor.ensure_agent() is None and len(builds) == 1
@@ -0,0 +1,160 @@
+import asyncio
+import threading
+import time
+
+from backend.services.job_queue import Job, JobQueue
+
+
+def _wait(job, timeout=5):
+    job.future.exception(timeout=timeout)
+    # The final status event is emitted just after the future resolves
+    deadline = time.time() + timeout
+    while not job.done or job.events[-1].get("status") != job.status:
+        assert time.time() < deadline
+        time.sleep(0.01)
+
+
+def test_job_runs_and_records_progress_events():
+    queue = JobQueue(workers=1)
+
+    def work(emit):
+        for i in range(3):
+            emit({"type": "progress", "done": i + 1, "total": 3})
+        return "ok"
+
+    job = queue.submit(work, owner="lic")
+    _wait(job)
+    assert job.status == "succeeded" and job.future.result() == "ok"
+    assert job.progress == {"done": 3, "total": 3}
+    assert [e["seq"] for e in job.events] == list(range(len(job.events)))
+    assert [e.get("status") for e in job.events if e["type"] == "status"] == ["running", "succeeded"]
+    assert job.started_at <= job.finished_at
+
+
+def test_failed_job_keeps_the_error():
+    queue = JobQueue(workers=1)
+
+    def work(emit):
+        raise ValueError("boom")
+
+    job = queue.submit(work, owner="lic")
+    _wait(job)
+    assert job.status == "failed" and isinstance(job.future.exception(), ValueError)
+    assert job.error == "boom" and job.finished_at is not None
+    assert queue.get(job.id) is job
+
+
+def test_owners_are_served_round_robin():
+    queue = JobQueue(workers=1)
+    gate = threading.Event()
+    order = []
+
+    def blocker(emit):
+        gate.wait(5)
+
+    def record(name):
+        return lambda emit: order.append(name)
+
+    first = queue.submit(blocker, owner="a")
+    first.wait_events(0, timeout=5)  # the worker has taken it off the queue
+    jobs = [queue.submit(record(f"a{i}"), owner="a") for i in range(3)]
+    jobs += [queue.submit(record(f"b{i}"), owner="b") for i in range(2)]
+    gate.set()
+    for job in [first] + jobs:
+        job.future.result(timeout=5)
+    assert order == ["a0", "b0", "a1", "b1", "a2"]
+
+
+def test_wait_events_returns_on_new_event_or_timeout():
+    job = Job(lambda emit: None, "lic", "generate", {})
+    started = time.time()
+    assert job.wait_events(0, timeout=0.05) == []
+    assert time.time() - started >= 0.05
+
+    threading.Timer(0.05, job.emit, args=({"type": "progress"},)).start()
+    events = job.wait_events(0, timeout=5)
+    assert [e["type"] for e in events] == ["progress"]
+
+
+def test_wait_events_async_is_woken_from_another_thread():
+    job = Job(lambda emit: None, "lic", "generate", {})
+
+    async def main():
+        threading.Timer(0.05, job.emit, args=({"type": "progress"},)).start()
+        started = time.time()
+        events = await job.wait_events_async(0, timeout=5)
+        return events, time.time() - started
+
+    events, elapsed = asyncio.run(main())
+    assert [e["type"] for e in events] == ["progress"]
+    assert elapsed < 2
+    assert job._waiters == []
+
+
+def test_wait_events_async_times_out_and_unregisters():
+    job = Job(lambda emit: None, "lic", "generate", {})
+    assert asyncio.run(job.wait_events_async(0, timeout=0.05)) == []
+    assert job._waiters == []
+
+
+def test_finished_jobs_are_pruned_after_retention():
+    queue = JobQueue(workers=1, retention_seconds=60)
+    job = queue.submit(lambda emit: None, owner="lic")
+    _wait(job)
+    job.finished_at -= 120
+    queue.submit(lambda emit: None, owner="lic")
+    assert queue.get(job.id) is None
+
+
+# ──────────────────────────────────────────────────────────────────────
+# Single-flight
+# ──────────────────────────────────────────────────────────────────────
+def test_identical_submissions_attach_to_the_running_job():
+    queue = JobQueue(workers=2)
+    gate = threading.Event()
+    calls = []
+
+    def work(emit):
+        calls.append(1)
+        gate.wait(5)
+        return "result"
+
+    job, attached = queue.submit_or_attach(work, owner="a", dedupe_key="k")
+    again, attached_again = queue.submit_or_attach(work, owner="b", dedupe_key="k")
+    other, attached_other = queue.submit_or_attach(work, owner="b", dedupe_key="other")
+    gate.set()
+    _wait(job)
+    _wait(other)
+
+    assert (attached, attached_again, attached_other) == (False, True, False)
+    assert again is job and other is not job
+    assert job.attached == 1
+    assert any(e["type"] == "attached" and e["owner"] == "b" for e in job.events)
+    assert len(calls) == 2
+
+
+def test_succeeded_result_is_reused_within_the_window_only():
+    queue = JobQueue(workers=1, dedupe_window=60)
+    job, _ = queue.submit_or_attach(lambda emit: "r", owner="a", dedupe_key="k")
+    _wait(job)
+
+    assert queue.submit_or_attach(lambda emit: "r", owner="a", dedupe_key="k") == (job, True)
+    fresh, attached = queue.submit_or_attach(lambda emit: "r", owner="a", dedupe_key="k", reuse_result=False)
+    assert not attached and fresh is not job
+    _wait(fresh)
+
+    fresh.finished_at -= 120
+    newer, attached = queue.submit_or_attach(lambda emit: "r", owner="a", dedupe_key="k")
+    assert not attached and newer is not fresh
+
+
+def test_failed_jobs_are_never_reused():
+    queue = JobQueue(workers=1)
+
+    def fail(emit):
+        raise RuntimeError("boom")
+
+    job, _ = queue.submit_or_attach(fail, owner="a", dedupe_key="k")
+    _wait(job)
+    retry, attached = queue.submit_or_attach(lambda emit: "r", owner="a", dedupe_key="k")
+    assert not attached and retry is not job
@@ -0,0 +1,80 @@
+import os
+
+import pytest
+
+from backend.services.js_executor import JsTestExecutor, discover_js_tests
+from backend.services.language_detector import (
+    LANGUAGES, detect_language, family_extensions, get_language, language_for_file,
+)
+
+needs_node = pytest.mark.skipif(not JsTestExecutor.available(), reason="node is not installed")
+
+
+def test_registry_lookup_and_errors():
+    assert get_language("TypeScript") is LANGUAGES["typescript"]
+    with pytest.raises(ValueError):
+        get_language("cobol")
+    assert family_extensions("typescript")[:4] == (".ts", ".tsx", ".mts", ".cts")
+    assert ".js" in family_extensions("typescript") and family_extensions("python") == (".py",)
+
+
+def test_files_map_to_languages():
+    assert language_for_file("src/a.tsx") == "typescript"
+    assert language_for_file("types/a.d.ts") is None
+    assert language_for_file("README.md") is None
+    assert detect_language(["a.ts", "b.ts", "c.js", "d.md"]) == "typescript"
+    assert detect_language(["README.md"]) is None
+
+
+def test_test_names_keep_the_source_extension():
+    def sanitize(s):
+        return s.replace("/", "_")
+
+    assert get_language("typescript").test_file_name("src/app.tsx", sanitize) == "test_src_app.tsx"
+    assert get_language("javascript").test_file_name("src/app", sanitize) == "test_src_app.js"
+    assert get_language("java").is_test("UserServiceTest.java")
+    assert get_language("javascript").is_test("cart.spec.mjs")
+    assert not get_language("javascript").is_test("cart.mjs")
+
+
+@pytest.fixture
+def suite(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("repo/src")
+    os.makedirs("tests/r/node_modules/pkg")
+    with open("repo/src/cart.js", "w") as f:
+        f.write("exports.total = (items) => items.reduce((s, i) => s + i.price, 0);\n")
+    with open("tests/r/test_cart.js", "w") as f:
+        f.write(
+            "const { total } = require('../../repo/src/cart');\n"
+            "describe('total', () => {\n"
+            "  it('sums', () => { expect(total([{ price: 2 }, { price: 3 }])).toBe(5); });\n"
+            "  it('fails', () => { expect(total([])).toEqual(1); });\n"
+            "  test('mocks', () => { const fn = jest.fn(); fn(1); expect(fn).toHaveBeenCalledWith(1); });\n"
+            "});\n"
+        )
+    with open("tests/r/test_broken.js", "w") as f:
+        f.write("require('./does-not-exist');\n")
+    for name in ("tests/r/types.d.ts", "tests/r/helper.js", "tests/r/node_modules/pkg/test_pkg.js"):
+        open(name, "w").close()
+    return "tests/r"
+
+
+def test_discovery_covers_the_js_family_only(suite):
+    open("tests/r/test_typed.ts", "w").close()
+    assert discover_js_tests(suite, "javascript") == [
+        "tests/r/test_broken.js", "tests/r/test_cart.js", "tests/r/test_typed.ts",
+    ]
+
+
+@needs_node
+def test_worker_runs_jest_style_suites(suite):
+    results = JsTestExecutor(suite, workers=2, timeout=30, extra_paths=["repo"]).run()
+    assert {r["nodeid"]: r["status"] for r in results} == {
+        "tests/r/test_cart.js::total > sums": "passed",
+        "tests/r/test_cart.js::total > fails": "failed",
+        "tests/r/test_cart.js::total > mocks": "passed",
+        "tests/r/test_broken.js": "error",
+    }
+    failed = next(r for r in results if r["status"] == "failed")
+    assert failed["file"] == "tests/r/test_cart.js" and "expected 0 to equal 1" in failed["message"]
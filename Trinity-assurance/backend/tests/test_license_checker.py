@@ -0,0 +1,92 @@
+import hashlib
+import time
+
+import pytest
+
+from backend.utils import license_checker
+from backend.utils.license_checker import LicenseCache, is_license_valid
+
+
+def _token(user="alice", expiry="2999-12-31", salt=None):
+    raw = f"{user}:{expiry}:{salt or license_checker.SECRET_SALT}"
+    return f"{user}:{expiry}:{hashlib.sha256(raw.encode()).hexdigest()}"
+
+
+def test_verification_accepts_only_well_formed_unexpired_tokens():
+    license = LicenseCache().verify(_token())
+    assert license.user_id == "alice" and license.expires_at > time.time()
+    for bad in (_token(expiry="2000-01-01"), _token(salt="other"), "alice:2999-12-31", "a:not-a-date:x", ""):
+        assert LicenseCache().verify(bad) is None
+
+
+def test_results_are_cached_by_token_hash(monkeypatch):
+    calls = []
+    real = license_checker._verify
+    monkeypatch.setattr(license_checker, "_verify", lambda t: calls.append(t) or real(t))
+    cache = LicenseCache()
+    for _ in range(3):
+        assert cache.verify(_token()) is not None
+        assert cache.verify("forged:2999-12-31:00") is None
+    assert len(calls) == 2
+    assert _token() not in str(cache._entries)
+
+
+def test_negative_entries_expire(monkeypatch):
+    calls = []
+    monkeypatch.setattr(license_checker, "_verify", lambda t: calls.append(t))
+    cache = LicenseCache(negative_ttl=0)
+    cache.verify("x")
+    cache.verify("x")
+    assert len(calls) == 2
+
+
+def test_cache_is_bounded_lru():
+    cache = LicenseCache(max_entries=2)
+    a, b, c = _token("a"), _token("b"), _token("c")
+    cache.verify(a)
+    cache.verify(b)
+    cache.verify(a)
+    cache.verify(c)
+    assert len(cache._entries) == 2
+    assert hashlib.sha256(b.encode()).hexdigest() not in cache._entries
+
+
+def test_module_helpers_use_the_shared_cache(monkeypatch):
+    monkeypatch.setattr(license_checker, "license_cache", LicenseCache())
+    assert is_license_valid(_token())
+    assert not is_license_valid("nope")
+
+
+# ──────────────────────────────────────────────────────────────────────
+# Per-license quotas (routers/auth.py)
+# ──────────────────────────────────────────────────────────────────────
+def test_rate_and_daily_quota_per_license_and_scope():
+    pytest.importorskip("fastapi")
+    from backend.routers.auth import LicenseUsage
+
+    usage = LicenseUsage(limits={"generate": (2, 3), "verify": (0, 0)})
+    assert usage.check("alice", "generate") is None
+    assert usage.check("alice", "generate") is None
+    reason, retry_after = usage.check("alice", "generate")
+    assert reason == "rate_limited" and 0 < retry_after <= 30
+    assert usage.check("bob", "generate") is None
+    for _ in range(100):
+        assert usage.check("alice", "verify") is None
+
+    entry = usage._entry("alice", "generate")
+    entry["bucket"].tokens = entry["bucket"].capacity
+    assert usage.check("alice", "generate") is None
+    reason, _ = usage.check("alice", "generate")
+    assert reason == "quota_exceeded"
+    assert usage.snapshot("alice")["generate"] == {"today": 3, "total": 3, "daily_quota": 3}
+
+
+def test_least_recently_seen_licenses_are_dropped():
+    pytest.importorskip("fastapi")
+    from backend.routers.auth import LicenseUsage
+
+    usage = LicenseUsage(limits={"verify": (0, 0)}, max_licenses=2)
+    for user in ("a", "b", "a", "c"):
+        usage.check(user, "verify")
+    assert usage.snapshot("b") == {}
+    assert usage.snapshot("a")["verify"]["total"] == 2
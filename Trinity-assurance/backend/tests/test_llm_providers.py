@@ -0,0 +1,77 @@
+import os
+
+import pytest
+
+from backend.services.llm_providers import (
+    GroqProvider, LLMProvider, LLMResponse, ReplayProvider, StubProvider, create_provider,
+)
+
+
+class _Counting(LLMProvider):
+    name = "counting"
+    default_model = "m"
+
+    def __init__(self):
+        super().__init__()
+        self.prompts = []
+
+    def _complete(self, model, prompt, max_tokens, temperature):
+        self.prompts.append(prompt)
+        return LLMResponse(f"answer to {prompt}", 7, 3, 4)
+
+
+def test_stub_is_deterministic_per_prompt():
+    stub = StubProvider()
+    first = stub.complete("", "write tests for a.py", 100, 0.2)
+    assert first == stub.complete("", "write tests for a.py", 100, 0.2)
+    assert first.text != stub.complete("", "write tests for b.py", 100, 0.2).text
+    assert first.text.startswith("def test_stub_") and first.total_tokens > 0
+    compile(first.text, "<stub>", "exec")
+
+
+def test_stub_answers_batch_prompts_per_file():
+    from backend.services.prompt_planner import PromptPlanner, SourceFile
+
+    files = [SourceFile("a.py", "a.py", "A = 1\n"), SourceFile("pkg/b.py", "pkg/b.py", "B = 2\n")]
+    [task] = PromptPlanner("python").plan(files)
+    prompt, max_tokens = task.prompts[0]
+    text = StubProvider().complete("", prompt, max_tokens, 0.2).text
+    assert set(PromptPlanner.split_batch_output(text, files)) == {"a.py", "pkg/b.py"}
+
+
+def test_replay_records_then_serves_from_disk(tmp_path):
+    upstream = _Counting()
+    recorder = ReplayProvider(replay_dir=str(tmp_path), upstream=upstream)
+    recorded = recorder.complete("", "p", 100, 0.2)
+    assert recorded == LLMResponse("answer to p", 7, 3, 4)
+    assert recorder.misses == 1 and upstream.prompts == ["p"]
+
+    replay = ReplayProvider(replay_dir=str(tmp_path))
+    assert replay.complete("m", "p", 100, 0.2) == recorded
+    assert replay.hits == 1 and upstream.prompts == ["p"]
+    assert not any(name.endswith(".tmp") for _, _, files in os.walk(tmp_path) for name in files)
+
+
+def test_replay_key_covers_every_request_parameter():
+    base = ReplayProvider.key("m", "p", 100, 0.2)
+    assert base == ReplayProvider.key("m", "p", 100, 0.2)
+    assert len({base, ReplayProvider.key("m2", "p", 100, 0.2), ReplayProvider.key("m", "q", 100, 0.2),
+                ReplayProvider.key("m", "p", 101, 0.2), ReplayProvider.key("m", "p", 100, 0.3)}) == 5
+
+
+def test_replay_miss_raises_or_falls_back_to_stub(tmp_path):
+    with pytest.raises(LookupError):
+        ReplayProvider(replay_dir=str(tmp_path), on_miss="error").complete("", "p", 100, 0.2)
+    fallback = ReplayProvider(replay_dir=str(tmp_path), on_miss="stub").complete("", "p", 100, 0.2)
+    assert fallback.text == StubProvider().complete("stub", "p", 100, 0.2).text
+
+
+def test_create_provider_needs_no_credentials(monkeypatch):
+    monkeypatch.delenv("GROQ_API_KEY", raising=False)
+    assert isinstance(create_provider("groq"), GroqProvider)
+    assert isinstance(create_provider("stub"), StubProvider)
+    record = create_provider("record")
+    assert isinstance(record, ReplayProvider) and isinstance(record.upstream, GroqProvider)
+    assert record.requests_per_minute == GroqProvider.requests_per_minute
+    with pytest.raises(ValueError):
+        create_provider("nope")
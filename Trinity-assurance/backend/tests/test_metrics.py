@@ -0,0 +1,89 @@
+import threading
+
+import pytest
+
+from backend.utils import metrics
+from backend.utils.metrics import Counter, Histogram, Registry
+
+
+def test_counter_renders_labelled_samples_sorted_and_escaped():
+    c = Counter("t_requests_total", "Requests", ("route", "status"))
+    c.inc(route="/b", status="200")
+    c.inc(2, route='/a"x\n', status="500")
+    c.inc(-1, route="/b", status="200")  # counters never go down
+    assert c.value(route="/b", status="200") == 1
+    assert c.render().splitlines() == [
+        "# HELP t_requests_total Requests",
+        "# TYPE t_requests_total counter",
+        't_requests_total{route="/a\\"x\\n",status="500"} 2',
+        't_requests_total{route="/b",status="200"} 1',
+    ]
+
+
+def test_wrong_labels_are_rejected():
+    c = Counter("t_total", "T", ("a",))
+    with pytest.raises(ValueError):
+        c.inc(b="1")
+
+
+def test_histogram_buckets_are_cumulative_with_inf():
+    h = Histogram("t_seconds", "Latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        h.observe(value)
+    assert h.count() == 4
+    assert h.samples() == [
+        't_seconds_bucket{le="0.1"} 2',
+        't_seconds_bucket{le="1"} 3',
+        't_seconds_bucket{le="+Inf"} 4',
+        "t_seconds_sum 3.65",
+        "t_seconds_count 4",
+    ]
+
+
+def test_counter_is_thread_safe():
+    c = Counter("t_threads_total", "T")
+    threads = [threading.Thread(target=lambda: [c.inc() for _ in range(1000)]) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert c.value() == 8000
+
+
+def test_registry_returns_the_first_metric_per_name():
+    registry = Registry()
+    first = registry.register(Counter("t_total", "T"))
+    assert registry.register(Counter("t_total", "Other")) is first
+    first.inc()
+    assert registry.render() == "# HELP t_total T\n# TYPE t_total counter\nt_total 1\n"
+
+
+def test_stage_timer_and_timed_record_durations():
+    before = metrics.STAGE_SECONDS.count(component="t", stage="block")
+
+    with metrics.stage_timer("t", "block"):
+        pass
+
+    @metrics.timed("t", "block")
+    def work():
+        return 42
+
+    assert work() == 42
+    assert metrics.STAGE_SECONDS.count(component="t", stage="block") == before + 2
+    assert 'trinity_stage_duration_seconds_count{component="t",stage="block"}' in metrics.REGISTRY.render()
+
+
+def test_trace_ids_follow_bound_work_into_threads():
+    assert metrics.new_trace_id("abc-123") == "abc-123"
+    assert metrics.new_trace_id("bad id!") != "bad id!"
+    assert len(metrics.new_trace_id("x" * 65)) == 16
+
+    seen = []
+    token = metrics.trace_id_var.set("req-1")
+    try:
+        worker = threading.Thread(target=metrics.bind_context(lambda: seen.append(metrics.current_trace_id())))
+    finally:
+        metrics.trace_id_var.reset(token)
+    worker.start()
+    worker.join()
+    assert seen == ["req-1"]
@@ -0,0 +1,81 @@
+import io
+import os
+import random
+import zipfile
+
+import pytest
+
+from backend.services.packager import ZipPackager
+
+FILES = {
+    "test_a.py": b"def test_a():\n    assert True\n" * 50,
+    "sub/test_b.py": os.urandom(70_000),  # incompressible, spans several read chunks
+    "sub/deeper/test_é.py": b"",
+    ".cache/skip.bin": b"trinity state",
+    "old.zip": b"previous archive",
+}
+
+
+@pytest.fixture
+def suite(tmp_path):
+    folder = tmp_path / "suite"
+    for name, data in FILES.items():
+        path = folder / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    return str(folder)
+
+
+@pytest.fixture
+def packager(tmp_path):
+    return ZipPackager(cache_dir=str(tmp_path / "cache"))
+
+
+def _bytes(layout, start=0, end=None, chunk_size=4096):
+    return b"".join(layout.iter_bytes(start, end, chunk_size=chunk_size))
+
+
+def test_archive_is_a_valid_zip_without_state_files(suite, packager):
+    layout = packager.layout(suite)
+    data = _bytes(layout)
+    assert len(data) == layout.size
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.testzip() is None
+        assert sorted(archive.namelist()) == ["sub/deeper/test_é.py", "sub/test_b.py", "test_a.py"]
+        for name in archive.namelist():
+            assert archive.read(name) == FILES[name]
+
+
+def test_any_byte_range_is_a_slice_of_the_archive(suite, packager):
+    layout = packager.layout(suite)
+    full = _bytes(layout)
+    # Every segment boundary, plus random ranges
+    boundaries = [offset for offset, _, _ in layout.segments] + [layout.size - 1]
+    rng = random.Random(0)
+    ranges = [(b, b) for b in boundaries] + [(max(0, b - 3), min(layout.size - 1, b + 3)) for b in boundaries]
+    ranges += [tuple(sorted(rng.randrange(layout.size) for _ in range(2))) for _ in range(200)]
+    for start, end in ranges:
+        assert _bytes(layout, start, end, chunk_size=1000) == full[start:end + 1]
+    # An end past the archive is clamped, as for an open-ended Range header
+    assert _bytes(layout, layout.size - 10, layout.size + 100) == full[-10:]
+
+
+def test_etag_is_stable_and_tracks_content(suite, packager):
+    first = packager.layout(suite)
+    assert packager.layout(suite) is first
+
+    with open(os.path.join(suite, "test_a.py"), "ab") as f:
+        f.write(b"# changed\n")
+    changed = packager.layout(suite)
+    assert changed.etag != first.etag
+
+    # A fresh packager over the same cache rebuilds the identical archive
+    again = ZipPackager(cache_dir=packager.cache_dir).layout(suite)
+    assert again.etag == changed.etag and _bytes(again) == _bytes(changed)
+
+
+def test_write_materializes_the_same_bytes(suite, packager, tmp_path):
+    dest = str(tmp_path / "out.zip")
+    layout = packager.write(suite, dest)
+    with open(dest, "rb") as f:
+        assert f.read() == _bytes(layout)
@@ -0,0 +1,106 @@
+from backend.services import prompt_planner
+from backend.services.prompt_planner import PromptPlanner, SourceFile, count_tokens, output_budget
+
+
+def _file(name, code):
+    return SourceFile(path=name, rel_path=name, code=code)
+
+
+def _big_python(functions=200):
+    return "import os\nfrom typing import List\n\n" + "\n\n".join(
+        f"def f{i}(items: List[int]) -> int:\n    total = 0\n    for x in items:\n        total += x * {i}\n    return total"
+        for i in range(functions)
+    )
+
+
+def test_output_budget_stays_within_the_window():
+    assert output_budget(10, 100) == prompt_planner.MIN_OUTPUT_TOKENS
+    assert output_budget(100_000, 100) == prompt_planner.MAX_OUTPUT_TOKENS
+    assert output_budget(1000, prompt_planner.CONTEXT_TOKENS - 300) == 300 - prompt_planner.SAFETY_MARGIN
+
+
+def test_plan_routes_files_by_size():
+    planner = PromptPlanner("python")
+    medium = "\n".join(f"def g{i}(a, b):\n    return a + b * {i}" for i in range(60))
+    tasks = planner.plan([
+        _file("tiny_a.py", "def a():\n    return 1\n"),
+        _file("tiny_b.py", "def b():\n    return 2\n"),
+        _file("medium.py", medium),
+        _file("big.py", _big_python()),
+    ])
+    kinds = {t.kind: [f.rel_path for f in t.files] for t in tasks}
+    assert kinds == {"chunked": ["big.py"], "single": ["medium.py"], "batch": ["tiny_a.py", "tiny_b.py"]}
+    for task in tasks:
+        for prompt, max_tokens in task.prompts:
+            assert count_tokens(prompt) + max_tokens <= prompt_planner.CONTEXT_TOKENS
+
+
+def test_batches_respect_the_file_limit(monkeypatch):
+    monkeypatch.setattr(prompt_planner, "BATCH_MAX_FILES", 3)
+    tasks = PromptPlanner("python").plan([_file(f"t{i}.py", f"X{i} = {i}\n") for i in range(7)])
+    assert [len(t.files) for t in tasks] == [3, 3, 1]
+    assert [t.kind for t in tasks] == ["batch", "batch", "single"]
+
+
+def test_python_split_keeps_whole_functions_and_shares_imports():
+    planner = PromptPlanner("python")
+    context, chunks = planner.split(_big_python())
+    assert context == "import os\nfrom typing import List"
+    assert len(chunks) > 1
+    # Same slack chunked_task allows before warning (separators are not budgeted)
+    assert all(count_tokens(context) + count_tokens(c) <= planner.max_chunk_tokens * 1.2 for c in chunks)
+    joined = "\n\n".join(chunks)
+    assert all(f"def f{i}(" in joined for i in range(200))
+    assert all(c.startswith("def ") for c in chunks)
+
+
+def test_oversized_python_class_is_split_per_member():
+    planner = PromptPlanner("python")
+    planner.max_chunk_tokens = 200
+    methods = "\n\n".join(f"    def m{i}(self):\n        return self.value * {i} + {i}" for i in range(40))
+    _, chunks = planner.split(f"class Big:\n    value = 1\n\n{methods}\n")
+    assert len(chunks) > 1
+    assert all(c.startswith("class Big:") for c in chunks)
+
+
+def test_unparsable_python_falls_back_to_line_splitting():
+    planner = PromptPlanner("python")
+    planner.max_chunk_tokens = 150
+    code = "def broken(:\n" + "\n".join(f"    x{i} = {i}" for i in range(200))
+    _, chunks = planner.split(code)
+    assert len(chunks) > 1 and "\n".join(chunks).count("x199") == 1
+
+
+def test_java_split_carries_the_class_declaration():
+    planner = PromptPlanner("java")
+    planner.max_chunk_tokens = 200
+    methods = "\n\n".join(
+        f"    public int m{i}(int a) {{\n        return a * {i} + {i};\n    }}" for i in range(40)
+    )
+    context, chunks = planner.split(f"package com.x;\nimport java.util.List;\n\npublic class Calc {{\n{methods}\n}}\n")
+    assert context.splitlines() == ["package com.x;", "import java.util.List;", "public class Calc { ... }"]
+    assert len(chunks) > 1
+
+
+def test_split_batch_output_matches_requested_files_only():
+    files = [_file("a.py", ""), _file("b.py", ""), _file("c.py", "")]
+    output = (
+        "preamble\n### TEST FILE: a.py\ndef test_a(): pass\n"
+        "### TEST FILE: `b.py`\ndef test_b(): pass\n"
+        "### TEST FILE: other.py\ndef test_x(): pass\n"
+        "### TEST FILE: c.py\n\n"
+    )
+    assert PromptPlanner.split_batch_output(output, files) == {
+        "a.py": "def test_a(): pass",
+        "b.py": "def test_b(): pass",
+    }
+
+
+def test_merge_chunks_hoists_and_dedupes_imports():
+    java = PromptPlanner("java").merge_chunks([
+        "import org.junit.Test;\nclass APart1Test {}",
+        "package com.x;\nimport org.junit.Test;\nimport java.util.List;\nclass APart2Test {}",
+    ])
+    assert java.splitlines()[:3] == ["package com.x;", "import org.junit.Test;", "import java.util.List;"]
+    assert java.count("import org.junit.Test;") == 1
+    assert "class APart1Test {}\n\nclass APart2Test {}" in java
@@ -0,0 +1,72 @@
+import os
+import time
+
+import pytest
+
+from backend.services import pytest_worker
+from backend.services.python_executor import PythonTestExecutor
+
+
+class _Writer:
+    def __init__(self):
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def suite(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("tests/repo/sub")
+    with open("tests/repo/test_x.py", "w") as f:
+        f.write("def test_ok():\n    assert True\n\nclass TestGroup:\n    def test_bad(self):\n        assert 1 == 2\n")
+    with open("tests/repo/sub/test_y.py", "w") as f:
+        f.write("import missing_module_xyz\n")
+    return "tests/repo"
+
+
+def _results(records):
+    return {r["nodeid"]: r["status"] for r in records if r["event"] == "result"}
+
+
+def test_run_minimal_reports_paths_relative_to_rootdir(suite):
+    writer = _Writer()
+    files = ["tests/repo/test_x.py", "tests/repo/sub/test_y.py"]
+    assert pytest_worker._run_minimal(files, os.path.abspath(suite), writer, timeout=5) == 1
+    assert _results(writer.records) == {
+        "test_x.py::test_ok": "passed",
+        "test_x.py::TestGroup::test_bad": "failed",
+        "sub/test_y.py": "error",
+    }
+    assert {r["file"] for r in writer.records if r["event"] == "result"} == {"test_x.py", "sub/test_y.py"}
+
+
+def test_normalize_maps_rootdir_paths_back_to_cwd(suite):
+    executor = PythonTestExecutor(suite)
+    writer = _Writer()
+    pytest_worker._run_minimal(["tests/repo/sub/test_y.py"], os.path.abspath(suite), writer, timeout=5)
+    assert executor._normalize(writer.records[0]["file"]) == os.path.join("tests", "repo", "sub", "test_y.py")
+
+
+def test_iter_results_yields_cwd_relative_nodeids(suite):
+    results = {r["nodeid"]: r["status"] for r in PythonTestExecutor(suite, workers=2, timeout=30).iter_results()}
+    assert results["tests/repo/test_x.py::test_ok"] == "passed"
+    assert results["tests/repo/test_x.py::TestGroup::test_bad"] == "failed"
+    assert results["tests/repo/sub/test_y.py"] == "error"
+
+
+def test_closing_the_generator_terminates_workers(suite):
+    with open("tests/repo/test_slow.py", "w") as f:
+        f.write("import time\n\ndef test_slow():\n    time.sleep(60)\n")
+    executor = PythonTestExecutor(suite, workers=3, timeout=120)
+    started = time.monotonic()
+    results = executor.iter_results(["tests/repo/test_x.py", "tests/repo/test_slow.py", "tests/repo/sub/test_y.py"])
+    next(results)
+    results.close()
+    assert time.monotonic() - started < 30
+    alive = [
+        line for line in os.popen("ps -eo args").read().splitlines()
+        if "pytest_worker.py" in line and "test_slow.py" in line
+    ]
+    assert alive == []
@@ -0,0 +1,120 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from backend.utils import rate_limiter
+from backend.utils.rate_limiter import RateLimiter, TokenBucket, backoff_delay, retry_with_backoff
+
+
+class _Clock:
+    """Stands in for time.monotonic/time.sleep: sleeping advances the clock."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(rate_limiter, "time", SimpleNamespace(monotonic=clock.monotonic, sleep=clock.sleep))
+    return clock
+
+
+def test_bucket_starts_full_and_reports_the_wait(clock):
+    bucket = TokenBucket(60)  # one token per second
+    for _ in range(60):
+        assert bucket.try_acquire() == 0.0
+    assert bucket.try_acquire() == pytest.approx(1.0)
+    clock.now += 0.5
+    assert bucket.try_acquire() == pytest.approx(0.5)
+
+
+def test_acquire_sleeps_until_refilled(clock):
+    bucket = TokenBucket(60, capacity=1)
+    bucket.acquire()
+    bucket.acquire()
+    assert sum(clock.slept) == pytest.approx(1.0)
+
+
+def test_oversized_requests_are_capped_at_capacity(clock):
+    bucket = TokenBucket(600, capacity=100)
+    assert bucket.try_acquire(10_000) == 0.0  # would otherwise never fit
+    assert bucket.tokens == 0
+
+
+def test_zero_rate_bucket_refuses_instead_of_hanging(clock):
+    bucket = TokenBucket(0, capacity=1)
+    bucket.acquire()
+    with pytest.raises(RuntimeError):
+        bucket.acquire()
+
+
+def test_settle_refunds_overestimated_tokens(clock):
+    limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=1000)
+    limiter.acquire(estimated_tokens=800)
+    limiter.settle(800, actual_tokens=300)
+    assert limiter.tokens.tokens == pytest.approx(700)
+    limiter.settle(100, actual_tokens=None)  # usage unknown: no refund
+    assert limiter.tokens.tokens == pytest.approx(700)
+
+
+def test_bucket_is_thread_safe():
+    bucket = TokenBucket(6000, capacity=500)
+    granted = []
+
+    def worker():
+        granted.append(sum(1 for _ in range(200) if bucket.try_acquire() == 0.0))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert 500 <= sum(granted) <= 510  # capacity, plus what refilled during the test
+
+
+def test_backoff_is_jittered_below_the_exponential_cap():
+    for attempt in range(8):
+        delay = backoff_delay(attempt, base_delay=1.0, max_delay=10.0)
+        assert 0 <= delay <= min(10.0, 2 ** attempt)
+
+
+def test_retry_until_success_honouring_retry_after(clock):
+    outcomes = iter([ValueError("429"), ValueError("503"), "ok"])
+    retries = []
+
+    def call():
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    result = retry_with_backoff(
+        call, is_retryable=lambda e: True, retry_after=lambda e: 7.0 if str(e) == "429" else None,
+        on_retry=lambda attempt, e: retries.append(attempt),
+    )
+    assert result == "ok"
+    assert retries == [0, 1]
+    assert clock.slept[0] == 7.0 and 0 <= clock.slept[1] <= 2.0
+
+
+def test_non_retryable_and_exhausted_errors_propagate(clock):
+    def fail():
+        raise KeyError("boom")
+
+    with pytest.raises(KeyError):
+        retry_with_backoff(fail, is_retryable=lambda e: False)
+    assert clock.slept == []
+
+    with pytest.raises(KeyError):
+        retry_with_backoff(fail, is_retryable=lambda e: True, max_retries=3)
+    assert len(clock.slept) == 3
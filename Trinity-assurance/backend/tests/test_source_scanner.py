@@ -0,0 +1,43 @@
+import pytest
+
+from backend.services.source_scanner import IgnoreRule, is_ignored
+
+
+@pytest.mark.parametrize("pattern, path, is_dir, expected", [
+    ("*.pyc", "a/b/c.pyc", False, True),
+    ("*.pyc", "a/b/c.py", False, False),
+    ("build/", "pkg/build", True, True),
+    ("build/", "pkg/build", False, False),  # dir-only rule never matches a file
+    ("/setup.py", "setup.py", False, True),
+    ("/setup.py", "pkg/setup.py", False, False),  # leading slash anchors to the ignore file's dir
+    ("docs/*.md", "docs/a.md", False, True),
+    ("docs/*.md", "docs/sub/a.md", False, False),  # * doesn't cross directories
+    ("docs/*.md", "x/docs/a.md", False, False),  # a slash in the middle anchors too
+    ("**/gen", "a/b/gen", True, True),
+    ("gen/**", "gen/a/b.py", False, True),
+    ("a/**/b", "a/b", False, True),
+    ("a/**/b", "a/x/y/b", False, True),
+    ("test_?.py", "test_1.py", False, True),
+    ("test_?.py", "test_10.py", False, False),
+    ("[!a]*.js", "b.js", False, True),
+    ("[!a]*.js", "a.js", False, False),
+    ("\\!important", "!important", False, True),
+])
+def test_ignore_rule_matches(pattern, path, is_dir, expected):
+    assert IgnoreRule(pattern).matches(path, is_dir) is expected
+
+
+def test_negation_reincludes_and_last_rule_wins():
+    stack = (("", (IgnoreRule("*.log"), IgnoreRule("!keep.log"))),)
+    assert is_ignored(stack, "debug.log", False)
+    assert not is_ignored(stack, "keep.log", False)
+    assert IgnoreRule("!keep.log").negate
+
+
+def test_nested_ignore_file_applies_below_its_directory_only():
+    stack = (("", (IgnoreRule("*.tmp"),)), ("sub", (IgnoreRule("!x.tmp"), IgnoreRule("/local.py"))))
+    assert is_ignored(stack, "x.tmp", False)
+    assert not is_ignored(stack, "sub/x.tmp", False)
+    assert is_ignored(stack, "sub/local.py", False)
+    assert not is_ignored(stack, "local.py", False)
+    assert not is_ignored(stack, "sub/deeper/local.py", False)
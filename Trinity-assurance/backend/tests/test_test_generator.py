@@ -0,0 +1,135 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("dotenv")
+
+from backend.services import test_generator  # noqa: E402
+from backend.services.llm_providers import LLMProvider, LLMResponse  # noqa: E402
+
+
+class _Flaky(LLMProvider):
+    """Fails the first `failures` calls with a retryable error, then echoes."""
+
+    name = "flaky"
+
+    def __init__(self, failures=0, latency=0.0):
+        super().__init__(max_in_flight=16)
+        self.failures = failures
+        self.latency = latency
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def _complete(self, model, prompt, max_tokens, temperature):
+        with self._lock:
+            self.calls += 1
+            if self.calls <= self.failures:
+                raise ConnectionError("try again")
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.latency)
+        with self._lock:
+            self.active -= 1
+        return LLMResponse(f"echo {len(prompt)}", total_tokens=10)
+
+    def is_retryable(self, exc):
+        return isinstance(exc, ConnectionError)
+
+    def retry_after(self, exc):
+        return 0.0
+
+
+def _generator(provider, **kwargs):
+    return test_generator.TestGenerator(provider=provider, validator=None, **kwargs)
+
+
+def test_complete_settles_the_estimate_against_reported_usage():
+    generator = _generator(_Flaky(), requests_per_minute=0, tokens_per_minute=100_000)
+    assert generator.complete("hello", max_tokens=500).startswith("echo")
+    # Estimated prompt + 500 were taken; the provider reported 10 in total
+    assert generator.rate_limiter.tokens.tokens == pytest.approx(100_000 - 10, abs=1)
+
+
+def test_complete_retries_retryable_errors():
+    provider = _Flaky(failures=2)
+    generator = _generator(provider, requests_per_minute=0, tokens_per_minute=0)
+    assert generator.complete("hello").startswith("echo")
+    assert provider.calls == 3
+
+
+def test_complete_gives_up_after_max_retries():
+    provider = _Flaky(failures=10)
+    generator = _generator(provider, requests_per_minute=0, tokens_per_minute=0, max_retries=2)
+    with pytest.raises(ConnectionError):
+        generator.complete("hello")
+    assert provider.calls == 3
+
+
+def test_provider_caps_calls_in_flight():
+    provider = _Flaky(latency=0.05)
+    provider._slots = threading.BoundedSemaphore(3)
+    threads = [threading.Thread(target=provider.complete, args=("m", "p", 1, 0.0)) for _ in range(12)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert provider.calls == 12 and provider.peak <= 3
+
+
+# ──────────────────────────────────────────────────────────────────────
+# Pre-write validation with LLM repair
+# ──────────────────────────────────────────────────────────────────────
+class _Fixer(LLMProvider):
+    """Answers every repair prompt with the next canned test file."""
+
+    name = "fixer"
+
+    def __init__(self, answers):
+        super().__init__()
+        self.answers = list(answers)
+        self.prompts = []
+
+    def _complete(self, model, prompt, max_tokens, temperature):
+        self.prompts.append(prompt)
+        return LLMResponse(self.answers.pop(0) if self.answers else "def test_(:\n")
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "repo").mkdir()
+    for name in ("a.py", "b.py"):
+        (tmp_path / "repo" / name).write_text("def f():\n    return 1\n")
+    return "repo"
+
+
+def _validate_and_repair(provider, codes, repo):
+    from concurrent.futures import ThreadPoolExecutor
+
+    generator = test_generator.TestGenerator(
+        provider=provider, validator=test_generator.TestValidator(workers=1),
+        requests_per_minute=0, tokens_per_minute=0,
+    )
+    generator.cache = None
+    with ThreadPoolExecutor(2) as pool:
+        return generator._validate_and_repair(pool, codes, repo, "python", "unit")
+
+
+def test_invalid_tests_are_repaired_with_the_error_fed_back(repo):
+    provider = _Fixer(["def test_fixed():\n    assert True\n"])
+    codes = {"repo/a.py": "def test_ok():\n    assert True\n", "repo/b.py": "def test_broken(:\n"}
+    assert _validate_and_repair(provider, codes, repo) == {}
+    assert "test_fixed" in codes["repo/b.py"] and codes["repo/a.py"].startswith("def test_ok")
+    [prompt] = provider.prompts
+    assert "def test_broken(:" in prompt and "test_b.py:1:17 invalid syntax" in prompt
+
+
+def test_repairs_stop_after_the_attempt_limit(repo):
+    provider = _Fixer([])
+    codes = {"repo/b.py": "def test_broken(:\n"}
+    errors = _validate_and_repair(provider, codes, repo)
+    assert list(errors) == ["repo/b.py"]
+    assert len(provider.prompts) == test_generator.MAX_REPAIR_ATTEMPTS
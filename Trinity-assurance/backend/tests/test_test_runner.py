@@ -0,0 +1,31 @@
+import os
+
+import pytest
+
+from backend.services import test_runner
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("tests/r")
+    os.makedirs("repos/r")
+    return tmp_path
+
+
+@pytest.mark.parametrize("repo", ["..", ".", "r/..", "missing", "escape"])
+def test_runner_refuses_repo_names_outside_tests(workspace, repo):
+    os.symlink(os.path.abspath("repos"), "tests/escape")
+    with pytest.raises(FileNotFoundError):
+        test_runner.TestRunner(language="python", repo=repo)
+
+
+def test_runner_runs_a_direct_child_of_tests(workspace):
+    runner = test_runner.TestRunner(language="python", repo="r")
+    assert runner.test_dir == os.path.join("tests", "r")
+
+
+def test_runner_caps_workers_at_cpu_count(workspace):
+    assert test_runner.TestRunner(language="python", repo="r", workers=10_000).workers == (os.cpu_count() or 1)
+    assert test_runner.TestRunner(language="python", repo="r", workers=1).workers == 1
+    assert test_runner.TestRunner(language="python", repo="r").workers is None
@@ -0,0 +1,75 @@
+import pytest
+
+from backend.services import history_manager, test_sharder
+from backend.services.history_manager import HistoryCache
+from backend.services.test_sharder import lpt_shards, parse_shard
+
+
+@pytest.fixture
+def history(tmp_path, monkeypatch):
+    monkeypatch.setattr(history_manager, "history_cache", HistoryCache())
+    return history_manager.TestHistory(base_dir=str(tmp_path / "tests"))
+
+
+def test_parse_shard():
+    assert parse_shard("2/4") == (2, 4)
+    for bad in ("0/4", "5/4", "1/0", "x/2", "3"):
+        with pytest.raises(ValueError):
+            parse_shard(bad)
+
+
+def test_lpt_balances_load_and_keeps_input_order():
+    files = ["a", "b", "c", "d", "e"]
+    durations = {"a": 8, "b": 1, "c": 4, "d": 4, "e": 1}
+    shards = lpt_shards(files, durations, 2)
+    assert sorted(sum(durations[f] for f in s) for s in shards) == [9, 9]
+    assert sorted(f for s in shards for f in s) == files
+    for s in shards:
+        assert s == sorted(s)
+
+
+def test_lpt_never_makes_more_shards_than_files():
+    assert lpt_shards(["a"], {}, 4) == [["a"]]
+    assert lpt_shards([], {}, 3) == [[], [], []]
+
+
+def test_file_stats_are_moving_averages(history):
+    history.record_file_stats("r", "python", {"t.py": {"duration": 10.0, "failed": True}})
+    history.record_file_stats("r", "python", {"t.py": {"duration": 0.0, "failed": False}})
+    [stat] = history.get_file_stats("r", "python")
+    assert stat["runs"] == 2
+    assert stat["avg_duration"] == pytest.approx(7.0)
+    assert stat["failure_rate"] == pytest.approx(0.7)
+    assert stat["last_duration"] == 0.0 and stat["last_failed_at"] > 0
+
+
+def test_unknown_files_get_the_median_duration(history):
+    history.record_file_stats("r", "python", {
+        "tests/r/a.py": {"duration": 1.0, "failed": False},
+        "tests/r/b.py": {"duration": 3.0, "failed": False},
+        "tests/r/c.py": {"duration": 8.0, "failed": False},
+    })
+    sharder = test_sharder.TestSharder("r", "python", history=history)
+    assert sharder.durations(["tests/r/./b.py", "tests/r/new.py"]) == {"tests/r/./b.py": 3.0, "tests/r/new.py": 3.0}
+    assert test_sharder.TestSharder("other", "python", history=history).durations(["x.py"]) == {
+        "x.py": test_sharder.DEFAULT_FILE_DURATION,
+    }
+
+
+def test_order_puts_failing_files_first_then_fastest(history):
+    history.record_file_stats("r", "python", {
+        "slow.py": {"duration": 9.0, "failed": False},
+        "fast.py": {"duration": 1.0, "failed": False},
+        "broken.py": {"duration": 5.0, "failed": True},
+    })
+    sharder = test_sharder.TestSharder("r", "python", history=history)
+    assert sharder.order(["slow.py", "fast.py", "broken.py"]) == ["broken.py", "fast.py", "slow.py"]
+
+
+def test_shards_cover_every_file_once(history):
+    files = [f"t{i}.py" for i in range(10)]
+    history.record_file_stats("r", "python", {f: {"duration": float(i), "failed": False} for i, f in enumerate(files)})
+    sharder = test_sharder.TestSharder("r", "python", history=history)
+    shards = [sharder.shard(files, i, 3) for i in (1, 2, 3)]
+    assert sorted(f for s in shards for f in s) == sorted(files)
+    assert sharder.shard(files[:2], 3, 3) == []
@@ -0,0 +1,96 @@
+import os
+import shutil
+import time
+
+import pytest
+
+from backend.services import test_validator
+from backend.services.test_validator import JsSyntaxChecker
+
+needs_node = pytest.mark.skipif(not JsSyntaxChecker.available(), reason="node not installed")
+
+
+@pytest.fixture
+def validator():
+    validator = test_validator.TestValidator(workers=1)
+    yield validator
+    validator.close()
+
+
+def test_python_errors_are_reported_per_file(validator):
+    errors = validator.validate("python", {
+        "test_ok.py": "def test_it():\n    assert True\n",
+        "test_bad.py": "def test_it(:\n    pass\n",
+        "test_return.py": "return 1\n",
+    })
+    assert errors["test_ok.py"] is None
+    assert errors["test_bad.py"].startswith("test_bad.py:1:")
+    assert "outside function" in errors["test_return.py"]
+
+
+def test_python_batches_use_the_pool_and_agree_with_inline_checks():
+    files = {f"test_{i}.py": ("x = 1\n" if i % 2 else "x = (\n") for i in range(10)}
+    pooled = test_validator.TestValidator(workers=2)
+    try:
+        assert pooled.validate("python", files) == test_validator.TestValidator(workers=1).validate("python", files)
+    finally:
+        pooled.close()
+
+
+@needs_node
+def test_js_syntax_errors_are_reported(validator):
+    errors = validator.validate("javascript", {
+        "ok.test.js": "test('a', () => { expect(1).toBe(1); });\n",
+        "bad.test.js": "test('a', () => { expect(1).toBe(1); ;\n",
+    })
+    assert errors["ok.test.js"] is None
+    assert errors["bad.test.js"]
+
+
+@needs_node
+def test_js_batch_larger_than_the_pipe_buffers_completes(validator):
+    body = "test('a', () => { expect(1).toBe(1); });\n" + "// padding\n" * 20_000
+    files = {f"t{i}.test.js": body for i in range(40)}  # ~9 MB each way
+    errors = validator.validate("javascript", files)
+    assert set(errors) == set(files) and not any(errors.values())
+
+
+@needs_node
+def test_hung_syntax_worker_is_killed_at_the_deadline(tmp_path, monkeypatch):
+    worker = tmp_path / "hung_worker.js"
+    worker.write_text("setInterval(() => {}, 1000);\n")  # never reads stdin
+    monkeypatch.setattr(test_validator, "SYNTAX_WORKER", str(worker))
+    monkeypatch.setattr(test_validator, "SYNTAX_TIMEOUT", 1.0)
+    checker = JsSyntaxChecker()
+    started = time.monotonic()
+    try:
+        assert checker.check({f"t{i}.test.js": "x".ljust(100_000) for i in range(20)}) == {}
+    finally:
+        checker.close()
+    assert time.monotonic() - started < 10
+
+
+def test_java_is_skipped_without_javac(validator, monkeypatch):
+    monkeypatch.setattr(test_validator.shutil, "which", lambda name: None)
+    assert validator.validate("java", {"FooTest.java": "class FooTest {"}) == {"FooTest.java": None}
+
+
+def test_javac_errors_are_attributed_per_file(validator, tmp_path, monkeypatch):
+    # Fake javac: a syntax error in any file whose class is Bad*, an unresolved symbol in Missing*
+    javac = tmp_path / "bin" / "javac"
+    javac.parent.mkdir()
+    javac.write_text(
+        "#!/bin/sh\nstatus=0\n"
+        "for f in \"$@\"; do case \"$f\" in\n"
+        "  *Bad*.java) echo \"$f:3: error: ';' expected\"; status=1;;\n"
+        "  *Missing*.java) echo \"$f:1: error: cannot find symbol\"; status=1;;\n"
+        "esac; done\nexit $status\n"
+    )
+    javac.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{javac.parent}{os.pathsep}{os.environ['PATH']}")
+    errors = validator.validate("java", {
+        "test_ok.java": "class OkTest {}",
+        "test_bad.java": "public class BadTest {",
+        "test_missing.java": "public class MissingTest {}",
+    })
+    assert errors == {"test_ok.java": None, "test_bad.java": "test_bad.java:3 ';' expected", "test_missing.java": None}
@@ -1,42 +1,486 @@
 import os
-import subprocess
+import re
+import json
+import time
+import shutil
 import logging
+import threading
+import subprocess
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from backend.utils.metrics import stage_timer
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process locking only
+    fcntl = None
 
 # Base folder where all repos are stored
 CLONE_BASE_DIR = "./repos"
 os.makedirs(CLONE_BASE_DIR, exist_ok=True)
 
+# Trinity bookkeeping lives in dot-folders next to the clones
+MIRROR_DIR = os.path.join(CLONE_BASE_DIR, ".mirrors")
+WORKTREE_DIR = os.path.join(CLONE_BASE_DIR, ".worktrees")
+LOCK_DIR = os.path.join(CLONE_BASE_DIR, ".locks")
+META_DIR = os.path.join(CLONE_BASE_DIR, ".meta")
+
+# Generated suites: tests/<repo>, one folder per repo name
+TESTS_DIR = "tests"
+
+# "clone": one working copy per repo (default). "worktree": bare mirror + one
+# detached worktree per commit, so jobs on different refs never share a checkout.
+REPO_MODE = os.getenv("TRINITY_REPO_MODE", "clone")
+CLONE_DEPTH = int(os.getenv("TRINITY_CLONE_DEPTH", "1"))  # 0 = full history
+CLONE_FILTER = os.getenv("TRINITY_CLONE_FILTER", "blob:none")  # "" disables partial clone
+REPO_CACHE_MAX_BYTES = int(os.getenv("TRINITY_REPO_CACHE_MAX_BYTES", str(20 * 1024 ** 3)))
+LS_REMOTE_TIMEOUT = float(os.getenv("TRINITY_LS_REMOTE_TIMEOUT", "15"))
+# Worktree mode: per-commit worktrees kept per repo (least recently used beyond this are removed)
+WORKTREES_PER_REPO = int(os.getenv("TRINITY_WORKTREES_PER_REPO", "4"))
+
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-def clone_or_pull_repo(repo_url: str) -> str:
+_thread_locks: Dict[str, "_SharedLock"] = {}
+_thread_locks_guard = threading.Lock()
+
+
+def repo_name_from_url(repo_url: str) -> str:
+    """Local folder name for a repo URL, with hyphens replaced for import compatibility."""
+    repo_name = str(repo_url).rstrip("/").split("/")[-1]
+    if repo_name.endswith(".git"):
+        repo_name = repo_name[:-len(".git")]
+    return repo_name.replace("-", "_")
+
+
+def suite_folder(repo: str) -> Optional[str]:
     """
-    Clone or pull a GitHub repo into ./repos, safely replacing hyphens for import compatibility.
-    Returns the absolute local path to the repo.
+    The generated-suite folder for `repo`, or None unless it is an existing direct
+    child of tests/ once resolved ("..", "." and symlinks out of tests/ are refused).
     """
-    repo_name = repo_url.rstrip("/").split("/")[-1].replace(".git", "")
-    safe_repo_name = repo_name.replace("-", "_")
+    if not re.fullmatch(r"[a-zA-Z0-9_\-\.]+", repo or ""):
+        return None
+    folder = os.path.join(TESTS_DIR, repo)
+    resolved = os.path.realpath(folder)
+    if os.path.dirname(resolved) != os.path.realpath(TESTS_DIR) or not os.path.isdir(resolved):
+        return None
+    return folder
+
+
+class _SharedLock:
+    """In-process readers/writer lock; the flock in _RepoLock covers other processes."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+
+    def acquire(self, shared: bool, blocking: bool) -> bool:
+        with self._cond:
+            while self._writer or (not shared and self._readers):
+                if not blocking:
+                    return False
+                self._cond.wait()
+            if shared:
+                self._readers += 1
+            else:
+                self._writer = True
+            return True
+
+    def downgrade(self) -> None:
+        with self._cond:
+            self._writer = False
+            self._readers += 1
+            self._cond.notify_all()
+
+    def release(self, shared: bool) -> None:
+        with self._cond:
+            if shared:
+                self._readers -= 1
+            else:
+                self._writer = False
+            self._cond.notify_all()
+
+
+class _RepoLock:
+    """One holder's per-repo lock, across threads and processes (flock)."""
+
+    def __init__(self, name: str, lock_dir: str = LOCK_DIR):
+        self.lock_dir = lock_dir
+        self.path = os.path.join(lock_dir, f"{name}.lock")
+        with _thread_locks_guard:
+            self.thread_lock = _thread_locks.setdefault(os.path.abspath(self.path), _SharedLock())
+        self.lock_file = None
+        self.shared = False
+
+    def acquire(self, shared: bool = False, blocking: bool = True) -> bool:
+        if not self.thread_lock.acquire(shared, blocking):
+            return False
+        os.makedirs(self.lock_dir, exist_ok=True)
+        self.lock_file = open(self.path, "a")
+        self.shared = shared
+        if fcntl is not None:
+            flags = (fcntl.LOCK_SH if shared else fcntl.LOCK_EX) | (0 if blocking else fcntl.LOCK_NB)
+            try:
+                fcntl.flock(self.lock_file, flags)
+            except BlockingIOError:
+                self._close()
+                return False
+        return True
+
+    def downgrade(self) -> None:
+        """Exclusive → shared without letting a writer in between (flock converts in place on Linux)."""
+        if fcntl is not None:
+            fcntl.flock(self.lock_file, fcntl.LOCK_SH)
+        self.thread_lock.downgrade()
+        self.shared = True
+
+    def release(self) -> None:
+        if fcntl is not None:
+            fcntl.flock(self.lock_file, fcntl.LOCK_UN)
+        self._close()
+
+    def _close(self) -> None:
+        self.lock_file.close()
+        self.lock_file = None
+        self.thread_lock.release(self.shared)
+
+
+@contextmanager
+def repo_lock(name: str, blocking: bool = True, shared: bool = False, lock_dir: str = LOCK_DIR):
+    """
+    Per-repo lock across threads and processes: exclusive to modify or delete a checkout,
+    shared while one is in use. With blocking=False, yields False instead of waiting.
+    Other caches guarded the same way pass their own `lock_dir`.
+    """
+    lock = _RepoLock(name, lock_dir)
+    if not lock.acquire(shared=shared, blocking=blocking):
+        yield False
+        return
+    try:
+        yield True
+    finally:
+        lock.release()
+
+
+def _git(*args: str, cwd: Optional[str] = None) -> str:
+    result = subprocess.run(
+        ["git", *args], cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True
+    )
+    return result.stdout.strip()
+
+
+def _clone_args(depth: int) -> List[str]:
+    args = []
+    if CLONE_FILTER:
+        args.append(f"--filter={CLONE_FILTER}")
+    if depth > 0:
+        args.append(f"--depth={depth}")
+    return args
+
+
+def _apply_sparse_checkout(repo_path: str, folder_filter: str = "", rev: str = "HEAD") -> None:
+    """
+    Restrict the working tree to folder_filter when it names a directory at `rev`;
+    otherwise (no filter, or a substring-style filter) keep the full tree.
+    """
+    folder = folder_filter.strip("/")
+    if folder and _git("ls-tree", "-d", "--name-only", rev, "--", folder, cwd=repo_path):
+        _git("sparse-checkout", "set", folder, cwd=repo_path)
+    elif _git("config", "--bool", "--default", "false", "core.sparseCheckout", cwd=repo_path) == "true":
+        _git("sparse-checkout", "disable", cwd=repo_path)
+
+
+def _read_meta(name: str) -> Dict:
+    try:
+        with open(os.path.join(META_DIR, f"{name}.json")) as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def _write_meta(name: str, meta: Dict) -> None:
+    os.makedirs(META_DIR, exist_ok=True)
+    with open(os.path.join(META_DIR, f"{name}.json"), "w") as f:
+        json.dump(meta, f)
+
+
+def _tree_bytes(top: str) -> int:
+    """On-disk size of the files under `top`. A full walk: only run when a checkout changed."""
+    size = 0
+    for root, _, files in os.walk(top):
+        for f in files:
+            try:
+                size += os.lstat(os.path.join(root, f)).st_size
+            except OSError:
+                continue
+    return size
+
+
+def _object_bytes(git_dir: str) -> int:
+    """Size of a repository's object store, from `git count-objects` (no walk)."""
+    sizes = dict(line.split(": ", 1) for line in _git("count-objects", "-v", cwd=git_dir).splitlines())
+    return sum(int(sizes.get(key, 0)) for key in ("size", "size-pack", "size-garbage")) * 1024
+
+
+def _touch(name: str, path: str, folder_filter: str = "") -> None:
+    """
+    Record last use and on-disk size of a cached clone (drives LRU eviction). The size
+    is only re-measured when the fetch moved HEAD or the sparse filter changed.
+    """
+    meta = _read_meta(name)
+    state = f"{get_head_commit(path)}:{folder_filter}"
+    if meta.get("state") != state or meta.get("path") != path or "bytes" not in meta:
+        meta["bytes"] = _tree_bytes(path)
+    meta.update(path=path, mirror=None, checkout=path, state=state, last_used=time.time())
+    _write_meta(name, meta)
+
+
+def _worktree_lock_name(name: str, worktree_path: str) -> str:
+    """Held shared by the job using a worktree; pruning needs it exclusively."""
+    return f"{name}.wt-{os.path.basename(worktree_path)}"
+
+
+def _touch_worktree(name: str, mirror_path: str, worktree_path: str) -> None:
+    """
+    Worktree-mode bookkeeping, under the mirror lock: a new worktree is measured once,
+    the mirror through count-objects, and worktrees beyond WORKTREES_PER_REPO that no
+    job holds are removed, least recently used first.
+    """
+    meta = _read_meta(name)
+    now = time.time()
+    worktrees = {p: w for p, w in meta.get("worktrees", {}).items() if os.path.isdir(p)}
+    entry = worktrees.get(worktree_path) or {"bytes": _tree_bytes(worktree_path)}
+    entry["last_used"] = now
+    worktrees[worktree_path] = entry
+
+    by_use = sorted(worktrees, key=lambda p: worktrees[p]["last_used"], reverse=True)
+    for stale in by_use[WORKTREES_PER_REPO:]:
+        if stale == worktree_path:
+            continue
+        lock_name = _worktree_lock_name(name, stale)
+        with repo_lock(lock_name, blocking=False) as acquired:
+            if not acquired:
+                continue  # a job is still using it
+            try:
+                _git("worktree", "remove", "--force", os.path.abspath(stale), cwd=mirror_path)
+            except subprocess.CalledProcessError:
+                _remove_path(stale)
+                _git("worktree", "prune", cwd=mirror_path)
+            os.remove(os.path.join(LOCK_DIR, f"{lock_name}.lock"))
+        del worktrees[stale]
+        logger.info(f"[GitOps] 🧹 Removed unused worktree: {stale}")
+
+    meta.update(
+        path=os.path.join(WORKTREE_DIR, name), mirror=mirror_path, checkout=worktree_path, worktrees=worktrees,
+        last_used=now, bytes=_object_bytes(mirror_path) + sum(w["bytes"] for w in worktrees.values()),
+    )
+    _write_meta(name, meta)
+
+
+def checkout_path(name: str) -> str:
+    """Working tree of the repo's latest checkout: repos/<name>, or its worktree in worktree mode."""
+    checkout = _read_meta(name).get("checkout")
+    return checkout if checkout and os.path.isdir(checkout) else os.path.join(CLONE_BASE_DIR, name)
+
+
+def _remove_path(path: str) -> None:
+    if os.path.exists(path):
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def evict_repo_cache(max_bytes: int = REPO_CACHE_MAX_BYTES, keep: Optional[str] = None) -> List[str]:
+    """Delete least-recently-used checkouts until the cache fits in max_bytes."""
+    if not os.path.isdir(META_DIR):
+        return []
+
+    entries = []
+    for name in os.listdir(META_DIR):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(META_DIR, name)) as f:
+                entries.append((name[:-len(".json")], json.load(f)))
+        except (OSError, json.JSONDecodeError):
+            continue
+
+    total = sum(meta.get("bytes", 0) for _, meta in entries)
+    evicted = []
+    for name, meta in sorted(entries, key=lambda e: e[1].get("last_used", 0)):
+        if total <= max_bytes:
+            break
+        if name == keep:
+            continue
+        with repo_lock(name, blocking=False) as acquired:
+            if not acquired:
+                continue  # in use by another job
+            _remove_path(meta.get("path", ""))
+            if meta.get("mirror"):
+                _remove_path(meta["mirror"])
+            os.remove(os.path.join(META_DIR, f"{name}.json"))
+        total -= meta.get("bytes", 0)
+        evicted.append(name)
+        logger.info(f"[GitOps] 🧹 Evicted cached repo: {name}")
+    return evicted
+
+
+def _clone_or_fetch(repo_url: str, repo_path: str, folder_filter: str, depth: int, ref: Optional[str]) -> None:
+    if os.path.exists(repo_path) and not os.path.exists(os.path.join(repo_path, ".git")):
+        logger.warning(f"[GitOps] Invalid Git repo found. Cleaning and recloning: {repo_path}")
+        _remove_path(repo_path)
+
+    if os.path.exists(repo_path):
+        logger.info(f"[GitOps] Fetching latest changes: {repo_path}")
+        fetch_args = ["fetch", "--prune", *([f"--depth={depth}"] if depth > 0 else []), "origin"]
+        _git(*fetch_args, ref or "HEAD", cwd=repo_path)
+        _apply_sparse_checkout(repo_path, folder_filter, rev="FETCH_HEAD")
+        _git("reset", "--hard", "--quiet", "FETCH_HEAD", cwd=repo_path)
+        return
+
+    logger.info(f"[GitOps] Cloning new repo: {repo_url} → {repo_path}")
+    sparse = ["--sparse"] if folder_filter else []
+    branch = ["--branch", ref] if ref else []
+    _git("clone", "--quiet", *_clone_args(depth), *sparse, *branch, repo_url, repo_path)
+    if folder_filter:
+        _apply_sparse_checkout(repo_path, folder_filter)
+
+
+def _mirror_worktree(repo_url: str, name: str, folder_filter: str, ref: Optional[str]) -> str:
+    """Update the bare mirror and return a detached worktree for the resolved commit."""
+    mirror_path = os.path.join(MIRROR_DIR, f"{name}.git")
+    if not os.path.exists(mirror_path):
+        logger.info(f"[GitOps] Creating bare mirror: {repo_url} → {mirror_path}")
+        os.makedirs(MIRROR_DIR, exist_ok=True)
+        filter_args = [f"--filter={CLONE_FILTER}"] if CLONE_FILTER else []
+        _git("clone", "--quiet", "--bare", *filter_args, repo_url, mirror_path)
+    else:
+        _git("fetch", "--quiet", "--prune", "origin", "+refs/heads/*:refs/heads/*", "+refs/tags/*:refs/tags/*",
+             cwd=mirror_path)
+
+    commit = _git("rev-parse", f"{ref or 'HEAD'}^{{commit}}", cwd=mirror_path)
+    worktree_path = os.path.join(WORKTREE_DIR, name, commit[:12])
+    if not os.path.exists(worktree_path):
+        _git("worktree", "prune", cwd=mirror_path)
+        _git("worktree", "add", "--detach", "--no-checkout", os.path.abspath(worktree_path), commit, cwd=mirror_path)
+        _apply_sparse_checkout(worktree_path, folder_filter, rev=commit)
+        _git("checkout", "--quiet", "--detach", commit, cwd=worktree_path)
+    return worktree_path
+
+
+@contextmanager
+def checkout_repo(
+    repo_url: str,
+    folder_filter: str = "",
+    ref: Optional[str] = None,
+    depth: int = CLONE_DEPTH,
+    mode: str = REPO_MODE,
+):
+    """
+    Fetch a repo into ./repos (shallow, blob-less, optionally sparse) and yield the local
+    path to the checkout, safely replacing hyphens for import compatibility.
+
+    The per-repo lock is held shared for as long as the caller uses the checkout, so
+    eviction can't delete it and no other job can reset it underneath; the fetch itself
+    takes it exclusively. In worktree mode the fetch only touches the mirror and the new
+    worktree, so it runs under a separate mirror lock and jobs on other commits go on.
+    """
+    repo_url = str(repo_url)
+    safe_repo_name = repo_name_from_url(repo_url)
     repo_path = os.path.join(CLONE_BASE_DIR, safe_repo_name)
+    lock = _RepoLock(safe_repo_name)
+    worktree_lock: Optional[_RepoLock] = None
 
     try:
-        if os.path.exists(repo_path):
-            git_dir = os.path.join(repo_path, ".git")
-            if not os.path.exists(git_dir):
-                logger.warning(f"[GitOps] Invalid Git repo found. Cleaning and recloning: {repo_path}")
-                subprocess.run(["rm", "-rf", repo_path], check=True)
-            else:
-                logger.info(f"[GitOps] Pulling latest changes: {safe_repo_name}")
-                subprocess.run(["git", "-C", repo_path, "pull"], check=True)
+        if mode == "worktree":
+            lock.acquire(shared=True)
+            with stage_timer("git", "clone_or_pull"), repo_lock(f"{safe_repo_name}.mirror"):
+                repo_path = _mirror_worktree(repo_url, safe_repo_name, folder_filter or "", ref)
+                worktree_lock = _RepoLock(_worktree_lock_name(safe_repo_name, repo_path))
+                worktree_lock.acquire(shared=True)
+                _touch_worktree(safe_repo_name, os.path.join(MIRROR_DIR, f"{safe_repo_name}.git"), repo_path)
+        else:
+            lock.acquire(shared=False)
+            with stage_timer("git", "clone_or_pull"):
+                _clone_or_fetch(repo_url, repo_path, folder_filter or "", depth, ref)
+            _touch(safe_repo_name, repo_path, folder_filter or "")
+            lock.downgrade()
 
-        if not os.path.exists(repo_path):
-            logger.info(f"[GitOps] Cloning new repo: {repo_url} → {safe_repo_name}")
-            subprocess.run(["git", "clone", repo_url, repo_path], check=True)
+    except BaseException as e:
+        for held in (worktree_lock, lock):
+            if held is not None and held.lock_file is not None:
+                held.release()
+        if isinstance(e, subprocess.CalledProcessError):
+            logger.error(f"[GitOps] ❌ Git operation failed: {e.stderr if e.stderr else str(e)}")
+            raise RuntimeError(f"Git clone/pull failed for {repo_url}")
+        raise
 
-    except subprocess.CalledProcessError as e:
-        logger.error(f"[GitOps] ❌ Git operation failed: {e.stderr if e.stderr else str(e)}")
-        raise RuntimeError(f"Git clone/pull failed for {repo_url}")
+    try:
+        evict_repo_cache(keep=safe_repo_name)
+        yield repo_path
+    finally:
+        if worktree_lock is not None:
+            worktree_lock.release()
+        lock.release()
+
+
+def clone_or_pull_repo(
+    repo_url: str,
+    folder_filter: str = "",
+    ref: Optional[str] = None,
+    depth: int = CLONE_DEPTH,
+    mode: str = REPO_MODE,
+) -> str:
+    """
+    Fetch a repo (see checkout_repo) and return the local path to the checkout. Nothing is
+    held afterwards: jobs that read the checkout should use checkout_repo instead.
+    """
+    with checkout_repo(repo_url, folder_filter, ref, depth, mode) as repo_path:
+        return repo_path
+
+
+def get_head_commit(repo_path: str) -> str:
+    return _git("rev-parse", "HEAD", cwd=repo_path)
+
+
+def resolve_remote_commit(repo_url: str, ref: Optional[str] = None, timeout: float = LS_REMOTE_TIMEOUT) -> Optional[str]:
+    """
+    Commit SHA that `ref` (default: the remote HEAD) points to, via `git ls-remote` — one
+    round trip, nothing fetched. None if the remote can't be reached or the ref doesn't exist.
+    """
+    ref = ref or "HEAD"
+    if len(ref) == 40 and all(c in "0123456789abcdef" for c in ref.lower()):
+        return ref.lower()
+    try:
+        result = subprocess.run(
+            ["git", "ls-remote", "--quiet", str(repo_url), ref],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, timeout=timeout, check=True,
+            env={**os.environ, "GIT_TERMINAL_PROMPT": "0"},
+        )
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired, OSError) as e:
+        reason = (getattr(e, "stderr", None) or str(e)).strip().splitlines()
+        logger.warning(f"[GitOps] ⚠️ ls-remote failed for {repo_url}: {reason[0] if reason else e}")
+        return None
+    line = result.stdout.split("\n", 1)[0]
+    return line.split("\t", 1)[0] or None
 
-    return repo_path
+
+def ensure_commit_available(repo_path: str, ref: str, max_deepen: int = 8) -> bool:
+    """Deepen a shallow clone until `ref` resolves (needed before diffing against it)."""
+    for attempt in range(max_deepen + 1):
+        try:
+            _git("rev-parse", "--verify", "--quiet", f"{ref}^{{commit}}", cwd=repo_path)
+            return True
+        except subprocess.CalledProcessError:
+            if attempt == max_deepen:
+                break
+            if _git("rev-parse", "--is-shallow-repository", cwd=repo_path) != "true":
+                break
+            try:
+                _git("fetch", "--quiet", f"--deepen={2 ** attempt * 10}", "origin", cwd=repo_path)
+            except subprocess.CalledProcessError:
+                break
+    return False
 
 
 def ensure_python_importable(repo_path: str):
@@ -52,17 +496,48 @@ def ensure_python_importable(repo_path: str):
                 logger.debug(f"[GitOps] __init__.py added at: {init_file}")
 
 
-def get_repo_diff(repo_path: str, file_path: str = "") -> str:
+def get_repo_diff(repo_path: str, file_path: str = "", base_ref: str = "HEAD~1") -> str:
     """
-    Return the Git diff for a file or full repo between last two commits.
+    Return the Git diff for a file or full repo between base_ref (default: previous commit) and HEAD.
     """
-    args = ["git", "-C", repo_path, "diff", "HEAD~1", "HEAD"]
+    ensure_commit_available(repo_path, base_ref)
+    args = ["git", "-C", repo_path, "diff", base_ref, "HEAD"]
     if file_path:
-        args.append(file_path)
+        args.extend(["--", file_path])
 
     try:
         result = subprocess.run(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
-        return result.stdout.decode("utf-8")
+        return result.stdout.decode("utf-8", errors="replace")
     except subprocess.CalledProcessError as e:
         logger.error(f"[GitOps] ❌ Diff failed: {e.stderr.decode('utf-8')}")
-        return ""
\ No newline at end of file
+        return ""
+
+
+def _name_status(repo_path: str, base_ref: str) -> Optional[List[List[str]]]:
+    """`git diff --name-status -M` rows as [status, path, (new path)], or None if base_ref is unusable."""
+    if not ensure_commit_available(repo_path, base_ref):
+        logger.warning(f"[GitOps] ⚠️ Base ref not available in {repo_path}: {base_ref}")
+        return None
+    try:
+        output = _git("diff", "--name-status", "-M", "--no-color", base_ref, "HEAD", cwd=repo_path)
+    except subprocess.CalledProcessError as e:
+        logger.error(f"[GitOps] ❌ Diff failed: {e.stderr}")
+        return None
+    return [line.split("\t") for line in output.splitlines() if line]
+
+
+def get_changed_files(repo_path: str, base_ref: str = "HEAD~1") -> Optional[List[str]]:
+    """
+    Repo-relative paths added or modified between base_ref and HEAD (renames report the new path).
+    Returns None when base_ref can't be resolved, so callers can fall back to a full run.
+    """
+    rows = _name_status(repo_path, base_ref)
+    if rows is None:
+        return None
+    return [row[-1] for row in rows if not row[0].startswith("D")]
+
+
+def get_deleted_files(repo_path: str, base_ref: str = "HEAD~1") -> List[str]:
+    """Repo-relative paths deleted (or renamed away) between base_ref and HEAD."""
+    rows = _name_status(repo_path, base_ref) or []
+    return [row[1] for row in rows if row[0].startswith(("D", "R"))]
@@ -1,11 +1,29 @@
 # backend/utils/license_checker.py
 import hashlib
+import hmac
 import os
+import threading
+import time
+import calendar
+from collections import OrderedDict
 from datetime import datetime
+from typing import NamedTuple, Optional, Tuple
+
+from backend.utils.metrics import cache_event
 
 SECRET_SALT = os.getenv("LICENSE_SECRET", "trinity_default_salt")
 
-def is_license_valid(license_token: str) -> bool:
+# Verified tokens are cached until their own expiry; rejected ones for a short while
+LICENSE_CACHE_SIZE = int(os.getenv("TRINITY_LICENSE_CACHE_SIZE", "10000"))
+NEGATIVE_CACHE_TTL = float(os.getenv("TRINITY_LICENSE_NEGATIVE_TTL", "60"))
+
+
+class License(NamedTuple):
+    user_id: str
+    expires_at: float  # epoch seconds (UTC midnight of the expiry date)
+
+
+def _verify(license_token: str) -> Optional[License]:
     """
     ✅ Basic license token verification logic.
     This assumes license tokens are SHA-256 hashes of user_id + expiry + secret salt.
@@ -14,20 +32,72 @@ def is_license_valid(license_token: str) -> bool:
         # Format expected: user_id:expiry:hash
         parts = license_token.split(":")
         if len(parts) != 3:
-            return False
+            return None
 
         user_id, expiry_str, provided_hash = parts
 
         # ⏳ Check expiration
-        expiry = datetime.strptime(expiry_str, "%Y-%m-%d")
-        if expiry < datetime.utcnow():
-            return False
+        expires_at = calendar.timegm(datetime.strptime(expiry_str, "%Y-%m-%d").timetuple())
+        if expires_at < time.time():
+            return None
 
-        # 🔐 Recompute hash and compare
+        # 🔐 Recompute hash and compare in constant time
         raw = f"{user_id}:{expiry_str}:{SECRET_SALT}"
         expected_hash = hashlib.sha256(raw.encode()).hexdigest()
-
-        return expected_hash == provided_hash
+        if not hmac.compare_digest(expected_hash.encode(), provided_hash.encode()):
+            return None
+        return License(user_id, float(expires_at))
 
     except Exception:
-        return False
\ No newline at end of file
+        return None
+
+
+class LicenseCache:
+    """
+    Bounded LRU of verification results keyed by the token's SHA-256 (raw tokens
+    are never held). Valid entries live until the license expires; invalid ones for
+    `negative_ttl` seconds, since a wrong hash never becomes right for a fixed salt.
+    """
+
+    def __init__(self, max_entries: int = LICENSE_CACHE_SIZE, negative_ttl: float = NEGATIVE_CACHE_TTL):
+        self.max_entries = max_entries
+        self.negative_ttl = negative_ttl
+        self._entries: "OrderedDict[str, Tuple[Optional[License], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def verify(self, license_token: str) -> Optional[License]:
+        key = hashlib.sha256(license_token.encode("utf-8", errors="replace")).hexdigest()
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                cache_event("license", True)
+                return entry[0]
+
+        cache_event("license", False)
+        verified = _verify(license_token)
+        valid_until = verified.expires_at if verified else now + self.negative_ttl
+        if self.max_entries > 0:
+            with self._lock:
+                self._entries[key] = (verified, valid_until)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return verified
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+license_cache = LicenseCache()
+
+
+def verify_license(license_token: str) -> Optional[License]:
+    """The license behind a token, or None if it is malformed, forged or expired."""
+    return license_cache.verify(license_token)
+
+
+def is_license_valid(license_token: str) -> bool:
+    return verify_license(license_token) is not None
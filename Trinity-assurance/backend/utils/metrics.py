@@ -0,0 +1,256 @@
+# backend/utils/metrics.py
+
+import os
+import time
+import uuid
+import bisect
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# In-process registry rendered in the Prometheus text format (no client library needed).
+# Values are per process; scrape each worker separately when running several.
+METRICS_ENABLED = os.getenv("TRINITY_METRICS", "1") != "0"
+TRACE_HEADER = "X-Trace-Id"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} expects labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labels)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        return "\n".join(lines + self.samples())
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        if not METRICS_ENABLED or amount < 0:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, k)} {_format_value(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values → [bucket counts..., sum, count]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.setdefault(key, [0] * (len(self.buckets) + 2))
+            if index < len(self.buckets):
+                state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return int(state[-1]) if state else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        lines = []
+        for key, state in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), state[:-2] + [state[-1] - sum(state[:-2])]):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {_format_value(cumulative)}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {_format_value(state[-1])}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(m.render() for m in metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, help, labels))
+
+
+def histogram(name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, help, labels, buckets))
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Trinity metrics
+# ──────────────────────────────────────────────────────────────────────────────
+STAGE_SECONDS = histogram(
+    "trinity_stage_duration_seconds", "Time spent in each pipeline stage", ("component", "stage")
+)
+LLM_REQUESTS = counter("trinity_llm_requests_total", "LLM completions by outcome", ("provider", "outcome"))
+LLM_SECONDS = histogram("trinity_llm_request_duration_seconds", "LLM completion latency incl. retries", ("provider",))
+LLM_TOKENS = counter("trinity_llm_tokens_total", "LLM tokens sent (in) and generated (out)", ("provider", "direction"))
+LLM_RETRIES = counter("trinity_llm_retries_total", "Retried LLM calls (429 / 5xx / connection errors)", ("provider",))
+VALIDATION_SECONDS = histogram(
+    "trinity_validation_duration_seconds", "Per-file validation latency of generated tests", ("language",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+VALIDATION_RESULTS = counter(
+    "trinity_validation_results_total", "Generated tests checked before writing, by outcome", ("language", "outcome")
+)
+VALIDATION_RETRIES = counter(
+    "trinity_validation_retries_total", "Regenerations requested for tests that failed validation", ("language",)
+)
+CI_BYTES = counter("trinity_ci_bytes_total", "CI log bytes ingested (as uploaded, before decompression)")
+CI_RECORDS = counter("trinity_ci_records_total", "Test results extracted from CI logs", ("format", "status"))
+CACHE_EVENTS = counter("trinity_cache_events_total", "Cache lookups by cache and result", ("cache", "result"))
+LICENSE_CHECKS = counter("trinity_license_checks_total", "License checks by scope and outcome", ("scope", "outcome"))
+HTTP_REQUESTS = counter("trinity_http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+HTTP_SECONDS = histogram("trinity_http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+
+
+@contextmanager
+def stage_timer(component: str, stage: str) -> Iterator[None]:
+    """Time a block into trinity_stage_duration_seconds{component, stage}."""
+    with STAGE_SECONDS.time(component=component, stage=stage):
+        yield
+
+
+def timed(component: str, stage: str) -> Callable:
+    """Decorator form of stage_timer."""
+    def decorator(fn: Callable) -> Callable:
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage_timer(component, stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def cache_event(cache: str, hit: bool) -> None:
+    CACHE_EVENTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Trace IDs: set per request by the HTTP middleware, carried into worker threads
+# with contextvars.copy_context(), and stamped on every log record as %(trace_id)s.
+# ──────────────────────────────────────────────────────────────────────────────
+trace_id_var: contextvars.ContextVar[str] = contextvars.ContextVar("trinity_trace_id", default="-")
+
+
+def new_trace_id(incoming: Optional[str] = None) -> str:
+    """Reuse a sane client-supplied id, otherwise mint one."""
+    if incoming and len(incoming) <= 64 and all(c.isalnum() or c in "-_." for c in incoming):
+        return incoming
+    return uuid.uuid4().hex[:16]
+
+
+def current_trace_id() -> str:
+    return trace_id_var.get()
+
+
+def bind_context(fn: Callable) -> Callable:
+    """Wrap fn to run in a copy of the caller's context (trace id) on another thread."""
+    ctx = contextvars.copy_context()
+    return lambda *args, **kwargs: ctx.run(fn, *args, **kwargs)
+
+
+_log_factory_installed = False
+
+
+def install_trace_logging(format: Optional[str] = None) -> None:
+    """Give every LogRecord a trace_id attribute; optionally configure a root handler using it."""
+    global _log_factory_installed
+    if not _log_factory_installed:
+        previous = logging.getLogRecordFactory()
+
+        def factory(*args, **kwargs):
+            record = previous(*args, **kwargs)
+            record.trace_id = trace_id_var.get()
+            return record
+
+        logging.setLogRecordFactory(factory)
+        _log_factory_installed = True
+    if format:
+        logging.basicConfig(level=logging.INFO, format=format)
@@ -1,5 +1,7 @@
 # backend/utils/prompts.py
 
+import hashlib
+
 TEST_GEN_PROMPT_TEMPLATE = """
 You are a highly skilled senior QA automation engineer. Your task is to generate **robust, production-quality test code** for the following source file written in **{language}**.
 
@@ -31,4 +33,148 @@ Your Responsibilities:
 ✅ Return a complete test file as plain code. No markdown, no explanations, and no wrapping text.
 
 Make the output intelligent, professional, and efficient.
-"""
\ No newline at end of file
+"""
+
+TEST_UPDATE_PROMPT_TEMPLATE = """
+You are a highly skilled senior QA automation engineer. A source file written in **{language}** has changed, and its existing test file must be updated to match.
+
+========================
+CURRENT SOURCE CODE:
+{source}
+========================
+CHANGES SINCE THE TESTS WERE GENERATED (unified diff):
+{diff}
+========================
+EXISTING TEST FILE:
+{existing_tests}
+========================
+
+Your Responsibilities:
+1. Keep every existing test that is still valid for the current source code unchanged.
+2. Fix or remove tests for code that was changed or deleted in the diff.
+3. Add tests for new or changed functions, classes and branches, covering edge cases, exception handling and invalid input.
+4. Keep the same framework, imports style and structure as the existing test file.
+5. ⚠️ Do NOT describe anything. Just return raw, executable test code as a single file.
+
+🔁 Output Format:
+✅ Return the complete updated test file as plain code. No markdown, no explanations, and no wrapping text.
+"""
+
+# One slice of a source file too large for a single request (see services/prompt_planner.py)
+TEST_GEN_CHUNK_PROMPT_TEMPLATE = """
+You are a highly skilled senior QA automation engineer. Generate **robust, production-quality test code** in **{language}** for part {part} of {parts} of the source file `{path}`.
+The file was split because it is large; other parts are tested separately and the results are merged into one test file.
+
+========================
+FILE CONTEXT (imports and declarations; do not test these directly):
+{context}
+========================
+CODE TO TEST (part {part} of {parts}):
+{code}
+========================
+
+Your Responsibilities:
+1. Test only the functions, classes and methods shown in CODE TO TEST: functionality, edge cases, exceptions, boundary conditions and invalid input.
+2. Use standard frameworks: PyTest for Python, JUnit for Java, Jest for JavaScript/TypeScript.
+3. Include all necessary imports, mocks, and setup/teardown.
+4. {naming}
+5. ⚠️ Do NOT describe anything. Return raw, executable test code only.
+
+🔁 Output Format:
+✅ Plain code. No markdown, no explanations, and no wrapping text.
+"""
+
+# Several small source files in one request, answered with delimited per-file outputs
+TEST_GEN_BATCH_PROMPT_TEMPLATE = """
+You are a highly skilled senior QA automation engineer. Generate **robust, production-quality test code** in **{language}** for EACH of the {count} small source files below.
+
+{files}
+
+Your Responsibilities:
+1. For every file, test its functions, classes and logic: functionality, edge cases, exceptions, boundary conditions and invalid input.
+2. Use standard frameworks: PyTest for Python, JUnit for Java, Jest for JavaScript/TypeScript.
+3. Each test file must be complete and independent, with all necessary imports.
+4. ⚠️ Do NOT describe anything.
+
+🔁 Output Format (follow exactly):
+For each source file, output a line `### TEST FILE: <source path>` followed by the raw test code for that file.
+No markdown and no other text.
+"""
+
+# A generated test file that failed the pre-write syntax/compile check (see services/test_validator.py)
+TEST_FIX_PROMPT_TEMPLATE = """
+You are a highly skilled senior QA automation engineer. The {language} test file below was generated for the given source file, but it does not compile.
+
+========================
+SOURCE CODE:
+{source}
+========================
+TEST FILE:
+{test_code}
+========================
+ERRORS:
+{error}
+========================
+
+Your Responsibilities:
+1. Fix every error listed above; keep all tests that are already correct.
+2. Keep the same framework, imports and structure.
+3. ⚠️ Do NOT describe anything. Just return raw, executable test code as a single file.
+
+🔁 Output Format:
+✅ Return the complete corrected test file as plain code. No markdown, no explanations, and no wrapping text.
+"""
+
+# Self-healing (see services/healer.py): one request per failure cluster
+HEAL_FILE_PROMPT_TEMPLATE = """
+You are a highly skilled senior QA automation engineer. The generated {language} test file `{test_file}` fails when run. Fix the TEST FILE so the failures below go away.
+
+========================
+SOURCE CODE UNDER TEST ({source_file}):
+{source}
+========================
+TEST FILE:
+{test_code}
+========================
+FAILURES:
+{failures}
+========================
+
+Your Responsibilities:
+1. Fix wrong imports, setup, and expectations that contradict the source code. The source code is correct; do not assume it changes.
+2. Keep every passing test unchanged; remove a test only if it cannot be made correct.
+3. ⚠️ Do NOT describe anything. Just return raw, executable test code as a single file.
+
+🔁 Output Format:
+✅ Return the complete corrected test file as plain code. No markdown, no explanations, and no wrapping text.
+"""
+
+HEAL_RULES_PROMPT_TEMPLATE = """
+You are a highly skilled senior QA automation engineer. {count} generated {language} test files fail with the same root cause. One of them is shown below with its failure.
+
+========================
+FAILURE ({exc_type}):
+{failure}
+========================
+EXAMPLE TEST FILE `{test_file}`:
+{test_code}
+========================
+OTHER AFFECTED FILES:
+{other_files}
+========================
+
+Your Responsibilities:
+1. Find the root cause shared by all affected files.
+2. Express the fix as regular-expression substitutions that work for EVERY affected file, not just the example.
+   They are applied in order with Python `re.sub(pattern, replacement, file_content, flags=re.MULTILINE)`.
+
+🔁 Output Format:
+✅ Return only JSON, no markdown and no other text:
+{{"rules": [{{"pattern": "<python regex>", "replacement": "<replacement, may use \\\\1 backreferences>"}}]}}
+"""
+
+# Change whenever any generation template changes; part of the generation cache key
+TEST_GEN_PROMPT_VERSION = hashlib.sha256(
+    (TEST_GEN_PROMPT_TEMPLATE + TEST_GEN_CHUNK_PROMPT_TEMPLATE + TEST_GEN_BATCH_PROMPT_TEMPLATE).encode("utf-8")
+).hexdigest()[:16]
+TEST_UPDATE_PROMPT_VERSION = hashlib.sha256(TEST_UPDATE_PROMPT_TEMPLATE.encode("utf-8")).hexdigest()[:16]
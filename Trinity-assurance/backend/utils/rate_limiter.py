@@ -0,0 +1,117 @@
+# backend/utils/rate_limiter.py
+
+import time
+import random
+import threading
+import logging
+from typing import Callable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at `rate_per_minute`.
+    `acquire` blocks until enough tokens are available.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate_per_second = max(rate_per_minute, 0.0) / 60.0
+        self.capacity = float(capacity if capacity is not None else rate_per_minute)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate_per_second)
+        self.updated_at = now
+
+    def try_acquire(self, amount: float = 1.0) -> float:
+        """Take `amount` tokens if available. Returns 0 on success, else seconds to wait."""
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._refill()
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return 0.0
+            if self.rate_per_second <= 0:
+                return float("inf")
+            return (amount - self.tokens) / self.rate_per_second
+
+    def acquire(self, amount: float = 1.0) -> None:
+        while True:
+            wait = self.try_acquire(amount)
+            if wait == 0.0:
+                return
+            if wait == float("inf"):
+                raise RuntimeError("TokenBucket has a zero refill rate; cannot acquire")
+            time.sleep(min(wait, 5.0))
+
+    def refund(self, amount: float) -> None:
+        """Return unused tokens (e.g. when the real usage was lower than the estimate)."""
+        if amount <= 0:
+            return
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class RateLimiter:
+    """
+    Combined requests/min + tokens/min limiter matching LLM provider quotas.
+    A limit of 0 (or None) disables that dimension.
+    """
+
+    def __init__(self, requests_per_minute: Optional[int] = None, tokens_per_minute: Optional[int] = None):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+
+    def acquire(self, estimated_tokens: int = 0) -> None:
+        if self.requests:
+            self.requests.acquire(1)
+        if self.tokens and estimated_tokens:
+            self.tokens.acquire(estimated_tokens)
+
+    def settle(self, estimated_tokens: int, actual_tokens: Optional[int]) -> None:
+        """Refund the difference once the provider reports real token usage."""
+        if self.tokens and actual_tokens is not None and actual_tokens < estimated_tokens:
+            self.tokens.refund(estimated_tokens - actual_tokens)
+
+
+def backoff_delay(attempt: int, base_delay: float = 1.0, max_delay: float = 30.0) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+def retry_with_backoff(
+    fn: Callable[[], T],
+    is_retryable: Callable[[Exception], bool],
+    max_retries: int = 5,
+    base_delay: float = 1.0,
+    max_delay: float = 30.0,
+    retry_after: Callable[[Exception], Optional[float]] = lambda e: None,
+    on_retry: Optional[Callable[[int, Exception], None]] = None,
+) -> T:
+    """
+    Call `fn`, retrying retryable failures with jittered exponential backoff.
+    A server supplied Retry-After (via `retry_after`) takes precedence over the computed delay.
+    """
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable(e):
+                raise
+            delay = retry_after(e)
+            if delay is None:
+                delay = backoff_delay(attempt, base_delay, max_delay)
+            logger.warning(f"[RateLimit] ⏳ Retry {attempt + 1}/{max_retries} in {delay:.1f}s after: {e}")
+            if on_retry:
+                on_retry(attempt, e)
+            time.sleep(delay)
+            attempt += 1
@@ -0,0 +1,489 @@
+# benchmarks/run_benchmarks.py
+"""
+End-to-end benchmarks for Trinity's hot paths on synthetic repos and histories.
+
+Run from the Trinity-assurance root:
+
+    python -m benchmarks.run_benchmarks --files 1000 --out bench.json
+    python -m benchmarks.run_benchmarks --files 1000 --save-baseline      # record benchmarks/baseline.json
+    python -m benchmarks.run_benchmarks --files 1000 --threshold 0.25     # exit 1 on >25% regressions
+    python -m benchmarks.run_benchmarks --files 100 --stages ci_parse,ci_parse_junit,ci_ingest --ci-log-mb 256
+
+Every stage runs in its own subprocess inside a scratch workspace (so peak RSS is per
+stage and nothing touches the real tests/ or repos/), with the LLM replaced by the
+deterministic stub provider.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+from typing import Callable, Dict, List, Optional
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+# Latency changes smaller than this are noise, whatever the ratio
+MIN_LATENCY_DELTA_MS = 2.0
+QUERY_PAGE_SIZE = 50
+HISTORY_BATCH = 500
+
+STAGE_ENV = {
+    "TRINITY_LLM_PROVIDER": "stub",
+    "TRINITY_GEN_CACHE": "0",  # measure the full generation path, not cache hits
+    "TRINITY_HISTORY_CACHE_TTL": "0",  # history reads hit SQLite, not the in-process cache
+}
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Measurement
+# ──────────────────────────────────────────────────────────────────────────────
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def _rss_mb(who: int) -> float:
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class StageTimer:
+    """Collects per-operation latencies and the number of items (files, records, tests) processed."""
+
+    def __init__(self, unit: str):
+        self.unit = unit
+        self.latencies: List[float] = []
+        self.items = 0
+        self.elapsed = 0.0
+
+    def measure(self, fn: Callable[[], int]) -> None:
+        started = time.perf_counter()
+        items = fn()
+        duration = time.perf_counter() - started
+        self.latencies.append(duration)
+        self.elapsed += duration
+        self.items += items
+
+    def record(self, latency: float, items: int = 1) -> None:
+        """Add an operation timed elsewhere (e.g. per-file progress events)."""
+        self.latencies.append(latency)
+        self.items += items
+
+    def result(self, elapsed: Optional[float] = None) -> Dict:
+        elapsed = elapsed if elapsed is not None else self.elapsed
+        return {
+            "unit": self.unit,
+            "ops": len(self.latencies),
+            "items": round(self.items, 3),
+            "seconds": round(elapsed, 4),
+            "throughput": round(self.items / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(percentile(self.latencies, 50) * 1000, 3),
+            "p99_ms": round(percentile(self.latencies, 99) * 1000, 3),
+            "max_ms": round(max(self.latencies, default=0.0) * 1000, 3),
+        }
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Stages (run in the child process, cwd = per-stage scratch dir)
+# ──────────────────────────────────────────────────────────────────────────────
+def stage_scan(config: Dict) -> Dict:
+    from backend.services.test_generator import TestGenerator
+
+    generator = TestGenerator(provider="stub")
+    timer = StageTimer("files")
+    for _ in range(config["repeat"]):
+        for language in config["languages"]:
+            timer.measure(lambda: len(generator.get_all_source_files(config["repo"]["path"], language)))
+    return timer.result()
+
+
+def stage_generate(config: Dict) -> Dict:
+    from backend.services.test_generator import TestGenerator
+
+    generator = TestGenerator(provider="stub")
+    repo_url = f"file://{config['repo']['path']}"
+    timer = StageTimer("files")
+    started = time.perf_counter()
+    for _ in range(max(1, config["repeat"] // 2)):
+        for language in config["languages"]:
+            shutil.rmtree(os.path.join("tests", os.path.basename(config["repo"]["path"])), ignore_errors=True)
+            last = [time.perf_counter()]
+
+            def on_event(event: Dict) -> None:
+                # Files complete in input order, so the gap between events is one file's latency
+                if event.get("type") == "file":
+                    now = time.perf_counter()
+                    timer.record(now - last[0])
+                    last[0] = now
+
+            generator.generate_tests_from_repo(repo_url, language, test_type="unit", progress=on_event)
+    return timer.result(time.perf_counter() - started)
+
+
+def stage_history_save(config: Dict) -> Dict:
+    from backend.services.history_manager import TestHistory
+    from benchmarks.synthetic import history_record
+    import random
+
+    history = TestHistory()
+    rng = random.Random(1)
+    timer = StageTimer("records")
+    for i in range(min(config["history_records"], 2000)):
+        record = history_record(i, config["files"], rng)
+        timer.measure(lambda: history.save(repo="bench", **record) or 1)
+    return timer.result()
+
+
+def stage_history_save_batch(config: Dict) -> Dict:
+    from backend.services.history_manager import TestHistory
+    from benchmarks.synthetic import history_record
+    import random
+
+    history = TestHistory()
+    rng = random.Random(2)
+    timer = StageTimer("records")
+    remaining = config["history_records"]
+
+    def one_batch(size: int) -> int:
+        with history.batch():
+            for i in range(size):
+                history.save(repo="bench", **history_record(i, config["files"], rng))
+        return size
+
+    while remaining > 0:
+        size = min(HISTORY_BATCH, remaining)
+        timer.measure(lambda: one_batch(size))
+        remaining -= size
+    return timer.result()
+
+
+def _seeded_history(config: Dict):
+    from backend.services.history_manager import TestHistory
+    from benchmarks.synthetic import make_history
+
+    history = TestHistory()
+    make_history(history, "bench", config["history_records"], config["files"])
+    return history
+
+
+def stage_history_fetch(config: Dict) -> Dict:
+    history = _seeded_history(config)
+    timer = StageTimer("records")
+    for _ in range(config["repeat"]):
+        timer.measure(lambda: len(history.fetch("bench", include_output=False)))
+    return timer.result()
+
+
+def stage_history_query(config: Dict) -> Dict:
+    history = _seeded_history(config)
+    timer = StageTimer("records")
+    for _ in range(config["repeat"]):
+        cursor = None
+        while True:
+            page = {}
+
+            def fetch_page() -> int:
+                page.update(history.query("bench", limit=QUERY_PAGE_SIZE, cursor=cursor))
+                return len(page["items"])
+
+            timer.measure(fetch_page)
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+    return timer.result()
+
+
+def stage_history_router(config: Dict) -> Dict:
+    try:
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+    except ImportError as e:
+        return {"skipped": f"fastapi test client unavailable: {e}"}
+    from backend.routers import history as history_router
+
+    _seeded_history(config)
+    app = FastAPI()
+    app.include_router(history_router.router, prefix="/history")
+    client = TestClient(app)
+    timer = StageTimer("records")
+    for _ in range(config["repeat"]):
+        cursor = None
+        while True:
+            params = {"limit": QUERY_PAGE_SIZE, **({"cursor": cursor} if cursor else {})}
+            body = {}
+
+            def get_page() -> int:
+                response = client.get("/history/bench", params=params)
+                response.raise_for_status()
+                body.update(response.json())
+                return len(body["history"])
+
+            timer.measure(get_page)
+            cursor = body["next_cursor"]
+            if not cursor:
+                break
+    return timer.result()
+
+
+def _zip_once(packager, folder: str) -> int:
+    layout = packager.layout(folder)
+    for _ in layout.iter_bytes():
+        pass
+    return len(layout.entries)
+
+
+def stage_zip_cold(config: Dict) -> Dict:
+    from backend.services.packager import ZipPackager
+    from benchmarks.synthetic import make_test_folder
+
+    make_test_folder(os.path.join("tests", "bench"), config["files"])
+    timer = StageTimer("files")
+    for i in range(max(1, config["repeat"] // 2)):
+        packager = ZipPackager(cache_dir=os.path.join("tests", ".cache", f"zip-cold-{i}"))
+        timer.measure(lambda: _zip_once(packager, os.path.join("tests", "bench")))
+    return timer.result()
+
+
+def stage_zip_warm(config: Dict) -> Dict:
+    from backend.services.packager import ZipPackager
+    from benchmarks.synthetic import make_test_folder
+
+    folder = os.path.join("tests", "bench")
+    make_test_folder(folder, config["files"])
+    packager = ZipPackager(cache_dir=os.path.join("tests", ".cache", "zip-warm"))
+    _zip_once(packager, folder)
+    timer = StageTimer("files")
+    for _ in range(config["repeat"]):
+        timer.measure(lambda: _zip_once(packager, folder))
+    return timer.result()
+
+
+def stage_run_python(config: Dict) -> Dict:
+    from backend.services.test_runner import TestRunner
+    from benchmarks.synthetic import make_python_tests
+
+    make_python_tests(os.path.join("tests", "bench_run"), config["test_files"], config["tests_per_file"])
+    def run_once() -> int:
+        runner = TestRunner(language="python", test_type="unit", repo="bench_run")
+        runner.run()
+        return len(runner.results)
+
+    timer = StageTimer("tests")
+    for _ in range(max(1, config["repeat"] // 2)):
+        timer.measure(run_once)
+    return timer.result()
+
+
+def _parse_ci(path: str) -> float:
+    from backend.services.ci_parser import parse_stream, read_chunks
+
+    for _ in parse_stream(read_chunks(path)):
+        pass
+    return os.path.getsize(path) / (1024 * 1024)
+
+
+def stage_ci_parse(config: Dict) -> Dict:
+    from benchmarks.synthetic import make_ci_log
+
+    make_ci_log("ci.log", config["ci_log_mb"])
+    timer = StageTimer("MB")
+    for _ in range(max(1, config["repeat"] // 2)):
+        timer.measure(lambda: _parse_ci("ci.log"))
+    return timer.result()
+
+
+def stage_ci_parse_junit(config: Dict) -> Dict:
+    from benchmarks.synthetic import make_junit_report
+
+    make_junit_report("TEST-bench.xml", config["ci_log_mb"])
+    timer = StageTimer("MB")
+    for _ in range(max(1, config["repeat"] // 2)):
+        timer.measure(lambda: _parse_ci("TEST-bench.xml"))
+    return timer.result()
+
+
+def stage_ci_ingest(config: Dict) -> Dict:
+    from backend.services.ci_parser import ingest_log, read_chunks
+    from benchmarks.synthetic import make_ci_log
+
+    make_ci_log("ci.log", config["ci_log_mb"])
+    timer = StageTimer("MB")
+    for _ in range(max(1, config["repeat"] // 2)):
+        timer.measure(lambda: ingest_log(read_chunks("ci.log"), "bench", "python")["log_bytes"] / (1024 * 1024))
+    return timer.result()
+
+
+STAGES: Dict[str, Callable[[Dict], Dict]] = {
+    "scan": stage_scan,
+    "generate": stage_generate,
+    "history_save": stage_history_save,
+    "history_save_batch": stage_history_save_batch,
+    "history_fetch": stage_history_fetch,
+    "history_query": stage_history_query,
+    "history_router": stage_history_router,
+    "zip_cold": stage_zip_cold,
+    "zip_warm": stage_zip_warm,
+    "run_python": stage_run_python,
+    "ci_parse": stage_ci_parse,
+    "ci_parse_junit": stage_ci_parse_junit,
+    "ci_ingest": stage_ci_ingest,
+}
+
+
+def run_child(stage: str, config: Dict) -> None:
+    """Entry point of a stage subprocess: print one JSON line with the stage metrics."""
+    result = STAGES[stage](config)
+    if "skipped" not in result:
+        result["peak_rss_mb"] = _rss_mb(resource.RUSAGE_SELF)
+        result["children_peak_rss_mb"] = _rss_mb(resource.RUSAGE_CHILDREN)
+    print(json.dumps(result))
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Orchestration (parent process)
+# ──────────────────────────────────────────────────────────────────────────────
+def run_stage(stage: str, config: Dict, workspace: str) -> Dict:
+    cwd = os.path.join(workspace, stage)
+    os.makedirs(cwd, exist_ok=True)
+    env = dict(os.environ, **STAGE_ENV)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [PROJECT_ROOT, env.get("PYTHONPATH")]))
+    env["TRINITY_LLM_STUB_LATENCY_MS"] = str(config["llm_latency_ms"])
+
+    proc = subprocess.run(
+        [sys.executable, "-m", "benchmarks.run_benchmarks", "--child", stage, "--config", json.dumps(config)],
+        cwd=cwd, env=env, capture_output=True, text=True,
+    )
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        return {"error": (proc.stderr.strip().splitlines() or ["stage failed"])[-1]}
+    return json.loads(lines[-1])
+
+
+def compare(stages: Dict[str, Dict], baseline: Dict, threshold: float) -> List[str]:
+    """Regressions beyond `threshold` (fraction) against the baseline's stage metrics."""
+    regressions = []
+    for stage, current in stages.items():
+        base = baseline.get("stages", {}).get(stage)
+        if not base or "error" in current or "skipped" in current or "error" in base or "skipped" in base:
+            continue
+        for key in ("p50_ms", "p99_ms"):
+            if current[key] > base[key] * (1 + threshold) and current[key] - base[key] > MIN_LATENCY_DELTA_MS:
+                regressions.append(f"{stage}.{key}: {base[key]} → {current[key]}")
+        if base["throughput"] and current["throughput"] < base["throughput"] * (1 - threshold):
+            regressions.append(f"{stage}.throughput: {base['throughput']} → {current['throughput']}")
+        if current["peak_rss_mb"] > base["peak_rss_mb"] * (1 + threshold):
+            regressions.append(f"{stage}.peak_rss_mb: {base['peak_rss_mb']} → {current['peak_rss_mb']}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Trinity end-to-end benchmarks")
+    parser.add_argument("--files", type=int, default=1000, help="Synthetic repo size (100 – 50000 source files)")
+    parser.add_argument("--languages", default="python,java,javascript,typescript")
+    parser.add_argument("--history-records", type=int, default=10000)
+    parser.add_argument("--test-files", type=int, default=50, help="Python test files for run_python")
+    parser.add_argument("--tests-per-file", type=int, default=5)
+    parser.add_argument("--ci-log-mb", type=float, default=64, help="Synthetic CI log / JUnit report size")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Simulated stub LLM latency")
+    parser.add_argument("--stages", default=",".join(STAGES), help="Comma-separated subset of stages")
+    parser.add_argument("--out", help="Write results JSON here (default: stdout)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed regression, as a fraction")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the baseline")
+    parser.add_argument("--workspace", help="Scratch directory (default: a temp dir, removed afterwards)")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--config", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        run_child(args.child, json.loads(args.config))
+        return 0
+
+    from benchmarks.synthetic import LANGUAGES, make_repo
+
+    languages = [l.strip() for l in args.languages.split(",") if l.strip()]
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = [x for x in languages if x not in LANGUAGES] + [s for s in stages if s not in STAGES]
+    if unknown:
+        parser.error(f"Unknown languages/stages: {', '.join(unknown)}")
+
+    workspace = os.path.abspath(args.workspace or tempfile.mkdtemp(prefix="trinity-bench-"))
+    config = {
+        "files": args.files,
+        "languages": languages,
+        "history_records": args.history_records,
+        "test_files": args.test_files,
+        "tests_per_file": args.tests_per_file,
+        "ci_log_mb": args.ci_log_mb,
+        "repeat": max(1, args.repeat),
+        "llm_latency_ms": args.llm_latency_ms,
+    }
+
+    try:
+        started = time.perf_counter()
+        config["repo"] = make_repo(os.path.join(workspace, "source", "bench_repo"), args.files, languages)
+        print(f"[Bench] 🏗️ Synthetic repo: {config['repo']['counts']} in {time.perf_counter() - started:.1f}s",
+              file=sys.stderr)
+
+        results: Dict[str, Dict] = {}
+        for stage in stages:
+            results[stage] = run_stage(stage, config, workspace)
+            print(f"[Bench] ⏱️ {stage}: {json.dumps(results[stage])}", file=sys.stderr)
+    finally:
+        if not args.workspace:
+            shutil.rmtree(workspace, ignore_errors=True)
+
+    comparable = {k: v for k, v in config.items() if k != "repo"}
+    report = {
+        "config": comparable,
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "stages": results,
+        "regressions": [],
+    }
+
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("config") != comparable:
+            print("[Bench] ⚠️ Baseline was recorded with a different config; not comparing", file=sys.stderr)
+        else:
+            report["regressions"] = compare(results, baseline, args.threshold)
+
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+        print(f"[Bench] 💾 Baseline saved: {args.baseline}", file=sys.stderr)
+
+    failed = [s for s, r in results.items() if "error" in r]
+    for line in report["regressions"]:
+        print(f"[Bench] ❌ Regression: {line}", file=sys.stderr)
+    for stage in failed:
+        print(f"[Bench] 💥 Stage failed: {stage}: {results[stage]['error']}", file=sys.stderr)
+    return 1 if report["regressions"] or failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+# benchmarks/synthetic.py
+
+import os
+import random
+import subprocess
+from typing import Dict, List
+
+from backend.services.history_manager import TestHistory
+
+LANGUAGES = ("python", "java", "javascript", "typescript")
+EXTENSIONS = {"python": ".py", "java": ".java", "javascript": ".js", "typescript": ".ts"}
+FILES_PER_DIR = 50
+FUNCTIONS_PER_FILE = 5
+# Directories a real checkout carries that scanners should skip
+NOISE_DIRS = ("node_modules/left-pad", "__pycache__", ".venv/lib", "build/generated")
+NOISE_FILES_PER_DIR = 20
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Source files
+# ──────────────────────────────────────────────────────────────────────────────
+def source_code(language: str, index: int, functions: int = FUNCTIONS_PER_FILE) -> str:
+    """A small but realistic module: imports, a few functions with loops and branches."""
+    if language == "python":
+        body = "".join(
+            f"\n\ndef func_{index}_{j}(values: List[int]) -> int:\n"
+            f"    total = 0\n"
+            f"    for v in values:\n"
+            f"        total += v * {j + 1} if v % 2 else -v\n"
+            f"    return total\n"
+            for j in range(functions)
+        )
+        return f'"""Synthetic module {index}."""\nfrom typing import List\n{body}'
+    if language == "java":
+        methods = "".join(
+            f"\n    public int method{j}(int[] values) {{\n"
+            f"        int total = 0;\n"
+            f"        for (int v : values) {{ total += (v % 2 == 0) ? -v : v * {j + 1}; }}\n"
+            f"        return total;\n"
+            f"    }}\n"
+            for j in range(functions)
+        )
+        return f"package bench.pkg{index // FILES_PER_DIR};\n\nimport java.util.List;\n\npublic class Module{index} {{{methods}}}\n"
+    typed = language == "typescript"
+    functions_src = "".join(
+        f"\nexport function func_{index}_{j}(values{': number[]' if typed else ''}){': number' if typed else ''} {{\n"
+        f"  let total = 0;\n"
+        f"  for (const v of values) {{ total += v % 2 ? v * {j + 1} : -v; }}\n"
+        f"  return total;\n"
+        f"}}\n"
+        for j in range(functions)
+    )
+    return f"// Synthetic module {index}\nimport {{ helper }} from './helper';\n{functions_src}"
+
+
+def make_repo(root: str, files: int, languages: List[str] = list(LANGUAGES), commit: bool = True) -> Dict:
+    """
+    Write a synthetic repo of `files` source files spread evenly over `languages`,
+    FILES_PER_DIR per directory, plus vendored/cache noise. Committed so it can be cloned.
+    Returns {"path", "counts": {language: files}}.
+    """
+    os.makedirs(root, exist_ok=True)
+    counts = {language: 0 for language in languages}
+    for i in range(files):
+        language = languages[i % len(languages)]
+        n = counts[language]
+        counts[language] += 1
+        if language == "java":
+            folder = os.path.join(root, "src", "main", "java", "bench", f"pkg{n // FILES_PER_DIR}")
+            name = f"Module{n}.java"
+        else:
+            folder = os.path.join(root, "src", language, f"pkg_{n // FILES_PER_DIR}")
+            name = f"mod_{n}{EXTENSIONS[language]}"
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, name), "w", encoding="utf-8") as f:
+            f.write(source_code(language, n))
+
+    for noise in NOISE_DIRS:
+        folder = os.path.join(root, noise)
+        os.makedirs(folder, exist_ok=True)
+        for i in range(NOISE_FILES_PER_DIR):
+            language = languages[i % len(languages)]
+            with open(os.path.join(folder, f"noise_{i}{EXTENSIONS[language]}"), "w", encoding="utf-8") as f:
+                f.write(source_code(language, i, functions=1))
+    with open(os.path.join(root, ".gitignore"), "w", encoding="utf-8") as f:
+        f.write("__pycache__/\n.venv/\nbuild/\nnode_modules/\n")
+
+    if commit:
+        git = ["git", "-c", "user.name=bench", "-c", "user.email=bench@localhost"]
+        subprocess.run(["git", "init", "-q"], cwd=root, check=True)
+        subprocess.run(git + ["add", "-A"], cwd=root, check=True)
+        subprocess.run(git + ["commit", "-q", "-m", "synthetic"], cwd=root, check=True)
+    return {"path": os.path.abspath(root), "counts": counts}
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Generated tests
+# ──────────────────────────────────────────────────────────────────────────────
+def make_python_tests(folder: str, files: int, tests_per_file: int, failure_every: int = 0) -> int:
+    """Passing pytest files (every `failure_every`-th test fails); returns the test count."""
+    os.makedirs(folder, exist_ok=True)
+    total = 0
+    for i in range(files):
+        lines = []
+        for j in range(tests_per_file):
+            total += 1
+            expected = -1 if failure_every and total % failure_every == 0 else sum(range(j + 10))
+            lines.append(f"def test_case_{i}_{j}():\n    assert sum(range({j} + 10)) == {expected}\n")
+        with open(os.path.join(folder, f"test_bench_{i}.py"), "w", encoding="utf-8") as f:
+            f.write("\n\n".join(lines))
+    return total
+
+
+def make_test_folder(folder: str, files: int) -> None:
+    """A generated-tests folder shaped like TestGenerator output, for packaging."""
+    for i in range(files):
+        sub = os.path.join(folder, f"pkg_{i // FILES_PER_DIR}")
+        os.makedirs(sub, exist_ok=True)
+        with open(os.path.join(sub, f"test_mod_{i}.py"), "w", encoding="utf-8") as f:
+            f.write(f"from pkg_{i // FILES_PER_DIR}.mod_{i} import *\n\n" + source_code("python", i))
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# History
+# ──────────────────────────────────────────────────────────────────────────────
+def history_record(i: int, files: int, rng: random.Random) -> Dict:
+    language = LANGUAGES[i % len(LANGUAGES)]
+    n = rng.randrange(max(files, 1))
+    return {
+        "file": f"src/{language}/pkg_{n // FILES_PER_DIR}/mod_{n}{EXTENSIONS[language]}",
+        "language": language,
+        "test_type": rng.choice(("unit", "integration", "auto")),
+        "output_path": f"tests/bench/test_mod_{n}{EXTENSIONS[language]}",
+        # Roughly a third of bodies repeat, as regenerations of unchanged files do
+        "ai_output": source_code("python", n if rng.random() < 0.3 else i, functions=3),
+    }
+
+
+def make_history(history: TestHistory, repo: str, records: int, files: int, seed: int = 0,
+                 start: float = 1_700_000_000.0) -> None:
+    """Insert `records` history rows for `repo`, spaced one minute apart, in one transaction."""
+    rng = random.Random(seed)
+    with history.batch():
+        for i in range(records):
+            history.save(repo=repo, created_at=start + 60 * i, **history_record(i, files, rng))
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# CI logs
+# ──────────────────────────────────────────────────────────────────────────────
+CI_NOISE = (
+    "2024-05-01T10:00:00.0000000Z [INFO] Downloading from central: https://repo.maven.apache.org/maven2/org/x/{n}.pom",
+    "2024-05-01T10:00:00.0000000Z \x1b[32mcompiling\x1b[0m src/pkg_{d}/mod_{n}.ts -> dist/pkg_{d}/mod_{n}.js",
+    "2024-05-01T10:00:00.0000000Z npm WARN deprecated left-pad@1.3.{n}: use String.prototype.padStart()",
+)
+
+
+def _ci_block(i: int, rng: random.Random, failure_every: int) -> str:
+    """One tool's output for one test file/class, in pytest -v, Jest --verbose or Surefire form."""
+    noise = "\n".join(CI_NOISE[k % len(CI_NOISE)].format(n=i, d=i // FILES_PER_DIR) for k in range(rng.randrange(4, 12)))
+    failing = failure_every and i % failure_every == 0
+    kind = i % 3
+    if kind == 0:
+        lines = [f"tests/pkg_{i // FILES_PER_DIR}/test_mod_{i}.py::test_case_{j} PASSED [ 50%]" for j in range(5)]
+        if failing:
+            lines += [
+                f"tests/pkg_{i // FILES_PER_DIR}/test_mod_{i}.py::test_broken FAILED [ 60%]",
+                "=================================== FAILURES ===================================",
+                "_________________________________ test_broken __________________________________",
+                "    def test_broken():", f">       assert func_{i}([1, 2]) == {i}", f"E       assert 3 == {i}",
+                f"tests/pkg_{i // FILES_PER_DIR}/test_mod_{i}.py:4: AssertionError",
+                f"========================= 1 failed, 5 passed in 0.{i % 10}2s =========================",
+            ]
+    elif kind == 1:
+        lines = [f"PASS src/pkg_{i // FILES_PER_DIR}/mod_{i}.test.js ({rng.random():.3f} s)", "  module"]
+        lines += [f"    ✓ case {j} ({rng.randrange(1, 40)} ms)" for j in range(5)]
+        if failing:
+            lines[0] = "FAIL" + lines[0][4:]
+            lines += ["    ✕ broken (3 ms)", "", "  ● module › broken", "",
+                      "    expect(received).toBe(expected) // Object.is equality", "",
+                      f"      at Object.<anonymous> (src/pkg_{i // FILES_PER_DIR}/mod_{i}.test.js:9:20)", ""]
+    else:
+        cls = f"bench.pkg{i // FILES_PER_DIR}.Module{i}Test"
+        lines = [f"[INFO] Running {cls}"]
+        if failing:
+            lines += [f"[ERROR] Tests run: 5, Failures: 1, Errors: 0, Skipped: 0, Time elapsed: 0.05 s <<< FAILURE! - in {cls}",
+                      f"[ERROR] testBroken({cls})  Time elapsed: 0.01 s  <<< FAILURE!",
+                      "java.lang.AssertionError: expected:<1> but was:<2>",
+                      f"\tat {cls}.testBroken(Module{i}Test.java:12)", ""]
+        else:
+            lines.append(f"[INFO] Tests run: 5, Failures: 0, Errors: 0, Skipped: 0, Time elapsed: 0.04 s - in {cls}")
+    return noise + "\n" + "\n".join(lines) + "\n"
+
+
+def make_ci_log(path: str, megabytes: float, files: int = 3000, failure_every: int = 20, seed: int = 0) -> int:
+    """
+    A CI log of about `megabytes` MB: build noise interleaved with pytest, Jest and
+    Surefire output for a suite of `files` test files/classes (every `failure_every`-th
+    fails), repeated as matrix jobs until the size is reached. Returns the bytes written.
+    """
+    rng = random.Random(seed)
+    target = int(megabytes * 1024 * 1024)
+    written = 0
+    i = 0
+    with open(path, "w", encoding="utf-8") as f:
+        while written < target:
+            # Each matrix job starts a new pytest session
+            block = "=" * 29 + " test session starts " + "=" * 30 + "\n" if i % files == 0 else ""
+            block += "".join(_ci_block((i + k) % files, rng, failure_every) for k in range(100))
+            f.write(block)
+            written += len(block.encode("utf-8"))
+            i += 100
+    return written
+
+
+def make_junit_report(path: str, megabytes: float, failure_every: int = 20) -> int:
+    """A Surefire-style JUnit XML report of about `megabytes` MB. Returns the bytes written."""
+    target = int(megabytes * 1024 * 1024)
+    written = 0
+    i = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<testsuites>\n')
+        while written < target:
+            cls = f"bench.pkg{i // FILES_PER_DIR}.Module{i}Test"
+            cases = []
+            for j in range(10):
+                failing = failure_every and (i * 10 + j) % failure_every == 0
+                body = (
+                    f'<failure message="expected:&lt;1&gt; but was:&lt;2&gt;" type="java.lang.AssertionError">'
+                    f"java.lang.AssertionError: expected:&lt;1&gt; but was:&lt;2&gt;\n\tat {cls}.test{j}(Module{i}Test.java:{j + 10})"
+                    f"</failure>" if failing else ""
+                )
+                cases.append(f'  <testcase name="test{j}" classname="{cls}" time="0.0{j}">{body}<system-out>log line {j}</system-out></testcase>')
+            block = f'<testsuite name="{cls}" tests="10">\n' + "\n".join(cases) + "\n</testsuite>\n"
+            f.write(block)
+            written += len(block.encode("utf-8"))
+            i += 1
+        f.write("</testsuites>\n")
+    return written
@@ -0,0 +1,129 @@
+// Trinity: run a generated test suite across N Jenkins agents.
+//
+// Shards are balanced by per-file timings recorded in Trinity's history
+// (tests/.history/trinity.db): each agent runs `--shard i/N`, and the final
+// stage folds every shard's report back into the history and archives the DB.
+// Prepare restores it from the last build that archived one (Copy Artifact
+// plugin), so the next run's split is based on fresh numbers.
+//
+// Neither the generated suite nor the code under test is part of this checkout:
+// Prepare downloads tests/<REPO> from the Trinity server that generated it and
+// clones repos/<REPO> from REPO_URL, then stashes both for the shards.
+
+pipeline {
+    agent none
+
+    parameters {
+        string(name: 'REPO', defaultValue: '', description: 'Repo folder under tests/ (e.g. my_service)')
+        string(name: 'REPO_URL', defaultValue: '', description: 'Git URL of the code under test (cloned into repos/<REPO>)')
+        string(name: 'REPO_REF', defaultValue: '', description: 'Branch or tag to test (default: the remote HEAD)')
+        string(name: 'TRINITY_URL', defaultValue: 'http://localhost:8000', description: 'Trinity server that generated tests/<REPO>')
+        choice(name: 'LANGUAGE', choices: ['python', 'java', 'javascript', 'typescript'], description: 'Test language')
+        string(name: 'SHARDS', defaultValue: '4', description: 'Number of parallel shards / agents')
+        choice(name: 'MODE', choices: ['all', 'affected'], description: "'affected' runs only tests hit by the diff")
+        string(name: 'BASE_REF', defaultValue: 'HEAD~1', description: 'Diff base for affected mode')
+        string(name: 'AGENT_LABEL', defaultValue: 'trinity-runner', description: 'Label of agents that run shards')
+    }
+
+    options {
+        timestamps()
+        skipDefaultCheckout()
+    }
+
+    stages {
+        stage('Prepare') {
+            agent { label 'trinity' }
+            steps {
+                checkout scm
+                dir('Trinity-assurance') {
+                    // The generated suite, as packaged by the Trinity server
+                    sh """
+                        set -e
+                        rm -rf tests/${params.REPO} && mkdir -p tests/${params.REPO}
+                        curl -fsSL '${params.TRINITY_URL}/tests/download/${params.REPO}' -o suite.zip
+                        python3 -m zipfile -e suite.zip tests/${params.REPO}
+                        rm -f suite.zip
+                    """
+                    // The code under test, with full history so affected mode can diff against BASE_REF
+                    sh """
+                        set -e
+                        REPO_URL='${params.REPO_URL}' REPO_REF='${params.REPO_REF}' TRINITY_REPO_MODE=clone \\
+                            python3 -c 'import os; from backend.utils.git_ops import clone_or_pull_repo as clone; print(clone(os.environ["REPO_URL"], ref=os.environ["REPO_REF"] or None, depth=0))'
+                        test -d repos/${params.REPO}/.git || { echo "REPO_URL does not clone into repos/${params.REPO}"; exit 1; }
+                    """
+                    // Timing history recorded by the previous build (none on the first build);
+                    // a DB left in this workspace, with its WAL, must not mix with it
+                    sh 'rm -f tests/.history/trinity.db*'
+                    copyArtifacts projectName: env.JOB_NAME, selector: lastWithArtifacts(),
+                        filter: 'tests/.history/trinity.db', optional: true
+                    // Generated tests, the cloned repo and timing history travel to every shard
+                    stash name: 'suite', includes: "backend/**,agents/**,requirements.txt,tests/${params.REPO}/**,tests/.history/**,repos/${params.REPO}/**", useDefaultExcludes: false
+                }
+            }
+        }
+
+        stage('Test') {
+            steps {
+                script {
+                    def total = params.SHARDS as Integer
+                    def branches = [:]
+                    for (int i = 1; i <= total; i++) {
+                        def index = i
+                        branches["shard ${index}/${total}"] = {
+                            node(params.AGENT_LABEL) {
+                                deleteDir()
+                                unstash 'suite'
+                                def status = sh(
+                                    returnStatus: true,
+                                    script: """
+                                        python3 -m pip install -q -r requirements.txt
+                                        python3 -m backend.services.test_runner \\
+                                            --language ${params.LANGUAGE} \\
+                                            --repo ${params.REPO} \\
+                                            --mode ${params.MODE} \\
+                                            --base-ref ${params.BASE_REF} \\
+                                            --shard ${index}/${total} \\
+                                            --report shard-${index}.ndjson
+                                    """
+                                )
+                                stash name: "report-${index}", includes: "shard-${index}.ndjson", allowEmpty: true
+                                archiveArtifacts artifacts: "shard-${index}.ndjson", allowEmptyArchive: true
+                                if (status != 0) {
+                                    unstable("Shard ${index}/${total} had failing tests")
+                                }
+                            }
+                        }
+                    }
+                    parallel branches
+                }
+            }
+        }
+
+        stage('Record timings') {
+            agent { label 'trinity' }
+            steps {
+                dir('Trinity-assurance') {
+                    // Code and timing history to fold the reports into (no checkout on this agent)
+                    sh 'rm -rf tests/.history'
+                    unstash 'suite'
+                    script {
+                        def total = params.SHARDS as Integer
+                        for (int i = 1; i <= total; i++) {
+                            unstash "report-${i}"
+                        }
+                    }
+                    sh """
+                        set -e
+                        python3 -m backend.services.test_runner \\
+                            --language ${params.LANGUAGE} \\
+                            --repo ${params.REPO} \\
+                            --ingest shard-*.ndjson
+                        python3 -c 'import sqlite3; sqlite3.connect("tests/.history/trinity.db").execute("PRAGMA wal_checkpoint(TRUNCATE)")'
+                    """
+                    // Checkpointed above, so the single DB file carries every timing for Prepare to restore
+                    archiveArtifacts artifacts: 'tests/.history/trinity.db'
+                }
+            }
+        }
+    }
+}
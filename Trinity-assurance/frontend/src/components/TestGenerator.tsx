@@ -16,12 +16,6 @@ import axios from "axios";
 import TestResultsViewer from "./TestResultsViewer";
 import TestHistoryViewer from "./TestHistoryViewer";
 
-interface TestRunResponse {
-  output: string;
-  error?: string;
-  status: "success" | "error";
-}
-
 interface Props {
   licenseToken: string;
 }
@@ -34,7 +28,6 @@ const TestGenerator: React.FC<Props> = ({ licenseToken }) => {
   const [testType, setTestType] = useState<string>("auto");
   const [dryRun, setDryRun] = useState<boolean>(false);
   const [result, setResult] = useState<string | null>(null);
-  const [testResults, setTestResults] = useState<TestRunResponse | null>(null);
   const [loading, setLoading] = useState<boolean>(false);
   const [error, setError] = useState<string>("");
   const [testsSaved, setTestsSaved] = useState<boolean>(false);
@@ -44,7 +37,6 @@ const TestGenerator: React.FC<Props> = ({ licenseToken }) => {
     setLoading(true);
     setError("");
     setResult(null);
-    setTestResults(null);
     setTestsSaved(false);
 
     try {
@@ -69,12 +61,12 @@ const TestGenerator: React.FC<Props> = ({ licenseToken }) => {
     }
   };
 
+  // Folder name the backend uses for the repo (tests/<repoName>)
+  const repoName = repoUrl.trim().replace(/\/+$/, "").split("/").pop()?.replace(/\.git$/, "").replace(/-/g, "_") || "";
+
   const handleDownloadZip = async () => {
     if (!repoUrl) return;
 
-    const repoNameRaw = repoUrl.trim().split("/").pop()?.replace(".git", "") || "";
-    const repoName = repoNameRaw.replace(/-/g, "_");
-
     const zipUrl = `http://localhost:8000/api/tests/download/${repoName}`;
 
     try {
@@ -180,13 +172,11 @@ const TestGenerator: React.FC<Props> = ({ licenseToken }) => {
         </Box>
       )}
 
-      {testResults && <TestResultsViewer results={testResults} />}
+      {testsSaved && <TestResultsViewer repo={repoName} language={language} testType={testType} />}
 
       {repoUrl && (
         <Box sx={{ mt: 4 }}>
-          <TestHistoryViewer
-            repo={repoUrl.trim().replace(/\/+$/, "").split("/").pop()?.replace(/\.git$/, "").replace(/-/g, "_") || ""}
-          />
+          <TestHistoryViewer repo={repoName} />
         </Box>
       )}
     </Paper>
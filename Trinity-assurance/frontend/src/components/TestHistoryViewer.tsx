@@ -1,5 +1,6 @@
 import React, { useEffect, useState } from "react";
 import {
+  Button,
   Paper,
   Typography,
   CircularProgress,
@@ -11,25 +12,52 @@ import {
 } from "@mui/material";
 import axios from "axios";
 
+interface HistoryEntry {
+  id: number;
+  file: string;
+  created_at: number;
+  ai_output?: string;
+}
+
+// One page of GET /history/{repo} (newest first, keyset cursor)
+interface HistoryPage {
+  repo: string;
+  history: HistoryEntry[];
+  next_cursor: string | null;
+}
+
+const HISTORY_API = "http://localhost:8000/api/history";
+const PAGE_SIZE = 50;
+
 interface TestHistoryViewerProps {
   repo: string;
 }
 
 const TestHistoryViewer: React.FC<TestHistoryViewerProps> = ({ repo }) => {
-  const [files, setFiles] = useState<string[]>([]);
-  const [selectedFile, setSelectedFile] = useState<string>("");
+  const [entries, setEntries] = useState<HistoryEntry[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [selectedId, setSelectedId] = useState<number | null>(null);
   const [fileContent, setFileContent] = useState<string>("");
   const [loadingFiles, setLoadingFiles] = useState<boolean>(true);
+  const [loadingMore, setLoadingMore] = useState<boolean>(false);
   const [loadingContent, setLoadingContent] = useState<boolean>(false);
   const [error, setError] = useState<string>("");
 
+  const fetchPage = (cursor?: string) =>
+    axios.get<HistoryPage>(`${HISTORY_API}/${repo}`, {
+      params: { limit: PAGE_SIZE, fields: "id,file,created_at", ...(cursor ? { cursor } : {}) },
+    });
+
   useEffect(() => {
-    const fetchFileList = async () => {
+    const fetchFirstPage = async () => {
+      setLoadingFiles(true);
+      setEntries([]);
+      setSelectedId(null);
+      setError("");
       try {
-        const response = await axios.get<{ files: string[] }>(
-          `http://localhost:8000/api/history/${repo}`
-        );
-        setFiles(response.data.files || []);
+        const response = await fetchPage();
+        setEntries(response.data.history || []);
+        setNextCursor(response.data.next_cursor);
       } catch (err) {
         setError("⚠️ Failed to load file list.");
       } finally {
@@ -37,19 +65,41 @@ const TestHistoryViewer: React.FC<TestHistoryViewerProps> = ({ repo }) => {
       }
     };
 
-    if (repo) fetchFileList();
+    if (repo) fetchFirstPage();
   }, [repo]);
 
-  const handleFileClick = async (filename: string) => {
-    setSelectedFile(filename);
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const response = await fetchPage(nextCursor);
+      setEntries((previous) => [...previous, ...(response.data.history || [])]);
+      setNextCursor(response.data.next_cursor);
+    } catch (err) {
+      setError("⚠️ Failed to load more history.");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  // Newest entry per file: older generations of the same file are superseded
+  const latest = entries.filter(
+    (entry, idx) => entries.findIndex((other) => other.file === entry.file) === idx
+  );
+  const selected = entries.find((entry) => entry.id === selectedId);
+
+  const handleFileClick = async (entry: HistoryEntry) => {
+    setSelectedId(entry.id);
     setFileContent("");
     setLoadingContent(true);
 
     try {
-      const res = await axios.get<{ content: string }>(
-        `http://localhost:8000/api/history/${repo}/file/${filename}`
-      );
-      setFileContent(res.data.content);
+      // The list is fetched without bodies; load this exact file's newest one on demand
+      const res = await axios.get<HistoryPage>(`${HISTORY_API}/${repo}`, {
+        params: { file: entry.file, limit: 1, fields: "id,file,ai_output" },
+      });
+      const match = res.data.history.find((item) => item.file === entry.file);
+      setFileContent(match?.ai_output ?? "⚠️ File content not found.");
     } catch (err) {
       setFileContent("⚠️ Failed to load file content.");
     } finally {
@@ -59,7 +109,7 @@ const TestHistoryViewer: React.FC<TestHistoryViewerProps> = ({ repo }) => {
 
   if (loadingFiles) return <CircularProgress />;
   if (error) return <Typography color="error">{error}</Typography>;
-  if (!files.length)
+  if (!entries.length)
     return <Typography>No test history found for {repo}</Typography>;
 
   return (
@@ -74,16 +124,26 @@ const TestHistoryViewer: React.FC<TestHistoryViewerProps> = ({ repo }) => {
           sx={{ width: "30%", maxHeight: 300, overflowY: "auto" }}
         >
           <List dense>
-            {files.map((filename, idx) => (
+            {latest.map((entry) => (
               <ListItemButton
-                key={idx}
-                selected={filename === selectedFile}
-                onClick={() => handleFileClick(filename)}
+                key={entry.id}
+                selected={entry.id === selectedId}
+                onClick={() => handleFileClick(entry)}
               >
-                <ListItemText primary={filename} />
+                <ListItemText
+                  primary={entry.file}
+                  secondary={new Date(entry.created_at * 1000).toLocaleString()}
+                />
               </ListItemButton>
             ))}
           </List>
+          {nextCursor && (
+            <Box sx={{ p: 1, textAlign: "center" }}>
+              <Button size="small" onClick={loadMore} disabled={loadingMore}>
+                {loadingMore ? <CircularProgress size={16} /> : "Load older"}
+              </Button>
+            </Box>
+          )}
         </Paper>
 
         {/* File content */}
@@ -100,9 +160,9 @@ const TestHistoryViewer: React.FC<TestHistoryViewerProps> = ({ repo }) => {
         >
           {loadingContent ? (
             <CircularProgress size={20} />
-          ) : selectedFile ? (
+          ) : selected ? (
             <>
-              <Typography variant="subtitle2">📄 {selectedFile}</Typography>
+              <Typography variant="subtitle2">📄 {selected.file}</Typography>
               <Divider sx={{ my: 1 }} />
               <Typography variant="body2">{fileContent}</Typography>
             </>
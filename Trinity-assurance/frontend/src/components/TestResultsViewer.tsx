@@ -1,4 +1,4 @@
-import React, { useState } from "react";
+import React, { useEffect, useRef, useState } from "react";
 import {
   Box,
   Typography,
@@ -7,44 +7,162 @@ import {
   Tab,
   Chip,
   Divider,
+  Button,
+  LinearProgress,
 } from "@mui/material";
 import CheckCircleIcon from "@mui/icons-material/CheckCircle";
 import ErrorIcon from "@mui/icons-material/Error";
 
-interface TestResults {
-  status: "success" | "error";
-  output?: string;
-  error?: string;
+interface TestCaseResult {
+  nodeid: string;
+  file: string;
+  name: string;
+  status: "passed" | "failed" | "error" | "skipped";
+  duration: number;
+  message?: string;
+  traceback?: string;
 }
 
+interface RunSummary {
+  run_id: number;
+  passed: number;
+  failed: number;
+  error: number;
+  skipped: number;
+  total: number;
+  duration: number;
+}
+
+// One line of the NDJSON stream from /tests/run/stream
+type StreamEvent =
+  | ({ event: "result" } & TestCaseResult)
+  | ({ event: "summary" } & RunSummary)
+  | { event: "error"; message: string };
+
+const STATUS_ICONS: Record<TestCaseResult["status"], string> = {
+  passed: "✅",
+  failed: "❌",
+  error: "💥",
+  skipped: "⏭️",
+};
+
 interface TestResultsViewerProps {
-  results: TestResults;
+  repo: string;
+  language: string;
+  testType?: string;
 }
 
-const TestResultsViewer: React.FC<TestResultsViewerProps> = ({ results }) => {
+const TestResultsViewer: React.FC<TestResultsViewerProps> = ({ repo, language, testType = "auto" }) => {
   const [tab, setTab] = useState<number>(0);
+  const [results, setResults] = useState<TestCaseResult[]>([]);
+  const [summary, setSummary] = useState<RunSummary | null>(null);
+  const [error, setError] = useState<string>("");
+  const [running, setRunning] = useState<boolean>(false);
+  const abortRef = useRef<AbortController | null>(null);
+
+  // Closing the stream stops the run server-side (the workers are terminated)
+  useEffect(() => () => abortRef.current?.abort(), []);
 
-  if (!results) return null;
+  const runTests = async () => {
+    abortRef.current?.abort();
+    const controller = new AbortController();
+    abortRef.current = controller;
+    setResults([]);
+    setSummary(null);
+    setError("");
+    setRunning(true);
 
-  const isSuccess = results.status === "success";
+    try {
+      const response = await fetch("http://localhost:8000/api/tests/run/stream", {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ repo, language, test_type: testType }),
+        signal: controller.signal,
+      });
+      if (!response.ok || !response.body) {
+        const detail = await response.json().catch(() => null);
+        throw new Error(detail?.detail || `Test run failed (HTTP ${response.status})`);
+      }
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+
+      // One state update per network chunk, not per test
+      const handleLines = (lines: string[]) => {
+        const batch: TestCaseResult[] = [];
+        lines.forEach((line) => {
+          if (!line.trim()) return;
+          const event = JSON.parse(line) as StreamEvent;
+          if (event.event === "result") {
+            const { event: _, ...record } = event;
+            batch.push(record);
+          } else if (event.event === "summary") {
+            const { event: _, ...totals } = event;
+            setSummary(totals);
+          } else {
+            setError(event.message);
+          }
+        });
+        if (batch.length) setResults((previous) => [...previous, ...batch]);
+      };
+
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split("\n");
+        buffer = lines.pop() ?? "";
+        handleLines(lines);
+      }
+      handleLines([buffer + decoder.decode()]);
+    } catch (err: any) {
+      if (err.name !== "AbortError") setError(err.message || "Test run failed.");
+    } finally {
+      if (abortRef.current === controller) {
+        abortRef.current = null;
+        setRunning(false);
+      }
+    }
+  };
+
+  const failures = results.filter((r) => r.status === "failed" || r.status === "error");
+  const isSuccess = !error && failures.length === 0;
+  const started = running || summary !== null || results.length > 0 || error !== "";
 
   return (
     <Paper elevation={3} sx={{ mt: 4, p: 3 }}>
       <Box sx={{ display: "flex", justifyContent: "space-between", alignItems: "center", mb: 2 }}>
         <Typography variant="h6">🧪 Test Results</Typography>
-        <Chip
-          icon={isSuccess ? <CheckCircleIcon color="success" /> : <ErrorIcon color="error" />}
-          label={isSuccess ? "Success" : "Failed"}
-          color={isSuccess ? "success" : "error"}
-          variant="outlined"
-        />
+        <Box sx={{ display: "flex", gap: 1, alignItems: "center" }}>
+          {started && !running && (
+            <Chip
+              icon={isSuccess ? <CheckCircleIcon color="success" /> : <ErrorIcon color="error" />}
+              label={isSuccess ? "Success" : "Failed"}
+              color={isSuccess ? "success" : "error"}
+              variant="outlined"
+            />
+          )}
+          <Button variant="outlined" onClick={running ? () => abortRef.current?.abort() : runTests}>
+            {running ? "Stop" : "▶️ Run Tests"}
+          </Button>
+        </Box>
       </Box>
 
+      {running && <LinearProgress sx={{ mb: 2 }} />}
+
       <Divider sx={{ mb: 2 }} />
 
+      <Typography variant="body2" sx={{ mb: 1 }}>
+        {summary
+          ? `Run ${summary.run_id}: ${summary.passed} passed, ${summary.failed} failed, ` +
+            `${summary.error} errors, ${summary.skipped} skipped in ${summary.duration.toFixed(2)}s`
+          : `${results.length} tests finished${running ? " so far" : ""}`}
+      </Typography>
+
       <Tabs value={tab} onChange={(_, newTab: number) => setTab(newTab)} sx={{ mb: 2 }}>
-        <Tab label="Stdout" />
-        <Tab label="Stderr" />
+        <Tab label={`Tests (${results.length})`} />
+        <Tab label={`Failures (${failures.length})`} />
       </Tabs>
 
       <Box
@@ -59,12 +177,31 @@ const TestResultsViewer: React.FC<TestResultsViewerProps> = ({ results }) => {
           overflowY: "auto",
         }}
       >
-        {tab === 0
-          ? results.output || "No stdout output."
-          : results.error || "No stderr output."}
+        {error && <Typography color="error">{error}</Typography>}
+        {tab === 0 &&
+          (results.length
+            ? results.map((r) => (
+                <div key={r.nodeid}>
+                  {STATUS_ICONS[r.status]} {r.nodeid} ({r.duration.toFixed(2)}s)
+                  {r.message ? ` — ${r.message}` : ""}
+                </div>
+              ))
+            : "No per-test results yet.")}
+        {tab === 1 &&
+          (failures.length
+            ? failures.map((r) => (
+                <Box key={r.nodeid} sx={{ mb: 2 }}>
+                  <strong>
+                    {STATUS_ICONS[r.status]} {r.nodeid}
+                  </strong>
+                  {"\n"}
+                  {r.traceback || r.message}
+                </Box>
+              ))
+            : "No failures.")}
       </Box>
     </Paper>
   );
 };
 
-export default TestResultsViewer;
\ No newline at end of file
+export default TestResultsViewer;